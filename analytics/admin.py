@@ -0,0 +1,8 @@
+from django.contrib import admin
+from .models import EtlRun
+
+
+@admin.register(EtlRun)
+class EtlRunAdmin(admin.ModelAdmin):
+    list_display = ("date", "loaded_at")
+    ordering = ("-date",)
@@ -0,0 +1,170 @@
+"""
+Nightly ETL from the transactional tables into the daily fact tables.
+
+Loading a day deletes that day's facts and re-inserts them from grouped
+queries inside one transaction, so re-running a day (or a whole backfill)
+is idempotent. Occupancy is a point-in-time snapshot, so it is only taken
+for the most recent day being loaded; past days in a backfill keep
+whatever snapshot they already had.
+"""
+import logging
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    BookingDailyFact,
+    EtlRun,
+    NewUserDailyFact,
+    OccupancySnapshot,
+    RevenueDailyFact,
+)
+
+logger = logging.getLogger(__name__)
+
+BOOKING_STATUSES = ["PENDING", "CONFIRMED", "PAID", "COMPLETED", "CANCELLED"]
+
+
+def day_bounds(day):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(day, time.min), tz)
+    return start, start + timedelta(days=1)
+
+
+def _load_bookings(day, start, end):
+    from bookings.models import Booking
+
+    aggregates = {"created": Count("id"), "total_amount": Sum("booking_amount")}
+    for status_value in BOOKING_STATUSES:
+        aggregates[status_value.lower()] = Count("id", filter=Q(booking_status=status_value))
+
+    rows = (
+        Booking.objects.filter(created_at__gte=start, created_at__lt=end)
+        .values("unit__apartment_id", "landlord_id")
+        .annotate(**aggregates)
+        .order_by()
+    )
+    BookingDailyFact.objects.filter(date=day).delete()
+    BookingDailyFact.objects.bulk_create([
+        BookingDailyFact(
+            date=day,
+            apartment_id=row["unit__apartment_id"],
+            landlord_id=row["landlord_id"],
+            created=row["created"],
+            pending=row["pending"],
+            confirmed=row["confirmed"],
+            paid=row["paid"],
+            completed=row["completed"],
+            cancelled=row["cancelled"],
+            booking_amount=row["total_amount"] or 0,
+        )
+        for row in rows
+    ])
+
+
+def _load_revenue(day, start, end):
+    from wallet.models import WalletTransaction
+
+    rows = (
+        WalletTransaction.objects.filter(status="COMPLETED", created_at__gte=start, created_at__lt=end)
+        .values("wallet__user_id", "transaction_type")
+        .annotate(transaction_count=Count("id"), amount=Sum("amount"))
+        .order_by()
+    )
+    RevenueDailyFact.objects.filter(date=day).delete()
+    RevenueDailyFact.objects.bulk_create([
+        RevenueDailyFact(
+            date=day,
+            user_id=row["wallet__user_id"],
+            transaction_type=row["transaction_type"],
+            transaction_count=row["transaction_count"],
+            amount=row["amount"] or 0,
+        )
+        for row in rows
+    ])
+
+
+def _load_new_users(day, start, end):
+    from users.models import User
+
+    rows = (
+        User.objects.filter(created_at__gte=start, created_at__lt=end)
+        .values("role")
+        .annotate(count=Count("id"))
+        .order_by()
+    )
+    NewUserDailyFact.objects.filter(date=day).delete()
+    NewUserDailyFact.objects.bulk_create([
+        NewUserDailyFact(date=day, role=row["role"], count=row["count"]) for row in rows
+    ])
+
+
+def _snapshot_occupancy(day):
+    from properties.models import Unit
+
+    rows = (
+        Unit.objects.values("apartment_id", "apartment__landlord_id")
+        .annotate(
+            total_units=Count("id"),
+            occupied=Count("id", filter=Q(status="OCCUPIED")),
+            reserved=Count("id", filter=Q(status="RESERVED")),
+            vacant=Count("id", filter=Q(status="VACANT")),
+            maintenance=Count("id", filter=Q(status="MAINTENANCE")),
+        )
+        .order_by()
+    )
+    OccupancySnapshot.objects.filter(date=day).delete()
+    OccupancySnapshot.objects.bulk_create([
+        OccupancySnapshot(
+            date=day,
+            apartment_id=row["apartment_id"],
+            landlord_id=row["apartment__landlord_id"],
+            total_units=row["total_units"],
+            occupied=row["occupied"],
+            reserved=row["reserved"],
+            vacant=row["vacant"],
+            maintenance=row["maintenance"],
+        )
+        for row in rows
+    ])
+
+
+def load_day(day, snapshot_occupancy=False):
+    """(Re)load all facts for ``day``."""
+    start, end = day_bounds(day)
+    with transaction.atomic():
+        _load_bookings(day, start, end)
+        _load_revenue(day, start, end)
+        _load_new_users(day, start, end)
+        if snapshot_occupancy:
+            _snapshot_occupancy(day)
+        EtlRun.objects.update_or_create(date=day)
+
+
+def backfill(start_date, end_date):
+    """Load every day in [start_date, end_date]; returns the number of days loaded."""
+    day = start_date
+    latest = timezone.localdate() - timedelta(days=1)
+    count = 0
+    while day <= end_date:
+        load_day(day, snapshot_occupancy=day >= latest)
+        day += timedelta(days=1)
+        count += 1
+    logger.info(f"Analytics backfill loaded {count} day(s) from {start_date} to {end_date}")
+    return count
+
+
+def run_incremental(until=None):
+    """
+    Load every day after the last loaded one, up to ``until`` (default yesterday).
+
+    The last loaded day is always reloaded as well, to pick up late writes.
+    """
+    until = until or timezone.localdate() - timedelta(days=1)
+    last = EtlRun.objects.order_by("-date").values_list("date", flat=True).first()
+    start = last if last else until
+    if start > until:
+        return 0
+    return backfill(start, until)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from analytics.etl import backfill
+
+
+class Command(BaseCommand):
+    help = "Load the analytics fact tables for a date range (safe to re-run)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", required=True, help="First day to load (YYYY-MM-DD).")
+        parser.add_argument("--end", required=True, help="Last day to load (YYYY-MM-DD).")
+
+    def handle(self, *args, **options):
+        start = parse_date(options["start"])
+        end = parse_date(options["end"])
+        if not start or not end or start > end:
+            raise CommandError("--start and --end must be YYYY-MM-DD with start <= end.")
+
+        days = backfill(start, end)
+        self.stdout.write(self.style.SUCCESS(f"Loaded {days} day(s) of analytics facts."))
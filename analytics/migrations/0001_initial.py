@@ -0,0 +1,131 @@
+# Generated by Django 5.0.4 on 2026-10-19 12:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('properties', '0009_unit_deposit_amount_unit_electricity_deposit_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EtlRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True)),
+                ('loaded_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NewUserDailyFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('role', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OccupancySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total_units', models.PositiveIntegerField(default=0)),
+                ('occupied', models.PositiveIntegerField(default=0)),
+                ('reserved', models.PositiveIntegerField(default=0)),
+                ('vacant', models.PositiveIntegerField(default=0)),
+                ('maintenance', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RevenueDailyFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('transaction_type', models.CharField(max_length=30)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BookingDailyFact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('pending', models.PositiveIntegerField(default=0)),
+                ('confirmed', models.PositiveIntegerField(default=0)),
+                ('paid', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+                ('booking_amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('apartment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='properties.apartment')),
+                ('landlord', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='newuserdailyfact',
+            constraint=models.UniqueConstraint(fields=('date', 'role'), name='unique_new_user_fact_per_day'),
+        ),
+        migrations.AddField(
+            model_name='occupancysnapshot',
+            name='apartment',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='properties.apartment'),
+        ),
+        migrations.AddField(
+            model_name='occupancysnapshot',
+            name='landlord',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='revenuedailyfact',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='bookingdailyfact',
+            index=models.Index(fields=['landlord', 'date'], name='analytics_b_landlor_62ed14_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bookingdailyfact',
+            index=models.Index(fields=['date'], name='analytics_b_date_4e16ce_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='bookingdailyfact',
+            constraint=models.UniqueConstraint(fields=('date', 'apartment'), name='unique_booking_fact_per_day'),
+        ),
+        migrations.AddIndex(
+            model_name='occupancysnapshot',
+            index=models.Index(fields=['landlord', 'date'], name='analytics_o_landlor_2aff2a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='occupancysnapshot',
+            index=models.Index(fields=['date'], name='analytics_o_date_839c2e_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='occupancysnapshot',
+            constraint=models.UniqueConstraint(fields=('date', 'apartment'), name='unique_occupancy_snapshot_per_day'),
+        ),
+        migrations.AddIndex(
+            model_name='revenuedailyfact',
+            index=models.Index(fields=['user', 'date'], name='analytics_r_user_id_8728d4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='revenuedailyfact',
+            index=models.Index(fields=['date'], name='analytics_r_date_7d0ebb_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='revenuedailyfact',
+            constraint=models.UniqueConstraint(fields=('date', 'user', 'transaction_type'), name='unique_revenue_fact_per_day'),
+        ),
+    ]
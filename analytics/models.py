@@ -0,0 +1,92 @@
+from django.db import models
+from django.conf import settings
+
+User = settings.AUTH_USER_MODEL
+
+
+class BookingDailyFact(models.Model):
+    """Bookings created on ``date`` for one apartment, broken down by current status."""
+    date = models.DateField()
+    landlord = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    apartment = models.ForeignKey("properties.Apartment", on_delete=models.CASCADE, related_name="+")
+    created = models.PositiveIntegerField(default=0)
+    pending = models.PositiveIntegerField(default=0)
+    confirmed = models.PositiveIntegerField(default=0)
+    paid = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    booking_amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "apartment"], name="unique_booking_fact_per_day"),
+        ]
+        indexes = [
+            models.Index(fields=["landlord", "date"]),
+            models.Index(fields=["date"]),
+        ]
+
+
+class RevenueDailyFact(models.Model):
+    """Completed wallet transactions on ``date`` for one user and transaction type."""
+    date = models.DateField()
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    transaction_type = models.CharField(max_length=30)
+    transaction_count = models.PositiveIntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "user", "transaction_type"], name="unique_revenue_fact_per_day"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["user", "date"]),
+            models.Index(fields=["date"]),
+        ]
+
+
+class OccupancySnapshot(models.Model):
+    """Unit status counts for one apartment as observed when the ETL ran for ``date``."""
+    date = models.DateField()
+    landlord = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    apartment = models.ForeignKey("properties.Apartment", on_delete=models.CASCADE, related_name="+")
+    total_units = models.PositiveIntegerField(default=0)
+    occupied = models.PositiveIntegerField(default=0)
+    reserved = models.PositiveIntegerField(default=0)
+    vacant = models.PositiveIntegerField(default=0)
+    maintenance = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "apartment"], name="unique_occupancy_snapshot_per_day"),
+        ]
+        indexes = [
+            models.Index(fields=["landlord", "date"]),
+            models.Index(fields=["date"]),
+        ]
+
+
+class NewUserDailyFact(models.Model):
+    """Users who registered on ``date``, per role."""
+    date = models.DateField()
+    role = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "role"], name="unique_new_user_fact_per_day"),
+        ]
+
+
+class EtlRun(models.Model):
+    """Watermark of days already loaded, so the nightly run is incremental."""
+    date = models.DateField(unique=True)
+    loaded_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-date"]
+
+    def __str__(self):
+        return f"ETL {self.date}"
@@ -0,0 +1,117 @@
+"""
+Historical reports served from the daily fact tables.
+
+These never touch Booking, WalletTransaction, Unit or User, so trend
+queries stay cheap however large the transactional tables grow.
+"""
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from .models import BookingDailyFact, NewUserDailyFact, OccupancySnapshot, RevenueDailyFact
+
+BUCKETS = {
+    "day": None,
+    "week": TruncWeek,
+    "month": TruncMonth,
+}
+
+
+def _money(value):
+    return str(Decimal(value or 0).quantize(Decimal("0.01")))
+
+
+def _series(qs, bucket, **aggregates):
+    trunc = BUCKETS.get(bucket or "day")
+    key = trunc("date") if trunc else None
+    if key is not None:
+        qs = qs.annotate(bucket=key)
+        group = "bucket"
+    else:
+        group = "date"
+    rows = qs.values(group).annotate(**aggregates).order_by(group)
+    return [{"bucket": row.pop(group).isoformat(), **row} for row in rows]
+
+
+def landlord_history(user, start_date, end_date, bucket=None):
+    bookings = BookingDailyFact.objects.filter(landlord=user, date__gte=start_date, date__lte=end_date)
+    revenue = RevenueDailyFact.objects.filter(
+        user=user, transaction_type="DEPOSIT", date__gte=start_date, date__lte=end_date
+    )
+    occupancy = OccupancySnapshot.objects.filter(landlord=user, date__gte=start_date, date__lte=end_date)
+
+    totals = bookings.aggregate(
+        total=Sum("created"),
+        confirmed=Sum("confirmed"),
+        pending=Sum("pending"),
+        cancelled=Sum("cancelled"),
+    )
+    revenue_series = _series(revenue, bucket, total=Sum("amount"))
+    for row in revenue_series:
+        row["total"] = _money(row["total"])
+
+    return {
+        "bookings": {key: value or 0 for key, value in totals.items()},
+        "revenue": _money(revenue.aggregate(total=Sum("amount"))["total"]),
+        "series": {
+            "bucket": bucket or "day",
+            "bookings": _series(bookings, bucket, count=Sum("created")),
+            "revenue": revenue_series,
+            "occupancy": occupancy_series(occupancy),
+        },
+    }
+
+
+def admin_history(start_date, end_date, bucket=None):
+    new_users = NewUserDailyFact.objects.filter(date__gte=start_date, date__lte=end_date)
+    bookings = BookingDailyFact.objects.filter(date__gte=start_date, date__lte=end_date)
+    revenue = RevenueDailyFact.objects.filter(date__gte=start_date, date__lte=end_date)
+
+    new_users_by_role = {
+        row["role"]: row["count"]
+        for row in new_users.values("role").annotate(count=Sum("count")).order_by()
+    }
+    revenue_series = _series(revenue, bucket, total=Sum("amount"))
+    for row in revenue_series:
+        row["total"] = _money(row["total"])
+
+    return {
+        "new_users": new_users_by_role,
+        "series": {
+            "bucket": bucket or "day",
+            "new_users": _series(new_users, bucket, count=Sum("count")),
+            "bookings": _series(bookings, bucket, count=Sum("created")),
+            "revenue": revenue_series,
+            "occupancy": occupancy_series(
+                OccupancySnapshot.objects.filter(date__gte=start_date, date__lte=end_date)
+            ),
+        },
+    }
+
+
+def occupancy_series(snapshots):
+    """Daily occupancy across the given snapshots."""
+    rows = (
+        snapshots.values("date")
+        .annotate(
+            total=Sum("total_units"),
+            occupied=Sum("occupied"),
+            reserved=Sum("reserved"),
+            vacant=Sum("vacant"),
+            maintenance=Sum("maintenance"),
+        )
+        .order_by("date")
+    )
+    return [
+        {
+            "date": row["date"].isoformat(),
+            "total_units": row["total"],
+            "occupied": row["occupied"],
+            "reserved": row["reserved"],
+            "vacant": row["vacant"],
+            "maintenance": row["maintenance"],
+            "occupancy_rate": round(row["occupied"] / row["total"] * 100, 2) if row["total"] else 0.0,
+        }
+        for row in rows
+    ]
@@ -0,0 +1,25 @@
+from celery import shared_task
+import logging
+
+from django.utils.dateparse import parse_date
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="analytics.tasks.run_nightly_etl")
+def run_nightly_etl():
+    """Runs nightly — loads every day since the last ETL run into the fact tables."""
+    from .etl import run_incremental
+
+    days = run_incremental()
+    logger.info(f"Analytics ETL loaded {days} day(s)")
+    return f"Loaded {days}"
+
+
+@shared_task(name="analytics.tasks.backfill_analytics")
+def backfill_analytics(start_date, end_date):
+    """Reload the fact tables for an ISO date range."""
+    from .etl import backfill
+
+    days = backfill(parse_date(start_date), parse_date(end_date))
+    return f"Loaded {days}"
@@ -0,0 +1,105 @@
+from datetime import date, timedelta
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking
+from properties.models import Apartment, Unit
+from wallet.models import Wallet, WalletTransaction
+from .etl import load_day, backfill, run_incremental
+from .models import BookingDailyFact, EtlRun, NewUserDailyFact, OccupancySnapshot, RevenueDailyFact
+
+User = get_user_model()
+
+
+class AnalyticsEtlTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.today = timezone.localdate()
+        self.landlord = User.objects.create_user(
+            username="etl_landlord",
+            email="etl_landlord@test.com",
+            password="password",
+            role=User.ROLE_LANDLORD,
+            verification_status=User.VERIF_VERIFIED,
+        )
+        self.tenant = User.objects.create_user(
+            username="etl_tenant",
+            email="etl_tenant@test.com",
+            password="password",
+            role=User.ROLE_TENANT,
+        )
+        self.admin = User.objects.create_user(
+            username="etl_admin",
+            email="etl_admin@test.com",
+            password="password",
+            role=User.ROLE_ADMIN,
+        )
+        self.apartment = Apartment.objects.create(landlord=self.landlord, name="ETL Apartment")
+        unit = Unit.objects.create(apartment=self.apartment, unit_number_or_id="E1", price_per_month=1000)
+        Unit.objects.create(
+            apartment=self.apartment, unit_number_or_id="E2", price_per_month=1000, status="OCCUPIED"
+        )
+        Booking.objects.create(
+            unit=unit,
+            tenant=self.tenant,
+            landlord=self.landlord,
+            move_in_date=date.today(),
+            booking_amount=1000,
+        )
+        wallet = Wallet.objects.create(user=self.landlord, wallet_type="LANDLORD")
+        WalletTransaction.objects.create(
+            wallet=wallet, transaction_type="DEPOSIT", amount=250, status="COMPLETED"
+        )
+
+    def test_load_day_populates_facts(self):
+        load_day(self.today, snapshot_occupancy=True)
+
+        booking_fact = BookingDailyFact.objects.get(date=self.today, apartment=self.apartment)
+        self.assertEqual(booking_fact.created, 1)
+        self.assertEqual(booking_fact.pending, 1)
+        revenue_fact = RevenueDailyFact.objects.get(date=self.today, user=self.landlord)
+        self.assertEqual(revenue_fact.amount, 250)
+        self.assertEqual(NewUserDailyFact.objects.get(date=self.today, role="TENANT").count, 1)
+        snapshot = OccupancySnapshot.objects.get(date=self.today, apartment=self.apartment)
+        self.assertEqual((snapshot.total_units, snapshot.occupied), (2, 1))
+
+    def test_reloading_a_day_is_idempotent(self):
+        load_day(self.today, snapshot_occupancy=True)
+        load_day(self.today, snapshot_occupancy=True)
+        self.assertEqual(BookingDailyFact.objects.filter(date=self.today).count(), 1)
+        self.assertEqual(RevenueDailyFact.objects.filter(date=self.today).count(), 1)
+        self.assertEqual(EtlRun.objects.filter(date=self.today).count(), 1)
+
+    def test_backfill_and_incremental_runs_advance_watermark(self):
+        start = self.today - timedelta(days=3)
+        self.assertEqual(backfill(start, self.today - timedelta(days=2)), 2)
+        run_incremental(until=self.today)
+        self.assertEqual(
+            list(EtlRun.objects.order_by("date").values_list("date", flat=True)),
+            [start + timedelta(days=i) for i in range(4)],
+        )
+
+    def test_historical_landlord_analytics_reads_facts(self):
+        load_day(self.today, snapshot_occupancy=True)
+        self.client.force_authenticate(self.landlord)
+
+        response = self.client.get("/api/landlord/analytics", {"mode": "historical", "period": "7"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["mode"], "historical")
+        self.assertEqual(response.data["bookings"]["total"], 1)
+        self.assertEqual(response.data["revenue"], "250.00")
+        self.assertEqual(response.data["series"]["occupancy"][0]["occupancy_rate"], 50.0)
+
+    def test_historical_admin_and_occupancy_endpoints(self):
+        load_day(self.today, snapshot_occupancy=True)
+        self.client.force_authenticate(self.admin)
+
+        response = self.client.get("/api/admin/analytics", {"mode": "historical"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["new_users"]["LANDLORD"], 1)
+
+        response = self.client.get("/api/properties/occupancy-stats/", {"mode": "historical"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["series"][0]["total_units"], 2)
@@ -0,0 +1,94 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:18
+
+import logging
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import migrations, models
+
+ACTIVE_BOOKING_STATUSES = ('PENDING', 'CONFIRMED', 'PAID', 'COMPLETED')
+LIVE_PAYMENT_STATUSES = ('UNPAID', 'PENDING', 'COMPLETED')
+
+
+# Which of a unit's active bookings survives: money taken first, then how far
+# the booking got, then the earliest request.
+PAYMENT_RANK = {'COMPLETED': 0, 'PENDING': 1, 'UNPAID': 2}
+BOOKING_RANK = {'COMPLETED': 0, 'PAID': 0, 'CONFIRMED': 1, 'PENDING': 2}
+
+logger = logging.getLogger(__name__)
+
+
+def cancel_duplicate_bookings(apps, schema_editor):
+    # Units double-booked before the constraint existed keep their best
+    # active booking (see PAYMENT_RANK/BOOKING_RANK); the others are
+    # cancelled, and logged, so the index can be built. A cancelled booking
+    # that was already paid for is settled the way wallet/settlement.py
+    # settles a payment that loses its unit: the amount is credited to the
+    # tenant's wallet as a REFUND and the booking is marked REFUNDED.
+    Booking = apps.get_model('bookings', 'Booking')
+    by_unit = defaultdict(list)
+    active = Booking.objects.filter(
+        booking_status__in=ACTIVE_BOOKING_STATUSES,
+        payment_status__in=LIVE_PAYMENT_STATUSES,
+    ).values_list('id', 'unit_id', 'booking_status', 'payment_status', 'created_at')
+    for row in active.iterator():
+        by_unit[row[1]].append(row)
+
+    duplicates = []
+    paid = []
+    for unit_id, rows in by_unit.items():
+        if len(rows) < 2:
+            continue
+        rows.sort(key=lambda row: (PAYMENT_RANK[row[3]], BOOKING_RANK[row[2]], row[4], str(row[0])))
+        kept, cancelled = rows[0], rows[1:]
+        for booking_id, _, booking_status, payment_status, _ in cancelled:
+            logger.warning(
+                f"Unit {unit_id}: cancelling booking {booking_id} ({booking_status}/{payment_status}); "
+                f"keeping {kept[0]} ({kept[2]}/{kept[3]})"
+            )
+            duplicates.append(booking_id)
+            if payment_status == 'COMPLETED':
+                paid.append(booking_id)
+    Booking.objects.filter(id__in=duplicates).update(booking_status='CANCELLED')
+    refund_paid_bookings(apps, paid)
+
+
+def refund_paid_bookings(apps, booking_ids):
+    Booking = apps.get_model('bookings', 'Booking')
+    Wallet = apps.get_model('wallet', 'Wallet')
+    WalletTransaction = apps.get_model('wallet', 'WalletTransaction')
+
+    for booking in Booking.objects.filter(id__in=booking_ids):
+        wallet, _ = Wallet.objects.get_or_create(user_id=booking.tenant_id, wallet_type='PLATFORM')
+        WalletTransaction.objects.create(
+            wallet=wallet,
+            transaction_type='REFUND',
+            amount=booking.booking_amount,
+            status='COMPLETED',
+            booking=booking,
+            description=f"Booking {booking.id} cancelled: unit {booking.unit_id} was double-booked",
+        )
+        Wallet.objects.filter(pk=wallet.pk).update(balance=models.F('balance') + booking.booking_amount)
+        booking.payment_status = 'REFUNDED'
+        booking.save(update_fields=['payment_status'])
+        logger.warning(
+            f"Booking {booking.id}: KES {booking.booking_amount} credited to wallet {wallet.id} of user {booking.tenant_id}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_booking_lease_agreement_and_more'),
+        ('properties', '0009_unit_deposit_amount_unit_electricity_deposit_and_more'),
+        ('wallet', '0009_pendingpayment_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(cancel_duplicate_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('booking_status__in', ('PENDING', 'CONFIRMED', 'PAID', 'COMPLETED')), ('payment_status__in', ('UNPAID', 'PENDING', 'COMPLETED'))), fields=('unit',), name='unique_active_booking_per_unit'),
+        ),
+    ]
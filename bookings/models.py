@@ -2,10 +2,18 @@ import uuid
 from django.db import models
 from django.conf import settings
 from properties.models import Unit, LeaseAgreement
+from tyrent_backend.tracking import FieldTracker
 
 User = settings.AUTH_USER_MODEL
 
-class Booking(models.Model):
+# A booking holds its unit while it is in one of these states and its payment
+# has not failed or been refunded. At most one such booking exists per unit.
+ACTIVE_BOOKING_STATUSES = ("PENDING", "CONFIRMED", "PAID", "COMPLETED")
+LIVE_PAYMENT_STATUSES = ("UNPAID", "PENDING", "COMPLETED")
+
+class Booking(FieldTracker, models.Model):
+    tracked_fields = ("booking_status", "payment_status", "move_in_date")
+
     BOOKING_STATUS_CHOICES = [
         ("PENDING", "Pending"),
         ("CONFIRMED", "Confirmed"),
@@ -37,9 +45,25 @@ class Booking(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["unit"],
+                condition=models.Q(
+                    booking_status__in=ACTIVE_BOOKING_STATUSES,
+                    payment_status__in=LIVE_PAYMENT_STATUSES,
+                ),
+                name="unique_active_booking_per_unit",
+            ),
+        ]
+
     def __str__(self):
         return f"Booking {self.booking_confirmation_code} - {self.tenant}"
 
+    @property
+    def holds_unit(self):
+        return self.booking_status in ACTIVE_BOOKING_STATUSES and self.payment_status in LIVE_PAYMENT_STATUSES
+
     def save(self, *args, **kwargs):
         if not self.booking_confirmation_code:
             self.booking_confirmation_code = str(uuid.uuid4())[:8].upper()
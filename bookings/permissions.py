@@ -1,6 +1,8 @@
 # bookings/permissions.py
 from rest_framework.permissions import BasePermission
 
+from users.principal import get_principal
+
 
 class IsAdminRole(BasePermission):
     """
@@ -9,15 +11,7 @@ class IsAdminRole(BasePermission):
     message = "Only admin users can perform this action."
 
     def has_permission(self, request, view):
-        return bool(
-            request.user
-            and request.user.is_authenticated
-            and (
-                getattr(request.user, "role", None) == "ADMIN"
-                or request.user.is_staff
-                or request.user.is_superuser
-            )
-        )
+        return get_principal(request).has_admin_access
 
 
 class IsLandlordOfBooking(BasePermission):
@@ -27,7 +21,7 @@ class IsLandlordOfBooking(BasePermission):
     message = "Only the landlord assigned to this booking can perform this action."
 
     def has_object_permission(self, request, view, obj):
-        return request.user == obj.landlord
+        return get_principal(request).is_user(obj.landlord_id)
 
 
 class IsTenantOrLandlordOfBooking(BasePermission):
@@ -37,4 +31,5 @@ class IsTenantOrLandlordOfBooking(BasePermission):
     message = "Only the tenant or landlord on this booking can perform this action."
 
     def has_object_permission(self, request, view, obj):
-        return request.user in (obj.tenant, obj.landlord)
\ No newline at end of file
+        principal = get_principal(request)
+        return principal.is_user(obj.tenant_id) or principal.is_user(obj.landlord_id)
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Unit reservation.
+
+A unit can carry at most one active booking (see ``ACTIVE_BOOKING_STATUSES``
+and ``LIVE_PAYMENT_STATUSES`` in bookings/models.py). Two layers enforce it:
+
+- ``lock_unit`` takes a row lock on the unit (``SELECT ... FOR UPDATE``) for
+  the rest of the caller's transaction, so concurrent reservations of the
+  same unit queue behind each other and the availability check that follows
+  sees the winner's booking instead of racing it;
+- the ``unique_active_booking_per_unit`` partial unique constraint rejects a
+  second active row whatever path inserts it. ``insert`` runs the INSERT in a
+  savepoint and turns that violation into ``UnitUnavailable``.
+
+A booking also occupies its unit on the availability calendar from the day
+it is made (properties/availability.py), so ``lock_unit`` given a move-in
+date refuses units the landlord has blocked at any point from today, and
+``insert`` treats the calendar's exclusion constraint like the unique one.
+
+Both raise ``UnitUnavailable``, which views answer with 409 Conflict. An
+UNPAID booking request holds the unit against other requests but not
+against a captured payment: settling one (wallet/settlement.py) passes the
+payer as ``payer_id``, which cancels other tenants' unpaid requests and
+leaves the payer's own to be marked paid, and credits the payer's wallet
+when the unit is taken anyway.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ACTIVE_BOOKING_STATUSES, LIVE_PAYMENT_STATUSES, Booking
+
+CONSTRAINT = "unique_active_booking_per_unit"
+
+
+class UnitUnavailable(Exception):
+    """The unit already has an active booking."""
+
+
+def active_bookings(unit_id):
+    return Booking.objects.filter(
+        unit_id=unit_id,
+        booking_status__in=ACTIVE_BOOKING_STATUSES,
+        payment_status__in=LIVE_PAYMENT_STATUSES,
+    )
+
+
+def lock_unit(unit_id, move_in_date=None, payer_id=None):
+    """
+    Lock the unit until the surrounding transaction ends and return it; must
+    be called inside ``transaction.atomic()``. Raises ``UnitUnavailable`` if
+    the unit already has an active booking or, given ``move_in_date``, is
+    occupied on the calendar at any point from the day the booking would
+    start to hold it (``booking_starts_on``). Given ``payer_id``, active
+    bookings not yet paid for are cancelled first instead of counting
+    against the unit, except the payer's own request (``unpaid_request``),
+    which is left for the caller to mark paid.
+    """
+    from properties import availability
+    from properties.models import Unit
+
+    unit = Unit.objects.select_for_update().get(pk=unit_id)
+    own = Booking.objects.none()
+    if payer_id is not None:
+        own = unpaid_request(unit_id, payer_id)
+        for booking in active_bookings(unit_id).filter(payment_status="UNPAID").exclude(tenant_id=payer_id):
+            booking.booking_status = "CANCELLED"
+            booking.save(update_fields=["booking_status", "updated_at"])
+    if active_bookings(unit_id).exclude(pk__in=own).exists():
+        raise UnitUnavailable(unit_id)
+    if move_in_date is not None:
+        starts_on = availability.booking_starts_on(timezone.now().date(), move_in_date)
+        occupied = availability.overlapping(starts_on, None).filter(unit_id=unit_id)
+        if occupied.exclude(booking__in=own).exists():
+            raise UnitUnavailable(unit_id)
+    return unit
+
+
+def unpaid_request(unit_id, tenant_id):
+    """The tenant's active, not yet paid booking request for the unit, as a queryset."""
+    return active_bookings(unit_id).filter(tenant_id=tenant_id, payment_status="UNPAID")
+
+
+def insert(unit_id, create):
+    """
+    Run ``create()`` (which inserts the booking) in a savepoint. A violation of
+    the one-active-booking constraint raises ``UnitUnavailable``; any other
+    integrity error propagates.
+    """
+    try:
+        with transaction.atomic():
+            return create()
+    except IntegrityError as e:
+        from properties.availability import EXCLUSION_CONSTRAINT
+
+        if CONSTRAINT in str(e) or EXCLUSION_CONSTRAINT in str(e) or active_bookings(unit_id).exists():
+            raise UnitUnavailable(unit_id) from e
+        raise
+
+
+def reserve(unit_id, create, move_in_date=None):
+    """``lock_unit`` then ``insert`` in one transaction. Returns what ``create()`` returns."""
+    with transaction.atomic():
+        lock_unit(unit_id, move_in_date)
+        return insert(unit_id, create)
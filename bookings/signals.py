@@ -6,7 +6,10 @@ from datetime import date
 
 @receiver(post_save, sender=Booking)
 def booking_post_save(sender, instance, created, **kwargs):
-    """Update unit status when booking is created or payment status changes."""
+    """Update unit status when booking is created or its status changes."""
+    if not instance.has_changed("booking_status"):
+        return
+
     unit = instance.unit
 
     if instance.booking_status == "CANCELLED":
@@ -27,6 +30,16 @@ def booking_post_save(sender, instance, created, **kwargs):
     unit.apartment.recalc_unit_counts()
 
 
+@receiver(post_save, sender=Booking)
+def booking_occupancy_post_save(sender, instance, created, **kwargs):
+    """Mirror the booking onto the unit's availability calendar."""
+    if not instance.changed_fields():
+        return
+    from properties.availability import sync_booking
+
+    sync_booking(instance)
+
+
 @receiver(post_delete, sender=Booking)
 def booking_post_delete(sender, instance, **kwargs):
     """Reset unit status when booking is deleted."""
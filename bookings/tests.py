@@ -1,9 +1,14 @@
-from django.test import TestCase
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
 from django.contrib.auth import get_user_model
 from datetime import date, timedelta
 from rest_framework.test import APIClient
 from properties.models import Apartment, Unit
 from .models import Booking
+from .reservations import UnitUnavailable, reserve
 
 User = get_user_model()
 
@@ -171,7 +176,7 @@ class BookingReservationGuardTests(TestCase):
             format="json",
         )
 
-        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.status_code, 409)
         self.assertEqual(
             response.data.get("error"),
             "This unit is already reserved and cannot be booked.",
@@ -237,3 +242,144 @@ class BookingReservationGuardTests(TestCase):
         # Unit should be VACANT since no other active bookings exist
         self.unit.refresh_from_db()
         self.assertEqual(self.unit.status, "VACANT")
+
+
+class BookingFieldTrackingTests(TestCase):
+    """Signal handlers use tracked previous values instead of re-fetching the booking."""
+
+    def setUp(self):
+        self.landlord = User.objects.create_user(
+            username="tracking_landlord", email="tracking_landlord@test.com", password="testpass123", role="LANDLORD"
+        )
+        self.tenant = User.objects.create_user(
+            username="tracking_tenant", email="tracking_tenant@test.com", password="testpass123", role="TENANT"
+        )
+        apartment = Apartment.objects.create(landlord=self.landlord, name="Tracking Apartment")
+        unit = Unit.objects.create(apartment=apartment, unit_number_or_id="T1", price_per_month=1000)
+        self.booking = Booking.objects.create(
+            unit=unit,
+            tenant=self.tenant,
+            landlord=self.landlord,
+            move_in_date=date.today(),
+            booking_amount=1000,
+        )
+
+    def test_previous_and_has_changed(self):
+        booking = Booking.objects.get(id=self.booking.id)
+        self.assertFalse(booking.has_changed("booking_status"))
+        booking.booking_status = "CONFIRMED"
+        self.assertTrue(booking.has_changed("booking_status"))
+        self.assertEqual(booking.previous("booking_status"), "PENDING")
+        self.assertEqual(booking.changed_fields(), {"booking_status"})
+        booking.save()
+        self.assertFalse(booking.has_changed("booking_status"))
+        self.assertEqual(booking.previous("booking_status"), "CONFIRMED")
+
+    def test_confirmation_notifies_tenant_once(self):
+        from notifications.models import Notification, NotificationType
+
+        booking = Booking.objects.get(id=self.booking.id)
+        booking.booking_status = "CONFIRMED"
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+            booking.save()
+        self.assertEqual(
+            Notification.objects.filter(
+                recipient=self.tenant, type=NotificationType.BOOKING_CONFIRMED
+            ).count(),
+            1,
+        )
+
+    def test_save_without_status_change_skips_unit_update(self):
+        booking = Booking.objects.get(id=self.booking.id)
+        booking.lease_agreement_acknowledged = True
+        with self.assertNumQueries(1):
+            booking.save(update_fields=["lease_agreement_acknowledged"])
+
+
+class DoubleBookingTests(TestCase):
+    def setUp(self):
+        self.landlord = User.objects.create_user(
+            username="double_landlord", email="double_landlord@test.com", password="testpass123", role="LANDLORD"
+        )
+        self.tenants = [
+            User.objects.create_user(
+                username=f"double_tenant_{i}", email=f"double_tenant_{i}@test.com", password="testpass123", role="TENANT"
+            )
+            for i in range(2)
+        ]
+        apartment = Apartment.objects.create(landlord=self.landlord, name="Double Apartment")
+        self.unit = Unit.objects.create(apartment=apartment, unit_number_or_id="D1", price_per_month=1000)
+
+    def book(self, tenant, **fields):
+        return Booking.objects.create(
+            unit=self.unit,
+            tenant=tenant,
+            landlord=self.landlord,
+            move_in_date=date.today(),
+            booking_amount=1000,
+            **fields,
+        )
+
+    def test_constraint_rejects_second_active_booking(self):
+        self.book(self.tenants[0])
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.book(self.tenants[1])
+
+    def test_inactive_bookings_do_not_hold_the_unit(self):
+        self.book(self.tenants[0], booking_status="CANCELLED")
+        self.book(self.tenants[0], payment_status="FAILED")
+        self.book(self.tenants[1])
+        self.assertEqual(Booking.objects.filter(unit=self.unit).count(), 3)
+
+    def test_reserve_raises_unit_unavailable(self):
+        self.book(self.tenants[0])
+        with self.assertRaises(UnitUnavailable):
+            reserve(self.unit.pk, lambda: self.book(self.tenants[1]))
+        self.assertEqual(Booking.objects.filter(unit=self.unit).count(), 1)
+
+    def test_api_returns_409_once_the_unit_is_taken(self):
+        client = APIClient()
+        payload = {"unit": str(self.unit.id), "move_in_date": str(date.today()), "booking_amount": "1000.00"}
+        client.force_authenticate(self.tenants[0])
+        self.assertEqual(client.post("/api/bookings/", payload, format="json").status_code, 201)
+        client.force_authenticate(self.tenants[1])
+        self.assertEqual(client.post("/api/bookings/", payload, format="json").status_code, 409)
+
+
+# Needs real row locks: SQLite serialises writers on the whole database and
+# its in-memory test database fails concurrent writers outright.
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentBookingTests(TransactionTestCase):
+    ATTEMPTS = 50
+
+    def test_parallel_attempts_produce_one_booking(self):
+        landlord = User.objects.create_user(
+            username="race_landlord", email="race_landlord@test.com", password="testpass123", role="LANDLORD"
+        )
+        tenants = [
+            User.objects.create_user(
+                username=f"race_tenant_{i}", email=f"race_tenant_{i}@test.com", password="testpass123", role="TENANT"
+            )
+            for i in range(self.ATTEMPTS)
+        ]
+        apartment = Apartment.objects.create(landlord=landlord, name="Race Apartment")
+        unit = Unit.objects.create(apartment=apartment, unit_number_or_id="R1", price_per_month=1000)
+        payload = {"unit": str(unit.id), "move_in_date": str(date.today()), "booking_amount": "1000.00"}
+        start = threading.Barrier(self.ATTEMPTS)
+
+        def attempt(tenant):
+            client = APIClient()
+            client.force_authenticate(tenant)
+            try:
+                start.wait()
+                return client.post("/api/bookings/", payload, format="json").status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.ATTEMPTS) as pool:
+            codes = list(pool.map(attempt, tenants))
+
+        self.assertEqual(codes.count(201), 1)
+        self.assertEqual(codes.count(409), self.ATTEMPTS - 1)
+        self.assertEqual(Booking.objects.filter(unit=unit).count(), 1)
@@ -5,7 +5,10 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
 from django.db import transaction
 
+from users.principal import get_principal
+
 from .models import Booking
+from .reservations import UnitUnavailable, reserve
 from .serializers import BookingSerializer
 from .permissions import IsAdminRole, IsLandlordOfBooking, IsTenantOrLandlordOfBooking
 
@@ -19,18 +22,17 @@ class BookingCreateView(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
 
         unit = serializer.validated_data["unit"]
-        has_active_booking = Booking.objects.filter(
-            unit=unit,
-            booking_status__in=["PENDING", "CONFIRMED", "PAID", "COMPLETED"],
-            payment_status__in=["UNPAID", "PENDING", "COMPLETED"],
-        ).exists()
-        if has_active_booking:
+        try:
+            reserve(
+                unit.pk,
+                lambda: self.perform_create(serializer),
+                move_in_date=serializer.validated_data["move_in_date"],
+            )
+        except UnitUnavailable:
             return Response(
                 {"error": "This unit is already reserved and cannot be booked."},
-                status=status.HTTP_400_BAD_REQUEST,
+                status=status.HTTP_409_CONFLICT,
             )
-
-        self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
@@ -70,9 +72,9 @@ class BookingDetailView(generics.RetrieveAPIView):
 
     def get_object(self):
         booking = super().get_object()
-        user = self.request.user
-        is_admin = getattr(user, "role", None) == "ADMIN" or user.is_staff or user.is_superuser
-        if not is_admin and user not in (booking.tenant, booking.landlord):
+        principal = get_principal(self.request)
+        is_party = principal.is_user(booking.tenant_id) or principal.is_user(booking.landlord_id)
+        if not principal.has_admin_access and not is_party:
             self.permission_denied(
                 self.request,
                 message="You do not have permission to view this booking.",
@@ -1,5 +1,16 @@
 from django.contrib import admin
-from .models import Notification, NotificationSetting
+from .models import (
+    ArchivedNotification,
+    Broadcast,
+    DeadLetterEmail,
+    Notification,
+    NotificationEvent,
+    NotificationSetting,
+    OutgoingEmail,
+    account_notifications,
+    delete_notification,
+    notification_state,
+)
 
 
 @admin.register(Notification)
@@ -9,8 +20,62 @@ class NotificationAdmin(admin.ModelAdmin):
     search_fields = ["recipient__username", "title", "message"]
     readonly_fields = ["id", "created_at"]
 
+    # Keep the unread counters and stats in step with edits made here.
+
+    def save_model(self, request, obj, form, change):
+        before = None
+        if change:
+            before = notification_state(Notification.objects.select_related("recipient").get(pk=obj.pk))
+        super().save_model(request, obj, form, change)
+        account_notifications([(before, notification_state(obj))])
+
+    def delete_model(self, request, obj):
+        delete_notification(obj)
+
+    def delete_queryset(self, request, queryset):
+        states = [notification_state(notification) for notification in queryset.select_related("recipient")]
+        super().delete_queryset(request, queryset)
+        account_notifications([(state, None) for state in states])
+
 
 @admin.register(NotificationSetting)
 class NotificationSettingAdmin(admin.ModelAdmin):
     list_display = ["id", "user", "email_enabled", "push_enabled"]
-    search_fields = ["user__username"]
\ No newline at end of file
+    search_fields = ["user__username"]
+
+@admin.register(NotificationEvent)
+class NotificationEventAdmin(admin.ModelAdmin):
+    list_display = ["id", "type", "recipient", "recipient_role", "status", "delivered_count", "attempts", "created_at"]
+    list_filter = ["status", "type", "recipient_role"]
+    readonly_fields = ["id", "created_at", "processed_at"]
+
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ["id", "audience", "type", "title", "created_by", "created_at"]
+    list_filter = ["audience", "type"]
+    search_fields = ["title", "message"]
+    readonly_fields = ["id", "created_at"]
+
+
+@admin.register(ArchivedNotification)
+class ArchivedNotificationAdmin(admin.ModelAdmin):
+    list_display = ["id", "recipient", "type", "title", "created_at", "archived_at"]
+    list_filter = ["type"]
+    search_fields = ["recipient__username", "title"]
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ["id", "to_email", "subject", "category", "status", "attempts", "send_after"]
+    list_filter = ["category", "status"]
+    search_fields = ["to_email", "subject"]
+    exclude = ["body"]
+
+
+@admin.register(DeadLetterEmail)
+class DeadLetterEmailAdmin(admin.ModelAdmin):
+    list_display = ["id", "to_email", "subject", "category", "attempts", "failed_at"]
+    list_filter = ["category"]
+    search_fields = ["to_email", "subject"]
+    exclude = ["body"]
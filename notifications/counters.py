@@ -0,0 +1,133 @@
+"""
+Per-user unread notification counters.
+
+The personal unread count is kept in the cache and mirrored in the
+NotificationCounter table, which is the source of truth when the cache
+is cold. Writers adjust both with ``adjust_unread``; readers get the
+badge with one ``get_many`` round trip in ``unread_counts``.
+``reconcile`` recounts drifted counters nightly.
+
+Broadcasts are not counted per user (that would cost O(audience) per
+send). Each user's broadcast unread count is cached together with the
+global broadcast generation it was computed at; sending a broadcast
+bumps the generation, so stale entries are recomputed on next read.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Notification, NotificationCounter
+
+COUNTER_TIMEOUT = 60 * 60 * 24
+BROADCAST_GENERATION_KEY = "notifications:broadcast:generation"
+
+
+def _personal_key(user_id):
+    return f"notifications:unread:{user_id}"
+
+
+def _broadcast_key(user_id):
+    return f"notifications:unread:broadcast:{user_id}"
+
+
+def _load_personal(user_id):
+    """Read the DB counter, creating it from a live count the first time."""
+    unread = NotificationCounter.objects.filter(user_id=user_id).values_list("unread", flat=True).first()
+    if unread is None:
+        unread = Notification.objects.filter(recipient_id=user_id, is_read=False).count()
+        NotificationCounter.objects.get_or_create(user_id=user_id, defaults={"unread": unread})
+    cache.set(_personal_key(user_id), unread, COUNTER_TIMEOUT)
+    return unread
+
+
+def adjust_unread(user_ids, delta):
+    """Add ``delta`` to the personal unread counter of each user in ``user_ids``."""
+    user_ids = list(user_ids)
+    if not user_ids or not delta:
+        return
+    NotificationCounter.objects.filter(user_id__in=user_ids).update(unread=F("unread") + delta)
+
+    def update_cache():
+        if len(user_ids) == 1:
+            try:
+                cache.incr(_personal_key(user_ids[0]), delta)
+            except ValueError:
+                # Not cached; the next read loads the DB value.
+                pass
+        else:
+            cache.delete_many([_personal_key(user_id) for user_id in user_ids])
+
+    # A rollback would leave the cache ahead of the table; drop it instead.
+    if transaction.get_connection().in_atomic_block:
+        cache.delete_many([_personal_key(user_id) for user_id in user_ids])
+        transaction.on_commit(lambda: cache.delete_many([_personal_key(user_id) for user_id in user_ids]))
+    else:
+        update_cache()
+
+
+def forget_broadcasts(user_id):
+    """Drop the cached broadcast unread count after the user reads broadcasts."""
+    cache.delete(_broadcast_key(user_id))
+
+
+def bump_broadcast_generation():
+    """Invalidate every user's cached broadcast count after a new broadcast."""
+    if not cache.add(BROADCAST_GENERATION_KEY, 1, None):
+        try:
+            cache.incr(BROADCAST_GENERATION_KEY)
+        except ValueError:
+            cache.set(BROADCAST_GENERATION_KEY, 1, None)
+
+
+def unread_counts(user):
+    """Return ``(personal, broadcasts)`` unread counts for ``user``."""
+    from .models import visible_broadcasts
+
+    personal_key = _personal_key(user.id)
+    broadcast_key = _broadcast_key(user.id)
+    cached = cache.get_many([personal_key, broadcast_key, BROADCAST_GENERATION_KEY])
+
+    personal = cached.get(personal_key)
+    if personal is None:
+        personal = _load_personal(user.id)
+
+    generation = cached.get(BROADCAST_GENERATION_KEY, 0)
+    entry = cached.get(broadcast_key)
+    if entry is not None and entry[0] == generation:
+        broadcasts = entry[1]
+    else:
+        broadcasts = visible_broadcasts(user).filter(is_read=False).count()
+        cache.set(broadcast_key, (generation, broadcasts), COUNTER_TIMEOUT)
+
+    return max(personal, 0), broadcasts
+
+
+def _live_unread(user_id):
+    return Notification.objects.filter(recipient_id=user_id, is_read=False)
+
+
+def reconcile():
+    """
+    Reset every counter that disagrees with a live count of the user's
+    unread notifications. Each one is recounted under its row lock, so an
+    ``adjust_unread`` racing the repair is not lost. Returns the number of
+    counters fixed.
+    """
+    live = Subquery(
+        _live_unread(OuterRef("user_id")).order_by().values("recipient_id").annotate(n=Count("id")).values("n")
+    )
+    drifted = (
+        NotificationCounter.objects.annotate(live=Coalesce(live, Value(0)))
+        .exclude(unread=F("live"))
+        .values_list("user_id", flat=True)
+    )
+    fixed = 0
+    for user_id in drifted.iterator():
+        with transaction.atomic():
+            counter = NotificationCounter.objects.select_for_update().get(user_id=user_id)
+            counter.unread = _live_unread(user_id).count()
+            counter.save(update_fields=["unread"])
+        cache.delete(_personal_key(user_id))
+        fixed += 1
+    return fixed
@@ -0,0 +1,243 @@
+"""
+Queued email delivery.
+
+Request handlers call ``enqueue_email``, which stores an OutgoingEmail row
+and asks a worker to flush the queue after commit; nothing talks to the
+mail provider on the request path. ``send_pending`` claims due messages
+in batches and sends them over a single backend connection. Claiming is a
+short transaction that marks the rows SENDING for EMAIL_SEND_LEASE_SECONDS;
+the SMTP round trips happen after it commits, so no row lock is held while
+the provider is slow, and each row is settled on its own as soon as its
+send returns. Rows left SENDING by a worker that died are claimed again
+once the lease runs out. Failures are
+retried with exponential backoff and moved to DeadLetterEmail once
+EMAIL_MAX_ATTEMPTS is reached.
+
+OTP emails never store the code: ``enqueue_otp_email`` keeps it in the
+cache for the OTP's lifetime and the row holds only the template, filled in
+at send time. A code that expires before it can be sent is dropped with its
+email, and dead letters keep the template alone.
+
+``build_digests`` turns each user's new unread notifications into one
+email per user, honouring NotificationSetting.email_enabled.
+
+Delivery goes through Django's EMAIL_BACKEND, so the test runner's locmem
+backend (or the console backend in development) works offline.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import DeadLetterEmail, Notification, NotificationSetting, OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+DIGEST_MAX_ITEMS = 20
+
+
+def enqueue_email(to_email, subject, body, category=OutgoingEmail.CATEGORY_TRANSACTIONAL):
+    email = OutgoingEmail.objects.create(to_email=to_email, subject=subject, body=body, category=category)
+    transaction.on_commit(_dispatch)
+    return email
+
+
+def enqueue_otp_email(to_email, subject, template, code, ttl):
+    """
+    Queue an OTP email whose ``template`` contains ``{otp}``. The code is
+    kept in the cache for ``ttl`` seconds rather than in the queued row.
+    """
+    email = enqueue_email(to_email, subject, template, category=OutgoingEmail.CATEGORY_OTP)
+    cache.set(_otp_key(email.id), code, ttl)
+    return email
+
+
+def _otp_key(email_id):
+    return f"email-otp:{email_id}"
+
+
+def _render(email):
+    """The body to send, or None for an OTP email whose code has expired."""
+    if email.category != OutgoingEmail.CATEGORY_OTP:
+        return email.body
+    code = cache.get(_otp_key(email.id))
+    if code is None:
+        return None
+    return email.body.replace("{otp}", code)
+
+
+def _dispatch():
+    from .tasks import send_queued_emails
+
+    try:
+        send_queued_emails.delay()
+    except Exception as e:
+        # The per-minute sweep sends it once the broker is reachable again.
+        logger.warning(f"Could not enqueue email flush: {e}")
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def _fail(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+        with transaction.atomic():
+            DeadLetterEmail.objects.create(
+                id=email.id,
+                to_email=email.to_email,
+                subject=email.subject,
+                body=email.body,
+                category=email.category,
+                attempts=email.attempts,
+                last_error=email.last_error,
+                created_at=email.created_at,
+            )
+            email.delete()
+        cache.delete(_otp_key(email.id))
+        logger.error(f"Email {email.id} to {email.to_email} moved to dead letters: {error}")
+        return
+    email.status = OutgoingEmail.STATUS_QUEUED
+    email.claimed_until = None
+    email.send_after = now + _retry_delay(email.attempts)
+    email.save(update_fields=["status", "claimed_until", "attempts", "last_error", "send_after"])
+
+
+def _claim(batch_size, now):
+    """
+    Mark up to ``batch_size`` due emails SENDING and return them. Rows are
+    locked with SKIP LOCKED only for this transaction, so concurrent workers
+    take disjoint batches.
+    """
+    due = Q(status=OutgoingEmail.STATUS_QUEUED, send_after__lte=now) | Q(
+        status=OutgoingEmail.STATUS_SENDING, claimed_until__lte=now
+    )
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(due)
+            .order_by("send_after")[:batch_size]
+        )
+        if emails:
+            OutgoingEmail.objects.filter(id__in=[email.id for email in emails]).update(
+                status=OutgoingEmail.STATUS_SENDING,
+                claimed_until=now + timedelta(seconds=settings.EMAIL_SEND_LEASE_SECONDS),
+            )
+    return emails
+
+
+def send_batch(batch_size=None):
+    """
+    Claim up to ``batch_size`` due emails and send them over one connection.
+    Returns ``(sent, failed)``.
+    """
+    batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+    now = timezone.now()
+    sent = failed = 0
+
+    emails = _claim(batch_size, now)
+    if not emails:
+        return 0, 0
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            _fail(email, e, now)
+        return 0, len(emails)
+
+    try:
+        for email in emails:
+            body = _render(email)
+            if body is None:
+                OutgoingEmail.objects.filter(id=email.id).delete()
+                logger.info(f"OTP email {email.id} to {email.to_email} dropped: the code expired before it was sent")
+                continue
+            message = EmailMessage(
+                subject=email.subject,
+                body=body,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                to=[email.to_email],
+                connection=connection,
+            )
+            try:
+                connection.send_messages([message])
+            except Exception as e:
+                _fail(email, e, now)
+                failed += 1
+            else:
+                # Sent rows hold OTPs and personal data; the queue is not an archive.
+                OutgoingEmail.objects.filter(id=email.id).delete()
+                cache.delete(_otp_key(email.id))
+                sent += 1
+    finally:
+        connection.close()
+
+    return sent, failed
+
+
+def send_pending(max_batches=None):
+    """Drain due emails batch by batch; returns ``(sent, failed)`` totals."""
+    max_batches = max_batches or settings.EMAIL_MAX_BATCHES_PER_RUN
+    total_sent = total_failed = 0
+    for _ in range(max_batches):
+        sent, failed = send_batch()
+        total_sent += sent
+        total_failed += failed
+        if not sent and not failed:
+            break
+    return total_sent, total_failed
+
+
+def build_digests(now=None):
+    """
+    Queue one digest email per user with unread notifications they have not
+    been emailed about yet. Returns the number of digests queued.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(hours=settings.NOTIFICATION_DIGEST_LOOKBACK_HOURS)
+
+    rows = (
+        Notification.objects.filter(is_read=False, created_at__gte=since, created_at__lte=now)
+        .exclude(recipient__notification_settings__email_enabled=False)
+        .filter(
+            Q(recipient__notification_settings__last_digest_at__isnull=True)
+            | Q(created_at__gt=F("recipient__notification_settings__last_digest_at"))
+        )
+        .exclude(recipient__email="")
+        .order_by("recipient_id", "-created_at")
+        .values_list("recipient_id", "recipient__email", "title")
+    )
+
+    digests = {}
+    for user_id, email, title in rows.iterator(chunk_size=2000):
+        digests.setdefault(user_id, (email, []))[1].append(title)
+
+    with transaction.atomic():
+        for email, titles in digests.values():
+            lines = [f"- {title}" for title in titles[:DIGEST_MAX_ITEMS]]
+            if len(titles) > DIGEST_MAX_ITEMS:
+                lines.append(f"...and {len(titles) - DIGEST_MAX_ITEMS} more")
+            enqueue_email(
+                email,
+                f"You have {len(titles)} new notification{'s' if len(titles) != 1 else ''}",
+                "Here is what you missed on Tyrent Homes:\n\n" + "\n".join(lines),
+                category=OutgoingEmail.CATEGORY_DIGEST,
+            )
+
+        user_ids = list(digests)
+        NotificationSetting.objects.bulk_create(
+            [NotificationSetting(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        NotificationSetting.objects.filter(user_id__in=user_ids).update(last_digest_at=now)
+
+    return len(digests)
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.4 on 2026-10-19 13:03
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('recipient_role', models.CharField(blank=True, help_text='Fan out to every active user with this role instead of a single recipient', max_length=20)),
+                ('type', models.CharField(choices=[('USER_REGISTRATION', 'New User Registration'), ('USER_VERIFICATION', 'User Verification'), ('USER_ROLE_CHANGE', 'Role Change'), ('BOOKING_REQUEST', 'Booking Request'), ('BOOKING_CONFIRMED', 'Booking Confirmed'), ('BOOKING_CANCELLED', 'Booking Cancelled'), ('BOOKING_COMPLETED', 'Booking Completed'), ('BOOKING_PAYMENT', 'Payment Received'), ('APARTMENT_SUBMITTED', 'Apartment Submitted'), ('APARTMENT_VERIFIED', 'Apartment Verified'), ('APARTMENT_REJECTED', 'Apartment Rejected'), ('APARTMENT_APPROVED', 'Apartment Approved'), ('TOUR_REQUEST', 'Tour Request'), ('TOUR_CONFIRMED', 'Tour Confirmed'), ('TOUR_CANCELLED', 'Tour Cancelled'), ('GENERAL', 'General')], max_length=50)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('related_object_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('related_object_id', models.UUIDField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('PROCESSED', 'Processed'), ('FAILED', 'Failed')], default='PENDING', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('delivered_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('recipient', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='notificatio_status_b39d22_idx')],
+            },
+        ),
+    ]
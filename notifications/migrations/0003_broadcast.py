@@ -0,0 +1,51 @@
+# Generated by Django 5.0.4 on 2026-10-19 13:06
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0002_notificationevent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Broadcast',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('audience', models.CharField(choices=[('ALL', 'Everyone'), ('ADMIN', 'Admins'), ('LANDLORD', 'Landlords'), ('TENANT', 'Tenants'), ('AGENT', 'Agents')], max_length=20)),
+                ('type', models.CharField(choices=[('USER_REGISTRATION', 'New User Registration'), ('USER_VERIFICATION', 'User Verification'), ('USER_ROLE_CHANGE', 'Role Change'), ('BOOKING_REQUEST', 'Booking Request'), ('BOOKING_CONFIRMED', 'Booking Confirmed'), ('BOOKING_CANCELLED', 'Booking Cancelled'), ('BOOKING_COMPLETED', 'Booking Completed'), ('BOOKING_PAYMENT', 'Payment Received'), ('APARTMENT_SUBMITTED', 'Apartment Submitted'), ('APARTMENT_VERIFIED', 'Apartment Verified'), ('APARTMENT_REJECTED', 'Apartment Rejected'), ('APARTMENT_APPROVED', 'Apartment Approved'), ('TOUR_REQUEST', 'Tour Request'), ('TOUR_CONFIRMED', 'Tour Confirmed'), ('TOUR_CANCELLED', 'Tour Cancelled'), ('GENERAL', 'General')], default='GENERAL', max_length=50)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('related_object_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('related_object_id', models.UUIDField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='broadcasts_sent', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BroadcastReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('read_at', models.DateTimeField(auto_now_add=True)),
+                ('broadcast', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='notifications.broadcast')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcast_receipts', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='broadcast',
+            index=models.Index(fields=['audience', '-created_at'], name='notificatio_audienc_ddaa05_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='broadcastreceipt',
+            constraint=models.UniqueConstraint(fields=('user', 'broadcast'), name='unique_broadcast_receipt'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.4 on 2026-10-19 13:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notificationcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedNotification',
+            fields=[
+                ('id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('type', models.CharField(choices=[('USER_REGISTRATION', 'New User Registration'), ('USER_VERIFICATION', 'User Verification'), ('USER_ROLE_CHANGE', 'Role Change'), ('BOOKING_REQUEST', 'Booking Request'), ('BOOKING_CONFIRMED', 'Booking Confirmed'), ('BOOKING_CANCELLED', 'Booking Cancelled'), ('BOOKING_COMPLETED', 'Booking Completed'), ('BOOKING_PAYMENT', 'Payment Received'), ('APARTMENT_SUBMITTED', 'Apartment Submitted'), ('APARTMENT_VERIFIED', 'Apartment Verified'), ('APARTMENT_REJECTED', 'Apartment Rejected'), ('APARTMENT_APPROVED', 'Apartment Approved'), ('TOUR_REQUEST', 'Tour Request'), ('TOUR_CONFIRMED', 'Tour Confirmed'), ('TOUR_CANCELLED', 'Tour Cancelled'), ('GENERAL', 'General')], max_length=50)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('related_object_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('related_object_id', models.UUIDField(blank=True, null=True)),
+                ('is_read', models.BooleanField(default=True)),
+                ('read_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('USER_REGISTRATION', 'New User Registration'), ('USER_VERIFICATION', 'User Verification'), ('USER_ROLE_CHANGE', 'Role Change'), ('BOOKING_REQUEST', 'Booking Request'), ('BOOKING_CONFIRMED', 'Booking Confirmed'), ('BOOKING_CANCELLED', 'Booking Cancelled'), ('BOOKING_COMPLETED', 'Booking Completed'), ('BOOKING_PAYMENT', 'Payment Received'), ('APARTMENT_SUBMITTED', 'Apartment Submitted'), ('APARTMENT_VERIFIED', 'Apartment Verified'), ('APARTMENT_REJECTED', 'Apartment Rejected'), ('APARTMENT_APPROVED', 'Apartment Approved'), ('TOUR_REQUEST', 'Tour Request'), ('TOUR_CONFIRMED', 'Tour Confirmed'), ('TOUR_CANCELLED', 'Tour Cancelled'), ('GENERAL', 'General')], max_length=50)),
+                ('role', models.CharField(blank=True, max_length=20)),
+                ('total', models.IntegerField(default=0)),
+                ('unread', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['is_read', 'created_at'], name='notificatio_is_read_3a06ff_idx'),
+        ),
+        migrations.AddField(
+            model_name='archivednotification',
+            name='recipient',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_notifications', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='notificationstat',
+            constraint=models.UniqueConstraint(fields=('type', 'role'), name='unique_notification_stat'),
+        ),
+        migrations.AddIndex(
+            model_name='archivednotification',
+            index=models.Index(fields=['recipient', '-created_at'], name='notificatio_recipie_9d7f42_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivednotification',
+            index=models.Index(fields=['created_at'], name='notificatio_created_e1c923_idx'),
+        ),
+    ]
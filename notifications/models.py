@@ -1,6 +1,7 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
 
@@ -74,6 +75,7 @@ class Notification(models.Model):
         indexes = [
             models.Index(fields=["recipient", "is_read", "-created_at"]),
             models.Index(fields=["recipient", "-created_at"]),
+            models.Index(fields=["is_read", "created_at"]),
         ]
 
     def __str__(self):
@@ -81,9 +83,84 @@ class Notification(models.Model):
 
     def mark_as_read(self):
         from django.utils import timezone
+        from .counters import adjust_unread
+
         self.is_read = True
         self.read_at = timezone.now()
-        self.save(update_fields=["is_read", "read_at"])
+        # Conditional update so concurrent reads only decrement the counter once.
+        updated = Notification.objects.filter(pk=self.pk, is_read=False).update(
+            is_read=True, read_at=self.read_at
+        )
+        if updated:
+            from .stats import record_read
+
+            adjust_unread([self.recipient_id], -1)
+            record_read(self.recipient.role, {self.type: 1})
+
+
+class ArchivedNotification(models.Model):
+    """
+    Read notifications past the retention window, moved out of the hot
+    Notification table by the nightly archive task (see retention.py).
+    """
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="archived_notifications"
+    )
+    type = models.CharField(max_length=50, choices=NotificationType.choices)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    related_object_type = models.CharField(max_length=50, blank=True, null=True)
+    related_object_id = models.UUIDField(blank=True, null=True)
+    is_read = models.BooleanField(default=True)
+    read_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["recipient", "-created_at"]),
+            models.Index(fields=["created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Archived notification for {self.recipient}: {self.title}"
+
+
+class NotificationStat(models.Model):
+    """Maintained notification counts per type and recipient role (see stats.py)."""
+
+    type = models.CharField(max_length=50, choices=NotificationType.choices)
+    role = models.CharField(max_length=20, blank=True)
+    total = models.IntegerField(default=0)
+    unread = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["type", "role"], name="unique_notification_stat"),
+        ]
+
+    def __str__(self):
+        return f"{self.type}/{self.role}: {self.total} ({self.unread} unread)"
+
+
+class NotificationCounter(models.Model):
+    """Durable copy of a user's unread notification count (see counters.py)."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="notification_counter",
+    )
+    unread = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.unread} unread"
 
 
 class NotificationSetting(models.Model):
@@ -107,6 +184,9 @@ class NotificationSetting(models.Model):
     notify_property_verifications = models.BooleanField(default=True)
     notify_tour_requests = models.BooleanField(default=True)
 
+    # Newest notification already included in an email digest
+    last_digest_at = models.DateTimeField(blank=True, null=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -114,6 +194,190 @@ class NotificationSetting(models.Model):
         return f"Notification settings for {self.user.username}"
 
 
+class BroadcastAudience(models.TextChoices):
+    ALL = "ALL", "Everyone"
+    ADMIN = "ADMIN", "Admins"
+    LANDLORD = "LANDLORD", "Landlords"
+    TENANT = "TENANT", "Tenants"
+    AGENT = "AGENT", "Agents"
+
+
+class Broadcast(models.Model):
+    """
+    A message addressed to a whole audience, stored once.
+
+    Recipients are resolved at read time from their role, and read state is
+    kept in BroadcastReceipt rows created only when a user reads the message,
+    so sending costs one INSERT whatever the audience size.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    audience = models.CharField(max_length=20, choices=BroadcastAudience.choices)
+    type = models.CharField(max_length=50, choices=NotificationType.choices, default=NotificationType.GENERAL)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    related_object_type = models.CharField(max_length=50, blank=True, null=True)
+    related_object_id = models.UUIDField(blank=True, null=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="broadcasts_sent",
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["audience", "-created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Broadcast to {self.get_audience_display()}: {self.title}"
+
+
+class BroadcastReceipt(models.Model):
+    """Read state of a broadcast for one user; absent means unread."""
+
+    broadcast = models.ForeignKey(Broadcast, on_delete=models.CASCADE, related_name="receipts")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="broadcast_receipts")
+    read_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "broadcast"], name="unique_broadcast_receipt"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} read {self.broadcast_id}"
+
+
+class NotificationEvent(models.Model):
+    """
+    Outbox row for a notification that still has to be fanned out.
+
+    Signal handlers write one event per occurrence inside the request
+    transaction; a Celery worker expands it into per-recipient
+    Notification rows after commit.
+    """
+
+    STATUS_PENDING = "PENDING"
+    STATUS_PROCESSED = "PROCESSED"
+    STATUS_FAILED = "FAILED"
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, "Pending"),
+        (STATUS_PROCESSED, "Processed"),
+        (STATUS_FAILED, "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="notification_events",
+    )
+    recipient_role = models.CharField(
+        max_length=20,
+        blank=True,
+        help_text="Fan out to every active user with this role instead of a single recipient",
+    )
+    type = models.CharField(max_length=50, choices=NotificationType.choices)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    related_object_type = models.CharField(max_length=50, blank=True, null=True)
+    related_object_id = models.UUIDField(blank=True, null=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    delivered_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.type} event ({self.status})"
+
+
+class OutgoingEmail(models.Model):
+    """
+    Queued email, sent by a Celery worker (see emails.py).
+
+    Rows are deleted once sent; messages that keep failing are moved to
+    DeadLetterEmail. A worker marks the rows it is about to send SENDING
+    until ``claimed_until``; rows whose claim has lapsed (the worker died
+    mid-batch) are due again.
+    """
+
+    STATUS_QUEUED = "QUEUED"
+    STATUS_SENDING = "SENDING"
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, "Queued"),
+        (STATUS_SENDING, "Sending"),
+    ]
+
+    CATEGORY_OTP = "OTP"
+    CATEGORY_DIGEST = "DIGEST"
+    CATEGORY_TRANSACTIONAL = "TRANSACTIONAL"
+
+    CATEGORY_CHOICES = [
+        (CATEGORY_OTP, "One-time password"),
+        (CATEGORY_DIGEST, "Notification digest"),
+        (CATEGORY_TRANSACTIONAL, "Transactional"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default=CATEGORY_TRANSACTIONAL)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    send_after = models.DateTimeField(default=timezone.now)
+    claimed_until = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["send_after"]
+        indexes = [
+            models.Index(fields=["send_after"]),
+        ]
+
+    def __str__(self):
+        return f"{self.category} email to {self.to_email}"
+
+
+class DeadLetterEmail(models.Model):
+    """Email that exhausted EMAIL_MAX_ATTEMPTS; kept for inspection and manual resend."""
+
+    id = models.UUIDField(primary_key=True, editable=False)
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    category = models.CharField(max_length=20, choices=OutgoingEmail.CATEGORY_CHOICES)
+    attempts = models.PositiveIntegerField()
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField()
+    failed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-failed_at"]
+
+    def __str__(self):
+        return f"Undeliverable {self.category} email to {self.to_email}"
+
+
 # Helper functions to create notifications
 
 def create_notification(
@@ -125,7 +389,11 @@ def create_notification(
     related_object_id=None,
 ):
     """Create a single notification."""
-    return Notification.objects.create(
+    from .counters import adjust_unread
+    from .realtime import push_notifications
+    from .stats import record_created
+
+    notification = Notification.objects.create(
         recipient=recipient,
         type=notification_type,
         title=title,
@@ -133,6 +401,53 @@ def create_notification(
         related_object_type=related_object_type,
         related_object_id=related_object_id,
     )
+    adjust_unread([notification.recipient_id], 1)
+    record_created(notification_type, [recipient.role])
+    push_notifications([notification])
+    return notification
+
+
+def notification_state(notification):
+    """What the unread counters and stats know about a notification."""
+    return notification.recipient, notification.type, notification.is_read
+
+
+def account_notifications(changes):
+    """
+    Apply ``[(before, after), ...]`` to the unread counters and stats, where
+    each side is a ``notification_state`` or None for a notification that
+    doesn't exist on that side (created, deleted).
+    """
+    from collections import Counter, defaultdict
+    from .counters import adjust_unread
+    from .stats import record
+
+    unread = Counter()
+    deltas = defaultdict(lambda: [0, 0])
+    for before, after in changes:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            recipient, notification_type, is_read = state
+            delta = deltas[(notification_type, recipient.role)]
+            delta[0] += sign
+            if not is_read:
+                delta[1] += sign
+                unread[recipient.pk] += sign
+
+    by_delta = defaultdict(list)
+    for user_id, delta in unread.items():
+        by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        adjust_unread(user_ids, delta)
+    record({key: tuple(delta) for key, delta in deltas.items()})
+
+
+def delete_notification(notification):
+    """Delete a notification, taking it out of the unread counter and stats."""
+    state = notification_state(notification)
+    notification.delete()
+    account_notifications([(state, None)])
 
 
 def notify_admins(
@@ -144,6 +459,9 @@ def notify_admins(
 ):
     """Notify all admin users."""
     from users.models import User
+    from .counters import adjust_unread
+    from .realtime import push_notifications
+    from .stats import record_created
     admins = User.objects.filter(role=User.ROLE_ADMIN, status=User.STATUS_ACTIVE)
     notifications = []
     for admin in admins:
@@ -157,7 +475,11 @@ def notify_admins(
                 related_object_id=related_object_id,
             )
         )
-    return Notification.objects.bulk_create(notifications)
+    created = Notification.objects.bulk_create(notifications)
+    adjust_unread([notification.recipient_id for notification in created], 1)
+    record_created(notification_type, [User.ROLE_ADMIN] * len(created))
+    push_notifications(created)
+    return created
 
 
 def notify_landlord(
@@ -176,4 +498,22 @@ def notify_landlord(
         message=message,
         related_object_type=related_object_type,
         related_object_id=related_object_id,
-    )
\ No newline at end of file
+    )
+
+
+def visible_broadcasts(user):
+    """
+    Broadcasts addressed to ``user``, annotated with their read state.
+
+    Users only see broadcasts sent after they joined.
+    """
+    from django.db.models import Exists, OuterRef, Q, Subquery
+
+    receipts = BroadcastReceipt.objects.filter(broadcast=OuterRef("pk"), user=user)
+    return Broadcast.objects.filter(
+        Q(audience=BroadcastAudience.ALL) | Q(audience=user.role),
+        created_at__gte=user.created_at,
+    ).annotate(
+        is_read=Exists(receipts),
+        read_at=Subquery(receipts.values("read_at")[:1]),
+    )
@@ -0,0 +1,260 @@
+"""
+Transactional outbox for notifications.
+
+``publish`` writes a single NotificationEvent in the caller's transaction
+and schedules delivery for after commit, so the write path costs one
+INSERT no matter how many users end up being notified. ``deliver``
+(run by a Celery worker) resolves the recipients, drops users who opted
+out of the notification type, and bulk-inserts Notification rows in
+batches. Events whose task was lost are re-dispatched by the sweeper.
+
+``publish_many`` writes one single-recipient event per user, and
+``deliver_many`` delivers them a chunk at a time: one locking SELECT, one
+recipients query per type, one bulk INSERT and one counter/stats update for
+the whole chunk, instead of a transaction per event.
+"""
+import logging
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .counters import adjust_unread
+from .models import Notification, NotificationEvent, NotificationType
+from .realtime import push_notifications
+from .stats import record
+
+logger = logging.getLogger(__name__)
+
+# NotificationSetting flag consulted for each notification type. Types not
+# listed here are always delivered.
+PREFERENCE_FIELDS = {
+    NotificationType.USER_REGISTRATION: "notify_user_registrations",
+    NotificationType.USER_VERIFICATION: "notify_user_registrations",
+    NotificationType.BOOKING_REQUEST: "notify_booking_requests",
+    NotificationType.BOOKING_CONFIRMED: "notify_booking_confirmations",
+    NotificationType.BOOKING_CANCELLED: "notify_booking_confirmations",
+    NotificationType.BOOKING_COMPLETED: "notify_booking_confirmations",
+    NotificationType.BOOKING_PAYMENT: "notify_booking_confirmations",
+    NotificationType.APARTMENT_SUBMITTED: "notify_property_verifications",
+    NotificationType.APARTMENT_VERIFIED: "notify_property_verifications",
+    NotificationType.APARTMENT_REJECTED: "notify_property_verifications",
+    NotificationType.APARTMENT_APPROVED: "notify_property_verifications",
+    NotificationType.TOUR_REQUEST: "notify_tour_requests",
+    NotificationType.TOUR_CONFIRMED: "notify_tour_requests",
+    NotificationType.TOUR_CANCELLED: "notify_tour_requests",
+}
+
+
+def publish(
+    notification_type,
+    title,
+    message,
+    recipient=None,
+    recipient_role="",
+    related_object_type=None,
+    related_object_id=None,
+):
+    """Record a notification for ``recipient`` or every active user with ``recipient_role``."""
+    if recipient is None and not recipient_role:
+        raise ValueError("publish() needs a recipient or a recipient_role")
+
+    event = NotificationEvent.objects.create(
+        recipient=recipient,
+        recipient_role=recipient_role,
+        type=notification_type,
+        title=title,
+        message=message,
+        related_object_type=related_object_type,
+        related_object_id=related_object_id,
+    )
+    transaction.on_commit(lambda: _dispatch(event.id))
+    return event
+
+
+def publish_many(notification_type, title, message, recipient_ids, related_object_type=None, related_object_id=None):
+    """
+    Record the same notification for each of ``recipient_ids`` with one
+    bulk INSERT; a single task delivers them all after commit.
+    """
+    events = NotificationEvent.objects.bulk_create([
+        NotificationEvent(
+            recipient_id=recipient_id,
+            type=notification_type,
+            title=title,
+            message=message,
+            related_object_type=related_object_type,
+            related_object_id=recipient_id if related_object_type == "User" else related_object_id,
+        )
+        for recipient_id in recipient_ids
+    ])
+    event_ids = [str(event.id) for event in events]
+    if event_ids:
+        transaction.on_commit(lambda: _dispatch_many(event_ids))
+    return events
+
+
+def _dispatch_many(event_ids):
+    from .tasks import deliver_notification_events
+
+    try:
+        deliver_notification_events.delay(event_ids)
+    except Exception as e:
+        logger.warning(f"Could not enqueue {len(event_ids)} notification events: {e}")
+
+
+def _dispatch(event_id):
+    from .tasks import deliver_notification_event
+
+    try:
+        deliver_notification_event.delay(str(event_id))
+    except Exception as e:
+        # The sweeper picks the event up once the broker is reachable again.
+        logger.warning(f"Could not enqueue notification event {event_id}: {e}")
+
+
+def _eligible(users, notification_type):
+    """Active users of ``users``, minus those who opted out of ``notification_type``."""
+    from users.models import User
+
+    users = users.filter(status=User.STATUS_ACTIVE)
+    preference = PREFERENCE_FIELDS.get(notification_type)
+    if preference:
+        users = users.exclude(**{f"notification_settings__{preference}": False})
+    return users.order_by().values_list("id", "role")
+
+
+def recipients(event):
+    """``(id, role)`` of the active users the event should reach, minus those who opted out of its type."""
+    from users.models import User
+
+    users = User.objects.all()
+    if event.recipient_id:
+        users = users.filter(id=event.recipient_id)
+    elif event.recipient_role != "ALL":
+        users = users.filter(role=event.recipient_role)
+    return _eligible(users, event.type)
+
+
+def _insert_batch(batch, roles):
+    """Insert ``batch`` (``roles`` gives each recipient's role) and count it once."""
+    Notification.objects.bulk_create(batch)
+
+    per_user = Counter(notification.recipient_id for notification in batch)
+    by_count = defaultdict(list)
+    for user_id, count in per_user.items():
+        by_count[count].append(user_id)
+    for count, user_ids in by_count.items():
+        adjust_unread(user_ids, count)
+
+    created = Counter((notification.type, role) for notification, role in zip(batch, roles))
+    record({key: (count, count) for key, count in created.items()})
+    push_notifications(batch)
+    return len(batch)
+
+
+def _notification(event, user_id):
+    return Notification(
+        recipient_id=user_id,
+        type=event.type,
+        title=event.title,
+        message=event.message,
+        related_object_type=event.related_object_type,
+        related_object_id=event.related_object_id,
+    )
+
+
+def deliver(event_id):
+    """
+    Expand one pending event into Notification rows.
+
+    The event row is locked for the duration, so concurrent workers (or the
+    sweeper racing the on-commit task) never deliver it twice. Returns the
+    number of notifications created, or None if the event was already
+    handled.
+    """
+    batch_size = settings.NOTIFICATION_FANOUT_BATCH_SIZE
+    with transaction.atomic():
+        event = (
+            NotificationEvent.objects.select_for_update(skip_locked=True)
+            .filter(id=event_id, status=NotificationEvent.STATUS_PENDING)
+            .first()
+        )
+        if event is None:
+            return None
+
+        delivered = 0
+        batch = []
+        roles = []
+        for user_id, role in recipients(event).iterator(chunk_size=batch_size):
+            roles.append(role)
+            batch.append(_notification(event, user_id))
+            if len(batch) >= batch_size:
+                delivered += _insert_batch(batch, roles)
+                batch = []
+                roles = []
+        if batch:
+            delivered += _insert_batch(batch, roles)
+
+        event.status = NotificationEvent.STATUS_PROCESSED
+        event.delivered_count = delivered
+        event.attempts += 1
+        event.processed_at = timezone.now()
+        event.save(update_fields=["status", "delivered_count", "attempts", "processed_at"])
+    return delivered
+
+
+def deliver_many(event_ids):
+    """
+    Deliver a chunk of single-recipient events in one transaction. Events
+    already handled, or locked by another worker, are skipped. Returns the
+    number of notifications created.
+    """
+    from users.models import User
+
+    with transaction.atomic():
+        events = list(
+            NotificationEvent.objects.select_for_update(skip_locked=True).filter(
+                id__in=event_ids, status=NotificationEvent.STATUS_PENDING, recipient__isnull=False
+            )
+        )
+        if not events:
+            return 0
+
+        user_ids_by_type = defaultdict(set)
+        for event in events:
+            user_ids_by_type[event.type].add(event.recipient_id)
+        roles_by_type = {
+            notification_type: dict(_eligible(User.objects.filter(id__in=user_ids), notification_type))
+            for notification_type, user_ids in user_ids_by_type.items()
+        }
+
+        batch = []
+        roles = []
+        now = timezone.now()
+        for event in events:
+            eligible = roles_by_type[event.type]
+            event.delivered_count = 0
+            if event.recipient_id in eligible:
+                batch.append(_notification(event, event.recipient_id))
+                roles.append(eligible[event.recipient_id])
+                event.delivered_count = 1
+            event.status = NotificationEvent.STATUS_PROCESSED
+            event.attempts += 1
+            event.processed_at = now
+        delivered = _insert_batch(batch, roles) if batch else 0
+        NotificationEvent.objects.bulk_update(events, ["status", "delivered_count", "attempts", "processed_at"])
+    return delivered
+
+
+def mark_failed_attempt(event_id, error):
+    """Count a failed delivery; gives up once NOTIFICATION_OUTBOX_MAX_ATTEMPTS is reached."""
+    event = NotificationEvent.objects.filter(id=event_id, status=NotificationEvent.STATUS_PENDING).first()
+    if event is None:
+        return
+    event.attempts += 1
+    event.error = str(error)
+    if event.attempts >= settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS:
+        event.status = NotificationEvent.STATUS_FAILED
+    event.save(update_fields=["attempts", "error", "status"])
@@ -0,0 +1,182 @@
+"""
+Per-user push channel for real-time notifications.
+
+Events are appended to a short per-user log and read back by the SSE
+endpoint (notifications/sse.py). Every event has an id, so a client that
+reconnects with ``Last-Event-ID`` receives whatever it missed while the
+log still holds it.
+
+Two channel backends, chosen by ``NOTIFICATION_PUSH_BACKEND``:
+
+- ``redis``: one Redis stream per user (XADD capped at
+  ``NOTIFICATION_PUSH_HISTORY`` entries, XREAD BLOCK to wait). Streams
+  give pub/sub fan-out to every open connection plus the replay log in
+  a single structure.
+- ``memory``: a process-local equivalent used by the test suite.
+
+An SSE connection opens one reader per stream (``channel.reader``) and polls
+through it until it closes; on Redis that keeps a single connection per
+stream instead of dialling Redis on every heartbeat.
+
+Writers call ``push``, which publishes after the surrounding transaction
+commits so clients never see events for rows that were rolled back.
+"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from functools import partial
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(data):
+    return json.dumps(data, cls=DjangoJSONEncoder)
+
+
+class InMemoryChannel:
+    """Process-local channel with the same interface as RedisStreamChannel."""
+
+    poll_interval = 0.05
+
+    def __init__(self, history):
+        self.history = history
+        self._events = defaultdict(lambda: deque(maxlen=self.history))
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event, data):
+        with self._lock:
+            event_id = str(next(self._ids))
+            self._events[str(user_id)].append((event_id, event, _encode(data)))
+        return event_id
+
+    def latest_id(self, user_id):
+        with self._lock:
+            events = self._events.get(str(user_id))
+            return events[-1][0] if events else "0"
+
+    def _after(self, user_id, last_id):
+        with self._lock:
+            return [e for e in self._events.get(str(user_id), ()) if int(e[0]) > int(last_id)]
+
+    async def read(self, user_id, last_id, timeout):
+        """Events after ``last_id``, waiting up to ``timeout`` seconds for the first one."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            events = self._after(user_id, last_id)
+            if events or loop.time() >= deadline:
+                return events
+            await asyncio.sleep(self.poll_interval)
+
+    @asynccontextmanager
+    async def reader(self, user_id):
+        """``read`` bound to ``user_id``, for one connection's lifetime."""
+        yield partial(self.read, user_id)
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+
+class RedisStreamChannel:
+    def __init__(self, url, history):
+        self.url = url
+        self.history = history
+        self._client = None
+
+    def _key(self, user_id):
+        return f"notifications:stream:{user_id}"
+
+    def _sync_client(self):
+        if self._client is None:
+            import redis
+
+            self._client = redis.Redis.from_url(self.url, decode_responses=True)
+        return self._client
+
+    def publish(self, user_id, event, data):
+        return self._sync_client().xadd(
+            self._key(user_id),
+            {"event": event, "data": _encode(data)},
+            maxlen=self.history,
+            approximate=True,
+        )
+
+    def latest_id(self, user_id):
+        entries = self._sync_client().xrevrange(self._key(user_id), count=1)
+        return entries[0][0] if entries else "0"
+
+    @asynccontextmanager
+    async def reader(self, user_id):
+        """
+        Yield ``read(last_id, timeout)`` for ``user_id``'s stream. Every call
+        goes over the same client, which is closed when the block exits.
+        """
+        import redis.asyncio
+
+        key = self._key(user_id)
+        client = redis.asyncio.Redis.from_url(self.url, decode_responses=True)
+
+        async def read(last_id, timeout):
+            response = await client.xread({key: last_id}, block=int(timeout * 1000))
+            return [
+                (entry_id, fields["event"], fields["data"])
+                for _, entries in response
+                for entry_id, fields in entries
+            ]
+
+        try:
+            yield read
+        finally:
+            await client.aclose()
+
+
+_channel = None
+_channel_lock = threading.Lock()
+
+
+def get_channel():
+    global _channel
+    with _channel_lock:
+        if _channel is None:
+            history = settings.NOTIFICATION_PUSH_HISTORY
+            if settings.NOTIFICATION_PUSH_BACKEND == "memory":
+                _channel = InMemoryChannel(history)
+            else:
+                _channel = RedisStreamChannel(settings.NOTIFICATION_PUSH_REDIS_URL, history)
+        return _channel
+
+
+def _publish(user_id, event, data):
+    try:
+        get_channel().publish(user_id, event, data)
+    except Exception as e:
+        # Push is best effort; clients still see the row on their next fetch.
+        logger.warning(f"Could not push {event} to user {user_id}: {e}")
+
+
+def push(user_id, event, data):
+    """Publish ``event`` to ``user_id`` once the current transaction commits."""
+    transaction.on_commit(lambda: _publish(user_id, event, data))
+
+
+def push_notifications(notifications):
+    """Push newly created Notification rows to their recipients."""
+    from .serializers import NotificationSerializer
+
+    payloads = [(n.recipient_id, NotificationSerializer(n).data) for n in notifications]
+
+    def publish_all():
+        for user_id, data in payloads:
+            _publish(user_id, "notification", data)
+
+    transaction.on_commit(publish_all)
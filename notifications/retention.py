@@ -0,0 +1,76 @@
+"""
+Notification retention.
+
+Read notifications older than NOTIFICATION_RETENTION_DAYS are copied to
+ArchivedNotification and deleted from the hot table in fixed-size batches,
+each in its own short transaction, so the nightly job never holds long
+locks and the hot table only grows with recent and unread notifications.
+Unread notifications are never archived. Moving rows does not change
+NotificationStat, which counts both tables.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ArchivedNotification, Notification
+
+logger = logging.getLogger(__name__)
+
+ARCHIVED_FIELDS = [
+    "id",
+    "recipient_id",
+    "type",
+    "title",
+    "message",
+    "related_object_type",
+    "related_object_id",
+    "is_read",
+    "read_at",
+    "created_at",
+]
+
+
+def archive_batch(cutoff, batch_size):
+    """Move up to ``batch_size`` read notifications created before ``cutoff``; returns the count moved."""
+    with transaction.atomic():
+        rows = list(
+            Notification.objects.filter(is_read=True, created_at__lt=cutoff)
+            .order_by("created_at")
+            .values(*ARCHIVED_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+        ArchivedNotification.objects.bulk_create(
+            [ArchivedNotification(**row) for row in rows],
+            ignore_conflicts=True,
+        )
+        Notification.objects.filter(id__in=[row["id"] for row in rows]).delete()
+    return len(rows)
+
+
+def archive_read_notifications(days=None, batch_size=None, max_batches=None):
+    """
+    Archive read notifications older than ``days`` in batches.
+
+    Stops after ``max_batches`` when given, leaving the rest for the next
+    run. Returns the number of notifications archived.
+    """
+    days = settings.NOTIFICATION_RETENTION_DAYS if days is None else days
+    batch_size = batch_size or settings.NOTIFICATION_ARCHIVE_BATCH_SIZE
+    cutoff = timezone.now() - timedelta(days=days)
+
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_batch(cutoff, batch_size)
+        archived += moved
+        batches += 1
+        if moved < batch_size:
+            break
+
+    if archived:
+        logger.info(f"Archived {archived} notifications read before {cutoff:%Y-%m-%d}")
+    return archived
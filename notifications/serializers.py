@@ -1,12 +1,15 @@
 from rest_framework import serializers
-from .models import Notification, NotificationSetting, NotificationType
+from .models import Broadcast, Notification, NotificationSetting, NotificationType
 
 
 class NotificationSerializer(serializers.ModelSerializer):
+    source = serializers.SerializerMethodField()
+
     class Meta:
         model = Notification
         fields = [
             "id",
+            "source",
             "type",
             "title",
             "message",
@@ -16,6 +19,8 @@ class NotificationSerializer(serializers.ModelSerializer):
             "read_at",
             "created_at",
         ]
+        # is_read only changes through the mark-read actions, which keep
+        # the unread counters (counters.py) and stats in step.
         read_only_fields = [
             "id",
             "type",
@@ -23,10 +28,49 @@ class NotificationSerializer(serializers.ModelSerializer):
             "message",
             "related_object_type",
             "related_object_id",
+            "is_read",
             "read_at",
             "created_at",
         ]
 
+    def get_source(self, obj):
+        return "personal"
+
+
+class AdminNotificationSerializer(NotificationSerializer):
+    """Admin CRUD on personal notifications; read state stays read-only."""
+
+    class Meta(NotificationSerializer.Meta):
+        fields = NotificationSerializer.Meta.fields + ["recipient"]
+        read_only_fields = ["id", "is_read", "read_at", "created_at"]
+
+
+class BroadcastSerializer(serializers.ModelSerializer):
+    """Broadcast rendered in the same shape as a personal notification."""
+
+    source = serializers.SerializerMethodField()
+    is_read = serializers.BooleanField(read_only=True, default=False)
+    read_at = serializers.DateTimeField(read_only=True, default=None)
+
+    class Meta:
+        model = Broadcast
+        fields = [
+            "id",
+            "source",
+            "type",
+            "title",
+            "message",
+            "related_object_type",
+            "related_object_id",
+            "is_read",
+            "read_at",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+    def get_source(self, obj):
+        return "broadcast"
+
 
 class NotificationSettingSerializer(serializers.ModelSerializer):
     class Meta:
@@ -48,11 +92,20 @@ class NotificationCreateSerializer(serializers.Serializer):
     """Serializer for creating admin notifications."""
     recipient_id = serializers.UUIDField(required=False)
     recipient_role = serializers.ChoiceField(
-        choices=["ADMIN", "LANDLORD", "TENANT", "ALL_LANDLORDS"],
+        choices=["ALL", "ADMIN", "LANDLORD", "TENANT", "AGENT", "ALL_LANDLORDS"],
         required=False
     )
     type = serializers.ChoiceField(choices=NotificationType.choices)
     title = serializers.CharField(max_length=255)
     message = serializers.CharField()
     related_object_type = serializers.CharField(max_length=50, required=False, allow_blank=True)
-    related_object_id = serializers.UUIDField(required=False, allow_null=True)
\ No newline at end of file
+    related_object_id = serializers.UUIDField(required=False, allow_null=True)
+    materialize = serializers.BooleanField(
+        default=False,
+        help_text="Also write one notification per recipient, in background batches",
+    )
+
+    def validate(self, attrs):
+        if not attrs.get("recipient_id") and not attrs.get("recipient_role"):
+            raise serializers.ValidationError("recipient_id or recipient_role is required")
+        return attrs
@@ -1,6 +1,9 @@
 """
 Signal handlers for automatic notifications.
 These will be imported in the notifications app's ready() method.
+
+Handlers only record an outbox event (see outbox.py); recipients are
+resolved and notifications inserted by a Celery worker after commit.
 """
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -11,16 +14,13 @@ User = settings.AUTH_USER_MODEL
 
 def register_notification_signals():
     """Register all notification signals."""
-    from .models import (
-        Notification,
-        NotificationType,
-        create_notification,
-        notify_admins,
-        notify_landlord,
-    )
+    from .models import NotificationType
+    from .outbox import publish
+    from .realtime import push
     from users.models import User
     from bookings.models import Booking
     from properties.models import Apartment, VerificationStatus
+    from wallet.models import WalletTransaction
 
     # ================= USER SIGNALS =================
 
@@ -32,7 +32,8 @@ def register_notification_signals():
             if instance.role == User.ROLE_ADMIN:
                 return
 
-            notify_admins(
+            publish(
+                recipient_role=User.ROLE_ADMIN,
                 notification_type=NotificationType.USER_REGISTRATION,
                 title="New User Registration",
                 message=f"A new {instance.get_role_display()} '{instance.username}' has registered and requires verification.",
@@ -46,8 +47,8 @@ def register_notification_signals():
     def booking_created_notification(sender, instance, created, **kwargs):
         """Notify landlord when a new booking is requested."""
         if created and instance.booking_status == "PENDING":
-            notify_landlord(
-                landlord=instance.landlord,
+            publish(
+                recipient=instance.landlord,
                 notification_type=NotificationType.BOOKING_REQUEST,
                 title="New Booking Request",
                 message=f"{instance.tenant.full_name or instance.tenant.username} has requested to book {instance.unit}.",
@@ -56,7 +57,8 @@ def register_notification_signals():
             )
 
             # Also notify admins
-            notify_admins(
+            publish(
+                recipient_role=User.ROLE_ADMIN,
                 notification_type=NotificationType.BOOKING_REQUEST,
                 title="New Booking Request",
                 message=f"A new booking request for {instance.unit} from {instance.tenant.username} is pending approval.",
@@ -67,25 +69,22 @@ def register_notification_signals():
     @receiver(post_save, sender=Booking)
     def booking_confirmed_notification(sender, instance, created, **kwargs):
         """Notify tenant when booking is confirmed."""
-        if not created and instance.booking_status == "CONFIRMED":
-            # Get previous status
-            old_status = Booking.objects.get(id=instance.id).booking_status
-            if old_status != "CONFIRMED":
-                create_notification(
-                    recipient=instance.tenant,
-                    notification_type=NotificationType.BOOKING_CONFIRMED,
-                    title="Booking Confirmed",
-                    message=f"Your booking for {instance.unit} has been confirmed!",
-                    related_object_type="Booking",
-                    related_object_id=instance.id,
-                )
+        if not created and instance.booking_status == "CONFIRMED" and instance.has_changed("booking_status"):
+            publish(
+                recipient=instance.tenant,
+                notification_type=NotificationType.BOOKING_CONFIRMED,
+                title="Booking Confirmed",
+                message=f"Your booking for {instance.unit} has been confirmed!",
+                related_object_type="Booking",
+                related_object_id=instance.id,
+            )
 
     @receiver(post_save, sender=Booking)
     def booking_cancelled_notification(sender, instance, created, **kwargs):
         """Notify parties when booking is cancelled."""
-        if not created and instance.booking_status == "CANCELLED":
+        if not created and instance.booking_status == "CANCELLED" and instance.has_changed("booking_status"):
             # Notify tenant
-            create_notification(
+            publish(
                 recipient=instance.tenant,
                 notification_type=NotificationType.BOOKING_CANCELLED,
                 title="Booking Cancelled",
@@ -95,8 +94,8 @@ def register_notification_signals():
             )
 
             # Notify landlord
-            notify_landlord(
-                landlord=instance.landlord,
+            publish(
+                recipient=instance.landlord,
                 notification_type=NotificationType.BOOKING_CANCELLED,
                 title="Booking Cancelled",
                 message=f"Booking for {instance.unit} by {instance.tenant.username} has been cancelled.",
@@ -107,10 +106,10 @@ def register_notification_signals():
     @receiver(post_save, sender=Booking)
     def booking_payment_notification(sender, instance, created, **kwargs):
         """Notify landlord when payment is received."""
-        if not created and instance.payment_status == "COMPLETED":
+        if not created and instance.payment_status == "COMPLETED" and instance.has_changed("payment_status"):
             # Notify landlord
-            notify_landlord(
-                landlord=instance.landlord,
+            publish(
+                recipient=instance.landlord,
                 notification_type=NotificationType.BOOKING_PAYMENT,
                 title="Payment Received",
                 message=f"Payment of KES {instance.booking_amount} received for booking {instance.booking_confirmation_code}.",
@@ -118,19 +117,50 @@ def register_notification_signals():
                 related_object_id=instance.id,
             )
 
+    @receiver(post_save, sender=Booking)
+    def booking_payment_push(sender, instance, created, **kwargs):
+        """Push booking payment state changes to both parties' open streams."""
+        if created or not instance.has_changed("payment_status"):
+            return
+        data = {
+            "booking_id": instance.id,
+            "booking_status": instance.booking_status,
+            "payment_status": instance.payment_status,
+        }
+        push(instance.tenant_id, "booking", data)
+        push(instance.landlord_id, "booking", data)
+
+    # ================= PAYMENT SIGNALS =================
+
+    @receiver(post_save, sender=WalletTransaction)
+    def wallet_transaction_push(sender, instance, created, **kwargs):
+        """Push wallet transaction status changes to the wallet owner."""
+        if not instance.has_changed("status"):
+            return
+        push(
+            instance.wallet.user_id,
+            "payment",
+            {
+                "transaction_id": instance.id,
+                "transaction_type": instance.transaction_type,
+                "status": instance.status,
+                "amount": instance.amount,
+                "booking_id": instance.booking_id,
+            },
+        )
+
     # ================= APARTMENT SIGNALS =================
 
     @receiver(post_save, sender=Apartment)
     def apartment_submitted_notification(sender, instance, created, **kwargs):
         """Notify admins when a new apartment is submitted for verification."""
         if created or (
-            not created
-            and instance.verification_status == VerificationStatus.PENDING
-            and Apartment.objects.get(id=instance.id).verification_status
-            != VerificationStatus.PENDING
+            instance.verification_status == VerificationStatus.PENDING
+            and instance.has_changed("verification_status")
         ):
             # Check if this is a new submission (was NOT_REQUESTED -> PENDING)
-            notify_admins(
+            publish(
+                recipient_role=User.ROLE_ADMIN,
                 notification_type=NotificationType.APARTMENT_SUBMITTED,
                 title="New Apartment Submission",
                 message=f"New apartment '{instance.name}' by {instance.landlord.username} submitted for verification.",
@@ -141,34 +171,32 @@ def register_notification_signals():
     @receiver(post_save, sender=Apartment)
     def apartment_verified_notification(sender, instance, created, **kwargs):
         """Notify landlord when apartment is verified."""
-        if not created and instance.verification_status == VerificationStatus.VERIFIED:
-            # Get old status
-            old = Apartment.objects.get(id=instance.id).verification_status
-            if old != VerificationStatus.VERIFIED:
-                create_notification(
-                    recipient=instance.landlord,
-                    notification_type=NotificationType.APARTMENT_VERIFIED,
-                    title="Apartment Verified",
-                    message=f"Your apartment '{instance.name}' has been verified and is pending final approval.",
-                    related_object_type="Apartment",
-                    related_object_id=instance.id,
-                )
+        if (
+            not created
+            and instance.verification_status == VerificationStatus.VERIFIED
+            and instance.has_changed("verification_status")
+        ):
+            publish(
+                recipient=instance.landlord,
+                notification_type=NotificationType.APARTMENT_VERIFIED,
+                title="Apartment Verified",
+                message=f"Your apartment '{instance.name}' has been verified and is pending final approval.",
+                related_object_type="Apartment",
+                related_object_id=instance.id,
+            )
 
     @receiver(post_save, sender=Apartment)
     def apartment_approved_notification(sender, instance, created, **kwargs):
         """Notify landlord when apartment is approved."""
-        if not created and instance.is_approved:
-            # Get old is_approved
-            old = Apartment.objects.get(id=instance.id).is_approved
-            if not old:
-                create_notification(
-                    recipient=instance.landlord,
-                    notification_type=NotificationType.APARTMENT_APPROVED,
-                    title="Apartment Approved",
-                    message=f"Congratulations! Your apartment '{instance.name}' has been approved and is now live.",
-                    related_object_type="Apartment",
-                    related_object_id=instance.id,
-                )
+        if not created and instance.is_approved and instance.has_changed("is_approved"):
+            publish(
+                recipient=instance.landlord,
+                notification_type=NotificationType.APARTMENT_APPROVED,
+                title="Apartment Approved",
+                message=f"Congratulations! Your apartment '{instance.name}' has been approved and is now live.",
+                related_object_type="Apartment",
+                related_object_id=instance.id,
+            )
 
 
 # Note: Signals are connected when this module is imported
@@ -0,0 +1,98 @@
+"""
+Server-Sent Events endpoint for real-time notifications.
+
+This is a plain async Django view (DRF views are sync only), so it must be
+served by an ASGI server via tyrent_backend.asgi; the Procfile runs gunicorn
+with uvicorn workers. Under WSGI, Django consumes an async streaming
+response completely before sending any of it, so clients would see nothing
+until the stream closed, and each open stream would hold a worker thread.
+
+Clients connect with ``EventSource``. Since EventSource cannot set
+headers, the token (legacy key or JWT access token) may be passed as
+``?token=``. Each connection is closed
+after ``NOTIFICATION_STREAM_MAX_SECONDS``; the browser reconnects on its
+own, sending ``Last-Event-ID`` so nothing published in between is lost.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import exceptions
+
+from .realtime import get_channel
+
+RETRY_MILLISECONDS = 3000
+
+
+def _authenticate(request):
+    from users.authentication import FlexibleTokenAuthentication, StatelessJWTAuthentication
+
+    try:
+        key = request.GET.get("token")
+        if key and key.count(".") == 2:
+            authenticator = StatelessJWTAuthentication()
+            return authenticator.get_user(authenticator.get_validated_token(key))
+        if key:
+            user, _ = FlexibleTokenAuthentication().authenticate_credentials(key)
+            return user
+        for authenticator in (StatelessJWTAuthentication(), FlexibleTokenAuthentication()):
+            result = authenticator.authenticate(request)
+            if result:
+                return result[0]
+    except exceptions.AuthenticationFailed:
+        return None
+    return None
+
+
+def _format(event_id, event, data):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {data}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def _event_stream(user, last_event_id):
+    from .counters import unread_counts
+
+    channel = get_channel()
+    heartbeat = settings.NOTIFICATION_STREAM_HEARTBEAT_SECONDS
+    max_seconds = settings.NOTIFICATION_STREAM_MAX_SECONDS
+
+    yield f"retry: {RETRY_MILLISECONDS}\n\n"
+
+    if last_event_id is None:
+        # Fresh connection: start from "now" and send the current badge.
+        last_event_id = await sync_to_async(channel.latest_id)(user.id)
+        personal, broadcasts = await sync_to_async(unread_counts)(user)
+        yield _format(
+            last_event_id,
+            "unread_count",
+            json.dumps({"unread_count": personal + broadcasts, "personal": personal, "broadcasts": broadcasts}),
+        )
+
+    started = timezone.now()
+    async with channel.reader(user.id) as read:
+        while (timezone.now() - started).total_seconds() < max_seconds:
+            events = await read(last_event_id, timeout=heartbeat)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event_id, event, data in events:
+                last_event_id = event_id
+                yield _format(event_id, event, data)
+
+
+async def notification_stream(request):
+    user = await sync_to_async(_authenticate)(request)
+    if user is None or not user.is_active:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    response = StreamingHttpResponse(_event_stream(user, last_event_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
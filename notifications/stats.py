@@ -0,0 +1,118 @@
+"""
+Maintained notification statistics.
+
+NotificationStat holds total and unread counts per (type, recipient role),
+adjusted by the same code paths that create, read and delete
+notifications. The admin stats endpoint sums these few rows instead of
+scanning and joining the notification tables. ``rebuild`` recomputes
+them from the hot and archive tables and runs nightly to repair drift.
+
+There are only a handful of rows and every delivery touches one, so they
+are hot. ``record`` never updates them inside the caller's transaction:
+the deltas are applied after commit, each as a single short UPDATE, so a
+delivery doesn't hold a stats row lock for as long as its own work takes.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F, Q
+
+from .models import ArchivedNotification, Notification, NotificationStat
+
+
+def record(deltas):
+    """
+    Apply ``{(type, role): (total_delta, unread_delta)}`` to the stats rows,
+    after the surrounding transaction commits (and not at all if it rolls
+    back).
+    """
+    deltas = {key: value for key, value in deltas.items() if any(value)}
+    if not deltas:
+        return
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _apply(deltas))
+    else:
+        _apply(deltas)
+
+
+def _apply(deltas):
+    for (notification_type, role), (total, unread) in deltas.items():
+        updated = NotificationStat.objects.filter(type=notification_type, role=role).update(
+            total=F("total") + total, unread=F("unread") + unread
+        )
+        if not updated:
+            with transaction.atomic():
+                stat, created = NotificationStat.objects.select_for_update().get_or_create(
+                    type=notification_type, role=role, defaults={"total": total, "unread": unread}
+                )
+                if not created:
+                    NotificationStat.objects.filter(pk=stat.pk).update(
+                        total=F("total") + total, unread=F("unread") + unread
+                    )
+
+
+def record_created(notification_type, roles):
+    """Count new unread notifications of one type, given each recipient's role."""
+    record({(notification_type, role): (count, count) for role, count in Counter(roles).items()})
+
+
+def record_read(role, counts_by_type):
+    """Count notifications that went from unread to read, as ``{type: count}``."""
+    record({(notification_type, role): (0, -count) for notification_type, count in counts_by_type.items()})
+
+
+def record_deleted(notification_type, role, was_unread):
+    record({(notification_type, role): (-1, -1 if was_unread else 0)})
+
+
+def rebuild():
+    """
+    Recompute every stats row from the notification tables. The rows are
+    locked first and updated in place, so increments that queue behind the
+    rebuild apply on top of it instead of being wiped by a delete.
+    """
+    with transaction.atomic():
+        stats = {(stat.type, stat.role): stat for stat in NotificationStat.objects.select_for_update()}
+
+        totals = Counter()
+        for model in (Notification, ArchivedNotification):
+            rows = (
+                model.objects.values("type", "recipient__role")
+                .annotate(total=Count("id"), unread=Count("id", filter=Q(is_read=False)))
+                .order_by()
+            )
+            for row in rows:
+                key = (row["type"], row["recipient__role"] or "")
+                totals[key + ("total",)] += row["total"]
+                totals[key + ("unread",)] += row["unread"]
+
+        changed, missing = [], []
+        for key in stats.keys() | {key[:2] for key in totals}:
+            total, unread = totals[key + ("total",)], totals[key + ("unread",)]
+            stat = stats.get(key)
+            if stat is None:
+                missing.append(NotificationStat(type=key[0], role=key[1], total=total, unread=unread))
+            elif (stat.total, stat.unread) != (total, unread):
+                stat.total, stat.unread = total, unread
+                changed.append(stat)
+        NotificationStat.objects.bulk_update(changed, ["total", "unread"])
+        NotificationStat.objects.bulk_create(missing, ignore_conflicts=True)
+    return len(stats) + len(missing)
+
+
+def summary():
+    """Totals, unread and per-type / per-role breakdowns from the stats rows."""
+    by_type = Counter()
+    by_role = Counter()
+    total = unread = 0
+    for stat in NotificationStat.objects.all():
+        total += stat.total
+        unread += stat.unread
+        by_type[stat.type] += stat.total
+        by_role[stat.role] += stat.total
+    return {
+        "total": total,
+        "unread": unread,
+        "by_type": [{"type": key, "count": count} for key, count in by_type.most_common() if count],
+        "by_role": [{"recipient__role": key, "count": count} for key, count in by_role.most_common() if count],
+    }
@@ -0,0 +1,110 @@
+from celery import shared_task
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=10)
+def deliver_notification_event(self, event_id):
+    """Fan a NotificationEvent out into per-recipient notifications."""
+    from .outbox import deliver, mark_failed_attempt
+
+    try:
+        delivered = deliver(event_id)
+    except Exception as e:
+        logger.error(f"Delivering notification event {event_id} failed: {e}")
+        mark_failed_attempt(event_id, e)
+        raise self.retry(exc=e)
+
+    if delivered is None:
+        return "Skipped"
+    return f"Delivered {delivered}"
+
+
+@shared_task
+def deliver_notification_events(event_ids):
+    """Deliver single-recipient events written by ``publish_many``, a chunk per transaction."""
+    from .outbox import deliver_many, mark_failed_attempt
+
+    size = settings.NOTIFICATION_FANOUT_BATCH_SIZE
+    delivered = 0
+    for start in range(0, len(event_ids), size):
+        chunk = event_ids[start:start + size]
+        try:
+            delivered += deliver_many(chunk)
+        except Exception as e:
+            # Left pending; the outbox sweeper retries them one by one.
+            logger.error(f"Delivering {len(chunk)} notification events failed: {e}")
+            for event_id in chunk:
+                mark_failed_attempt(event_id, e)
+    return f"Delivered {delivered}"
+
+
+@shared_task
+def flush_notification_outbox():
+    """Runs every minute — re-dispatches events whose delivery task never ran."""
+    from .models import NotificationEvent
+    from .outbox import _dispatch
+
+    cutoff = timezone.now() - timedelta(seconds=settings.NOTIFICATION_OUTBOX_RETRY_SECONDS)
+    event_ids = list(
+        NotificationEvent.objects.filter(
+            status=NotificationEvent.STATUS_PENDING, created_at__lt=cutoff
+        ).values_list("id", flat=True)[:1000]
+    )
+    for event_id in event_ids:
+        _dispatch(event_id)
+
+    if event_ids:
+        logger.info(f"Re-dispatched {len(event_ids)} pending notification events")
+    return f"Re-dispatched {len(event_ids)}"
+
+
+@shared_task
+def archive_notifications():
+    """Runs nightly — moves old read notifications out of the hot table."""
+    from .retention import archive_read_notifications
+
+    archived = archive_read_notifications(max_batches=settings.NOTIFICATION_ARCHIVE_MAX_BATCHES)
+    return f"Archived {archived}"
+
+
+@shared_task
+def rebuild_notification_stats():
+    """Runs nightly — recomputes NotificationStat to repair any drift."""
+    from .stats import rebuild
+
+    rows = rebuild()
+    return f"Rebuilt {rows} stats rows"
+
+
+@shared_task
+def reconcile_unread_counters():
+    """Runs nightly — recounts unread counters that drifted from the notifications."""
+    from .counters import reconcile
+
+    fixed = reconcile()
+    return f"Reconciled {fixed} unread counters"
+
+
+@shared_task
+def send_queued_emails():
+    """Runs every minute and after each enqueue — sends due queued emails in batches."""
+    from .emails import send_pending
+
+    sent, failed = send_pending()
+    if failed:
+        logger.warning(f"{failed} queued emails failed and were rescheduled")
+    return f"Sent {sent}, failed {failed}"
+
+
+@shared_task
+def send_notification_digests():
+    """Runs hourly — queues one digest email per user with new unread notifications."""
+    from .emails import build_digests
+
+    queued = build_digests()
+    return f"Queued {queued} digests"
@@ -0,0 +1,671 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from bookings.models import Booking
+from properties.models import Apartment, Unit
+from .models import Notification, NotificationEvent, NotificationSetting, NotificationType
+from .outbox import deliver, publish
+from .tasks import flush_notification_outbox
+
+User = get_user_model()
+
+
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.admins = [
+            User.objects.create_user(
+                username=f"outbox_admin{i}", email=f"outbox_admin{i}@test.com", password="password", role="ADMIN"
+            )
+            for i in range(3)
+        ]
+        self.landlord = User.objects.create_user(
+            username="outbox_landlord", email="outbox_landlord@test.com", password="password", role="LANDLORD"
+        )
+        self.tenant = User.objects.create_user(
+            username="outbox_tenant", email="outbox_tenant@test.com", password="password", role="TENANT"
+        )
+        apartment = Apartment.objects.create(landlord=self.landlord, name="Outbox Apartment")
+        self.unit = Unit.objects.create(apartment=apartment, unit_number_or_id="O1", price_per_month=1000)
+        Notification.objects.all().delete()
+        NotificationEvent.objects.all().delete()
+
+    def _book(self):
+        return Booking.objects.create(
+            unit=self.unit,
+            tenant=self.tenant,
+            landlord=self.landlord,
+            move_in_date=date.today(),
+            booking_amount=1000,
+        )
+
+    def test_signal_writes_events_and_defers_fan_out(self):
+        self._book()
+        self.assertEqual(NotificationEvent.objects.filter(type=NotificationType.BOOKING_REQUEST).count(), 2)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_fan_out_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._book()
+        self.assertEqual(Notification.objects.filter(recipient=self.landlord).count(), 1)
+        self.assertEqual(Notification.objects.filter(recipient__role="ADMIN").count(), 3)
+        self.assertFalse(NotificationEvent.objects.filter(status=NotificationEvent.STATUS_PENDING).exists())
+
+    def test_write_path_cost_does_not_grow_with_admins(self):
+        with self.assertNumQueries(1):
+            publish(NotificationType.GENERAL, "Hello", "Admins", recipient_role="ADMIN")
+        for i in range(10):
+            User.objects.create_user(
+                username=f"extra_admin{i}", email=f"extra_admin{i}@test.com", password="password", role="ADMIN"
+            )
+        with self.assertNumQueries(1):
+            publish(NotificationType.GENERAL, "Hello", "Admins", recipient_role="ADMIN")
+
+    def test_respects_notification_settings(self):
+        NotificationSetting.objects.create(user=self.admins[0], notify_booking_requests=False)
+        event = publish(NotificationType.BOOKING_REQUEST, "Request", "New booking", recipient_role="ADMIN")
+        self.assertEqual(deliver(event.id), 2)
+        self.assertFalse(Notification.objects.filter(recipient=self.admins[0]).exists())
+
+    @override_settings(NOTIFICATION_FANOUT_BATCH_SIZE=2)
+    def test_delivers_in_batches_exactly_once(self):
+        event = publish(NotificationType.GENERAL, "Hello", "Everyone", recipient_role="ADMIN")
+        self.assertEqual(deliver(event.id), 3)
+        self.assertIsNone(deliver(event.id))
+        self.assertEqual(Notification.objects.count(), 3)
+
+    def test_deliver_many_costs_the_same_for_any_chunk_size(self):
+        from .counters import unread_counts
+        from .outbox import deliver_many, publish_many
+
+        NotificationSetting.objects.create(user=self.admins[0], notify_booking_requests=False)
+
+        def deliver_for(users):
+            events = publish_many(NotificationType.BOOKING_REQUEST, "Hi", "m", [user.id for user in users])
+            with CaptureQueriesContext(connection) as queries:
+                delivered = deliver_many([event.id for event in events])
+            return delivered, len(queries)
+
+        few = deliver_for(self.admins[:2])
+        many = deliver_for(self.admins + [self.landlord, self.tenant])
+        self.assertEqual((few[0], many[0]), (1, 4))
+        self.assertEqual(few[1], many[1])
+
+        self.assertFalse(NotificationEvent.objects.filter(status=NotificationEvent.STATUS_PENDING).exists())
+        self.assertEqual(unread_counts(self.admins[1])[0], 2)
+        self.assertEqual(deliver_many(list(NotificationEvent.objects.values_list("id", flat=True))), 0)
+
+    @override_settings(NOTIFICATION_OUTBOX_RETRY_SECONDS=0)
+    def test_sweeper_delivers_stranded_events(self):
+        publish(NotificationType.GENERAL, "Hello", "Landlord", recipient=self.landlord)
+        flush_notification_outbox()
+        self.assertEqual(Notification.objects.filter(recipient=self.landlord).count(), 1)
+
+
+class BroadcastTests(TestCase):
+    def setUp(self):
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username="broadcast_admin", email="broadcast_admin@test.com", password="password", role="ADMIN"
+        )
+        self.tenants = [
+            User.objects.create_user(
+                username=f"broadcast_tenant{i}", email=f"broadcast_tenant{i}@test.com", password="password",
+                role="TENANT",
+            )
+            for i in range(3)
+        ]
+        self.landlord = User.objects.create_user(
+            username="broadcast_landlord", email="broadcast_landlord@test.com", password="password",
+            role="LANDLORD",
+        )
+
+    def _send(self, **data):
+        self.client.force_authenticate(self.admin)
+        payload = {"type": NotificationType.GENERAL, "title": "Maintenance", "message": "Downtime tonight"}
+        payload.update(data)
+        return self.client.post("/api/notifications/admin/send_to_role/", payload, format="json")
+
+    def test_send_to_role_stores_one_row(self):
+        from notifications.models import Broadcast
+
+        response = self._send(recipient_role="TENANT")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Broadcast.objects.count(), 1)
+        self.assertEqual(Notification.objects.filter(type=NotificationType.GENERAL).count(), 0)
+
+    def test_send_to_role_requires_admin(self):
+        self.client.force_authenticate(self.tenants[0])
+        response = self.client.post(
+            "/api/notifications/admin/send_to_role/",
+            {"recipient_role": "TENANT", "type": "GENERAL", "title": "x", "message": "y"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_list_merges_personal_and_broadcast(self):
+        tenant = self.tenants[0]
+        Notification.objects.create(recipient=tenant, type=NotificationType.GENERAL, title="Personal", message="m")
+        self._send(recipient_role="TENANT")
+
+        self.client.force_authenticate(tenant)
+        response = self.client.get("/api/notifications/")
+        self.assertEqual(response.status_code, 200)
+        titles = [item["title"] for item in response.data["notifications"]]
+        self.assertIn("Maintenance", titles)
+        self.assertIn("Personal", titles)
+        self.assertEqual(response.data["unread_count"], 2)
+
+        self.client.force_authenticate(self.landlord)
+        response = self.client.get("/api/notifications/")
+        self.assertNotIn("Maintenance", [item["title"] for item in response.data["notifications"]])
+
+    def test_read_receipts_are_per_user(self):
+        broadcast_id = self._send(recipient_role="TENANT").data["broadcast_id"]
+
+        self.client.force_authenticate(self.tenants[0])
+        response = self.client.post(f"/api/notifications/{broadcast_id}/read/")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get("/api/notifications/", {"is_read": "false"})
+        self.assertEqual(response.data["count"], 0)
+
+        self.client.force_authenticate(self.tenants[1])
+        response = self.client.get("/api/notifications/", {"is_read": "false"})
+        self.assertEqual(response.data["count"], 1)
+        self.client.post("/api/notifications/mark-all-read/")
+        response = self.client.get("/api/notifications/unread/")
+        self.assertEqual(response.data["count"], 0)
+
+    def test_materialize_fans_out_in_background(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self._send(recipient_role="TENANT", materialize=True)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Notification.objects.filter(type=NotificationType.GENERAL).count(), 3)
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.test import APIClient
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="counter_tenant", email="counter_tenant@test.com", password="password", role="TENANT"
+        )
+        self.admin = User.objects.create_user(
+            username="counter_admin", email="counter_admin@test.com", password="password", role="ADMIN"
+        )
+        self.client.force_authenticate(self.user)
+
+    def _notify(self, title="Hello"):
+        from .models import create_notification
+
+        return create_notification(self.user, NotificationType.GENERAL, title, "message")
+
+    def _badge(self, **headers):
+        return self.client.get("/api/notifications/unread-count/", **headers)
+
+    def test_counter_follows_create_read_and_mark_all(self):
+        first = self._notify()
+        self._notify()
+        self.assertEqual(self._badge().data["unread_count"], 2)
+
+        self.client.post(f"/api/notifications/{first.id}/read/")
+        self.client.post(f"/api/notifications/{first.id}/read/")
+        self.assertEqual(self._badge().data["unread_count"], 1)
+
+        self.client.post("/api/notifications/mark-all-read/")
+        self.assertEqual(self._badge().data["unread_count"], 0)
+
+    def test_badge_served_from_cache(self):
+        self._notify()
+        self._badge()
+        with self.assertNumQueries(0):
+            response = self._badge()
+        self.assertEqual(response.data["unread_count"], 1)
+
+    def test_falls_back_to_db_column_when_cache_is_cold(self):
+        from django.core.cache import cache
+        from .models import NotificationCounter
+
+        self._notify()
+        self._badge()
+        cache.clear()
+        self.assertEqual(NotificationCounter.objects.get(user=self.user).unread, 1)
+        self.assertEqual(self._badge().data["unread_count"], 1)
+
+    def test_etag_not_modified(self):
+        self._notify()
+        etag = self._badge()["ETag"]
+        self.assertEqual(self._badge(HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self._notify()
+        self.assertEqual(self._badge(HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_is_read_cannot_be_patched(self):
+        notification = self._notify()
+        self._badge()
+        self.client.patch(f"/api/notifications/{notification.id}/", {"is_read": True}, format="json")
+        notification.refresh_from_db()
+        self.assertFalse(notification.is_read)
+        self.assertEqual(self._badge().data["unread_count"], 1)
+
+    def test_admin_update_and_delete_keep_counter(self):
+        notification = self._notify()
+        self._badge()
+        self.client.force_authenticate(self.admin)
+        self.client.get("/api/notifications/unread-count/")
+
+        response = self.client.patch(
+            f"/api/notifications/admin/{notification.id}/", {"recipient": str(self.admin.id)}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._badge().data["unread_count"], 1)
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self._badge().data["unread_count"], 0)
+
+        self.client.force_authenticate(self.admin)
+        self.client.delete(f"/api/notifications/admin/{notification.id}/")
+        self.assertEqual(self._badge().data["unread_count"], 0)
+
+    def test_django_admin_bulk_delete_keeps_counter(self):
+        from django.contrib import admin
+
+        notification = self._notify()
+        self._badge()
+        admin.site._registry[Notification].delete_queryset(None, Notification.objects.filter(pk=notification.pk))
+        self.assertEqual(self._badge().data["unread_count"], 0)
+
+    def test_reconcile_repairs_drift(self):
+        from .counters import reconcile
+        from .models import NotificationCounter
+
+        self._notify()
+        self._badge()
+        NotificationCounter.objects.filter(user=self.user).update(unread=7)
+        self.assertEqual(reconcile(), 1)
+        self.assertEqual(NotificationCounter.objects.get(user=self.user).unread, 1)
+        self.assertEqual(self._badge().data["unread_count"], 1)
+        self.assertEqual(reconcile(), 0)
+
+    def test_broadcasts_counted_and_cleared(self):
+        self._badge()
+        self.client.force_authenticate(self.admin)
+        broadcast_id = self.client.post(
+            "/api/notifications/admin/send_to_role/",
+            {"recipient_role": "TENANT", "type": "GENERAL", "title": "News", "message": "m"},
+            format="json",
+        ).data["broadcast_id"]
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self._badge().data["broadcasts"], 1)
+        self.client.post(f"/api/notifications/{broadcast_id}/read/")
+        self.assertEqual(self._badge().data["broadcasts"], 0)
+
+    def test_outbox_delivery_increments_counter(self):
+        self._badge()
+        with self.captureOnCommitCallbacks(execute=True):
+            publish(NotificationType.GENERAL, "Hello", "Tenant", recipient=self.user)
+        self.assertEqual(self._badge().data["unread_count"], 1)
+
+
+@override_settings(NOTIFICATION_STREAM_HEARTBEAT_SECONDS=0.1, NOTIFICATION_STREAM_MAX_SECONDS=0.3)
+class NotificationStreamTests(TestCase):
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+        from .realtime import get_channel
+
+        self.channel = get_channel()
+        self.channel.clear()
+        self.user = User.objects.create_user(
+            username="stream_tenant", email="stream_tenant@test.com", password="password", role="TENANT"
+        )
+        self.token = Token.objects.create(user=self.user)
+
+    def _read_stream(self, **extra):
+        from asgiref.sync import async_to_sync
+        from django.test import RequestFactory
+        from .sse import notification_stream
+
+        request = RequestFactory().get("/api/notifications/stream/", {"token": self.token.key}, **extra)
+        response = async_to_sync(notification_stream)(request)
+        if response.status_code != 200:
+            return response, ""
+
+        async def collect():
+            return "".join([chunk.decode() async for chunk in response.streaming_content])
+
+        return response, async_to_sync(collect)()
+
+    def _create(self, title):
+        from .models import create_notification
+
+        with self.captureOnCommitCallbacks(execute=True):
+            return create_notification(self.user, NotificationType.GENERAL, title, "message")
+
+    def test_rejects_missing_token(self):
+        from asgiref.sync import async_to_sync
+        from django.test import RequestFactory
+        from .sse import notification_stream
+
+        response = async_to_sync(notification_stream)(RequestFactory().get("/api/notifications/stream/"))
+        self.assertEqual(response.status_code, 401)
+
+    def test_new_notifications_are_pushed(self):
+        response, body = self._read_stream()
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertIn("event: unread_count", body)
+
+        self._create("Pushed")
+        _, body = self._read_stream(HTTP_LAST_EVENT_ID="0")
+        self.assertIn("event: notification", body)
+        self.assertIn("Pushed", body)
+
+    def test_reconnect_replays_only_missed_events(self):
+        self._create("First")
+        last_id = self.channel.latest_id(self.user.id)
+        self._create("Second")
+
+        _, body = self._read_stream(HTTP_LAST_EVENT_ID=last_id)
+        self.assertIn("Second", body)
+        self.assertNotIn("First", body)
+
+    def test_payment_status_change_is_pushed(self):
+        from wallet.models import Wallet, WalletTransaction
+
+        wallet = Wallet.objects.create(user=self.user, wallet_type="LANDLORD")
+        with self.captureOnCommitCallbacks(execute=True):
+            txn = WalletTransaction.objects.create(wallet=wallet, transaction_type="DEPOSIT", amount=100)
+        txn = WalletTransaction.objects.select_related("wallet").get(pk=txn.pk)
+        with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(1):
+            txn.status = "COMPLETED"
+            txn.save(update_fields=["status"])
+
+        _, body = self._read_stream(HTTP_LAST_EVENT_ID="0")
+        self.assertEqual(body.count("event: payment"), 2)
+        self.assertIn('"status": "COMPLETED"', body)
+
+    def test_nothing_pushed_on_rollback(self):
+        from django.db import transaction
+
+        try:
+            with transaction.atomic():
+                from .models import create_notification
+
+                create_notification(self.user, NotificationType.GENERAL, "Rolled back", "message")
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(self.channel.latest_id(self.user.id), "0")
+
+
+# The ASGI handler runs each request's database work in its own thread, so
+# the rows must be committed rather than held in a TestCase transaction.
+@override_settings(NOTIFICATION_STREAM_HEARTBEAT_SECONDS=5, NOTIFICATION_STREAM_MAX_SECONDS=60)
+class NotificationStreamASGITests(TransactionTestCase):
+    def setUp(self):
+        from rest_framework.authtoken.models import Token
+
+        self.user = User.objects.create_user(
+            username="asgi_tenant", email="asgi_tenant@test.com", password="password", role="TENANT"
+        )
+        self.token = Token.objects.create(user=self.user)
+
+    def test_first_event_arrives_before_stream_closes(self):
+        """Through the ASGI app the badge event is flushed at once, not when the stream ends."""
+        from asgiref.sync import async_to_sync
+        from asgiref.testing import ApplicationCommunicator
+        from tyrent_backend.asgi import application
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/api/notifications/stream/",
+            "raw_path": b"/api/notifications/stream/",
+            "query_string": f"token={self.token.key}".encode(),
+            "headers": [(b"host", b"testserver")],
+            "server": ("testserver", 80),
+            "client": ("127.0.0.1", 50000),
+        }
+
+        async def read_first_event():
+            communicator = ApplicationCommunicator(application, scope)
+            await communicator.send_input({"type": "http.request", "body": b"", "more_body": False})
+            start = await communicator.receive_output(timeout=5)
+            body = b""
+            while b"event: unread_count" not in body:
+                # Far below NOTIFICATION_STREAM_MAX_SECONDS: a buffered stream would time out here.
+                message = await communicator.receive_output(timeout=5)
+                body += message.get("body", b"")
+            await communicator.send_input({"type": "http.disconnect"})
+            await communicator.wait(timeout=5)
+            return start, body.decode()
+
+        start, body = async_to_sync(read_first_event)()
+        self.assertEqual(start["status"], 200)
+        self.assertIn('"unread_count": 0', body)
+
+
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import create_notification
+
+        self.user = User.objects.create_user(
+            username="retention_tenant", email="retention_tenant@test.com", password="password", role="TENANT"
+        )
+        self.old = timezone.now() - timedelta(days=200)
+        # Stats are applied on commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.notifications = [
+                create_notification(self.user, NotificationType.GENERAL, f"Old {i}", "message") for i in range(5)
+            ]
+            Notification.objects.filter(recipient=self.user).update(created_at=self.old)
+            for notification in self.notifications[:4]:
+                notification.mark_as_read()
+            self.recent = create_notification(self.user, NotificationType.GENERAL, "Recent", "message")
+            self.recent.mark_as_read()
+
+    def test_archives_only_old_read_notifications_in_batches(self):
+        from .models import ArchivedNotification
+        from .retention import archive_read_notifications
+
+        self.assertEqual(archive_read_notifications(days=90, batch_size=3, max_batches=1), 3)
+        self.assertEqual(archive_read_notifications(days=90, batch_size=3), 1)
+
+        remaining = set(Notification.objects.filter(recipient=self.user).values_list("title", flat=True))
+        self.assertEqual(remaining, {"Old 4", "Recent"})
+        archived = ArchivedNotification.objects.get(id=self.notifications[0].id)
+        self.assertEqual(archived.created_at, self.old)
+
+    def test_stats_read_maintained_counters(self):
+        from rest_framework.test import APIClient
+        from .retention import archive_read_notifications
+
+        admin = User.objects.create_user(
+            username="retention_admin", email="retention_admin@test.com", password="password", role="ADMIN"
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        archive_read_notifications(days=90)
+
+        with self.assertNumQueries(1):
+            response = client.get("/api/notifications/admin/stats/")
+        self.assertEqual(response.data["total"], 6)
+        self.assertEqual(response.data["unread"], 1)
+        self.assertEqual(response.data["by_role"], [{"recipient__role": "TENANT", "count": 6}])
+
+    def test_rebuild_matches_maintained_counters(self):
+        from .models import NotificationStat
+        from .retention import archive_read_notifications
+        from .stats import rebuild, summary
+
+        archive_read_notifications(days=90)
+        before = summary()
+        ids = set(NotificationStat.objects.values_list("id", flat=True))
+        NotificationStat.objects.update(total=0, unread=0)
+        rebuild()
+        self.assertEqual(summary(), before)
+        # Updated in place rather than deleted and reinserted.
+        self.assertEqual(set(NotificationStat.objects.values_list("id", flat=True)), ids)
+
+    def test_stats_applied_after_commit(self):
+        from .stats import summary
+        from .models import create_notification
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            create_notification(self.user, NotificationType.GENERAL, "New", "message")
+            self.assertEqual(summary()["unread"], 1)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(summary()["unread"], 2)
+
+
+class EmailQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="mail_tenant", email="mail_tenant@test.com", password="password", role="TENANT"
+        )
+
+    def test_otp_email_is_queued_not_sent_inline(self):
+        from django.core import mail
+        import re
+        from users.utils import send_otp_email, verify_user_otp
+        from .models import OutgoingEmail
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            send_otp_email(self.user)
+        self.assertEqual(len(mail.outbox), 0)
+        queued = OutgoingEmail.objects.get()
+        self.assertEqual(queued.category, OutgoingEmail.CATEGORY_OTP)
+        self.assertIsNone(re.search(r"\d{6}", queued.body))
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual(len(mail.outbox), 1)
+        code = re.search(r"\b(\d{6})\b", mail.outbox[0].body).group(1)
+        self.assertTrue(verify_user_otp(self.user, code)[0])
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    @override_settings(EMAIL_MAX_ATTEMPTS=1)
+    def test_otp_codes_are_not_kept_with_the_email(self):
+        from unittest import mock
+        from django.core import mail
+        from django.core.cache import cache
+        from django.core.mail.backends.locmem import EmailBackend
+        from .emails import enqueue_otp_email, send_batch
+        from .models import DeadLetterEmail
+
+        expired = enqueue_otp_email("expired@test.com", "Code", "Your OTP is {otp}.", "123456", 60)
+        cache.clear()
+        self.assertEqual(send_batch(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+        enqueue_otp_email("bounce@test.com", "Code", "Your OTP is {otp}.", "654321", 60)
+        with mock.patch.object(EmailBackend, "send_messages", side_effect=ConnectionError("provider down")):
+            self.assertEqual(send_batch(), (0, 1))
+        dead = DeadLetterEmail.objects.get()
+        self.assertNotIn("654321", dead.body)
+        self.assertFalse(DeadLetterEmail.objects.filter(id=expired.id).exists())
+
+    def test_batches_share_one_connection(self):
+        from unittest import mock
+        from django.core.mail.backends.locmem import EmailBackend
+        from .emails import enqueue_email, send_pending
+
+        for i in range(5):
+            enqueue_email(f"user{i}@test.com", "Hello", "Body")
+        with override_settings(EMAIL_BATCH_SIZE=2), mock.patch.object(
+            EmailBackend, "open", autospec=True, return_value=True
+        ) as opened:
+            self.assertEqual(send_pending(), (5, 0))
+        self.assertEqual(opened.call_count, 3)
+
+    @override_settings(EMAIL_MAX_ATTEMPTS=2, EMAIL_RETRY_BASE_SECONDS=0)
+    def test_retries_then_dead_letters(self):
+        from unittest import mock
+        from django.core import mail
+        from django.core.mail.backends.locmem import EmailBackend
+        from .emails import enqueue_email, send_batch
+        from .models import DeadLetterEmail, OutgoingEmail
+
+        enqueue_email("bounce@test.com", "Hello", "Body")
+        with mock.patch.object(EmailBackend, "send_messages", side_effect=ConnectionError("provider down")):
+            self.assertEqual(send_batch(), (0, 1))
+            self.assertEqual(OutgoingEmail.objects.get().attempts, 1)
+            self.assertEqual(send_batch(), (0, 1))
+
+        self.assertFalse(OutgoingEmail.objects.exists())
+        dead = DeadLetterEmail.objects.get()
+        self.assertEqual((dead.to_email, dead.attempts), ("bounce@test.com", 2))
+        self.assertIn("provider down", dead.last_error)
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_emails_are_claimed_before_sending(self):
+        from unittest import mock
+        from django.utils import timezone
+        from django.core.mail.backends.locmem import EmailBackend
+        from .emails import enqueue_email, send_batch
+        from .models import OutgoingEmail
+
+        enqueue_email("user@test.com", "Hello", "Body")
+        statuses = []
+
+        def send_messages(backend, messages):
+            statuses.append(OutgoingEmail.objects.values_list("status", "claimed_until").get())
+            return len(messages)
+
+        with mock.patch.object(EmailBackend, "send_messages", autospec=True, side_effect=send_messages):
+            self.assertEqual(send_batch(), (1, 0))
+        self.assertEqual(statuses[0][0], OutgoingEmail.STATUS_SENDING)
+        self.assertGreater(statuses[0][1], timezone.now())
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_lapsed_claims_are_sent_again(self):
+        from datetime import timedelta
+        from django.core import mail
+        from django.utils import timezone
+        from .emails import send_batch
+        from .models import OutgoingEmail
+
+        now = timezone.now()
+        OutgoingEmail.objects.create(
+            to_email="lapsed@test.com", subject="Hello", body="Body",
+            status=OutgoingEmail.STATUS_SENDING, claimed_until=now - timedelta(seconds=1),
+        )
+        OutgoingEmail.objects.create(
+            to_email="claimed@test.com", subject="Hello", body="Body",
+            status=OutgoingEmail.STATUS_SENDING, claimed_until=now + timedelta(minutes=5),
+        )
+        self.assertEqual(send_batch(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ["lapsed@test.com"])
+        self.assertEqual(OutgoingEmail.objects.get().to_email, "claimed@test.com")
+
+    def test_digest_one_email_per_user_and_respects_settings(self):
+        from .emails import build_digests
+        from .models import OutgoingEmail, create_notification
+
+        other = User.objects.create_user(
+            username="mail_optout", email="mail_optout@test.com", password="password", role="TENANT"
+        )
+        NotificationSetting.objects.create(user=other, email_enabled=False)
+        for i in range(3):
+            create_notification(self.user, NotificationType.GENERAL, f"Update {i}", "message")
+        create_notification(other, NotificationType.GENERAL, "Hidden", "message")
+
+        self.assertEqual(build_digests(), 1)
+        digest = OutgoingEmail.objects.get(category=OutgoingEmail.CATEGORY_DIGEST)
+        self.assertEqual(digest.to_email, self.user.email)
+        self.assertIn("Update 2", digest.body)
+
+        # Already digested notifications are not emailed again.
+        self.assertEqual(build_digests(), 0)
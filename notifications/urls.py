@@ -1,5 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
+from .sse import notification_stream
 from .views import NotificationViewSet, NotificationSettingViewSet, AdminNotificationViewSet
 
 router = DefaultRouter()
@@ -7,4 +8,7 @@ router.register(r"", NotificationViewSet, basename="notification")
 router.register(r"settings", NotificationSettingViewSet, basename="notification-settings")
 router.register(r"admin", AdminNotificationViewSet, basename="admin-notification")
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = [
+    # Before the router: its empty-prefix detail route would swallow "stream/"
+    path("stream/", notification_stream, name="notification-stream"),
+] + router.urls
\ No newline at end of file
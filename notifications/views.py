@@ -1,16 +1,43 @@
+import heapq
+from itertools import islice
+
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.db.models import Count, Q
 
-from .models import Notification, NotificationSetting, NotificationType
+from users.permissions import IsAdmin
+from .models import (
+    Broadcast,
+    BroadcastReceipt,
+    Notification,
+    NotificationSetting,
+    NotificationType,
+    account_notifications,
+    create_notification,
+    delete_notification,
+    notification_state,
+    visible_broadcasts,
+)
+from .stats import record_read, summary as stats_summary
+from .counters import adjust_unread, bump_broadcast_generation, forget_broadcasts, unread_counts
 from .serializers import (
+    AdminNotificationSerializer,
+    BroadcastSerializer,
+    NotificationCreateSerializer,
     NotificationSerializer,
     NotificationSettingSerializer,
 )
 
 
+def _serialize_merged(items):
+    return [
+        BroadcastSerializer(item).data if isinstance(item, Broadcast) else NotificationSerializer(item).data
+        for item in items
+    ]
+
+
 class NotificationViewSet(viewsets.ModelViewSet):
     """ViewSet for managing user notifications."""
 
@@ -20,19 +47,32 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         return Notification.objects.filter(recipient=self.request.user)
 
-    def list(self, request, *args, **kwargs):
-        """List notifications for the current user."""
-        queryset = self.get_queryset()
-
+    def _filter(self, queryset):
         # Filter by read status
-        is_read = request.query_params.get("is_read")
+        is_read = self.request.query_params.get("is_read")
         if is_read is not None:
             queryset = queryset.filter(is_read=is_read.lower() == "true")
 
         # Filter by type
-        notification_type = request.query_params.get("type")
+        notification_type = self.request.query_params.get("type")
         if notification_type:
             queryset = queryset.filter(type=notification_type)
+        return queryset
+
+    def _merged(self, personal, broadcasts, start, end):
+        """Newest-first merge of personal notifications and broadcasts, sliced to [start:end]."""
+        merged = heapq.merge(
+            personal.order_by("-created_at")[:end],
+            broadcasts.order_by("-created_at")[:end],
+            key=lambda item: item.created_at,
+            reverse=True,
+        )
+        return list(islice(merged, start, end))
+
+    def list(self, request, *args, **kwargs):
+        """List personal notifications and broadcasts for the current user."""
+        personal = self._filter(self.get_queryset())
+        broadcasts = self._filter(visible_broadcasts(request.user))
 
         # Pagination
         page = int(request.query_params.get("page", 1))
@@ -40,13 +80,21 @@ class NotificationViewSet(viewsets.ModelViewSet):
         start = (page - 1) * page_size
         end = start + page_size
 
-        notifications = queryset[start:end]
-        serializer = self.get_serializer(notifications, many=True)
+        if request.query_params.get("type"):
+            unread_count = personal.filter(is_read=False).count() + broadcasts.filter(is_read=False).count()
+        else:
+            unread_count = sum(unread_counts(request.user))
+
+        is_read = request.query_params.get("is_read")
+        if is_read is not None and is_read.lower() != "true" and not request.query_params.get("type"):
+            count = unread_count
+        else:
+            count = personal.count() + broadcasts.count()
 
         return Response({
-            "notifications": serializer.data,
-            "count": queryset.count(),
-            "unread_count": queryset.filter(is_read=False).count(),
+            "notifications": _serialize_merged(self._merged(personal, broadcasts, start, end)),
+            "count": count,
+            "unread_count": unread_count,
         })
 
     def retrieve(self, request, *args, **kwargs):
@@ -61,38 +109,91 @@ class NotificationViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"], url_path="read")
     def mark_read(self, request, pk=None):
-        notification = self.get_object()
-        notification.mark_as_read()
+        notification = self.get_queryset().filter(pk=pk).first()
+        if notification is not None:
+            notification.mark_as_read()
+            return Response({"message": "Notification marked as read"})
+
+        broadcast = visible_broadcasts(request.user).filter(pk=pk).first()
+        if broadcast is None:
+            return Response({"error": "Notification not found"}, status=status.HTTP_404_NOT_FOUND)
+        BroadcastReceipt.objects.get_or_create(broadcast=broadcast, user=request.user)
+        forget_broadcasts(request.user.id)
         return Response({"message": "Notification marked as read"})
 
     @action(detail=False, methods=["post"], url_path="mark-all-read")
     def mark_all_read(self, request):
         from django.utils import timezone
-        self.get_queryset().filter(is_read=False).update(
-            is_read=True, read_at=timezone.now()
+        unread = self.get_queryset().filter(is_read=False)
+        by_type = dict(unread.values_list("type").annotate(count=Count("id")).order_by())
+        updated = unread.update(is_read=True, read_at=timezone.now())
+        adjust_unread([request.user.id], -updated)
+        if updated:
+            record_read(request.user.role, by_type)
+        unread_ids = visible_broadcasts(request.user).filter(is_read=False).values_list("id", flat=True)
+        BroadcastReceipt.objects.bulk_create(
+            [BroadcastReceipt(broadcast_id=broadcast_id, user=request.user) for broadcast_id in unread_ids],
+            ignore_conflicts=True,
         )
+        forget_broadcasts(request.user.id)
         return Response({"success": True})
 
     @action(detail=False, methods=["get"], url_path="unread")
     def unread(self, request):
-        qs = self.get_queryset().filter(is_read=False)
-        serializer = self.get_serializer(qs, many=True)
+        personal = self.get_queryset().filter(is_read=False)
+        broadcasts = visible_broadcasts(request.user).filter(is_read=False)
+        count = sum(unread_counts(request.user))
+
+        page = int(request.query_params.get("page", 1))
+        page_size = int(request.query_params.get("page_size", 20))
+        start = (page - 1) * page_size
         return Response({
-            "results": serializer.data,
-            "count": qs.count(),
-            "unread_count": qs.count(),
+            "results": _serialize_merged(self._merged(personal, broadcasts, start, start + page_size)),
+            "count": count,
+            "unread_count": count,
         })
 
+    @action(detail=False, methods=["get"], url_path="unread-count")
+    def unread_count(self, request):
+        """
+        Badge count from the cached counters; no notification rows are read.
+
+        Supports conditional requests: clients sending the previous ETag in
+        If-None-Match get an empty 304 while the count is unchanged.
+        """
+        personal, broadcasts = unread_counts(request.user)
+        etag = f'"{personal}-{broadcasts}"'
+        if request.headers.get("If-None-Match") == etag:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response({
+                "unread_count": personal + broadcasts,
+                "personal": personal,
+                "broadcasts": broadcasts,
+            })
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        return response
+
+    def perform_destroy(self, instance):
+        delete_notification(instance)
+
     @action(detail=False, methods=["get"])
     def unread_count_by_type(self, request):
         """Get unread count grouped by notification type."""
-        queryset = self.get_queryset().filter(is_read=False)
-        counts = (
-            queryset.values("type")
-            .annotate(count=Count("id"))
-            .order_by("-count")
-        )
-        return Response({"counts": list(counts)})
+        counts = {}
+        for queryset in (
+            self.get_queryset().filter(is_read=False),
+            visible_broadcasts(request.user).filter(is_read=False),
+        ):
+            for row in queryset.values("type").annotate(count=Count("id")).order_by():
+                counts[row["type"]] = counts.get(row["type"], 0) + row["count"]
+        return Response({
+            "counts": [
+                {"type": key, "count": value}
+                for key, value in sorted(counts.items(), key=lambda item: -item[1])
+            ]
+        })
 
 
 class NotificationSettingViewSet(viewsets.ModelViewSet):
@@ -125,76 +226,90 @@ class NotificationSettingViewSet(viewsets.ModelViewSet):
 class AdminNotificationViewSet(viewsets.ModelViewSet):
     """Admin-only viewset for managing system notifications."""
 
-    permission_classes = [IsAuthenticated]
-    serializer_class = NotificationSerializer
+    permission_classes = [IsAdmin]
+    serializer_class = AdminNotificationSerializer
 
     def get_queryset(self):
         # Admin can see all notifications
         return Notification.objects.all()
 
-    @action(detail=False, methods=["get"])
+    # Writes go through the same helpers as the delivery path so the unread
+    # counters and stats stay in step.
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        serializer.instance = create_notification(
+            data["recipient"],
+            data["type"],
+            data["title"],
+            data["message"],
+            related_object_type=data.get("related_object_type"),
+            related_object_id=data.get("related_object_id"),
+        )
+
+    def perform_update(self, serializer):
+        before = notification_state(serializer.instance)
+        notification = serializer.save()
+        account_notifications([(before, notification_state(notification))])
+
+    def perform_destroy(self, instance):
+        delete_notification(instance)
+
+    @action(detail=False, methods=["post"])
     def send_to_role(self, request):
-        """Send notification to all users of a specific role."""
+        """
+        Send a notification to one user or to every user of a role.
+
+        Role-wide messages are stored once as a Broadcast. With
+        ``materialize`` they are instead expanded into per-user
+        notifications by a background worker in batches.
+        """
+        from notifications.outbox import publish
         from users.models import User
 
-        recipient_role = request.data.get("recipient_role")
-        notification_type = request.data.get("type")
-        title = request.data.get("title")
-        message = request.data.get("message")
-
-        if not all([notification_type, title, message]):
-            return Response(
-                {"error": "type, title, and message are required"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        if recipient_role == "ALL_LANDLORDS":
-            users = User.objects.filter(
-                role=User.ROLE_LANDLORD,
-                status=User.STATUS_ACTIVE
-            )
-        else:
-            users = User.objects.filter(
-                role=recipient_role,
-                status=User.STATUS_ACTIVE
-            )
-
-        notifications = []
-        for user in users:
-            notifications.append(
-                Notification(
-                    recipient=user,
-                    type=notification_type,
-                    title=title,
-                    message=message,
-                )
-            )
-
-        created = Notification.objects.bulk_create(notifications)
-        return Response({
-            "message": f"Successfully sent to {len(created)} users",
-            "count": len(created)
-        })
-
-    @action(detail=False, methods=["get"])
-    def stats(self, request):
-        """Get notification statistics."""
-        total = Notification.objects.count()
-        unread = Notification.objects.filter(is_read=False).count()
-        by_type = (
-            Notification.objects.values("type")
-            .annotate(count=Count("id"))
-            .order_by("-count")
+        serializer = NotificationCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        fields = {
+            "notification_type": data["type"],
+            "title": data["title"],
+            "message": data["message"],
+            "related_object_type": data.get("related_object_type"),
+            "related_object_id": data.get("related_object_id"),
+        }
+
+        if data.get("recipient_id"):
+            recipient = User.objects.filter(id=data["recipient_id"]).first()
+            if recipient is None:
+                return Response({"error": "Recipient not found"}, status=status.HTTP_404_NOT_FOUND)
+            event = publish(recipient=recipient, **fields)
+            return Response({"message": "Notification queued", "event_id": event.id}, status=status.HTTP_202_ACCEPTED)
+
+        role = data["recipient_role"]
+        if role == "ALL_LANDLORDS":
+            role = User.ROLE_LANDLORD
+
+        if data["materialize"]:
+            event = publish(recipient_role=role, **fields)
+            return Response({"message": f"Notification to {role} queued", "event_id": event.id}, status=status.HTTP_202_ACCEPTED)
+
+        broadcast = Broadcast.objects.create(
+            audience=role,
+            type=fields["notification_type"],
+            title=fields["title"],
+            message=fields["message"],
+            related_object_type=fields["related_object_type"],
+            related_object_id=fields["related_object_id"],
+            created_by=request.user,
         )
-        by_role = (
-            Notification.objects.values("recipient__role")
-            .annotate(count=Count("id"))
-            .order_by("-count")
+        bump_broadcast_generation()
+        return Response(
+            {"message": f"Broadcast sent to {role}", "broadcast_id": broadcast.id},
+            status=status.HTTP_201_CREATED,
         )
 
-        return Response({
-            "total": total,
-            "unread": unread,
-            "by_type": list(by_type),
-            "by_role": list(by_role),
-        })
\ No newline at end of file
+    @action(detail=False, methods=["get"])
+    def stats(self, request):
+        """Get notification statistics from the maintained counters."""
+        return Response(stats_summary())
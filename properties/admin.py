@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Apartment, Unit, Amenity, KeyAmenity, ApartmentAmenityDistance
+from .models import Apartment, Unit, UnitOccupancy, Amenity, KeyAmenity, ApartmentAmenityDistance
 
 try:
     from .signals import Reservation
@@ -38,3 +38,11 @@ class UnitAdmin(admin.ModelAdmin):
     list_display = ("unit_number_or_id", "apartment", "status", "price_per_month")
     list_filter = ("status", "category", "type")
     search_fields = ("unit_number_or_id", "apartment__name")
+
+
+@admin.register(UnitOccupancy)
+class UnitOccupancyAdmin(admin.ModelAdmin):
+    list_display = ("unit", "kind", "starts_on", "ends_on", "booking")
+    list_filter = ("kind",)
+    search_fields = ("unit__unit_number_or_id", "unit__apartment__name")
+    raw_id_fields = ("unit", "booking")
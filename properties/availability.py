@@ -0,0 +1,194 @@
+"""
+Unit availability calendar.
+
+Occupancy is stored as date intervals per unit in ``UnitOccupancy``:
+``[starts_on, ends_on)``, with a NULL ``ends_on`` for open-ended periods.
+Each active booking owns one open-ended row (``sync_booking``, driven by
+bookings/signals.py); landlords add finite BLOCK rows through the calendar
+API.
+
+A booking's row starts on the day it was made, not on move-in: the
+one-active-booking-per-unit constraint (bookings/reservations.py) takes the
+whole unit as soon as the booking exists, so the calendar has to show it
+taken from then on or it would offer dates that booking then refuses.
+Likewise a landlord can't block a unit while a tenant's payment for it is in
+flight (``PAYMENT_WINDOW``), so a captured payment doesn't find the unit
+blocked under it.
+
+Overlapping rows for the same unit are rejected twice over:
+
+- on PostgreSQL by the ``unit_occupancy_no_overlap`` exclusion constraint
+  (``unit_id WITH =, daterange(starts_on, ends_on) WITH &&``, GiST, added by
+  migration 0010 with btree_gist). Its index also serves every overlap
+  query below, because ``Overlaps`` compiles to the same ``daterange``
+  expression there;
+- everywhere, by taking the unit's row lock and checking for an overlap
+  before inserting (``block``; bookings go through bookings/reservations.py).
+  On other databases ``Overlaps`` is spelled out as plain comparisons, which
+  the ``(unit, starts_on, ends_on)`` index answers.
+
+"Which units are free between X and Y" is then an anti-join: a unit is
+available when no occupancy row of its own overlaps ``[X, Y)``.
+"""
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.db.models import BooleanField, DateField, Exists, F, Func, OuterRef, Value
+
+from .models import Unit, UnitOccupancy
+
+EXCLUSION_CONSTRAINT = "unit_occupancy_no_overlap"
+
+DEFAULT_CALENDAR_DAYS = 90
+MAX_CALENDAR_DAYS = 366
+
+# Matches the duplicate-payment window in wallet/views.py InitiatePaymentView.
+PAYMENT_WINDOW = datetime.timedelta(minutes=5)
+
+
+class OccupancyConflict(Exception):
+    """The period overlaps an existing occupancy of the unit."""
+
+
+class Overlaps(Func):
+    """
+    ``[start, end)`` overlaps ``[lo, hi)``, where a NULL ``end`` (or a
+    ``hi`` of None) is open-ended.
+    """
+    conditional = True
+    output_field = BooleanField()
+    arity = 4
+
+    def __init__(self, start, end, lo, hi):
+        self.open_ended = hi is None
+        super().__init__(
+            start,
+            end,
+            Value(lo, output_field=DateField()),
+            Value(hi, output_field=DateField()),
+        )
+
+    def _compile_parts(self, compiler):
+        return [compiler.compile(expression) for expression in self.get_source_expressions()]
+
+    def as_sql(self, compiler, connection, **extra_context):
+        (start, start_params), (end, end_params), (lo, lo_params), (hi, hi_params) = self._compile_parts(compiler)
+        sql = f"({end} IS NULL OR {end} > {lo})"
+        params = [*end_params, *end_params, *lo_params]
+        if not self.open_ended:
+            sql = f"({start} < {hi} AND {sql})"
+            params = [*start_params, *hi_params, *params]
+        return sql, params
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        (start, start_params), (end, end_params), (lo, lo_params), (hi, hi_params) = self._compile_parts(compiler)
+        return (
+            f"daterange({start}, {end}, '[)') && daterange({lo}, {hi}, '[)')",
+            [*start_params, *end_params, *lo_params, *hi_params],
+        )
+
+
+# ================= QUERIES =================
+
+def overlapping(start, end):
+    """Occupancies overlapping ``[start, end)``; ``end=None`` means open-ended."""
+    return UnitOccupancy.objects.filter(Overlaps(F("starts_on"), F("ends_on"), start, end))
+
+
+def available_units(queryset, start, end):
+    """Units of ``queryset`` with no occupancy overlapping ``[start, end)``."""
+    return queryset.filter(~Exists(overlapping(start, end).filter(unit_id=OuterRef("pk"))))
+
+
+def apartments_with_availability(queryset, start, end):
+    """Apartments of ``queryset`` with at least one unit free for ``[start, end)``."""
+    return queryset.filter(Exists(available_units(Unit.objects.filter(apartment_id=OuterRef("pk")), start, end)))
+
+
+def is_free(unit_id, start, end=None):
+    return not overlapping(start, end).filter(unit_id=unit_id).exists()
+
+
+def is_blocked(unit_id, start, end=None):
+    """Whether a landlord block (not a booking) covers any of ``[start, end)``."""
+    return overlapping(start, end).filter(unit_id=unit_id, kind=UnitOccupancy.KIND_BLOCK).exists()
+
+
+def booking_starts_on(booked_on, move_in_date):
+    """First day a booking made on ``booked_on`` occupies its unit."""
+    return min(booked_on, move_in_date)
+
+
+def parse_range(value):
+    """Parse ``"YYYY-MM-DD,YYYY-MM-DD"`` into ``(start, end)``; raises ValueError."""
+    try:
+        start, end = (datetime.date.fromisoformat(part.strip()) for part in value.split(","))
+    except ValueError:
+        raise ValueError("Expected two ISO dates separated by a comma, e.g. 2026-11-01,2026-12-01.")
+    if end <= start:
+        raise ValueError("The end date must be after the start date.")
+    return start, end
+
+
+def calendar(unit_id, start, end):
+    """
+    Occupied and free periods of a unit within ``[start, end)``. Occupied
+    periods are returned whole; free periods are clipped to the window.
+    """
+    occupied = list(overlapping(start, end).filter(unit_id=unit_id).order_by("starts_on"))
+    free = []
+    cursor = start
+    for occupancy in occupied:
+        if occupancy.starts_on > cursor:
+            free.append({"starts_on": cursor, "ends_on": occupancy.starts_on})
+        if occupancy.ends_on is None:
+            cursor = end
+            break
+        cursor = max(cursor, occupancy.ends_on)
+    if cursor < end:
+        free.append({"starts_on": cursor, "ends_on": end})
+    return occupied, free
+
+
+# ================= WRITES =================
+
+def block(unit_id, starts_on, ends_on, note=""):
+    """Take the unit off the calendar for ``[starts_on, ends_on)``. Raises ``OccupancyConflict``."""
+    from wallet.models import PendingPayment
+
+    with transaction.atomic():
+        Unit.objects.select_for_update().only("pk").get(pk=unit_id)
+        if not is_free(unit_id, starts_on, ends_on):
+            raise OccupancyConflict(unit_id)
+        if PendingPayment.objects.filter(unit_id=unit_id, created_at__gte=timezone.now() - PAYMENT_WINDOW).exists():
+            raise OccupancyConflict(unit_id)
+        try:
+            with transaction.atomic():
+                return UnitOccupancy.objects.create(
+                    unit_id=unit_id,
+                    kind=UnitOccupancy.KIND_BLOCK,
+                    starts_on=starts_on,
+                    ends_on=ends_on,
+                    note=note,
+                )
+        except IntegrityError as e:
+            if EXCLUSION_CONSTRAINT in str(e):
+                raise OccupancyConflict(unit_id) from e
+            raise
+
+
+def sync_booking(booking):
+    """Keep the booking's open-ended occupancy in step with whether it holds the unit."""
+    if booking.holds_unit:
+        UnitOccupancy.objects.update_or_create(
+            booking=booking,
+            defaults={
+                "unit_id": booking.unit_id,
+                "kind": UnitOccupancy.KIND_BOOKING,
+                "starts_on": booking_starts_on(booking.created_at.date(), booking.move_in_date),
+                "ends_on": None,
+            },
+        )
+    else:
+        UnitOccupancy.objects.filter(booking=booking).delete()
@@ -0,0 +1,83 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+ACTIVE_BOOKING_STATUSES = ('PENDING', 'CONFIRMED', 'PAID', 'COMPLETED')
+LIVE_PAYMENT_STATUSES = ('UNPAID', 'PENDING', 'COMPLETED')
+
+
+def backfill_booking_occupancy(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    UnitOccupancy = apps.get_model('properties', 'UnitOccupancy')
+    bookings = Booking.objects.filter(
+        booking_status__in=ACTIVE_BOOKING_STATUSES,
+        payment_status__in=LIVE_PAYMENT_STATUSES,
+    ).values_list('id', 'unit_id', 'created_at', 'move_in_date')
+    # Same span as availability.sync_booking: held from the day it was booked.
+    UnitOccupancy.objects.bulk_create(
+        [
+            UnitOccupancy(
+                booking_id=booking_id,
+                unit_id=unit_id,
+                kind='BOOKING',
+                starts_on=min(created_at.date(), move_in_date),
+            )
+            for booking_id, unit_id, created_at, move_in_date in bookings.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+# No two occupancies of a unit may overlap. The constraint's GiST index on
+# (unit_id, daterange) also serves the overlap queries in
+# properties/availability.py. PostgreSQL only; other databases rely on the
+# unit row lock taken before inserting.
+def create_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        'ALTER TABLE properties_unitoccupancy ADD CONSTRAINT unit_occupancy_no_overlap '
+        "EXCLUDE USING gist (unit_id WITH =, daterange(starts_on, ends_on, '[)') WITH &&)"
+    )
+
+
+def drop_exclusion_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('ALTER TABLE properties_unitoccupancy DROP CONSTRAINT IF EXISTS unit_occupancy_no_overlap')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_unique_active_booking'),
+        ('properties', '0009_unit_deposit_amount_unit_electricity_deposit_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnitOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('BOOKING', 'Booking'), ('BLOCK', 'Blocked by landlord')], default='BLOCK', max_length=10)),
+                ('starts_on', models.DateField()),
+                ('ends_on', models.DateField(blank=True, null=True)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='occupancy', to='bookings.booking')),
+                ('unit', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='occupancies', to='properties.unit')),
+            ],
+            options={
+                'ordering': ['starts_on'],
+                'indexes': [models.Index(fields=['unit', 'starts_on', 'ends_on'], name='unit_occupancy_span_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='unitoccupancy',
+            constraint=models.CheckConstraint(check=models.Q(('ends_on__isnull', True), ('ends_on__gt', models.F('starts_on')), _connector='OR'), name='unit_occupancy_ends_after_start'),
+        ),
+        migrations.RunPython(backfill_booking_occupancy, migrations.RunPython.noop),
+        migrations.RunPython(create_exclusion_constraint, drop_exclusion_constraint),
+    ]
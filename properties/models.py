@@ -5,6 +5,7 @@ from django.conf import settings
 from django.urls import reverse
 from django.core.validators import FileExtensionValidator
 from cloudinary.models import CloudinaryField
+from tyrent_backend.tracking import FieldTracker
 
 
 User = settings.AUTH_USER_MODEL
@@ -115,7 +116,9 @@ class LeaseAgreement(models.Model):
         super().save(*args, **kwargs)
 
 
-class Apartment(models.Model):
+class Apartment(FieldTracker, models.Model):
+    tracked_fields = ("verification_status", "is_approved", "landlord")
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     landlord = models.ForeignKey(User, on_delete=models.CASCADE, related_name="apartments")
     name = models.CharField(max_length=255)
@@ -172,7 +175,9 @@ class Apartment(models.Model):
         self.is_approved = True
         self.save(update_fields=["is_approved"])
 
-class Unit(models.Model):
+class Unit(FieldTracker, models.Model):
+    tracked_fields = ("status",)
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     apartment = models.ForeignKey(Apartment, on_delete=models.CASCADE, related_name="units")
     unit_number_or_id = models.CharField(max_length=100)
@@ -227,6 +232,46 @@ class Unit(models.Model):
         return reverse("properties:unit-detail", args=[str(self.id)])
 
 
+class UnitOccupancy(models.Model):
+    """
+    A period ``[starts_on, ends_on)`` during which a unit cannot be booked.
+    ``ends_on`` is NULL for open-ended periods such as a booking, which has a
+    move-in date but no move-out date. See properties/availability.py.
+    """
+    KIND_BOOKING = "BOOKING"
+    KIND_BLOCK = "BLOCK"
+    KIND_CHOICES = [
+        (KIND_BOOKING, "Booking"),
+        (KIND_BLOCK, "Blocked by landlord"),
+    ]
+
+    # Covered by unit_occupancy_span_idx, which leads with the unit.
+    unit = models.ForeignKey(Unit, on_delete=models.CASCADE, related_name="occupancies", db_index=False)
+    booking = models.OneToOneField(
+        "bookings.Booking", on_delete=models.CASCADE, null=True, blank=True, related_name="occupancy"
+    )
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default=KIND_BLOCK)
+    starts_on = models.DateField()
+    ends_on = models.DateField(null=True, blank=True)
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["starts_on"]
+        indexes = [
+            models.Index(fields=["unit", "starts_on", "ends_on"], name="unit_occupancy_span_idx"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(ends_on__isnull=True) | models.Q(ends_on__gt=models.F("starts_on")),
+                name="unit_occupancy_ends_after_start",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.unit_id} {self.kind} {self.starts_on} - {self.ends_on or '...'}"
+
+
 class Review(models.Model):
     """Reviews and ratings for apartments."""
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -2,7 +2,7 @@ from rest_framework import serializers
 from django.db import models
 from django.core.exceptions import ValidationError as DjangoValidationError
 from django.contrib.auth import get_user_model
-from .models import Apartment, Unit, Amenity, LeaseAgreement, KeyAmenity, ApartmentAmenityDistance, KeyAmenityType, Review, Tour
+from .models import Apartment, Unit, UnitOccupancy, Amenity, LeaseAgreement, KeyAmenity, ApartmentAmenityDistance, KeyAmenityType, Review, Tour
 
 User = get_user_model()
 
@@ -208,3 +208,17 @@ class TourSerializer(serializers.ModelSerializer):
         model = Tour
         fields = ["id", "apartment", "apartment_name", "user", "user_name", "tour_type", "scheduled_date", "scheduled_time", "status", "notes", "contact_phone", "created_at", "updated_at"]
         read_only_fields = ["user", "status", "created_at", "updated_at"]
+
+
+class UnitOccupancySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UnitOccupancy
+        fields = ["id", "kind", "starts_on", "ends_on", "note"]
+        read_only_fields = ["id", "kind"]
+        # Landlord blocks are always finite; open-ended rows come from bookings.
+        extra_kwargs = {"ends_on": {"required": True, "allow_null": False}}
+
+    def validate(self, attrs):
+        if attrs["ends_on"] <= attrs["starts_on"]:
+            raise serializers.ValidationError({"ends_on": "Must be after starts_on."})
+        return attrs
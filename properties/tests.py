@@ -384,3 +384,183 @@ class KeyAmenityAPITestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data), 1)
         self.assertEqual(response.data[0]["amenity_type"], "SCHOOL")
+
+
+class UnitAvailabilityTestCase(TestCase):
+    def setUp(self):
+        from datetime import date
+
+        self.client = APIClient()
+        self.landlord = User.objects.create_user(
+            email="calendar-landlord@test.com",
+            password="password",
+            username="calendar_landlord",
+            role=User.ROLE_LANDLORD,
+        )
+        self.tenant = User.objects.create_user(
+            email="calendar-tenant@test.com",
+            password="password",
+            username="calendar_tenant",
+            role=User.ROLE_TENANT,
+        )
+        self.apartment = Apartment.objects.create(landlord=self.landlord, name="Calendar Apartment")
+        self.unit = Unit.objects.create(apartment=self.apartment, unit_number_or_id="C1", price_per_month=10000)
+        self.other = Unit.objects.create(apartment=self.apartment, unit_number_or_id="C2", price_per_month=10000)
+        self.d = lambda day: date(2030, 1, day)
+
+    def calendar_url(self, unit=None):
+        return f"/api/properties/units/{(unit or self.unit).id}/calendar/"
+
+    def block(self, starts_on, ends_on, unit=None):
+        from properties import availability
+
+        return availability.block((unit or self.unit).id, starts_on, ends_on)
+
+    def book(self, unit, move_in_date, **fields):
+        from bookings.models import Booking
+
+        return Booking.objects.create(
+            unit=unit,
+            tenant=self.tenant,
+            landlord=self.landlord,
+            move_in_date=move_in_date,
+            booking_amount=1000,
+            **fields,
+        )
+
+    def test_active_booking_occupies_unit_from_booking_date(self):
+        from properties.models import UnitOccupancy
+
+        booking = self.book(self.unit, self.d(10))
+        occupancy = UnitOccupancy.objects.get(booking=booking)
+        self.assertEqual((occupancy.starts_on, occupancy.ends_on), (booking.created_at.date(), None))
+
+        booking.booking_status = "CANCELLED"
+        booking.save()
+        self.assertFalse(UnitOccupancy.objects.filter(booking=booking).exists())
+
+    def test_calendar_lists_occupied_and_free_periods(self):
+        self.block(self.d(5), self.d(8))
+        booking = self.book(self.other, self.d(20))
+        window = {"start": "2030-01-01", "end": "2030-02-01"}
+
+        response = self.client.get(self.calendar_url(), window)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(o["kind"], o["starts_on"], o["ends_on"]) for o in response.data["occupied"]],
+            [("BLOCK", "2030-01-05", "2030-01-08")],
+        )
+        self.assertEqual(
+            response.data["free"],
+            [
+                {"starts_on": self.d(1), "ends_on": self.d(5)},
+                {"starts_on": self.d(8), "ends_on": self.d(1).replace(month=2)},
+            ],
+        )
+
+        # The booking holds its unit from the day it was made, not from move-in.
+        response = self.client.get(self.calendar_url(self.other), window)
+        self.assertEqual(
+            [(o["kind"], o["starts_on"], o["ends_on"]) for o in response.data["occupied"]],
+            [("BOOKING", booking.created_at.date().isoformat(), None)],
+        )
+        self.assertEqual(response.data["free"], [])
+
+    def test_calendar_agrees_with_booking_constraint(self):
+        self.book(self.unit, self.d(20))
+
+        units = self.client.get("/api/properties/units/", {"available_between": "2030-01-01,2030-01-06"})
+        self.assertEqual([u["id"] for u in units.data], [str(self.other.id)])
+
+        self.client.force_authenticate(self.tenant)
+        response = self.client.post(
+            "/api/bookings/",
+            {"unit": str(self.unit.id), "booking_amount": "1000.00", "move_in_date": "2030-01-01"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 409)
+
+    def test_calendar_rejects_oversized_window(self):
+        response = self.client.get(self.calendar_url(), {"start": "2030-01-01", "end": "2032-01-01"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_landlord_blocks_and_unblocks_period(self):
+        self.client.force_authenticate(self.landlord)
+
+        response = self.client.post(self.calendar_url(), {"starts_on": "2030-01-05", "ends_on": "2030-01-08"})
+        self.assertEqual(response.status_code, 201)
+        block_id = response.data["id"]
+
+        overlapping = self.client.post(self.calendar_url(), {"starts_on": "2030-01-07", "ends_on": "2030-01-09"})
+        self.assertEqual(overlapping.status_code, 409)
+        adjacent = self.client.post(self.calendar_url(), {"starts_on": "2030-01-08", "ends_on": "2030-01-09"})
+        self.assertEqual(adjacent.status_code, 201)
+
+        response = self.client.delete(f"{self.calendar_url()}{block_id}/")
+        self.assertEqual(response.status_code, 204)
+
+    def test_tenant_cannot_block(self):
+        self.client.force_authenticate(self.tenant)
+        response = self.client.post(self.calendar_url(), {"starts_on": "2030-01-05", "ends_on": "2030-01-08"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_available_between_filters_units_and_apartments(self):
+        self.block(self.d(5), self.d(8))
+        self.book(self.other, self.d(1))
+        full = Apartment.objects.create(landlord=self.landlord, name="Full Apartment")
+        self.book(Unit.objects.create(apartment=full, unit_number_or_id="F1", price_per_month=1), self.d(1))
+
+        units = self.client.get("/api/properties/units/", {"available_between": "2030-01-08,2030-01-15"})
+        self.assertEqual([u["id"] for u in units.data], [str(self.unit.id)])
+        units = self.client.get("/api/properties/units/", {"available_between": "2030-01-01,2030-01-06"})
+        self.assertEqual(units.data, [])
+
+        apartments = self.client.get(
+            "/api/properties/apartments/search/", {"available_between": "2030-01-08,2030-01-15"}
+        )
+        self.assertEqual([a["id"] for a in apartments.data], [str(self.apartment.id)])
+
+    def test_available_between_rejects_bad_range(self):
+        response = self.client.get("/api/properties/units/", {"available_between": "2030-01-08,2030-01-01"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_booking_into_blocked_period_conflicts(self):
+        self.block(self.d(5), self.d(8))
+        self.client.force_authenticate(self.tenant)
+        payload = {"unit": str(self.unit.id), "booking_amount": "1000.00"}
+
+        response = self.client.post("/api/bookings/", {**payload, "move_in_date": "2030-01-01"}, format="json")
+        self.assertEqual(response.status_code, 409)
+        # A booking would hold the unit from today, across the block.
+        response = self.client.post("/api/bookings/", {**payload, "move_in_date": "2030-01-08"}, format="json")
+        self.assertEqual(response.status_code, 409)
+        payload["unit"] = str(self.other.id)
+        response = self.client.post("/api/bookings/", {**payload, "move_in_date": "2030-01-08"}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+    def test_landlord_cannot_block_during_booking_payment(self):
+        from wallet.models import PendingPayment
+
+        PendingPayment.objects.create(
+            user=self.tenant,
+            unit=self.unit,
+            phone_number="254700000000",
+            amount=1000,
+            checkout_request_id="calendar-payment",
+        )
+        self.client.force_authenticate(self.landlord)
+
+        response = self.client.post(self.calendar_url(), {"starts_on": "2030-01-05", "ends_on": "2030-01-08"})
+        self.assertEqual(response.status_code, 409)
+        response = self.client.post(self.calendar_url(self.other), {"starts_on": "2030-01-05", "ends_on": "2030-01-08"})
+        self.assertEqual(response.status_code, 201)
+
+    def test_availability_query_uses_index(self):
+        from django.db import connection
+        from properties import availability
+
+        if connection.vendor != "sqlite":
+            self.skipTest("Plan text is SQLite-specific")
+        plan = availability.available_units(Unit.objects.all(), self.d(1), self.d(8)).explain()
+        self.assertIn("unit_occupancy_span_idx", plan)
+        self.assertNotIn("SCAN properties_unitoccupancy", plan)
@@ -1,16 +1,18 @@
 from django.core.exceptions import PermissionDenied, ValidationError
-from rest_framework import viewsets, status, permissions
+from rest_framework import viewsets, status, permissions, exceptions
 from rest_framework.decorators import api_view, action, permission_classes
 from rest_framework.response import Response
+import datetime
 import math
 import os
 import uuid
 
-from .models import Apartment, Unit, Amenity, LeaseAgreement, KeyAmenity, ApartmentAmenityDistance, KeyAmenityType, Review, Tour
+from . import availability
+from .models import Apartment, Unit, UnitOccupancy, Amenity, LeaseAgreement, KeyAmenity, ApartmentAmenityDistance, KeyAmenityType, Review, Tour
 from .serializers import (
     ApartmentSerializer, UnitSerializer, AmenitySerializer, LeaseAgreementSerializer,
     LeaseAgreementUploadSerializer, KeyAmenitySerializer, ApartmentAmenityDistanceSerializer,
-    ApartmentAmenityDistanceCreateSerializer, ReviewSerializer, TourSerializer
+    ApartmentAmenityDistanceCreateSerializer, ReviewSerializer, TourSerializer, UnitOccupancySerializer
 )
 from django.shortcuts import get_object_or_404
 from rest_framework.routers import DefaultRouter
@@ -19,6 +21,8 @@ from django.db.models import Count, Q, Max, Min
 from rest_framework.permissions import IsAuthenticated
 from django.core.files.storage import default_storage
 
+from users.principal import get_principal
+
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     R = 6371
@@ -30,9 +34,35 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
     return R * c
 
+def available_between(request):
+    """``(start, end)`` from the ``available_between`` query parameter, or None if absent."""
+    value = request.query_params.get("available_between")
+    if not value:
+        return None
+    try:
+        return availability.parse_range(value)
+    except ValueError as e:
+        raise exceptions.ValidationError({"available_between": str(e)})
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def occupancy_stats(request):
+    if request.query_params.get("mode") == "historical":
+        from analytics.reports import occupancy_series
+        from analytics.models import OccupancySnapshot
+        from users.analytics import PeriodError, parse_period
+
+        try:
+            start, end, label = parse_period(request.query_params)
+        except PeriodError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        snapshots = OccupancySnapshot.objects.filter(date__gte=start.date(), date__lte=end.date())
+        principal = get_principal(request)
+        if principal.is_landlord:
+            snapshots = snapshots.filter(landlord_id=principal.user_id)
+        return Response({"period": label, "mode": "historical", "series": occupancy_series(snapshots)})
+
     total = Unit.objects.count()
     occupied = Unit.objects.filter(status="OCCUPIED").count()
     vacant = Unit.objects.filter(status="VACANT").count()
@@ -60,12 +90,14 @@ class IsLandlordOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in permissions.SAFE_METHODS:
             return True
-        if not request.user or not request.user.is_authenticated:
+        principal = get_principal(request)
+        if not principal.is_authenticated:
             return False
-        if hasattr(obj, "landlord"):
-            return obj.landlord == request.user or getattr(request.user, "role", "") == "ADMIN"
-        if hasattr(obj, "apartment"):
-            return obj.apartment.landlord == request.user or getattr(request.user, "role", "") == "ADMIN"
+        # Compare ids so the check never loads the landlord or apartment row.
+        if hasattr(obj, "landlord_id"):
+            return principal.is_admin or principal.is_user(obj.landlord_id)
+        if hasattr(obj, "apartment_id"):
+            return principal.can_manage_apartment(obj.apartment_id)
         return False
 
 class ApartmentViewSet(viewsets.ModelViewSet):
@@ -74,7 +106,7 @@ class ApartmentViewSet(viewsets.ModelViewSet):
     permission_classes = [IsLandlordOrReadOnly]
 
     def get_queryset(self):
-        user = self.request.user
+        principal = get_principal(self.request)
         qs = Apartment.objects.all().prefetch_related("amenity_distances", "units")
 
         distance_filter = self.request.query_params.get("max_distance")
@@ -91,10 +123,14 @@ class ApartmentViewSet(viewsets.ModelViewSet):
                 pass
 
         # Only filter by landlord if the user is authenticated AND is a landlord
-        if user and user.is_authenticated and getattr(user, "role", "").upper() == "LANDLORD":
-            return qs.filter(landlord=user)
+        if principal.is_landlord:
+            return qs.filter(landlord_id=principal.user_id)
         return qs
 
+    def _can_manage(self, apartment):
+        principal = get_principal(self.request)
+        return principal.is_admin or principal.is_user(apartment.landlord_id)
+
     @action(detail=False, methods=["get"], url_path="search")
     def search(self, request):
         queryset = self.get_queryset()
@@ -132,6 +168,10 @@ class ApartmentViewSet(viewsets.ModelViewSet):
         if location:
             queryset = queryset.filter(address__icontains=location)
 
+        window = available_between(request)
+        if window:
+            queryset = availability.apartments_with_availability(queryset, *window)
+
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -171,8 +211,9 @@ class ApartmentViewSet(viewsets.ModelViewSet):
             longitude__isnull=False
         )
 
-        if getattr(request.user, "role", "").upper() == "LANDLORD":
-            apartments = apartments.filter(landlord=request.user)
+        principal = get_principal(request)
+        if principal.is_landlord:
+            apartments = apartments.filter(landlord_id=principal.user_id)
 
         results = []
         for apt in apartments:
@@ -198,7 +239,7 @@ class ApartmentViewSet(viewsets.ModelViewSet):
     def set_amenity_distances(self, request, pk=None):
         apartment = self.get_object()
 
-        if apartment.landlord != request.user and getattr(request.user, "role", "").upper() != "ADMIN":
+        if not self._can_manage(apartment):
             return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = ApartmentAmenityDistanceCreateSerializer(data=request.data, many=True)
@@ -222,7 +263,7 @@ class ApartmentViewSet(viewsets.ModelViewSet):
     def upload_image(self, request, pk=None):
         apartment = self.get_object()
         
-        if apartment.landlord != request.user and getattr(request.user, "role", "").upper() != "ADMIN":
+        if not self._can_manage(apartment):
             return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
         
         image = request.FILES.get("image")
@@ -241,7 +282,7 @@ class ApartmentViewSet(viewsets.ModelViewSet):
     def set_virtual_tour(self, request, pk=None):
         apartment = self.get_object()
         
-        if apartment.landlord != request.user and getattr(request.user, "role", "").upper() != "ADMIN":
+        if not self._can_manage(apartment):
             return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
         
         tour_url = request.data.get("virtual_tour_url")
@@ -304,18 +345,22 @@ class UnitViewSet(viewsets.ModelViewSet):
     permission_classes = [IsLandlordOrReadOnly]
 
     def get_queryset(self):
-        user = self.request.user
+        principal = get_principal(self.request)
         qs = self.queryset
         apt = self.request.query_params.get("apartment")
         if apt:
             qs = qs.filter(apartment__id=apt)
-        if getattr(user, "role", "").upper() == "LANDLORD":
-            qs = qs.filter(apartment__landlord=user)
+        window = available_between(self.request)
+        if window:
+            qs = availability.available_units(qs, *window)
+        if principal.is_landlord:
+            qs = qs.filter(apartment__landlord_id=principal.user_id)
         return qs
 
     def perform_create(self, serializer):
         apartment = serializer.validated_data.get("apartment")
-        if getattr(self.request.user, "role", "").upper() == "LANDLORD" and apartment.landlord != self.request.user:
+        principal = get_principal(self.request)
+        if principal.is_landlord and not principal.is_user(apartment.landlord_id):
             raise PermissionError("You can only create units for your own apartments.")
         instance = serializer.save()
         instance.apartment.recalc_unit_counts()
@@ -336,11 +381,60 @@ class UnitViewSet(viewsets.ModelViewSet):
             unit.apartment.recalc_unit_counts()
         return Response(UnitSerializer(unit).data)
 
+    @action(detail=True, methods=["get", "post"], url_path="calendar", permission_classes=[IsLandlordOrReadOnly])
+    def calendar(self, request, pk=None):
+        unit = self.get_object()
+
+        if request.method == "POST":
+            if not get_principal(request).can_manage_apartment(unit.apartment_id):
+                return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+            serializer = UnitOccupancySerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            try:
+                occupancy = availability.block(unit.id, **serializer.validated_data)
+            except availability.OccupancyConflict:
+                return Response(
+                    {"detail": "The unit is already occupied during part of this period, or a booking payment for it is in progress."},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            return Response(UnitOccupancySerializer(occupancy).data, status=status.HTTP_201_CREATED)
+
+        try:
+            start = datetime.date.fromisoformat(request.query_params.get("start") or datetime.date.today().isoformat())
+            end = request.query_params.get("end")
+            end = datetime.date.fromisoformat(end) if end else start + datetime.timedelta(days=availability.DEFAULT_CALENDAR_DAYS)
+        except ValueError:
+            return Response({"detail": "start and end must be ISO dates (YYYY-MM-DD)."}, status=status.HTTP_400_BAD_REQUEST)
+        if not start < end <= start + datetime.timedelta(days=availability.MAX_CALENDAR_DAYS):
+            return Response(
+                {"detail": f"end must be after start and at most {availability.MAX_CALENDAR_DAYS} days later."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        occupied, free = availability.calendar(unit.id, start, end)
+        return Response({
+            "unit": str(unit.id),
+            "start": start,
+            "end": end,
+            "occupied": UnitOccupancySerializer(occupied, many=True).data,
+            "free": free,
+        })
+
+    @action(detail=True, methods=["delete"], url_path=r"calendar/(?P<occupancy_id>\d+)", permission_classes=[IsLandlordOrReadOnly])
+    def remove_block(self, request, pk=None, occupancy_id=None):
+        unit = self.get_object()
+        if not get_principal(request).can_manage_apartment(unit.apartment_id):
+            return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+        # Booking periods follow their booking; only landlord blocks are removable here.
+        block = get_object_or_404(UnitOccupancy, id=occupancy_id, unit=unit, kind=UnitOccupancy.KIND_BLOCK)
+        block.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
     @action(detail=True, methods=["post"], url_path="upload-images", permission_classes=[IsLandlordOrReadOnly])
     def upload_images(self, request, pk=None):
         unit = self.get_object()
 
-        if unit.apartment.landlord != request.user and getattr(request.user, "role", "").upper() != "ADMIN":
+        if not get_principal(request).can_manage_apartment(unit.apartment_id):
             return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
         image_files = request.FILES.getlist("images")
@@ -383,7 +477,7 @@ class UnitViewSet(viewsets.ModelViewSet):
     def upload_video(self, request, pk=None):
         unit = self.get_object()
 
-        if unit.apartment.landlord != request.user and getattr(request.user, "role", "").upper() != "ADMIN":
+        if not get_principal(request).can_manage_apartment(unit.apartment_id):
             return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
         video_file = request.FILES.get("video")
@@ -417,13 +511,13 @@ class LeaseAgreementViewSet(viewsets.ModelViewSet):
     permission_classes = [IsLandlordOrReadOnly]
 
     def get_queryset(self):
-        user = self.request.user
+        principal = get_principal(self.request)
         qs = self.queryset
         apt = self.request.query_params.get("apartment")
         if apt:
             qs = qs.filter(apartment__id=apt)
-        if getattr(user, "role", "").upper() == "LANDLORD":
-            qs = qs.filter(apartment__landlord=user)
+        if principal.is_landlord:
+            qs = qs.filter(apartment__landlord_id=principal.user_id)
         return qs
 
     def get_serializer_class(self):
@@ -439,7 +533,8 @@ class LeaseAgreementViewSet(viewsets.ModelViewSet):
 
         apartment = get_object_or_404(Apartment, id=apartment_id)
 
-        if apartment.landlord != request.user and getattr(request.user, "role", "").upper() != "ADMIN":
+        principal = get_principal(request)
+        if not principal.is_admin and not principal.is_user(apartment.landlord_id):
             return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = self.get_serializer(data=request.data)
@@ -508,13 +603,13 @@ class TourViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
+        principal = get_principal(self.request)
         queryset = Tour.objects.select_related("apartment", "user").all()
         
-        if getattr(user, "role", "").upper() == "LANDLORD":
-            queryset = queryset.filter(apartment__landlord=user)
+        if principal.is_landlord:
+            queryset = queryset.filter(apartment__landlord_id=principal.user_id)
         else:
-            queryset = queryset.filter(user=user)
+            queryset = queryset.filter(user_id=principal.user_id)
         return queryset
 
     def perform_create(self, serializer):
@@ -527,7 +622,8 @@ class TourViewSet(viewsets.ModelViewSet):
         if new_status not in dict(Tour.TOUR_STATUS_CHOICES).keys():
             return Response({"detail": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
         
-        if getattr(request.user, "role", "").upper() != "LANDLORD" and request.user != tour.user:
+        principal = get_principal(request)
+        if not principal.is_landlord and not principal.is_user(tour.user_id):
             return Response({"detail": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
         
         tour.status = new_status
@@ -1,5 +1,7 @@
 import os
+import sys
 import cloudinary
+from datetime import timedelta
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
@@ -28,6 +30,7 @@ else:
 ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
 SECRET_KEY = os.getenv("SECRET_KEY", "unsafe-secret-key")
 DEBUG = os.getenv("DEBUG", "True").lower() == "true"
+TESTING = len(sys.argv) > 1 and sys.argv[1] == "test"
 
 # --------------------------------------------------
 # ALLOWED HOSTS & CORS (allow everything)
@@ -100,6 +103,7 @@ INSTALLED_APPS = [
     "wallet",
     "verification",
     "notifications",
+    "analytics",
 ]
 
 # --------------------------------------------------
@@ -109,6 +113,8 @@ CELERY_BROKER_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_BACKEND = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")
+# Run tasks inline under `manage.py test` so no broker is needed
+CELERY_TASK_ALWAYS_EAGER = TESTING
 
 CELERY_BEAT_SCHEDULE = {
     "expire-subscriptions-daily": {
@@ -119,6 +125,42 @@ CELERY_BEAT_SCHEDULE = {
         "task": "wallet.tasks.expire_stale_pending_transactions",
         "schedule": crontab(minute="*/10"),  # every 10 minutes
     },
+    "analytics-etl-nightly": {
+        "task": "analytics.tasks.run_nightly_etl",
+        "schedule": crontab(hour=0, minute=30),
+    },
+    "check-dashboard-rollups-nightly": {
+        "task": "users.tasks.check_dashboard_rollups",
+        "schedule": crontab(hour=2, minute=0),
+    },
+    "archive-notifications-nightly": {
+        "task": "notifications.tasks.archive_notifications",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "rebuild-notification-stats-nightly": {
+        "task": "notifications.tasks.rebuild_notification_stats",
+        "schedule": crontab(hour=3, minute=30),
+    },
+    "reconcile-unread-counters-nightly": {
+        "task": "notifications.tasks.reconcile_unread_counters",
+        "schedule": crontab(hour=3, minute=45),
+    },
+    "send-queued-emails": {
+        "task": "notifications.tasks.send_queued_emails",
+        "schedule": crontab(minute="*"),
+    },
+    "notification-digests-hourly": {
+        "task": "notifications.tasks.send_notification_digests",
+        "schedule": crontab(minute=15),
+    },
+    "flush-notification-outbox": {
+        "task": "notifications.tasks.flush_notification_outbox",
+        "schedule": crontab(minute="*"),
+    },
+    "dispatch-verifications": {
+        "task": "verification.tasks.dispatch_verifications",
+        "schedule": crontab(minute="*"),
+    },
 }
 
 # --------------------------------------------------
@@ -131,6 +173,22 @@ CACHES = {
     }
 }
 
+if TESTING:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Token authentication cache (users/token_cache.py): per-process LRU in
+# front of the shared cache above
+AUTH_TOKEN_LRU_SIZE = int(os.getenv("AUTH_TOKEN_LRU_SIZE", "1024"))
+AUTH_TOKEN_LRU_TTL = int(os.getenv("AUTH_TOKEN_LRU_TTL", "30"))
+AUTH_TOKEN_CACHE_TTL = int(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+
+# Owned-apartment ids of the request principal (users/principal.py)
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+
 # --------------------------------------------------
 # DRF SPECTACULAR
 # --------------------------------------------------
@@ -193,11 +251,18 @@ WSGI_APPLICATION = "tyrent_backend.wsgi.application"
 # --------------------------------------------------
 # DATABASE
 # --------------------------------------------------
+# The web process is served over ASGI (see Procfile), where sync views run in
+# sync_to_async threads and persistent connections aren't reliably closed at
+# the end of a request; with long-lived SSE streams they pile up until
+# Postgres refuses new ones. Connections are therefore closed after each
+# request unless DB_CONN_MAX_AGE says otherwise (e.g. behind a pooler).
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "0"))
+
 if ENVIRONMENT == "production":
     DATABASES = {
         "default": dj_database_url.config(
             default=os.getenv("DATABASE_URL"),
-            conn_max_age=600,
+            conn_max_age=DB_CONN_MAX_AGE,
             ssl_require=True,
         )
     }
@@ -205,7 +270,7 @@ else:
     DATABASES = {
         "default": dj_database_url.config(
             default=os.getenv("DATABASE_URL"),  # ✅ uses Railway DB in dev too
-            conn_max_age=600,
+            conn_max_age=DB_CONN_MAX_AGE,
         ) if os.getenv("DATABASE_URL") else {
             "ENGINE": os.getenv("DB_ENGINE", "django.db.backends.postgresql"),
             "NAME": os.getenv("DB_NAME", "tyrent_db"),
@@ -273,6 +338,7 @@ AUTH_USER_MODEL = "users.User"
 # --------------------------------------------------
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
+        "users.authentication.StatelessJWTAuthentication",
         "users.authentication.FlexibleTokenAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
@@ -281,6 +347,40 @@ REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 }
 
+# One-time passcodes (users/otp.py): "cache" or "database"
+OTP_STORE = os.getenv("OTP_STORE", "cache")
+OTP_TTL_SECONDS = int(os.getenv("OTP_TTL_SECONDS", "600"))
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+
+# Most users one bulk moderation request may touch (users/moderation.py)
+ADMIN_BULK_MAX_USERS = int(os.getenv("ADMIN_BULK_MAX_USERS", "5000"))
+
+# Sliding-window limits, (requests, seconds) per identifier (users/throttling.py)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+RATE_LIMITS = {
+    "login": {"ip": (20, 300), "email": (10, 300)},
+    "otp_send": {"ip": (10, 3600), "email": (3, 3600)},
+    "otp_verify": {"ip": (20, 600), "email": (5, 600)},
+    "password_reset": {"ip": (10, 3600), "email": (3, 3600)},
+    "newsletter": {"ip": (10, 3600)},
+    "contact": {"ip": (5, 3600), "user": (5, 3600)},
+}
+
+# --------------------------------------------------
+# JWT (users/tokens.py)
+# --------------------------------------------------
+SIMPLE_JWT = {
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=int(os.getenv("JWT_ACCESS_TOKEN_MINUTES", "5"))),
+    "REFRESH_TOKEN_LIFETIME": timedelta(days=int(os.getenv("JWT_REFRESH_TOKEN_DAYS", "7"))),
+    "AUTH_HEADER_TYPES": ("Bearer",),
+    "USER_ID_FIELD": "id",
+    "USER_ID_CLAIM": "user_id",
+    "AUTH_TOKEN_CLASSES": ("users.tokens.AccessToken",),
+    "UPDATE_LAST_LOGIN": False,
+}
+# Keep issuing the non-expiring DRF tokens until all clients use JWTs
+AUTH_LEGACY_TOKENS = os.getenv("AUTH_LEGACY_TOKENS", "True").lower() == "true"
+
 # --------------------------------------------------
 # EMAIL CONFIGURATION
 # --------------------------------------------------
@@ -292,12 +392,74 @@ else:
     SENDGRID_SANDBOX_MODE_IN_DEBUG = False
     DEFAULT_FROM_EMAIL = "Tyrent Homes <no-reply@tyrenthomes.com>"
 
+# Queued delivery (notifications/emails.py)
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "100"))
+EMAIL_MAX_BATCHES_PER_RUN = int(os.getenv("EMAIL_MAX_BATCHES_PER_RUN", "20"))
+EMAIL_MAX_ATTEMPTS = int(os.getenv("EMAIL_MAX_ATTEMPTS", "5"))
+# Retry n waits EMAIL_RETRY_BASE_SECONDS * 2^(n-1)
+EMAIL_RETRY_BASE_SECONDS = int(os.getenv("EMAIL_RETRY_BASE_SECONDS", "60"))
+# How long a worker owns the emails it claimed before another may resend them
+EMAIL_SEND_LEASE_SECONDS = int(os.getenv("EMAIL_SEND_LEASE_SECONDS", "300"))
+NOTIFICATION_DIGEST_LOOKBACK_HOURS = int(os.getenv("NOTIFICATION_DIGEST_LOOKBACK_HOURS", "24"))
+
 
 # --------------------------------------------------
 # OTP SETTINGS
 # --------------------------------------------------
 OTP_EXPIRATION_MINUTES = 120
 
+# --------------------------------------------------
+# WALLET STATEMENTS
+# --------------------------------------------------
+STATEMENT_EXPORT_CHUNK_SIZE = int(os.getenv("STATEMENT_EXPORT_CHUNK_SIZE", "2000"))
+# Ranges longer than this are generated by a Celery task instead of streamed
+STATEMENT_EXPORT_ASYNC_DAYS = int(os.getenv("STATEMENT_EXPORT_ASYNC_DAYS", "92"))
+# Storage for generated statement files; empty means DEFAULT_FILE_STORAGE.
+# MediaCloudinaryStorage uploads images only, so production uses the raw one.
+STATEMENT_EXPORT_STORAGE = os.getenv(
+    "STATEMENT_EXPORT_STORAGE",
+    "cloudinary_storage.storage.RawMediaCloudinaryStorage" if ENVIRONMENT == "production" else "",
+)
+
+# --------------------------------------------------
+# NOTIFICATIONS
+# --------------------------------------------------
+# Notification rows inserted per bulk_create when fanning out an outbox event
+NOTIFICATION_FANOUT_BATCH_SIZE = int(os.getenv("NOTIFICATION_FANOUT_BATCH_SIZE", "500"))
+# Pending outbox events older than this are re-dispatched by the sweeper
+NOTIFICATION_OUTBOX_RETRY_SECONDS = int(os.getenv("NOTIFICATION_OUTBOX_RETRY_SECONDS", "60"))
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = int(os.getenv("NOTIFICATION_OUTBOX_MAX_ATTEMPTS", "5"))
+# Real-time push (SSE): "redis" streams in production, "memory" in tests
+NOTIFICATION_PUSH_BACKEND = "memory" if TESTING else os.getenv("NOTIFICATION_PUSH_BACKEND", "redis")
+NOTIFICATION_PUSH_REDIS_URL = os.getenv("REDIS_URL", "redis://127.0.0.1:6379/2")
+# Events kept per user for Last-Event-ID replay
+NOTIFICATION_PUSH_HISTORY = int(os.getenv("NOTIFICATION_PUSH_HISTORY", "100"))
+NOTIFICATION_STREAM_HEARTBEAT_SECONDS = int(os.getenv("NOTIFICATION_STREAM_HEARTBEAT_SECONDS", "15"))
+NOTIFICATION_STREAM_MAX_SECONDS = int(os.getenv("NOTIFICATION_STREAM_MAX_SECONDS", "300"))
+# Read notifications older than this are moved to the archive table
+NOTIFICATION_RETENTION_DAYS = int(os.getenv("NOTIFICATION_RETENTION_DAYS", "90"))
+NOTIFICATION_ARCHIVE_BATCH_SIZE = int(os.getenv("NOTIFICATION_ARCHIVE_BATCH_SIZE", "1000"))
+# Upper bound on batches per nightly run; the remainder waits for the next night
+NOTIFICATION_ARCHIVE_MAX_BATCHES = int(os.getenv("NOTIFICATION_ARCHIVE_MAX_BATCHES", "500"))
+
+# --------------------------------------------------
+# VERIFICATION DISPATCH
+# --------------------------------------------------
+# Pending verifications assigned per dispatch run
+VERIFICATION_DISPATCH_BATCH_SIZE = int(os.getenv("VERIFICATION_DISPATCH_BATCH_SIZE", "10000"))
+# Agents with this many open (assigned / in progress) tasks get no more
+VERIFICATION_AGENT_MAX_OPEN = int(os.getenv("VERIFICATION_AGENT_MAX_OPEN", "50"))
+# Distance that weighs as much as one extra open task when choosing an agent
+VERIFICATION_DISPATCH_KM_PER_TASK = float(os.getenv("VERIFICATION_DISPATCH_KM_PER_TASK", "5"))
+# Report photos (verification/evidence.py)
+EVIDENCE_MAX_IMAGES = int(os.getenv("EVIDENCE_MAX_IMAGES", "25"))
+EVIDENCE_MAX_BYTES = int(os.getenv("EVIDENCE_MAX_BYTES", str(20 * 1024 * 1024)))
+# Parallel storage uploads / image processing per report
+EVIDENCE_UPLOAD_WORKERS = int(os.getenv("EVIDENCE_UPLOAD_WORKERS", "8"))
+EVIDENCE_MAX_DIMENSION = int(os.getenv("EVIDENCE_MAX_DIMENSION", "2048"))
+EVIDENCE_THUMBNAIL_SIZE = int(os.getenv("EVIDENCE_THUMBNAIL_SIZE", "320"))
+EVIDENCE_JPEG_QUALITY = int(os.getenv("EVIDENCE_JPEG_QUALITY", "82"))
+
 # --------------------------------------------------
 # MPESA SETTINGS
 # --------------------------------------------------
@@ -346,4 +508,4 @@ LOGGING = {
             "propagate": False,
         },
     },
-}
\ No newline at end of file
+}
@@ -0,0 +1,88 @@
+"""
+Field-change tracking for models.
+
+Models list the fields they care about in ``tracked_fields`` and mix in
+``FieldTracker``. The values loaded from the database (or passed to the
+constructor) are snapshotted when the instance is built, so signal
+handlers can ask what changed without re-fetching the row:
+
+    class Booking(FieldTracker, models.Model):
+        tracked_fields = ("booking_status", "payment_status")
+
+    @receiver(post_save, sender=Booking)
+    def handler(sender, instance, created, **kwargs):
+        if instance.has_changed("booking_status"):
+            old = instance.previous("booking_status")
+
+The snapshot is refreshed once ``save()`` returns, i.e. after every
+``post_save`` receiver has run, so all receivers see the same "before"
+values regardless of connection order.
+"""
+
+DEFERRED = object()
+
+
+class FieldTracker:
+    tracked_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._snapshot_tracked()
+
+    def _snapshot_tracked(self, fields=None):
+        snapshot = getattr(self, "_tracked_values", {})
+        for name in self.tracked_fields if fields is None else fields:
+            attname = self._meta.get_field(name).attname
+            # Deferred fields are absent from __dict__; reading them would query.
+            snapshot[name] = self.__dict__.get(attname, DEFERRED)
+        self._tracked_values = snapshot
+
+    def _tracking_new(self):
+        # ``_state.adding`` is already False while post_save runs for an insert.
+        return self._state.adding or getattr(self, "_tracking_inserting", False)
+
+    def previous(self, field):
+        """Value of ``field`` when the instance was loaded or last saved (None if new or deferred)."""
+        if self._tracking_new():
+            return None
+        value = self._tracked_values[field]
+        return None if value is DEFERRED else value
+
+    def has_changed(self, field):
+        """
+        Whether ``field`` differs from its loaded value. Always True for
+        unsaved instances; a deferred field counts as changed once assigned.
+        """
+        if self._tracking_new():
+            return True
+        old = self._tracked_values[field]
+        attname = self._meta.get_field(field).attname
+        if old is DEFERRED:
+            # Still deferred means it was neither loaded nor assigned.
+            return attname in self.__dict__
+        return old != self.__dict__.get(attname)
+
+    def changed_fields(self):
+        return {name for name in self.tracked_fields if self.has_changed(name)}
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None:
+            self._snapshot_tracked()
+        else:
+            fields = set(fields)
+            self._snapshot_tracked([
+                name for name in self.tracked_fields if self._meta.get_field(name).attname in fields
+            ])
+
+    def save(self, *args, **kwargs):
+        self._tracking_inserting = self._state.adding
+        try:
+            super().save(*args, **kwargs)
+        finally:
+            self._tracking_inserting = False
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            self._snapshot_tracked([name for name in self.tracked_fields if name in update_fields])
+        else:
+            self._snapshot_tracked()
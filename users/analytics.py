@@ -0,0 +1,368 @@
+"""
+Set-based analytics queries.
+
+Every metric is computed with a fixed number of grouped / conditional
+aggregate queries, so response time does not grow with the number of
+apartments a landlord owns. Admin metrics are additionally cached with
+stale-while-revalidate so the dashboard never waits on a recompute once
+warm.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, UUIDField
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+PRESET_PERIODS = {"7": 7, "30": 30, "90": 90}
+DEFAULT_PERIOD = "30"
+MAX_CUSTOM_DAYS = 366
+
+BUCKETS = {
+    "day": TruncDay,
+    "week": TruncWeek,
+    "month": TruncMonth,
+}
+
+
+class PeriodError(ValueError):
+    pass
+
+
+def parse_period(params):
+    """
+    Resolve ``period`` (7/30/90 days) or a custom ``start``/``end`` range.
+
+    Returns ``(start, end, label)`` as aware datetimes. Raises PeriodError
+    with a user-facing message on invalid input.
+    """
+    start_raw = params.get("start")
+    end_raw = params.get("end")
+
+    if start_raw or end_raw:
+        start_date = parse_date(start_raw) if start_raw else None
+        end_date = parse_date(end_raw) if end_raw else timezone.now().date()
+        if not start_date or not end_date:
+            raise PeriodError("start and end must be YYYY-MM-DD")
+        if start_date > end_date:
+            raise PeriodError("start must be before end")
+        if (end_date - start_date).days > MAX_CUSTOM_DAYS:
+            raise PeriodError(f"Custom ranges are limited to {MAX_CUSTOM_DAYS} days")
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime.combine(start_date, time.min), tz)
+        end = timezone.make_aware(datetime.combine(end_date, time.max), tz)
+        return start, end, "custom"
+
+    period = str(params.get("period", DEFAULT_PERIOD)).rstrip("d")
+    if period not in PRESET_PERIODS:
+        raise PeriodError("period must be one of 7, 30 or 90")
+    end = timezone.now()
+    return end - timedelta(days=PRESET_PERIODS[period]), end, f"last_{period}_days"
+
+
+def parse_bucket(params):
+    bucket = params.get("bucket")
+    if bucket and bucket not in BUCKETS:
+        raise PeriodError("bucket must be one of day, week or month")
+    return bucket
+
+
+def _landlord_revenue_transactions(user, start, end):
+    """Completed deposits into the landlord's wallet, tagged with the apartment they belong to."""
+    from bookings.models import Booking
+    from wallet.models import WalletTransaction
+
+    referenced_apartment = Booking.objects.filter(id=OuterRef("reference_id")).values("unit__apartment_id")[:1]
+    return WalletTransaction.objects.filter(
+        wallet__user=user,
+        status="COMPLETED",
+        transaction_type="DEPOSIT",
+        created_at__gte=start,
+        created_at__lte=end,
+    ).annotate(
+        apartment_id=Coalesce(
+            F("booking__unit__apartment_id"),
+            Subquery(referenced_apartment),
+            output_field=UUIDField(),
+        ),
+    )
+
+
+def _money(value):
+    return str(Decimal(value or 0).quantize(Decimal("0.01")))
+
+
+def _bucket_key(value):
+    return value.date().isoformat() if value else None
+
+
+def landlord_analytics_data(user, start, end, bucket=None):
+    from properties.models import Apartment, Unit
+    from bookings.models import Booking
+
+    in_period = Q(units__bookings__created_at__gte=start, units__bookings__created_at__lte=end)
+    apartments = list(
+        Apartment.objects.filter(landlord=user)
+        .annotate(period_bookings=Count("units__bookings", filter=in_period))
+        .values("id", "name", "total_units", "occupied_units", "period_bookings")
+        .order_by("-created_at")
+    )
+
+    units = Unit.objects.filter(apartment__landlord=user).aggregate(
+        total=Count("id"),
+        occupied=Count("id", filter=Q(status="OCCUPIED")),
+    )
+    total_units = units["total"]
+    occupied_units = units["occupied"]
+
+    recent_bookings = Booking.objects.filter(landlord=user, created_at__gte=start, created_at__lte=end)
+    bookings = recent_bookings.aggregate(
+        total=Count("id"),
+        confirmed=Count("id", filter=Q(booking_status="CONFIRMED")),
+        pending=Count("id", filter=Q(booking_status="PENDING")),
+        cancelled=Count("id", filter=Q(booking_status="CANCELLED")),
+    )
+
+    revenue_by_apartment = {
+        row["apartment_id"]: row["total"]
+        for row in _landlord_revenue_transactions(user, start, end)
+        .values("apartment_id")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    }
+    revenue = sum(revenue_by_apartment.values(), Decimal("0"))
+
+    data = {
+        "start": start,
+        "end": end,
+        "units": {
+            "total": total_units,
+            "occupied": occupied_units,
+            "vacant": total_units - occupied_units,
+            "occupancy_rate": round((occupied_units / total_units * 100) if total_units > 0 else 0, 1),
+        },
+        "bookings": bookings,
+        "revenue": _money(revenue),
+        "apartments": [
+            {
+                "apartment_id": str(apt["id"]),
+                "name": apt["name"],
+                "total_units": apt["total_units"],
+                "occupied_units": apt["occupied_units"],
+                "bookings": apt["period_bookings"],
+                "revenue": _money(revenue_by_apartment.get(apt["id"])),
+            }
+            for apt in apartments
+        ],
+    }
+
+    if bucket:
+        trunc = BUCKETS[bucket]
+        booking_series = (
+            recent_bookings.annotate(bucket=trunc("created_at"))
+            .values("bucket")
+            .annotate(count=Count("id"))
+            .order_by("bucket")
+        )
+        revenue_series = (
+            _landlord_revenue_transactions(user, start, end)
+            .annotate(bucket=trunc("created_at"))
+            .values("bucket")
+            .annotate(total=Sum("amount"))
+            .order_by("bucket")
+        )
+        data["series"] = {
+            "bucket": bucket,
+            "bookings": [{"bucket": _bucket_key(r["bucket"]), "count": r["count"]} for r in booking_series],
+            "revenue": [{"bucket": _bucket_key(r["bucket"]), "total": _money(r["total"])} for r in revenue_series],
+        }
+
+    return data
+
+
+# =====================================================
+# ADMIN METRICS
+# =====================================================
+ADMIN_ANALYTICS_FRESH_SECONDS = 60
+ADMIN_ANALYTICS_STALE_SECONDS = 900
+
+ACTIVE_VERIFICATION_STATUSES = ["PENDING", "ASSIGNED", "IN_PROGRESS"]
+
+
+def _counts(qs, **aggregates):
+    return {key: value or 0 for key, value in qs.aggregate(**aggregates).items()}
+
+
+def admin_analytics_data(start, end, bucket=None):
+    """
+    Platform-wide metrics for the admin dashboard.
+
+    One conditional-aggregate query per table (users, units, bookings,
+    payments, subscriptions, verifications), plus three grouped queries
+    when a time series is requested.
+    """
+    from users.models import User
+    from properties.models import Unit
+    from bookings.models import Booking
+    from wallet.models import Subscription, WalletTransaction
+    from verification.models import Verification
+
+    now = timezone.now()
+    in_period = Q(created_at__gte=start, created_at__lte=end)
+
+    users = _counts(
+        User.objects.all(),
+        total=Count("id"),
+        tenants=Count("id", filter=Q(role=User.ROLE_TENANT)),
+        landlords=Count("id", filter=Q(role=User.ROLE_LANDLORD)),
+        agents=Count("id", filter=Q(role=User.ROLE_AGENT)),
+        admins=Count("id", filter=Q(role=User.ROLE_ADMIN)),
+        suspended=Count("id", filter=Q(status=User.STATUS_SUSPENDED)),
+        pending_verification=Count("id", filter=Q(verification_status=User.VERIF_PENDING)),
+        new=Count("id", filter=in_period),
+    )
+
+    units = _counts(
+        Unit.objects.all(),
+        total=Count("id"),
+        occupied=Count("id", filter=Q(status="OCCUPIED")),
+        reserved=Count("id", filter=Q(status="RESERVED")),
+        vacant=Count("id", filter=Q(status="VACANT")),
+        maintenance=Count("id", filter=Q(status="MAINTENANCE")),
+    )
+    units["occupancy_rate"] = round(units["occupied"] / units["total"] * 100, 1) if units["total"] else 0
+
+    booking_aggregates = {"total": Count("id"), "created": Count("id", filter=in_period)}
+    for status_value, _ in Booking.BOOKING_STATUS_CHOICES:
+        booking_aggregates[status_value.lower()] = Count("id", filter=Q(booking_status=status_value))
+    booking_aggregates["value"] = Sum("booking_amount", filter=in_period & Q(payment_status="COMPLETED"))
+    bookings = _counts(Booking.objects.all(), **booking_aggregates)
+    bookings["value"] = _money(bookings["value"])
+
+    completed = Q(status="COMPLETED")
+    payments = _counts(
+        WalletTransaction.objects.filter(in_period),
+        total=Count("id"),
+        completed=Count("id", filter=completed),
+        pending=Count("id", filter=Q(status="PENDING")),
+        failed=Count("id", filter=Q(status="FAILED")),
+        deposits=Sum("amount", filter=completed & Q(transaction_type="DEPOSIT")),
+        withdrawals=Sum("amount", filter=completed & Q(transaction_type="WITHDRAWAL")),
+        commission=Sum("amount", filter=completed & Q(transaction_type="COMMISSION_DEDUCTION")),
+        refunds=Sum("amount", filter=completed & Q(transaction_type="REFUND")),
+        subscriptions=Sum("amount", filter=completed & Q(transaction_type="SUBSCRIPTION")),
+    )
+    for key in ("deposits", "withdrawals", "commission", "refunds", "subscriptions"):
+        payments[key] = _money(payments[key])
+
+    subscriptions = _counts(
+        Subscription.objects.all(),
+        total=Count("id"),
+        active=Count("id", filter=Q(status="ACTIVE") & (Q(expires_at__isnull=True) | Q(expires_at__gt=now))),
+        pending=Count("id", filter=Q(status="PENDING")),
+        expired=Count("id", filter=Q(status="EXPIRED") | Q(status="ACTIVE", expires_at__lte=now)),
+        failed=Count("id", filter=Q(status="FAILED")),
+        new=Count("id", filter=in_period),
+    )
+
+    verifications = _counts(
+        Verification.objects.all(),
+        backlog=Count("id", filter=Q(status__in=ACTIVE_VERIFICATION_STATUSES)),
+        unassigned=Count("id", filter=Q(status="PENDING", assigned_agent__isnull=True)),
+        assigned=Count("id", filter=Q(status="ASSIGNED")),
+        in_progress=Count("id", filter=Q(status="IN_PROGRESS")),
+        verified=Count("id", filter=Q(status="VERIFIED", updated_at__gte=start, updated_at__lte=end)),
+        rejected=Count("id", filter=Q(status="REJECTED", updated_at__gte=start, updated_at__lte=end)),
+    )
+
+    data = {
+        "start": start,
+        "end": end,
+        # Kept for clients of the original three-count response.
+        "total_tenants": users["tenants"],
+        "total_landlords": users["landlords"],
+        "pending_verifications": users["pending_verification"],
+        "users": users,
+        "units": units,
+        "bookings": bookings,
+        "payments": payments,
+        "subscriptions": subscriptions,
+        "verifications": verifications,
+    }
+
+    if bucket:
+        trunc = BUCKETS[bucket]
+
+        def series(qs, **aggregates):
+            return list(
+                qs.filter(in_period)
+                .annotate(bucket=trunc("created_at"))
+                .values("bucket")
+                .annotate(**aggregates)
+                .order_by("bucket")
+            )
+
+        revenue = series(
+            WalletTransaction.objects.filter(completed, transaction_type="DEPOSIT"), total=Sum("amount")
+        )
+        data["series"] = {
+            "bucket": bucket,
+            "new_users": [
+                {"bucket": _bucket_key(r["bucket"]), "count": r["count"]}
+                for r in series(User.objects.all(), count=Count("id"))
+            ],
+            "bookings": [
+                {"bucket": _bucket_key(r["bucket"]), "count": r["count"]}
+                for r in series(Booking.objects.all(), count=Count("id"))
+            ],
+            "revenue": [{"bucket": _bucket_key(r["bucket"]), "total": _money(r["total"])} for r in revenue],
+        }
+
+    return data
+
+
+def _admin_cache_params(params):
+    keys = ("period", "start", "end", "bucket")
+    return {key: params[key] for key in keys if params.get(key)}
+
+
+def _admin_cache_key(params):
+    parts = [f"{key}={value}" for key, value in sorted(params.items())]
+    return "analytics:admin:" + "&".join(parts)
+
+
+def refresh_admin_analytics(params):
+    """Recompute and cache admin metrics for normalized query ``params``."""
+    start, end, label = parse_period(params)
+    data = {"period": label, **admin_analytics_data(start, end, bucket=parse_bucket(params))}
+    entry = {"data": data, "fresh_until": timezone.now() + timedelta(seconds=ADMIN_ANALYTICS_FRESH_SECONDS)}
+    cache.set(_admin_cache_key(params), entry, ADMIN_ANALYTICS_STALE_SECONDS)
+    return data
+
+
+def get_admin_analytics(params):
+    """
+    Admin metrics with a short TTL and stale-while-revalidate.
+
+    Fresh entries are served as-is. Stale entries are served immediately
+    while a single background refresh (guarded by ``cache.add``) recomputes
+    them; only a cold cache computes inline. Raises PeriodError on bad
+    input before touching the cache.
+    """
+    params = _admin_cache_params(params)
+    parse_period(params)
+    parse_bucket(params)
+
+    key = _admin_cache_key(params)
+    entry = cache.get(key)
+    if entry is None:
+        return refresh_admin_analytics(params)
+
+    if entry["fresh_until"] <= timezone.now():
+        if cache.add(f"{key}:refreshing", True, ADMIN_ANALYTICS_FRESH_SECONDS):
+            from .tasks import refresh_admin_analytics as refresh_task
+
+            refresh_task.delay(params)
+    return entry["data"]
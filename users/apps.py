@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from . import signals
+        signals.register_dashboard_signals()
+        signals.register_token_cache_signals()
+        signals.register_principal_signals()
@@ -1,6 +1,30 @@
 from rest_framework.authentication import TokenAuthentication
 from rest_framework import exceptions
 from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .token_cache import lookup
+from .tokens import is_revoked, user_from_claims
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    'Bearer <access token>' authentication that never queries the database:
+    the user is built from the token's claims and revocation is one cache read.
+    """
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if is_revoked(token.payload):
+            raise InvalidToken({"detail": "Token has been revoked.", "code": "token_revoked"})
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            return user_from_claims(validated_token.payload)
+        except (KeyError, ValueError):
+            raise InvalidToken({"detail": "Token contained no recognizable user identification", "code": "bad_token"})
 
 
 class FlexibleTokenAuthentication(TokenAuthentication):
@@ -10,7 +34,16 @@ class FlexibleTokenAuthentication(TokenAuthentication):
     - '<token>' (Swagger/直接发送token的情况)
     """
     model = Token
-    
+
+    def authenticate_credentials(self, key):
+        result = lookup(key)
+        if result is None:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+        user, token = result
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+        return (user, token)
+
     def authenticate(self, request):
         auth = request.headers.get('Authorization')
         
@@ -20,14 +53,13 @@ class FlexibleTokenAuthentication(TokenAuthentication):
         # Try standard format first: "Token <token>"
         if auth.startswith('Token '):
             return super().authenticate(request)
+
+        # JWTs are handled by StatelessJWTAuthentication
+        if auth.startswith('Bearer '):
+            return None
         
         # If just the token (no prefix), use it directly
         if auth:
-            key = auth
-            try:
-                token = self.model.objects.get(key=key)
-                return (token.user, token)
-            except self.model.DoesNotExist:
-                raise exceptions.AuthenticationFailed('Invalid token.')
+            return self.authenticate_credentials(auth)
         
         return None
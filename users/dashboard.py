@@ -0,0 +1,168 @@
+"""
+Dashboard stats service.
+
+Each user has one DashboardRollup row holding unit, booking and wallet
+counters. Signal handlers (users/signals.py) apply deltas as bookings,
+units and wallets change; dashboards read the row through the cache and
+fall back to a primary-key lookup. ``check_rollups`` compares the stored
+counters with live counts and can repair drift caused by bulk updates.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import DashboardRollup
+
+ROLLUP_CACHE_TIMEOUT = 300
+
+UNIT_STATUS_FIELDS = {
+    "VACANT": "units_vacant",
+    "OCCUPIED": "units_occupied",
+    "RESERVED": "units_reserved",
+    "MAINTENANCE": "units_maintenance",
+}
+
+BOOKING_STATUSES = ["PENDING", "CONFIRMED", "PAID", "COMPLETED", "CANCELLED"]
+
+WALLET_BALANCE_FIELDS = {
+    "LANDLORD": "landlord_wallet_balance",
+    "PLATFORM": "wallet_balance",
+}
+
+def _cache_key(user_id):
+    return f"dashboard:rollup:{user_id}"
+
+
+def booking_field(side, booking_status):
+    """Counter name for a booking status seen from the landlord or tenant side."""
+    if booking_status not in BOOKING_STATUSES:
+        return None
+    return f"{side}_bookings_{booking_status.lower()}"
+
+
+def invalidate(user_id):
+    key = _cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def live_counts(user_id):
+    """Compute the rollup from the transactional tables, one query per table."""
+    from properties.models import Apartment, Unit
+    from bookings.models import Booking
+    from wallet.models import Wallet
+
+    counts = {
+        "apartments": Apartment.objects.filter(landlord_id=user_id).count(),
+    }
+
+    unit_aggregates = {"units_total": Count("id")}
+    for status_value, field in UNIT_STATUS_FIELDS.items():
+        unit_aggregates[field] = Count("id", filter=Q(status=status_value))
+    counts.update(Unit.objects.filter(apartment__landlord_id=user_id).aggregate(**unit_aggregates))
+
+    booking_aggregates = {}
+    for status_value in BOOKING_STATUSES:
+        booking_aggregates[booking_field("landlord", status_value)] = Count(
+            "id", filter=Q(landlord_id=user_id, booking_status=status_value)
+        )
+        booking_aggregates[booking_field("tenant", status_value)] = Count(
+            "id", filter=Q(tenant_id=user_id, booking_status=status_value)
+        )
+    counts.update(
+        Booking.objects.filter(Q(landlord_id=user_id) | Q(tenant_id=user_id)).aggregate(**booking_aggregates)
+    )
+
+    balances = Wallet.objects.filter(user_id=user_id).aggregate(**{
+        field: Sum("balance", filter=Q(wallet_type=wallet_type))
+        for wallet_type, field in WALLET_BALANCE_FIELDS.items()
+    })
+    counts.update({field: balance or Decimal("0.00") for field, balance in balances.items()})
+    return counts
+
+
+def rebuild_rollup(user_id):
+    """Recompute a user's rollup from live counts and store it."""
+    rollup, _ = DashboardRollup.objects.update_or_create(
+        user_id=user_id,
+        defaults=live_counts(user_id),
+    )
+    invalidate(user_id)
+    return rollup
+
+
+def get_rollup(user_id):
+    """Return the rollup for ``user_id`` from cache, the rollup row, or a rebuild."""
+    key = _cache_key(user_id)
+    rollup = cache.get(key)
+    if rollup is not None:
+        return rollup
+
+    rollup = DashboardRollup.objects.filter(user_id=user_id).first()
+    if rollup is None:
+        rollup = rebuild_rollup(user_id)
+    cache.set(key, rollup, ROLLUP_CACHE_TIMEOUT)
+    return rollup
+
+
+def apply_delta(user_id, deltas):
+    """
+    Atomically add ``deltas`` ({field: amount}) to a user's counters.
+
+    Users without a rollup row are skipped; the row is built from live
+    counts the first time their dashboard is read.
+    """
+    deltas = {field: value for field, value in deltas.items() if field and value}
+    if not user_id or not deltas:
+        return
+
+    updated = DashboardRollup.objects.filter(user_id=user_id).update(
+        **{field: F(field) + value for field, value in deltas.items()}
+    )
+    if updated:
+        invalidate(user_id)
+
+
+def set_wallet_balance(user_id, wallet_type):
+    """Store the balance of the user's ``wallet_type`` wallets in its rollup field."""
+    from wallet.models import Wallet
+
+    field = WALLET_BALANCE_FIELDS.get(wallet_type)
+    if field is None:
+        return
+    balance = Wallet.objects.filter(user_id=user_id, wallet_type=wallet_type).aggregate(
+        total=Sum("balance")
+    )["total"]
+    updated = DashboardRollup.objects.filter(user_id=user_id).update(
+        **{field: balance or Decimal("0.00")}
+    )
+    if updated:
+        invalidate(user_id)
+
+
+def check_rollups(user_ids=None, fix=False):
+    """
+    Compare stored rollups with live counts.
+
+    Returns a list of ``(user_id, {field: (stored, live)})`` for rollups that
+    have drifted. With ``fix=True`` the drifted rows are rebuilt.
+    """
+    qs = DashboardRollup.objects.all()
+    if user_ids is not None:
+        qs = qs.filter(user_id__in=user_ids)
+
+    mismatches = []
+    for rollup in qs.iterator(chunk_size=500):
+        live = live_counts(rollup.user_id)
+        diff = {
+            field: (getattr(rollup, field), value)
+            for field, value in live.items()
+            if getattr(rollup, field) != value
+        }
+        if diff:
+            mismatches.append((rollup.user_id, diff))
+            if fix:
+                rebuild_rollup(rollup.user_id)
+    return mismatches
@@ -0,0 +1,74 @@
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory
+
+from users.models import User
+from users.views import RegisterView
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure signup latency under a burst of concurrent registrations. "
+        "Benchmark accounts are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200)
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument(
+            "--fast-hashing",
+            action="store_true",
+            help="Use a cheap password hasher so the numbers reflect database work rather than PBKDF2.",
+        )
+
+    def _signup(self, view, factory, prefix, i):
+        data = {
+            "username": f"{prefix}{i}",
+            "email": f"{prefix}{i}@example.com",
+            "password": "Bench-pass-123!",
+            "password2": "Bench-pass-123!",
+            "role": User.ROLE_TENANT,
+        }
+        request = factory.post("/api/auth/register", data, format="multipart")
+        start = time.perf_counter()
+        response = view(request)
+        elapsed = time.perf_counter() - start
+        close_old_connections()
+        if response.status_code != 201:
+            raise RuntimeError(f"Signup failed: {response.status_code} {response.data}")
+        return elapsed
+
+    def handle(self, *args, **options):
+        hashers = ["django.contrib.auth.hashers.MD5PasswordHasher"] if options["fast_hashing"] else None
+        prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+        factory = APIRequestFactory()
+        view = RegisterView.as_view()
+
+        with override_settings(**({"PASSWORD_HASHERS": hashers} if hashers else {})):
+            try:
+                with CaptureQueriesContext(connection) as queries:
+                    self._signup(view, factory, prefix, "warmup")
+                self.stdout.write(f"queries per signup: {len(queries)}")
+
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+                    timings = list(pool.map(
+                        lambda i: self._signup(view, factory, prefix, i), range(options["requests"])
+                    ))
+                wall = time.perf_counter() - started
+            finally:
+                User.objects.filter(username__startswith=prefix).delete()
+
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        self.stdout.write(
+            f"{len(timings)} signups, concurrency {options['concurrency']}: "
+            f"p50 {statistics.median(timings) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms, "
+            f"max {timings[-1] * 1000:.1f} ms, {len(timings) / wall:.1f} signups/s"
+        )
@@ -0,0 +1,69 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from users import token_cache
+from users.authentication import FlexibleTokenAuthentication
+from users.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = "Measure per-request token authentication cost with and without the token cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+
+    def _measure(self, label, iterations, authenticate, before=None):
+        elapsed = 0.0
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(iterations):
+                if before:
+                    before()
+                start = time.perf_counter()
+                authenticate()
+                elapsed += time.perf_counter() - start
+        per_request = elapsed / iterations * 1_000_000
+        self.stdout.write(
+            f"{label:<28} {per_request:10.1f} µs/request {len(queries) / iterations:8.2f} queries/request"
+        )
+
+    def handle(self, *args, **options):
+        iterations = options["iterations"]
+        authenticator = FlexibleTokenAuthentication()
+
+        # Everything runs in a transaction that is rolled back, so the
+        # benchmark user never becomes visible to anything else.
+        try:
+            with transaction.atomic():
+                suffix = uuid.uuid4().hex[:12]
+                user = User.objects.create_user(
+                    username=f"bench-{suffix}", email=f"bench-{suffix}@example.com", role=User.ROLE_TENANT
+                )
+                key = Token.objects.create(user=user).key
+
+                def uncached():
+                    token = Token.objects.select_related("user").get(key=key)
+                    return token.user.is_active
+
+                def cached():
+                    return authenticator.authenticate_credentials(key)
+
+                def drop_local():
+                    token_cache._local.delete(key)
+
+                self._measure("database (no cache)", iterations, uncached)
+                self._measure("shared cache (LRU miss)", iterations, cached, before=drop_local)
+                self._measure("in-process LRU", iterations, cached)
+
+                token_cache.invalidate_token(key)
+                raise Rollback
+        except Rollback:
+            pass
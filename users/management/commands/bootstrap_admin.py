@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "One-time setup: make the first platform admin, either by promoting an "
+        "existing account or by creating a new one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", required=True)
+        parser.add_argument("--username", help="Username for a new account (defaults to the email).")
+        parser.add_argument("--password", help="Password for a new account.")
+        parser.add_argument("--force", action="store_true", help="Run even if an admin already exists.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if User.objects.filter(role=User.ROLE_ADMIN).exists() and not options["force"]:
+                raise CommandError("An admin already exists; use --force to add another.")
+
+            user = User.objects.select_for_update().filter(email=options["email"]).first()
+            created = user is None
+            if created:
+                if not options["password"]:
+                    raise CommandError("--password is required to create a new admin.")
+                user = User(email=options["email"], username=options["username"] or options["email"])
+                user.set_password(options["password"])
+
+            user.role = User.ROLE_ADMIN
+            user.verification_status = User.VERIF_VERIFIED
+            user.email_verified = True
+            user.status = User.STATUS_ACTIVE
+            user.save()
+
+        action = "Created" if created else "Promoted"
+        self.stdout.write(self.style.SUCCESS(f"{action} admin {user.email}."))
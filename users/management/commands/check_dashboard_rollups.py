@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from users.dashboard import check_rollups
+
+
+class Command(BaseCommand):
+    help = "Compare dashboard rollups against live counts and optionally rebuild drifted rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Rebuild rollups that have drifted.")
+
+    def handle(self, *args, **options):
+        mismatches = check_rollups(fix=options["fix"])
+        for user_id, diff in mismatches:
+            fields = ", ".join(f"{field}: {stored} != {live}" for field, (stored, live) in diff.items())
+            self.stdout.write(f"{user_id}: {fields}")
+
+        action = "rebuilt" if options["fix"] else "found"
+        self.stdout.write(self.style.SUCCESS(f"{len(mismatches)} drifted rollup(s) {action}."))
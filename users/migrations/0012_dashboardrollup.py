@@ -0,0 +1,39 @@
+# Generated by Django 5.0.4 on 2026-10-19 12:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_contactinquiry_newslettersubscription'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardRollup',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_rollup', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('apartments', models.IntegerField(default=0)),
+                ('units_total', models.IntegerField(default=0)),
+                ('units_vacant', models.IntegerField(default=0)),
+                ('units_occupied', models.IntegerField(default=0)),
+                ('units_reserved', models.IntegerField(default=0)),
+                ('units_maintenance', models.IntegerField(default=0)),
+                ('landlord_bookings_pending', models.IntegerField(default=0)),
+                ('landlord_bookings_confirmed', models.IntegerField(default=0)),
+                ('landlord_bookings_paid', models.IntegerField(default=0)),
+                ('landlord_bookings_completed', models.IntegerField(default=0)),
+                ('landlord_bookings_cancelled', models.IntegerField(default=0)),
+                ('tenant_bookings_pending', models.IntegerField(default=0)),
+                ('tenant_bookings_confirmed', models.IntegerField(default=0)),
+                ('tenant_bookings_paid', models.IntegerField(default=0)),
+                ('tenant_bookings_completed', models.IntegerField(default=0)),
+                ('tenant_bookings_cancelled', models.IntegerField(default=0)),
+                ('wallet_balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
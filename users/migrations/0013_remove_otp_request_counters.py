@@ -0,0 +1,21 @@
+# Generated by Django 5.0.4 on 2026-10-19 13:33
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_dashboardrollup'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='otp_request_count',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='otp_request_window',
+        ),
+    ]
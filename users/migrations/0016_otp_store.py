@@ -0,0 +1,43 @@
+# Generated by Django 5.0.4 on 2026-10-19 13:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0015_user_search_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='user',
+            name='email_otp',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='email_otp_used',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='otp_expiry',
+        ),
+        migrations.CreateModel(
+            name='OneTimeCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('purpose', models.CharField(max_length=20)),
+                ('code_hash', models.CharField(max_length=64)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='one_time_codes', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='onetimecode',
+            constraint=models.UniqueConstraint(fields=('user', 'purpose'), name='unique_otp_per_purpose'),
+        ),
+    ]
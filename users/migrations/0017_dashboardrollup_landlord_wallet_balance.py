@@ -0,0 +1,42 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:55
+
+from django.db import migrations, models
+
+WALLET_BALANCE_FIELDS = {
+    'LANDLORD': 'landlord_wallet_balance',
+    'PLATFORM': 'wallet_balance',
+}
+
+
+def split_wallet_balances(apps, schema_editor):
+    # wallet_balance held the sum of every wallet the user has; store each
+    # wallet type's balance in its own field instead.
+    DashboardRollup = apps.get_model('users', 'DashboardRollup')
+    Wallet = apps.get_model('wallet', 'Wallet')
+
+    DashboardRollup.objects.update(wallet_balance=0, landlord_wallet_balance=0)
+    for wallet_type, field in WALLET_BALANCE_FIELDS.items():
+        balances = (
+            Wallet.objects.filter(wallet_type=wallet_type)
+            .values('user_id')
+            .annotate(total=models.Sum('balance'))
+        )
+        for row in balances.iterator():
+            DashboardRollup.objects.filter(user_id=row['user_id']).update(**{field: row['total']})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0016_otp_store'),
+        ('wallet', '0009_pendingpayment_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dashboardrollup',
+            name='landlord_wallet_balance',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(split_wallet_balances, migrations.RunPython.noop),
+    ]
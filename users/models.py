@@ -2,12 +2,18 @@ import uuid
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from tyrent_backend.tracking import FieldTracker
 
-class User(AbstractUser):
+
+class User(FieldTracker, AbstractUser):
     """
     Custom user model with roles, verification, and OTP support.
     """
 
+    # Changes to these invalidate cached token lookups (users/token_cache.py)
+    # and revoke issued JWTs (users/tokens.py)
+    tracked_fields = ("role", "status", "verification_status", "email_verified", "is_active", "password")
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
     # ================= BASIC INFO =================
@@ -78,20 +84,53 @@ class User(AbstractUser):
     # ================= EMAIL VERIFICATION =================
     email_verified = models.BooleanField(default=False)
 
-    email_otp = models.CharField(max_length=6, blank=True, null=True)
-    otp_expiry = models.DateTimeField(blank=True, null=True)
-    email_otp_used = models.BooleanField(default=False)
 
-    otp_request_count = models.PositiveIntegerField(default=0)
-    otp_request_window = models.DateTimeField(blank=True, null=True)
 
     # ================= TIMESTAMPS =================
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta(AbstractUser.Meta):
+        # Name/email/phone search uses trigram indexes created in migration
+        # 0015 (PostgreSQL only).
+        indexes = [
+            models.Index(fields=["role", "verification_status", "-created_at"], name="user_role_verif_created_idx"),
+            models.Index(fields=["verification_status", "-created_at"], name="user_verif_created_idx"),
+            models.Index(fields=["-created_at"], name="user_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.username} ({self.role})"
 
+    def refresh_from_db(self, using=None, fields=None):
+        # Users rebuilt from the token cache load every deferred column on
+        # first access instead of one query per attribute.
+        if fields is not None and getattr(self, "_load_deferred_together", False):
+            self._load_deferred_together = False
+            fields = set(fields) | self.get_deferred_fields()
+        super().refresh_from_db(using=using, fields=fields)
+
+
+class OneTimeCode(models.Model):
+    """
+    Database store for one-time passcodes (users/otp.py), used when
+    OTP_STORE is "database". Holds an HMAC of the code, never the code.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="one_time_codes")
+    purpose = models.CharField(max_length=20)
+    code_hash = models.CharField(max_length=64)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "purpose"], name="unique_otp_per_purpose"),
+        ]
+
+    def __str__(self):
+        return f"{self.purpose} code for {self.user_id}"
+
 
 class NewsletterSubscription(models.Model):
     email = models.EmailField(unique=True)
@@ -112,5 +151,57 @@ class ContactInquiry(models.Model):
     is_resolved = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["is_resolved", "-created_at"], name="contact_resolved_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.subject} - {self.email}"
+
+
+class DashboardRollup(models.Model):
+    """
+    Pre-aggregated dashboard counters for a single user.
+
+    Kept in step with bookings, units and wallets by the handlers in
+    users/signals.py so dashboards are served from one primary-key read.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="dashboard_rollup",
+    )
+
+    # ================= LANDLORD =================
+    apartments = models.IntegerField(default=0)
+    units_total = models.IntegerField(default=0)
+    units_vacant = models.IntegerField(default=0)
+    units_occupied = models.IntegerField(default=0)
+    units_reserved = models.IntegerField(default=0)
+    units_maintenance = models.IntegerField(default=0)
+
+    landlord_bookings_pending = models.IntegerField(default=0)
+    landlord_bookings_confirmed = models.IntegerField(default=0)
+    landlord_bookings_paid = models.IntegerField(default=0)
+    landlord_bookings_completed = models.IntegerField(default=0)
+    landlord_bookings_cancelled = models.IntegerField(default=0)
+
+    # ================= TENANT =================
+    tenant_bookings_pending = models.IntegerField(default=0)
+    tenant_bookings_confirmed = models.IntegerField(default=0)
+    tenant_bookings_paid = models.IntegerField(default=0)
+    tenant_bookings_completed = models.IntegerField(default=0)
+    tenant_bookings_cancelled = models.IntegerField(default=0)
+
+    # ================= WALLETS =================
+    # Balance of the LANDLORD wallet, and of the PLATFORM wallet tenants pay
+    # from (and are credited to); see WALLET_BALANCE_FIELDS in dashboard.py.
+    landlord_wallet_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    wallet_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard rollup for {self.user_id}"
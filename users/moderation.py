@@ -0,0 +1,131 @@
+"""
+Bulk admin moderation.
+
+``moderate`` applies one action to a list of users with a single locking
+SELECT and a single set-based UPDATE per chunk, instead of a fetch and a
+full-row ``save()`` per user. Because ``update()`` bypasses ``post_save``,
+it does the save-time side effects itself after commit: it drops the users'
+cached token lookups, revokes their issued JWTs and queues one notification
+per affected user through the outbox.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import User
+
+CHUNK_SIZE = 1000
+
+RESULT_UPDATED = "updated"
+RESULT_UNCHANGED = "unchanged"
+RESULT_NOT_FOUND = "not_found"
+RESULT_SKIPPED = "skipped"
+
+
+def _verification(status):
+    def fields(actor, notes, now):
+        return {
+            "verification_status": status,
+            "verification_notes": notes,
+            "verified_by_admin_id": actor.id,
+            "verification_date": now,
+        }
+    return fields
+
+
+# action -> (field compared to decide whether the user changes, target value,
+#            extra columns to write, notification (type, title, message))
+ACTIONS = {
+    "verify": (
+        "verification_status", User.VERIF_VERIFIED, _verification(User.VERIF_VERIFIED),
+        ("USER_VERIFICATION", "Account Verified", "Your account has been verified."),
+    ),
+    "reject": (
+        "verification_status", User.VERIF_REJECTED, _verification(User.VERIF_REJECTED),
+        ("USER_VERIFICATION", "Verification Rejected", "Your account verification was rejected."),
+    ),
+    "promote": (
+        "role", User.ROLE_ADMIN, None,
+        ("USER_ROLE_CHANGE", "Role Changed", "You have been promoted to Admin."),
+    ),
+    "demote": (
+        "role", User.ROLE_TENANT, None,
+        ("USER_ROLE_CHANGE", "Role Changed", "Your role has been changed to Tenant."),
+    ),
+    "suspend": (
+        "status", User.STATUS_SUSPENDED, None,
+        ("GENERAL", "Account Suspended", "Your account has been suspended."),
+    ),
+    "unsuspend": (
+        "status", User.STATUS_ACTIVE, None,
+        ("GENERAL", "Account Reinstated", "Your account has been reinstated."),
+    ),
+}
+
+# Actions an admin may not apply to their own account.
+SELF_PROTECTED = {"demote", "suspend"}
+
+
+def moderate(action, user_ids, actor, notes=""):
+    """
+    Apply ``action`` to ``user_ids``. Returns ``(results, updated_ids)``
+    where ``results`` maps each requested id to one of ``updated``,
+    ``unchanged`` (already in the target state), ``not_found`` or
+    ``skipped`` (an admin acting on their own account).
+    """
+    field, target, extra, _ = ACTIONS[action]
+    user_ids = list(dict.fromkeys(user_ids))
+    results = dict.fromkeys(user_ids, RESULT_NOT_FOUND)
+    updated_ids = []
+    now = timezone.now()
+
+    values = {field: target, "updated_at": now}
+    if extra:
+        values.update(extra(actor, notes, now))
+
+    with transaction.atomic():
+        for start in range(0, len(user_ids), CHUNK_SIZE):
+            chunk = user_ids[start:start + CHUNK_SIZE]
+            current = dict(
+                User.objects.select_for_update()
+                .filter(id__in=chunk)
+                .order_by()
+                .values_list("id", field)
+            )
+            to_update = []
+            for user_id, value in current.items():
+                if action in SELF_PROTECTED and user_id == actor.id:
+                    results[user_id] = RESULT_SKIPPED
+                elif value == target:
+                    results[user_id] = RESULT_UNCHANGED
+                else:
+                    results[user_id] = RESULT_UPDATED
+                    to_update.append(user_id)
+            if to_update:
+                User.objects.filter(id__in=to_update).update(**values)
+                updated_ids.extend(to_update)
+
+        if updated_ids:
+            transaction.on_commit(lambda: after_moderation(action, updated_ids))
+            _notify(action, updated_ids, notes)
+
+    return results, updated_ids
+
+
+def after_moderation(action, user_ids):
+    from .token_cache import invalidate_users
+    from .tokens import revoke_users
+
+    for start in range(0, len(user_ids), CHUNK_SIZE):
+        chunk = user_ids[start:start + CHUNK_SIZE]
+        invalidate_users(chunk)
+        revoke_users(chunk)
+
+
+def _notify(action, user_ids, notes):
+    from notifications.outbox import publish_many
+
+    notification_type, title, message = ACTIONS[action][3]
+    if notes and action in ("verify", "reject"):
+        message = f"{message} Notes: {notes}"
+    for start in range(0, len(user_ids), CHUNK_SIZE):
+        publish_many(notification_type, title, message, user_ids[start:start + CHUNK_SIZE], related_object_type="User")
@@ -0,0 +1,149 @@
+"""
+One-time passcodes, kept out of the User row.
+
+Codes are stored as a keyed HMAC of ``purpose:user_id:code``, never in
+plain text, and checked with a constant-time comparison. Each user has at
+most one live code per purpose (email verification, password reset);
+issuing a new one replaces the old. A code is consumed atomically on
+success and invalidated after OTP_MAX_ATTEMPTS wrong guesses.
+
+Two stores, chosen by ``OTP_STORE``:
+
+- ``cache``: the shared Django cache (Redis in production), whose native
+  key TTL expires codes without any cleanup job;
+- ``database``: the OneTimeCode table, for deployments where losing the
+  cache must not invalidate outstanding codes.
+
+Nothing here writes to the user table; callers update the user only once
+verification has succeeded.
+"""
+import hashlib
+import hmac
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+EMAIL_VERIFY = "email_verify"
+PASSWORD_RESET = "password_reset"
+
+PURPOSES = (EMAIL_VERIFY, PASSWORD_RESET)
+
+
+class CacheOTPStore:
+    def _key(self, user_id, purpose):
+        return f"otp:{purpose}:{user_id}"
+
+    def _attempts_key(self, user_id, purpose):
+        return f"otp-attempts:{purpose}:{user_id}"
+
+    def save(self, user_id, purpose, code_hash, ttl):
+        cache.set_many({self._key(user_id, purpose): code_hash, self._attempts_key(user_id, purpose): 0}, ttl)
+
+    def get(self, user_id, purpose):
+        """``(code_hash, attempts)`` of the live code, or None."""
+        key, attempts_key = self._key(user_id, purpose), self._attempts_key(user_id, purpose)
+        found = cache.get_many([key, attempts_key])
+        if key not in found:
+            return None
+        return found[key], found.get(attempts_key, 0)
+
+    def record_failure(self, user_id, purpose):
+        try:
+            return cache.incr(self._attempts_key(user_id, purpose))
+        except ValueError:
+            return settings.OTP_MAX_ATTEMPTS
+
+    def consume(self, user_id, purpose):
+        """Delete the code; True only for the caller that actually removed it."""
+        deleted = cache.delete(self._key(user_id, purpose))
+        cache.delete(self._attempts_key(user_id, purpose))
+        return deleted
+
+
+class DatabaseOTPStore:
+    def _live(self, user_id, purpose):
+        from .models import OneTimeCode
+
+        return OneTimeCode.objects.filter(user_id=user_id, purpose=purpose, expires_at__gt=timezone.now())
+
+    def save(self, user_id, purpose, code_hash, ttl):
+        from .models import OneTimeCode
+
+        OneTimeCode.objects.update_or_create(
+            user_id=user_id,
+            purpose=purpose,
+            defaults={
+                "code_hash": code_hash,
+                "attempts": 0,
+                "expires_at": timezone.now() + timedelta(seconds=ttl),
+            },
+        )
+
+    def get(self, user_id, purpose):
+        return self._live(user_id, purpose).values_list("code_hash", "attempts").first()
+
+    def record_failure(self, user_id, purpose):
+        live = self._live(user_id, purpose)
+        live.update(attempts=F("attempts") + 1)
+        attempts = live.values_list("attempts", flat=True).first()
+        return settings.OTP_MAX_ATTEMPTS if attempts is None else attempts
+
+    def consume(self, user_id, purpose):
+        from .models import OneTimeCode
+
+        deleted, _ = self._live(user_id, purpose).delete()
+        OneTimeCode.objects.filter(user_id=user_id, purpose=purpose).delete()
+        return bool(deleted)
+
+
+def get_store():
+    if settings.OTP_STORE == "database":
+        return DatabaseOTPStore()
+    return CacheOTPStore()
+
+
+def _hash(user_id, purpose, code):
+    message = f"{purpose}:{user_id}:{code}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+def generate_code():
+    return f"{secrets.randbelow(10 ** 6):06d}"
+
+
+def issue(user_id, purpose):
+    """Create a new code for ``purpose``, replacing any live one; returns the plain code."""
+    if purpose not in PURPOSES:
+        raise ValueError(f"Unknown OTP purpose: {purpose}")
+    code = generate_code()
+    get_store().save(user_id, purpose, _hash(user_id, purpose, code), settings.OTP_TTL_SECONDS)
+    return code
+
+
+def verify(user_id, purpose, code):
+    """
+    Check ``code`` and consume it on success. Returns ``(ok, message)``.
+    """
+    store = get_store()
+    entry = store.get(user_id, purpose)
+    if entry is None:
+        return False, "OTP expired or already used."
+
+    code_hash, attempts = entry
+    if attempts >= settings.OTP_MAX_ATTEMPTS:
+        store.consume(user_id, purpose)
+        return False, "Too many incorrect attempts. Request a new OTP."
+
+    if not hmac.compare_digest(code_hash, _hash(user_id, purpose, str(code or ""))):
+        if store.record_failure(user_id, purpose) >= settings.OTP_MAX_ATTEMPTS:
+            store.consume(user_id, purpose)
+        return False, "Invalid OTP."
+
+    # Two concurrent requests with the right code: only one consumes it.
+    if not store.consume(user_id, purpose):
+        return False, "OTP expired or already used."
+    return True, "OTP valid."
@@ -0,0 +1,14 @@
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination: each page is ``WHERE created_at < <cursor>``
+    on an indexed column, so deep pages cost the same as the first one
+    instead of scanning and discarding OFFSET rows.
+    """
+
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+    ordering = "-created_at"
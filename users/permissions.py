@@ -1,12 +1,14 @@
 from rest_framework.permissions import BasePermission
 
+from .principal import get_principal
+
 
 class IsAdmin(BasePermission):
     """
     Allow access only to users with role == ADMIN.
     """
     def has_permission(self, request, view):
-        return bool(request.user and request.user.is_authenticated and getattr(request.user, "role", None) == "ADMIN")
+        return get_principal(request).is_admin
 
 
 class IsVerifiedLandlord(BasePermission):
@@ -14,13 +16,8 @@ class IsVerifiedLandlord(BasePermission):
     Allow access only to verified landlords.
     """
     def has_permission(self, request, view):
-        user = request.user
-        return bool(
-            user and
-            user.is_authenticated and
-            getattr(user, "role", None) == "LANDLORD" and
-            getattr(user, "verification_status", None) == "VERIFIED"
-        )
+        principal = get_principal(request)
+        return principal.is_landlord and principal.is_verified
 
 
 class IsVerifiedTenant(BasePermission):
@@ -28,13 +25,8 @@ class IsVerifiedTenant(BasePermission):
     Allow access only to verified tenants.
     """
     def has_permission(self, request, view):
-        user = request.user
-        return bool(
-            user and
-            user.is_authenticated and
-            getattr(user, "role", None) == "TENANT" and
-            getattr(user, "verification_status", None) == "VERIFIED"
-        )
+        principal = get_principal(request)
+        return principal.is_tenant and principal.is_verified
 
 
 class IsOwnerOrAdmin(BasePermission):
@@ -43,9 +35,6 @@ class IsOwnerOrAdmin(BasePermission):
     Works as object permission.
     """
     def has_object_permission(self, request, view, obj):
-        if not request.user or not request.user.is_authenticated:
-            return False
-        if getattr(request.user, "role", None) == "ADMIN":
-            return True
+        principal = get_principal(request)
         # obj is expected to be a User instance
-        return getattr(obj, "id", None) == getattr(request.user, "id", None)
+        return principal.is_admin or principal.is_user(getattr(obj, "id", None))
@@ -0,0 +1,104 @@
+"""
+Per-request authorization principal.
+
+``get_principal(request)`` derives everything the permission classes and
+view querysets need to know about the caller once per request: the user
+id, role, verification state, staff flags and, for landlords, the set of
+apartment ids they own. Permission checks then compare foreign-key ids
+(``obj.landlord_id``, ``obj.apartment_id``) against the principal instead
+of loading related objects per row.
+
+The owned-apartment id set is loaded lazily with one ``values_list``
+query and shared across requests through the cache under
+``auth:apartments:{user_id}``; it is dropped whenever an apartment is
+created, deleted or changes landlord (see users/signals.py).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+ATTR = "_principal"
+
+
+def _apartments_key(user_id):
+    return f"auth:apartments:{user_id}"
+
+
+def invalidate_apartments(*user_ids):
+    keys = [_apartments_key(user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+class Principal:
+    def __init__(self, user):
+        authenticated = bool(user and user.is_authenticated)
+        self.user_id = user.pk if authenticated else None
+        self.is_authenticated = authenticated
+        self.role = getattr(user, "role", None) if authenticated else None
+        self.verification_status = getattr(user, "verification_status", None) if authenticated else None
+        self.is_staff = authenticated and bool(user.is_staff)
+        self.is_superuser = authenticated and bool(user.is_superuser)
+        self._owned_apartment_ids = None
+
+    # ================= ROLES =================
+
+    @property
+    def is_admin(self):
+        return self.role == "ADMIN"
+
+    @property
+    def has_admin_access(self):
+        """Platform admins plus Django staff and superusers."""
+        return self.is_admin or self.is_staff or self.is_superuser
+
+    @property
+    def is_landlord(self):
+        return self.role == "LANDLORD"
+
+    @property
+    def is_tenant(self):
+        return self.role == "TENANT"
+
+    @property
+    def is_verified(self):
+        return self.verification_status == "VERIFIED"
+
+    # ================= OWNERSHIP =================
+
+    @property
+    def owned_apartment_ids(self):
+        """Ids of the apartments this user owns as landlord (empty for other roles)."""
+        if self._owned_apartment_ids is None:
+            self._owned_apartment_ids = self._load_owned_apartment_ids()
+        return self._owned_apartment_ids
+
+    def _load_owned_apartment_ids(self):
+        if not self.is_landlord:
+            return frozenset()
+        key = _apartments_key(self.user_id)
+        ids = cache.get(key)
+        if ids is None:
+            from properties.models import Apartment
+
+            ids = frozenset(Apartment.objects.filter(landlord_id=self.user_id).values_list("id", flat=True))
+            cache.set(key, ids, settings.PRINCIPAL_CACHE_TTL)
+        return ids
+
+    def is_user(self, user_id):
+        return self.user_id is not None and user_id == self.user_id
+
+    def owns_apartment(self, apartment_id):
+        return apartment_id in self.owned_apartment_ids
+
+    def can_manage_apartment(self, apartment_id):
+        return self.is_admin or self.owns_apartment(apartment_id)
+
+
+def get_principal(request):
+    """The principal for ``request.user``, built once and kept on the request."""
+    user = getattr(request, "user", None)
+    principal = getattr(request, ATTR, None)
+    if principal is None or principal.user_id != getattr(user, "pk", None):
+        principal = Principal(user)
+        setattr(request, ATTR, principal)
+    return principal
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import authenticate
@@ -12,7 +13,17 @@ class UserSerializer(serializers.ModelSerializer):
             'national_id_image', 'profile_picture', 'bio', 'role', 'status',
             'verification_status', 'verification_notes', 'verification_date',
             'verified_by_admin', 'created_at', 'updated_at', 'email_verified',
-            'email_otp', 'otp_expiry'
+        ]
+
+
+class AdminUserListSerializer(serializers.ModelSerializer):
+    """Directory row: plain columns only, no related objects or file URLs."""
+
+    class Meta:
+        model = User
+        fields = [
+            "id", "username", "full_name", "email", "phone_number", "role", "status",
+            "verification_status", "email_verified", "created_at",
         ]
 
 
@@ -55,8 +66,10 @@ class RegisterSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         validated_data.pop('password2')
-        
-        user = User.objects.create(
+
+        # The password hash is set before the first save, so signup is a
+        # single INSERT.
+        user = User(
             username=validated_data['username'],
             email=validated_data['email'],
             full_name=validated_data.get('full_name', ''),
@@ -123,6 +136,14 @@ class AdminVerificationSerializer(serializers.Serializer):
     verification_notes = serializers.CharField(required=False, allow_blank=True)
 
 
+class BulkModerationSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=["verify", "reject", "promote", "demote", "suspend", "unsuspend"])
+    user_ids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=settings.ADMIN_BULK_MAX_USERS
+    )
+    verification_notes = serializers.CharField(required=False, allow_blank=True, default="")
+
+
 class AdminLandlordVerificationSerializer(serializers.ModelSerializer):
     national_id_image_url = serializers.SerializerMethodField()
     proof_of_ownership_url = serializers.SerializerMethodField()
@@ -0,0 +1,139 @@
+"""
+Signal handlers that keep DashboardRollup counters in step with bookings,
+units, apartments and wallets, and that invalidate the token and
+principal caches.
+Registered from UsersConfig.ready().
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+
+def register_dashboard_signals():
+    """Register the dashboard rollup signals."""
+    from bookings.models import Booking
+    from properties.models import Apartment, Unit
+    from wallet.models import Wallet
+
+    from .dashboard import UNIT_STATUS_FIELDS, apply_delta, booking_field, set_wallet_balance
+
+    # ================= BOOKINGS =================
+
+    @receiver(post_save, sender=Booking, dispatch_uid="rollup_booking_save")
+    def booking_rollup_save(sender, instance, created, **kwargs):
+        if not instance.has_changed("booking_status"):
+            return
+        old = instance.previous("booking_status")
+        new = instance.booking_status
+        for side, user_id in (("landlord", instance.landlord_id), ("tenant", instance.tenant_id)):
+            deltas = {booking_field(side, new): 1}
+            if old:
+                deltas[booking_field(side, old)] = -1
+            apply_delta(user_id, deltas)
+
+    @receiver(pre_delete, sender=Booking, dispatch_uid="rollup_booking_delete")
+    def booking_rollup_delete(sender, instance, **kwargs):
+        for side, user_id in (("landlord", instance.landlord_id), ("tenant", instance.tenant_id)):
+            apply_delta(user_id, {booking_field(side, instance.booking_status): -1})
+
+    # ================= UNITS =================
+
+    def _unit_landlord_id(unit):
+        # Unit writers go on to use unit.apartment (recalc_unit_counts), so
+        # this is free when it is already cached and saves them the load
+        # otherwise.
+        return unit.apartment.landlord_id
+
+    @receiver(post_save, sender=Unit, dispatch_uid="rollup_unit_save")
+    def unit_rollup_save(sender, instance, created, **kwargs):
+        if not instance.has_changed("status"):
+            return
+        old = instance.previous("status")
+        new = instance.status
+        deltas = {UNIT_STATUS_FIELDS.get(new): 1}
+        if created:
+            deltas["units_total"] = 1
+        elif old:
+            deltas[UNIT_STATUS_FIELDS.get(old)] = -1
+        apply_delta(_unit_landlord_id(instance), deltas)
+
+    @receiver(pre_delete, sender=Unit, dispatch_uid="rollup_unit_delete")
+    def unit_rollup_delete(sender, instance, **kwargs):
+        apply_delta(
+            _unit_landlord_id(instance),
+            {"units_total": -1, UNIT_STATUS_FIELDS.get(instance.status): -1},
+        )
+
+    # ================= APARTMENTS =================
+
+    @receiver(post_save, sender=Apartment, dispatch_uid="rollup_apartment_save")
+    def apartment_rollup_save(sender, instance, created, **kwargs):
+        if created:
+            apply_delta(instance.landlord_id, {"apartments": 1})
+
+    @receiver(post_delete, sender=Apartment, dispatch_uid="rollup_apartment_delete")
+    def apartment_rollup_delete(sender, instance, **kwargs):
+        apply_delta(instance.landlord_id, {"apartments": -1})
+
+    # ================= WALLETS =================
+
+    @receiver(post_save, sender=Wallet, dispatch_uid="rollup_wallet_save")
+    def wallet_rollup_save(sender, instance, **kwargs):
+        set_wallet_balance(instance.user_id, instance.wallet_type)
+
+
+def register_token_cache_signals():
+    """
+    Drop cached token lookups and revoke issued JWTs when a token goes away
+    or a user's access changes. Both happen after commit: dropping the cache
+    earlier would let a concurrent request refill it from the old rows.
+    """
+    from django.db import transaction
+    from rest_framework.authtoken.models import Token
+
+    from .models import User
+    from .token_cache import invalidate_token, invalidate_user
+    from .tokens import revoke_user
+
+    @receiver(post_delete, sender=Token, dispatch_uid="token_cache_token_delete")
+    def token_cache_token_delete(sender, instance, **kwargs):
+        key = instance.key
+        transaction.on_commit(lambda: invalidate_token(key))
+
+    @receiver(post_save, sender=User, dispatch_uid="token_cache_user_save")
+    def token_cache_user_save(sender, instance, created, **kwargs):
+        if not created and instance.changed_fields():
+            user_id = instance.pk
+
+            def invalidate():
+                invalidate_user(user_id)
+                revoke_user(user_id)
+
+            transaction.on_commit(invalidate)
+
+    @receiver(post_delete, sender=User, dispatch_uid="token_cache_user_delete")
+    def token_cache_user_delete(sender, instance, **kwargs):
+        user_id = instance.pk
+        transaction.on_commit(lambda: revoke_user(user_id))
+
+
+def register_principal_signals():
+    """
+    Drop cached owned-apartment ids when an apartment is added, removed or
+    changes hands, once the change commits (see register_token_cache_signals).
+    """
+    from django.db import transaction
+    from properties.models import Apartment
+
+    from .principal import invalidate_apartments
+
+    @receiver(post_save, sender=Apartment, dispatch_uid="principal_apartment_save")
+    def principal_apartment_save(sender, instance, created, **kwargs):
+        if created or instance.has_changed("landlord"):
+            # Read now: the tracker resnapshots after the save.
+            landlord_ids = (instance.previous("landlord"), instance.landlord_id)
+            transaction.on_commit(lambda: invalidate_apartments(*landlord_ids))
+
+    @receiver(post_delete, sender=Apartment, dispatch_uid="principal_apartment_delete")
+    def principal_apartment_delete(sender, instance, **kwargs):
+        landlord_id = instance.landlord_id
+        transaction.on_commit(lambda: invalidate_apartments(landlord_id))
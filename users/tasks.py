@@ -0,0 +1,28 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="users.tasks.check_dashboard_rollups")
+def check_dashboard_rollups():
+    """Runs nightly — rebuilds dashboard rollups that drifted from live counts."""
+    from .dashboard import check_rollups
+
+    mismatches = check_rollups(fix=True)
+    if mismatches:
+        logger.warning(f"Rebuilt {len(mismatches)} drifted dashboard rollups")
+    return f"Rebuilt {len(mismatches)}"
+
+
+@shared_task(name="users.tasks.refresh_admin_analytics")
+def refresh_admin_analytics(params):
+    """Background revalidation of a stale admin analytics cache entry."""
+    from django.core.cache import cache
+    from .analytics import _admin_cache_key, refresh_admin_analytics as refresh
+
+    try:
+        refresh(params)
+    finally:
+        cache.delete(f"{_admin_cache_key(params)}:refreshing")
+    return "Refreshed"
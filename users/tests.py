@@ -1,10 +1,20 @@
 from django.test import TestCase
 from rest_framework.test import APIClient
 from django.contrib.auth import get_user_model
+import re
+
+from users.utils import verify_user_otp
 
 User = get_user_model()
 
 
+def otp_from(email):
+    """The code in a queued OTP email, as it would be sent."""
+    from notifications.emails import _render
+
+    return re.search(r"\b(\d{6})\b", _render(email)).group(1)
+
+
 class UserPublicProfileTestCase(TestCase):
     def setUp(self):
         self.client = APIClient()
@@ -35,3 +45,908 @@ class UserPublicProfileTestCase(TestCase):
     def test_unauthenticated_user_cannot_get_public_profile(self):
         response = self.client.get(f"/api/users/{self.landlord.id}")
         self.assertEqual(response.status_code, 401)
+
+
+class DashboardRollupTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from properties.models import Apartment, Unit
+
+        cache.clear()
+        self.client = APIClient()
+        self.landlord = User.objects.create_user(
+            username="rollup_landlord",
+            email="rollup_landlord@test.com",
+            password="password",
+            role=User.ROLE_LANDLORD,
+            verification_status=User.VERIF_VERIFIED,
+        )
+        self.tenant = User.objects.create_user(
+            username="rollup_tenant",
+            email="rollup_tenant@test.com",
+            password="password",
+            role=User.ROLE_TENANT,
+            verification_status=User.VERIF_VERIFIED,
+        )
+        self.apartment = Apartment.objects.create(landlord=self.landlord, name="Rollup Apartment")
+        self.unit = Unit.objects.create(
+            apartment=self.apartment, unit_number_or_id="R1", price_per_month=1000, status="VACANT"
+        )
+        Unit.objects.create(
+            apartment=self.apartment, unit_number_or_id="R2", price_per_month=1000, status="OCCUPIED"
+        )
+
+    def _create_booking(self):
+        from datetime import date
+        from bookings.models import Booking
+
+        return Booking.objects.create(
+            unit=self.unit,
+            tenant=self.tenant,
+            landlord=self.landlord,
+            move_in_date=date.today(),
+            booking_amount=1000,
+        )
+
+    def test_landlord_dashboard_reports_rollup(self):
+        from wallet.models import Wallet
+
+        Wallet.objects.create(user=self.landlord, wallet_type="LANDLORD", balance=500)
+        Wallet.objects.create(user=self.landlord, wallet_type="PLATFORM", balance=40)
+        self.client.force_authenticate(self.landlord)
+        response = self.client.get("/api/landlord/dashboard")
+        self.assertEqual(response.status_code, 200)
+        stats = response.data["stats"]
+        self.assertEqual(stats["total_apartments"], 1)
+        self.assertEqual(stats["total_units"], 2)
+        self.assertEqual(stats["occupied_units"], 1)
+        self.assertEqual(stats["pending_bookings"], 0)
+        self.assertEqual(float(stats["wallet_balance"]), 500)
+
+    def test_cached_dashboard_load_is_a_single_read(self):
+        from django.core.cache import cache
+        from users.dashboard import get_rollup
+
+        get_rollup(self.landlord.id)
+        cache.clear()
+        with self.assertNumQueries(1):
+            get_rollup(self.landlord.id)
+        with self.assertNumQueries(0):
+            get_rollup(self.landlord.id)
+
+    def test_rollup_updates_incrementally_from_events(self):
+        from users.dashboard import get_rollup, check_rollups
+        from wallet.models import Wallet
+
+        get_rollup(self.landlord.id)
+        get_rollup(self.tenant.id)
+
+        booking = self._create_booking()
+        booking.booking_status = "CONFIRMED"
+        booking.save()
+        Wallet.objects.create(user=self.landlord, wallet_type="LANDLORD", balance=500)
+        Wallet.objects.create(user=self.landlord, wallet_type="PLATFORM", balance=40)
+
+        landlord_stats = get_rollup(self.landlord.id)
+        self.assertEqual(landlord_stats.landlord_bookings_confirmed, 1)
+        self.assertEqual(landlord_stats.landlord_bookings_pending, 0)
+        self.assertEqual(landlord_stats.units_occupied, 2)
+        self.assertEqual(str(landlord_stats.landlord_wallet_balance), "500.00")
+        self.assertEqual(str(landlord_stats.wallet_balance), "40.00")
+        self.assertEqual(get_rollup(self.tenant.id).tenant_bookings_confirmed, 1)
+
+        booking.delete()
+        self.assertEqual(get_rollup(self.landlord.id).landlord_bookings_confirmed, 0)
+        self.assertEqual(check_rollups(), [])
+
+    def test_unit_status_change_reuses_cached_apartment(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from properties.models import Unit
+        from users.dashboard import get_rollup
+
+        get_rollup(self.landlord.id)
+        unit = Unit.objects.select_related("apartment").get(pk=self.unit.pk)
+        unit.status = "OCCUPIED"
+        with CaptureQueriesContext(connection) as queries:
+            unit.save(update_fields=["status"])
+        self.assertFalse([q for q in queries if q["sql"].startswith("SELECT") and "properties_apartment" in q["sql"]])
+        self.assertEqual(get_rollup(self.landlord.id).units_occupied, 2)
+
+    def test_consistency_check_detects_and_repairs_drift(self):
+        from properties.models import Unit
+        from users.dashboard import get_rollup, check_rollups
+
+        get_rollup(self.landlord.id)
+        Unit.objects.filter(apartment=self.apartment).update(status="MAINTENANCE")
+
+        mismatches = check_rollups(fix=True)
+        self.assertEqual(len(mismatches), 1)
+        self.assertIn("units_maintenance", mismatches[0][1])
+        self.assertEqual(get_rollup(self.landlord.id).units_maintenance, 2)
+        self.assertEqual(check_rollups(), [])
+
+
+class LandlordAnalyticsTestCase(TestCase):
+    def setUp(self):
+        from datetime import date
+        from properties.models import Apartment, Unit
+        from bookings.models import Booking
+        from wallet.models import Wallet, WalletTransaction
+
+        self.client = APIClient()
+        self.landlord = User.objects.create_user(
+            username="analytics_landlord",
+            email="analytics_landlord@test.com",
+            password="password",
+            role=User.ROLE_LANDLORD,
+            verification_status=User.VERIF_VERIFIED,
+        )
+        self.tenant = User.objects.create_user(
+            username="analytics_tenant",
+            email="analytics_tenant@test.com",
+            password="password",
+            role=User.ROLE_TENANT,
+        )
+        wallet = Wallet.objects.create(user=self.landlord, wallet_type="LANDLORD")
+        self.apartments = []
+        for i in range(3):
+            apartment = Apartment.objects.create(landlord=self.landlord, name=f"Analytics {i}")
+            unit = Unit.objects.create(
+                apartment=apartment, unit_number_or_id=f"A{i}", price_per_month=1000
+            )
+            booking = Booking.objects.create(
+                unit=unit,
+                tenant=self.tenant,
+                landlord=self.landlord,
+                move_in_date=date.today(),
+                booking_amount=1000,
+            )
+            WalletTransaction.objects.create(
+                wallet=wallet,
+                transaction_type="DEPOSIT",
+                amount=100 * (i + 1),
+                status="COMPLETED",
+                reference_id=booking.id,
+            )
+            self.apartments.append(apartment)
+        self.client.force_authenticate(self.landlord)
+
+    def test_per_apartment_bookings_and_revenue(self):
+        response = self.client.get("/api/landlord/analytics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["period"], "last_30_days")
+        self.assertEqual(response.data["revenue"], "600.00")
+        self.assertEqual(response.data["bookings"]["total"], 3)
+        by_name = {a["name"]: a for a in response.data["apartments"]}
+        self.assertEqual(by_name["Analytics 2"]["revenue"], "300.00")
+        self.assertEqual(by_name["Analytics 0"]["bookings"], 1)
+
+    def test_query_count_does_not_grow_with_apartments(self):
+        from users.analytics import landlord_analytics_data, parse_period
+        from properties.models import Apartment
+
+        start, end, _ = parse_period({"period": "30"})
+        with self.assertNumQueries(4):
+            landlord_analytics_data(self.landlord, start, end)
+        for i in range(5):
+            Apartment.objects.create(landlord=self.landlord, name=f"Extra {i}")
+        with self.assertNumQueries(4):
+            landlord_analytics_data(self.landlord, start, end)
+
+    def test_custom_range_and_series(self):
+        from datetime import date
+
+        today = str(date.today())
+        response = self.client.get(
+            "/api/landlord/analytics", {"start": today, "end": today, "bucket": "day"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["period"], "custom")
+        self.assertEqual(response.data["series"]["bookings"], [{"bucket": today, "count": 3}])
+        self.assertEqual(response.data["series"]["revenue"][0]["total"], "600.00")
+
+    def test_invalid_period_rejected(self):
+        response = self.client.get("/api/landlord/analytics", {"period": "45"})
+        self.assertEqual(response.status_code, 400)
+
+
+class AdminAnalyticsTestCase(TestCase):
+    def setUp(self):
+        from datetime import date
+        from django.core.cache import cache
+        from properties.models import Apartment, Unit
+        from bookings.models import Booking
+        from verification.models import Verification
+
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username="metrics_admin", email="metrics_admin@test.com", password="password", role=User.ROLE_ADMIN
+        )
+        landlord = User.objects.create_user(
+            username="metrics_landlord", email="metrics_landlord@test.com", password="password",
+            role=User.ROLE_LANDLORD,
+        )
+        tenant = User.objects.create_user(
+            username="metrics_tenant", email="metrics_tenant@test.com", password="password", role=User.ROLE_TENANT
+        )
+        apartment = Apartment.objects.create(landlord=landlord, name="Metrics Apartment")
+        unit = Unit.objects.create(apartment=apartment, unit_number_or_id="M1", price_per_month=1000)
+        Unit.objects.create(apartment=apartment, unit_number_or_id="M2", price_per_month=1000, status="OCCUPIED")
+        Booking.objects.create(
+            unit=unit, tenant=tenant, landlord=landlord, move_in_date=date.today(), booking_amount=1000
+        )
+        Verification.objects.create(apartment=apartment)
+        self.client.force_authenticate(self.admin)
+
+    def test_consolidated_metrics(self):
+        response = self.client.get("/api/admin/analytics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["total_tenants"], 1)
+        self.assertEqual(response.data["users"]["total"], 3)
+        self.assertEqual(response.data["bookings"]["pending"], 1)
+        self.assertEqual(response.data["units"]["occupancy_rate"], 50.0)
+        self.assertEqual(response.data["verifications"]["unassigned"], 1)
+        self.assertIn("subscriptions", response.data)
+        self.assertIn("payments", response.data)
+
+    def test_one_query_per_table(self):
+        from users.analytics import admin_analytics_data, parse_period
+
+        start, end, _ = parse_period({"period": "30"})
+        with self.assertNumQueries(6):
+            admin_analytics_data(start, end)
+        with self.assertNumQueries(9):
+            admin_analytics_data(start, end, bucket="week")
+
+    def test_cached_then_stale_while_revalidate(self):
+        from datetime import timedelta
+        from django.core.cache import cache
+        from django.utils import timezone
+        from unittest import mock
+        from users.analytics import _admin_cache_key
+
+        self.client.get("/api/admin/analytics")
+        User.objects.create_user(
+            username="metrics_late", email="metrics_late@test.com", password="password", role=User.ROLE_TENANT
+        )
+        response = self.client.get("/api/admin/analytics")
+        self.assertEqual(response.data["total_tenants"], 1)
+
+        key = _admin_cache_key({})
+        entry = cache.get(key)
+        entry["fresh_until"] = timezone.now() - timedelta(seconds=1)
+        cache.set(key, entry)
+        with mock.patch("users.tasks.refresh_admin_analytics.delay") as delay:
+            response = self.client.get("/api/admin/analytics")
+            self.client.get("/api/admin/analytics")
+        self.assertEqual(response.data["total_tenants"], 1)
+        delay.assert_called_once_with({})
+
+    def test_invalid_bucket_rejected(self):
+        response = self.client.get("/api/admin/analytics", {"bucket": "year"})
+        self.assertEqual(response.status_code, 400)
+
+
+class TokenCacheTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from rest_framework.authtoken.models import Token
+        from users import token_cache
+        from users.authentication import FlexibleTokenAuthentication
+
+        cache.clear()
+        token_cache._local.clear()
+        self.user = User.objects.create_user(
+            username="cached_user",
+            email="cached@test.com",
+            password="password",
+            role=User.ROLE_TENANT,
+            full_name="Cached User",
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.auth = FlexibleTokenAuthentication()
+
+    def test_repeat_lookup_hits_no_database(self):
+        self.auth.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(0):
+            user, token = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.role, User.ROLE_TENANT)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_deferred_fields_load_in_one_query(self):
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.full_name, "Cached User")
+            self.assertEqual(user.phone_number, "")
+
+    def test_deleted_token_is_rejected(self):
+        from rest_framework import exceptions
+
+        self.auth.authenticate_credentials(self.token.key)
+        self.token.delete()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_role_and_status_changes_invalidate(self):
+        from rest_framework import exceptions
+
+        self.auth.authenticate_credentials(self.token.key)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.role = User.ROLE_LANDLORD
+            self.user.save()
+            # Dropped only once the change commits, so nothing can refill
+            # the cache from the old row in between.
+            user, _ = self.auth.authenticate_credentials(self.token.key)
+            self.assertEqual(user.role, User.ROLE_TENANT)
+        for callback in callbacks:
+            callback()
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertEqual(user.role, User.ROLE_LANDLORD)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_bare_and_prefixed_headers_authenticate(self):
+        client = APIClient()
+        for header in (f"Token {self.token.key}", self.token.key):
+            client.credentials(HTTP_AUTHORIZATION=header)
+            response = client.get(f"/api/users/{self.user.id}")
+            self.assertEqual(response.status_code, 200)
+
+
+class JWTAuthTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="jwt_user",
+            email="jwt@test.com",
+            password="password",
+            role=User.ROLE_TENANT,
+            email_verified=True,
+        )
+
+    def login(self):
+        response = self.client.post(
+            "/api/auth/login", {"email": "jwt@test.com", "password": "password"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def get_profile(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        response = self.client.get(f"/api/users/{self.user.id}")
+        self.client.credentials()
+        return response
+
+    def test_login_returns_jwt_pair_and_legacy_token(self):
+        data = self.login()
+        self.assertIn("access", data)
+        self.assertIn("refresh", data)
+        self.assertIn("token", data)
+        self.assertEqual(self.get_profile(data["access"]).status_code, 200)
+
+    def test_access_token_authenticates_without_queries(self):
+        from rest_framework.test import APIRequestFactory
+        from users.authentication import StatelessJWTAuthentication
+
+        access = self.login()["access"]
+        request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        with self.assertNumQueries(0):
+            user, _ = StatelessJWTAuthentication().authenticate(request)
+            self.assertEqual(user.pk, self.user.pk)
+            self.assertEqual(user.role, User.ROLE_TENANT)
+
+    def test_refresh_rotates_and_is_single_use(self):
+        refresh = self.login()["refresh"]
+        response = self.client.post("/api/auth/token/refresh", {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["refresh"], refresh)
+        self.assertEqual(self.get_profile(response.data["access"]).status_code, 200)
+
+        response = self.client.post("/api/auth/token/refresh", {"refresh": refresh}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_logout_revokes_access_and_refresh(self):
+        data = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {data['access']}")
+        response = self.client.post("/api/auth/logout", {"refresh": data["refresh"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.get_profile(data["access"]).status_code, 401)
+        response = self.client.post("/api/auth/token/refresh", {"refresh": data["refresh"]}, format="json")
+        self.assertEqual(response.status_code, 401)
+
+    def test_role_change_revokes_issued_tokens(self):
+        data = self.login()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = User.ROLE_LANDLORD
+            self.user.save()
+        self.assertEqual(self.get_profile(data["access"]).status_code, 401)
+
+        fresh = self.login()
+        self.assertEqual(self.get_profile(fresh["access"]).status_code, 200)
+
+    def test_legacy_token_can_be_exchanged(self):
+        from rest_framework.authtoken.models import Token
+
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+        response = self.client.post("/api/auth/token/exchange", {"revoke_legacy": True}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Token.objects.filter(key=token.key).exists())
+        self.assertEqual(self.get_profile(response.data["access"]).status_code, 200)
+
+
+class RateLimitTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="limited_user",
+            email="limited@test.com",
+            password="password",
+            role=User.ROLE_TENANT,
+        )
+
+    def test_sliding_window_weights_previous_bucket(self):
+        from users.throttling import hit
+
+        for _ in range(5):
+            self.assertTrue(hit("test:slide", 5, 60, now=6000.0)[0])
+        allowed, retry_after = hit("test:slide", 5, 60, now=6001.0)
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+
+        # Half-way through the next bucket, half of the previous six still count.
+        results = [hit("test:slide", 5, 60, now=6090.0)[0] for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+
+    def test_concurrent_hits_never_exceed_limit(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from users.throttling import hit
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            results = list(pool.map(lambda _: hit("test:concurrent", 10, 60, now=6000.0)[0], range(200)))
+        self.assertEqual(results.count(True), 10)
+
+    def test_login_limited_per_email_without_user_writes(self):
+        from django.db import connection
+        from django.test import override_settings
+        from django.test.utils import CaptureQueriesContext
+
+        limits = {"login": {"ip": (100, 300), "email": (3, 300)}}
+        with override_settings(RATE_LIMITS=limits), CaptureQueriesContext(connection) as queries:
+            statuses = [
+                self.client.post(
+                    "/api/auth/login", {"email": "limited@test.com", "password": "wrong"}, format="json"
+                ).status_code
+                for _ in range(5)
+            ]
+        self.assertEqual(statuses, [400, 400, 400, 429, 429])
+        self.assertFalse([q for q in queries if q["sql"].startswith("UPDATE") and "users_user" in q["sql"]])
+
+    def test_resend_otp_is_limited(self):
+        from django.test import override_settings
+
+        limits = {"otp_send": {"ip": (100, 3600), "email": (2, 3600)}}
+        with override_settings(RATE_LIMITS=limits):
+            statuses = [
+                self.client.post("/api/auth/resend-otp/", {"email": "limited@test.com"}, format="json").status_code
+                for _ in range(3)
+            ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_contact_limited_per_ip(self):
+        from django.test import override_settings
+
+        payload = {"name": "A", "email": "a@test.com", "subject": "Hi", "message": "Hello"}
+        with override_settings(RATE_LIMITS={"contact": {"ip": (2, 3600)}}):
+            responses = [self.client.post("/api/auth/contact", payload, format="json") for _ in range(3)]
+        self.assertEqual([response.status_code for response in responses], [201, 201, 429])
+        self.assertIn("Retry-After", responses[-1])
+
+
+class AdminUserDirectoryTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username="directory_admin", email="directory_admin@test.com", password="password", role=User.ROLE_ADMIN
+        )
+        for i in range(6):
+            User.objects.create_user(
+                username=f"landlord_{i}",
+                email=f"landlord_{i}@test.com",
+                password="password",
+                role=User.ROLE_LANDLORD,
+                full_name=f"Landlord Number {i}",
+                verification_status=User.VERIF_VERIFIED if i % 2 else User.VERIF_PENDING,
+            )
+        User.objects.create_user(
+            username="tenant_dir", email="tenant_dir@test.com", password="password", role=User.ROLE_TENANT,
+            phone_number="0799000111",
+        )
+        self.client.force_authenticate(self.admin)
+
+    def test_keyset_pages_cover_every_user_once(self):
+        seen = []
+        url = "/api/admin/users?page_size=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data["results"]), 3)
+            seen.extend(row["id"] for row in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(len(seen), User.objects.count())
+        self.assertEqual(len(set(seen)), len(seen))
+
+    def test_compact_rows(self):
+        response = self.client.get("/api/admin/users")
+        row = response.data["results"][0]
+        self.assertNotIn("email_otp", row)
+        self.assertNotIn("profile_picture", row)
+        self.assertNotIn("verified_by_admin", row)
+
+    def test_filter_and_search(self):
+        response = self.client.get("/api/admin/users", {"role": "LANDLORD", "verification_status": "VERIFIED"})
+        self.assertEqual(len(response.data["results"]), 3)
+
+        response = self.client.get("/api/admin/users", {"search": "number 4"})
+        self.assertEqual([row["username"] for row in response.data["results"]], ["landlord_4"])
+
+        response = self.client.get("/api/admin/users", {"search": "0799"})
+        self.assertEqual([row["username"] for row in response.data["results"]], ["tenant_dir"])
+
+    def test_pending_list_and_ordering(self):
+        response = self.client.get("/api/admin/users/pending", {"ordering": "email"})
+        emails = [row["email"] for row in response.data["results"]]
+        expected = User.objects.filter(verification_status=User.VERIF_PENDING).values_list("email", flat=True)
+        self.assertEqual(emails, sorted(expected))
+
+    def test_non_admin_forbidden(self):
+        self.client.force_authenticate(User.objects.get(username="tenant_dir"))
+        self.assertEqual(self.client.get("/api/admin/users").status_code, 403)
+
+
+class BulkModerationTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            username="moderator", email="moderator@test.com", password="password", role=User.ROLE_ADMIN
+        )
+        self.landlords = [
+            User.objects.create_user(
+                username=f"pending_{i}", email=f"pending_{i}@test.com", password="password", role=User.ROLE_LANDLORD
+            )
+            for i in range(5)
+        ]
+        self.client.force_authenticate(self.admin)
+
+    def post(self, action, user_ids, **extra):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                "/api/admin/users/bulk",
+                {"action": action, "user_ids": [str(user_id) for user_id in user_ids], **extra},
+                format="json",
+            )
+
+    def test_verify_batch_reports_per_id_results(self):
+        import uuid
+        from notifications.models import Notification
+
+        User.objects.filter(id=self.landlords[0].id).update(verification_status=User.VERIF_VERIFIED)
+        missing = uuid.uuid4()
+        ids = [user.id for user in self.landlords] + [missing]
+
+        response = self.post("verify", ids, verification_notes="Documents checked")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], 4)
+        results = {str(row["id"]): row["result"] for row in response.data["results"]}
+        self.assertEqual(results[str(self.landlords[0].id)], "unchanged")
+        self.assertEqual(results[str(self.landlords[1].id)], "updated")
+        self.assertEqual(results[str(missing)], "not_found")
+
+        user = User.objects.get(id=self.landlords[1].id)
+        self.assertEqual(user.verification_status, User.VERIF_VERIFIED)
+        self.assertEqual(user.verified_by_admin_id, self.admin.id)
+        self.assertEqual(user.verification_notes, "Documents checked")
+        self.assertEqual(
+            Notification.objects.filter(recipient__in=self.landlords[1:], type="USER_VERIFICATION").count(), 4
+        )
+
+    def test_update_is_set_based(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=False):
+                self.client.post(
+                    "/api/admin/users/bulk",
+                    {"action": "suspend", "user_ids": [str(user.id) for user in self.landlords]},
+                    format="json",
+                )
+        updates = [q for q in queries if q["sql"].startswith("UPDATE") and "users_user" in q["sql"]]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(User.objects.filter(status=User.STATUS_SUSPENDED).count(), 5)
+
+    def test_admin_cannot_suspend_self(self):
+        response = self.post("suspend", [self.admin.id])
+        self.assertEqual(response.data["results"][0]["result"], "skipped")
+        self.assertEqual(User.objects.get(id=self.admin.id).status, User.STATUS_ACTIVE)
+
+    def test_cached_auth_is_invalidated(self):
+        from rest_framework.authtoken.models import Token
+        from users.authentication import FlexibleTokenAuthentication
+        from users.tokens import issue_tokens
+
+        landlord = self.landlords[0]
+        token = Token.objects.create(user=landlord)
+        auth = FlexibleTokenAuthentication()
+        auth.authenticate_credentials(token.key)
+        access = issue_tokens(landlord)["access"]
+
+        self.post("promote", [landlord.id])
+
+        user, _ = auth.authenticate_credentials(token.key)
+        self.assertEqual(user.role, User.ROLE_ADMIN)
+        self.client.force_authenticate(None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(self.client.get(f"/api/users/{landlord.id}").status_code, 401)
+
+    def test_rejects_unknown_action_and_non_admin(self):
+        self.assertEqual(self.post("delete", [self.landlords[0].id]).status_code, 400)
+        self.client.force_authenticate(self.landlords[0])
+        self.assertEqual(self.post("verify", [self.landlords[1].id]).status_code, 403)
+
+
+class RegisterTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.data = {
+            "username": "new_tenant",
+            "email": "new_tenant@test.com",
+            "password": "Str0ng-pass-123",
+            "password2": "Str0ng-pass-123",
+            "role": User.ROLE_TENANT,
+        }
+
+    def test_signup_is_one_user_insert_with_otp(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from notifications.models import OutgoingEmail
+
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=False) as callbacks:
+                response = self.client.post("/api/auth/register", self.data, format="multipart")
+        self.assertEqual(response.status_code, 201)
+
+        user_writes = [q for q in queries if q["sql"].startswith(("INSERT", "UPDATE")) and "users_user" in q["sql"]]
+        self.assertEqual(len(user_writes), 1)
+        user = User.objects.get(username="new_tenant")
+        self.assertTrue(user.check_password("Str0ng-pass-123"))
+        # Nothing is emailed until the transaction commits.
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+        for callback in callbacks:
+            callback()
+        email = OutgoingEmail.objects.get(to_email="new_tenant@test.com")
+        self.assertEqual(verify_user_otp(user, otp_from(email)), (True, "OTP valid."))
+
+    def test_first_signup_is_not_promoted(self):
+        response = self.client.post("/api/auth/register", self.data, format="multipart")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(User.objects.get(username="new_tenant").role, User.ROLE_TENANT)
+
+    def test_bootstrap_admin_command(self):
+        from io import StringIO
+        from django.core.management import call_command, CommandError
+
+        call_command("bootstrap_admin", email="root@test.com", password="pass", stdout=StringIO())
+        admin = User.objects.get(email="root@test.com")
+        self.assertEqual(admin.role, User.ROLE_ADMIN)
+        self.assertTrue(admin.email_verified)
+
+        with self.assertRaises(CommandError):
+            call_command("bootstrap_admin", email="other@test.com", password="pass")
+
+
+class OTPTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username="otp_user", email="otp@test.com", password="password", role=User.ROLE_TENANT
+        )
+
+    def check_store(self):
+        from users import otp
+
+        code = otp.issue(self.user.id, otp.EMAIL_VERIFY)
+        self.assertEqual(otp.verify(self.user.id, otp.PASSWORD_RESET, code)[0], False)
+        self.assertEqual(otp.verify(self.user.id, otp.EMAIL_VERIFY, code), (True, "OTP valid."))
+        self.assertEqual(otp.verify(self.user.id, otp.EMAIL_VERIFY, code)[0], False)
+
+        code = otp.issue(self.user.id, otp.PASSWORD_RESET)
+        wrong = "000000" if code != "000000" else "111111"
+        for _ in range(5):
+            self.assertEqual(otp.verify(self.user.id, otp.PASSWORD_RESET, wrong), (False, "Invalid OTP."))
+        self.assertFalse(otp.verify(self.user.id, otp.PASSWORD_RESET, code)[0])
+
+    def test_cache_store(self):
+        from django.core.cache import cache
+        from users import otp
+
+        self.check_store()
+        code = otp.issue(self.user.id, otp.EMAIL_VERIFY)
+        self.assertNotEqual(cache.get(f"otp:{otp.EMAIL_VERIFY}:{self.user.id}"), code)
+
+    def test_database_store(self):
+        from django.test import override_settings
+        from users.models import OneTimeCode
+
+        with override_settings(OTP_STORE="database"):
+            self.check_store()
+        self.assertFalse(OneTimeCode.objects.exists())
+
+    def test_verify_email_writes_user_only_on_success(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from users import otp
+
+        code = otp.issue(self.user.id, otp.EMAIL_VERIFY)
+        wrong = "000000" if code != "000000" else "111111"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post("/api/auth/verify-email/", {"email": "otp@test.com", "otp": wrong}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse([q for q in queries if q["sql"].startswith("UPDATE") and "users_user" in q["sql"]])
+
+        response = self.client.post("/api/auth/verify-email/", {"email": "otp@test.com", "otp": code}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(User.objects.get(id=self.user.id).email_verified)
+
+    def test_password_reset_flow(self):
+        from notifications.models import OutgoingEmail
+
+        response = self.client.post("/api/auth/password-reset/request", {"email": "otp@test.com"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        code = otp_from(OutgoingEmail.objects.get(to_email="otp@test.com"))
+
+        response = self.client.post(
+            "/api/auth/password-reset/confirm",
+            {"email": "otp@test.com", "otp": code, "new_password": "N3w-password-xyz"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(User.objects.get(id=self.user.id).check_password("N3w-password-xyz"))
+
+
+class PrincipalTestCase(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from properties.models import Apartment, Unit
+
+        cache.clear()
+        self.client = APIClient()
+        self.landlord = User.objects.create_user(
+            username="principal_landlord", email="principal-landlord@test.com", password="password",
+            role=User.ROLE_LANDLORD,
+        )
+        self.other = User.objects.create_user(
+            username="principal_other", email="principal-other@test.com", password="password",
+            role=User.ROLE_LANDLORD,
+        )
+        self.tenant = User.objects.create_user(
+            username="principal_tenant", email="principal-tenant@test.com", password="password",
+            role=User.ROLE_TENANT,
+        )
+        self.apartment = Apartment.objects.create(landlord=self.landlord, name="Principal Apartment")
+        self.unit = Unit.objects.create(apartment=self.apartment, unit_number_or_id="P-1", price_per_month=1000)
+
+    def request_for(self, user):
+        from types import SimpleNamespace
+
+        return SimpleNamespace(user=user)
+
+    def test_principal_is_built_once_per_request(self):
+        from users.principal import get_principal
+
+        request = self.request_for(self.landlord)
+        principal = get_principal(request)
+        self.assertIs(get_principal(request), principal)
+        self.assertTrue(principal.is_landlord)
+        self.assertFalse(principal.is_admin)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(principal.owned_apartment_ids, {self.apartment.id})
+            self.assertTrue(principal.owns_apartment(self.apartment.id))
+
+        # A later request is served from the shared cache.
+        with self.assertNumQueries(0):
+            self.assertEqual(get_principal(self.request_for(self.landlord)).owned_apartment_ids, {self.apartment.id})
+
+    def test_anonymous_principal(self):
+        from django.contrib.auth.models import AnonymousUser
+        from users.principal import get_principal
+
+        principal = get_principal(self.request_for(AnonymousUser()))
+        self.assertFalse(principal.is_authenticated)
+        self.assertIsNone(principal.user_id)
+        with self.assertNumQueries(0):
+            self.assertEqual(principal.owned_apartment_ids, frozenset())
+
+    def test_owned_apartments_invalidated_on_create_and_transfer(self):
+        from properties.models import Apartment
+        from users.principal import get_principal
+
+        self.assertEqual(get_principal(self.request_for(self.other)).owned_apartment_ids, frozenset())
+        self.assertEqual(len(get_principal(self.request_for(self.landlord)).owned_apartment_ids), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second = Apartment.objects.create(landlord=self.landlord, name="Second")
+        self.assertEqual(get_principal(self.request_for(self.landlord)).owned_apartment_ids, {self.apartment.id, second.id})
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.apartment.landlord = self.other
+            self.apartment.save()
+            # Not dropped before commit, or it could be refilled from the old row.
+            self.assertEqual(len(get_principal(self.request_for(self.landlord)).owned_apartment_ids), 2)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(get_principal(self.request_for(self.landlord)).owned_apartment_ids, {second.id})
+        self.assertEqual(get_principal(self.request_for(self.other)).owned_apartment_ids, {self.apartment.id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(get_principal(self.request_for(self.landlord)).owned_apartment_ids, frozenset())
+
+    def test_object_check_compares_ids(self):
+        from properties.models import Unit
+        from properties.views import IsLandlordOrReadOnly
+        from rest_framework.test import APIRequestFactory
+
+        request = APIRequestFactory().patch("/")
+        request.user = self.landlord
+        unit = Unit.objects.get(id=self.unit.id)
+        permission = IsLandlordOrReadOnly()
+        permission.has_object_permission(request, None, unit)
+
+        # Owned ids are now cached on the request; no apartment or landlord rows are loaded.
+        with self.assertNumQueries(0):
+            self.assertTrue(permission.has_object_permission(request, None, unit))
+            self.assertTrue(permission.has_object_permission(request, None, self.apartment))
+
+    def test_unit_write_requires_ownership(self):
+        self.client.force_authenticate(self.tenant)
+        response = self.client.patch(f"/api/properties/units/{self.unit.id}/set-status/", {"status": "OCCUPIED"}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_authenticate(self.other)
+        response = self.client.patch(f"/api/properties/units/{self.unit.id}/set-status/", {"status": "OCCUPIED"}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+        self.client.force_authenticate(self.landlord)
+        response = self.client.patch(f"/api/properties/units/{self.unit.id}/set-status/", {"status": "OCCUPIED"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_landlord_unit_list_is_filtered_in_sql(self):
+        self.client.force_authenticate(self.other)
+        response = self.client.get("/api/properties/units/")
+        self.assertEqual(response.status_code, 200)
+        results = response.data["results"] if isinstance(response.data, dict) else response.data
+        self.assertEqual(results, [])
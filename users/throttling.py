@@ -0,0 +1,131 @@
+"""
+Sliding-window rate limits for the public auth and contact endpoints.
+
+Each limit is ``(requests, seconds)`` per identifier, configured in
+settings.RATE_LIMITS by scope and identifier kind:
+
+- ``ip``: the client address (DRF's ``get_ident``, honouring NUM_PROXIES);
+- ``email``: the email / login / username in the request body, hashed;
+- ``user``: the authenticated user's id.
+
+Counts live in the shared cache (Redis in production), never in the user
+table. The window is approximated from two fixed buckets: the current
+bucket's count plus the previous bucket's count weighted by how much of it
+still overlaps the window. That needs only atomic ``incr`` and one
+``get_many`` per identifier, so concurrent requests cannot overshoot the
+limit the way read-modify-write counters do.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+EMAIL_FIELDS = ("email", "login", "username")
+
+
+def _bucket_key(key, bucket):
+    return f"ratelimit:{key}:{bucket}"
+
+
+def _incr(key, timeout):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # First hit in this bucket; ``add`` loses to a concurrent first hit.
+        if cache.add(key, 1, timeout):
+            return 1
+        return cache.incr(key)
+
+
+def hit(key, limit, window, now=None):
+    """
+    Count one request against ``key``. Returns ``(allowed, retry_after)``
+    where ``retry_after`` is the number of seconds to wait when not allowed.
+    """
+    now = time.time() if now is None else now
+    bucket = int(now // window)
+    current_key = _bucket_key(key, bucket)
+    previous_key = _bucket_key(key, bucket - 1)
+
+    current = _incr(current_key, window * 2)
+    previous = cache.get(previous_key, 0)
+
+    elapsed = (now % window) / window
+    estimated = previous * (1 - elapsed) + current
+    if estimated <= limit:
+        return True, 0
+
+    if current > limit:
+        retry_after = window - (now % window)
+    else:
+        # Wait until enough of the previous bucket has slid out of the window.
+        retry_after = window * ((previous * (1 - elapsed) - (limit - current)) / previous)
+    return False, max(int(retry_after) + 1, 1)
+
+
+def reset(key, window, now=None):
+    now = time.time() if now is None else now
+    bucket = int(now // window)
+    cache.delete_many([_bucket_key(key, bucket), _bucket_key(key, bucket - 1)])
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Applies every limit configured for ``scope``; the request counts against each."""
+
+    scope = None
+
+    def get_identifier(self, kind, request):
+        if kind == "ip":
+            return self.get_ident(request)
+        if kind == "email":
+            data = request.data if hasattr(request.data, "get") else {}
+            value = next((data.get(field) for field in EMAIL_FIELDS if data.get(field)), None)
+            if not isinstance(value, str):
+                return None
+            return hashlib.sha256(value.strip().lower().encode()).hexdigest()[:32]
+        if kind == "user":
+            user = getattr(request, "user", None)
+            return str(user.pk) if user and user.is_authenticated else None
+        raise ValueError(f"Unknown rate limit identifier: {kind}")
+
+    def allow_request(self, request, view):
+        if not settings.RATE_LIMIT_ENABLED:
+            return True
+        self.retry_after = None
+        for kind, (limit, window) in settings.RATE_LIMITS[self.scope].items():
+            identifier = self.get_identifier(kind, request)
+            if identifier is None:
+                continue
+            allowed, retry_after = hit(f"{self.scope}:{kind}:{identifier}", limit, window)
+            if not allowed:
+                self.retry_after = max(retry_after, self.retry_after or 0)
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
+
+
+class LoginThrottle(SlidingWindowThrottle):
+    scope = "login"
+
+
+class OtpSendThrottle(SlidingWindowThrottle):
+    scope = "otp_send"
+
+
+class OtpVerifyThrottle(SlidingWindowThrottle):
+    scope = "otp_verify"
+
+
+class PasswordResetThrottle(SlidingWindowThrottle):
+    scope = "password_reset"
+
+
+class NewsletterThrottle(SlidingWindowThrottle):
+    scope = "newsletter"
+
+
+class ContactThrottle(SlidingWindowThrottle):
+    scope = "contact"
@@ -0,0 +1,157 @@
+"""
+Token-to-user cache for API authentication.
+
+Every authenticated request used to cost a Token + User join before the
+view ran. ``lookup`` resolves a token key in three tiers:
+
+1. a small in-process LRU (AUTH_TOKEN_LRU_SIZE entries, AUTH_TOKEN_LRU_TTL
+   seconds), which answers repeat requests on the same worker with no I/O;
+2. the shared Django cache (Redis), holding a compact snapshot of the user
+   for AUTH_TOKEN_CACHE_TTL seconds;
+3. the database, whose result is written back to both tiers.
+
+The snapshot only carries the columns authorization checks read. The user
+is rebuilt with ``User.from_db`` so every other column is deferred: touching
+one (e.g. ``full_name`` in a serializer) loads all remaining columns in one
+query, exactly like a normal fetch.
+
+Deleting a token or changing a user's role, status, verification status or
+active flag drops the cached entries (see users/signals.py). Other workers'
+LRUs are not reachable from here; their copies expire within
+AUTH_TOKEN_LRU_TTL seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+SNAPSHOT_FIELDS = (
+    "id",
+    "username",
+    "email",
+    "role",
+    "status",
+    "verification_status",
+    "email_verified",
+    "is_active",
+    "is_staff",
+    "is_superuser",
+    "created_at",
+)
+
+
+class LRUCache:
+    """Thread-safe LRU with a per-entry TTL."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = LRUCache(settings.AUTH_TOKEN_LRU_SIZE, settings.AUTH_TOKEN_LRU_TTL)
+
+
+def _cache_key(key):
+    return f"auth:token:{key}"
+
+
+def snapshot(user):
+    return tuple(getattr(user, field) for field in SNAPSHOT_FIELDS)
+
+
+def build_user(row):
+    """A User holding only the columns in ``row``; the rest load lazily on access."""
+    from .models import User
+
+    # from_db expects values in model field order.
+    field_names = [f.attname for f in User._meta.concrete_fields if f.attname in row]
+    user = User.from_db("default", field_names, [row[name] for name in field_names])
+    user._load_deferred_together = True
+    return user
+
+
+def _fetch(key):
+    from rest_framework.authtoken.models import Token
+
+    token = Token.objects.select_related("user").filter(key=key).first()
+    if token is None:
+        return None
+    return snapshot(token.user)
+
+
+def lookup(key):
+    """
+    Return ``(user, token)`` for ``key``, or None if no such token exists.
+
+    The returned objects are fresh instances on every call, so views may
+    mutate them without affecting other requests.
+    """
+    from rest_framework.authtoken.models import Token
+
+    values = _local.get(key)
+    if values is None:
+        values = cache.get(_cache_key(key))
+        if values is None:
+            values = _fetch(key)
+            if values is None:
+                return None
+            cache.set(_cache_key(key), values, settings.AUTH_TOKEN_CACHE_TTL)
+        _local.set(key, values)
+
+    user = build_user(dict(zip(SNAPSHOT_FIELDS, values)))
+    token = Token(key=key, user=user)
+    token._state.adding = False
+    return user, token
+
+
+def invalidate_token(key):
+    _local.delete(key)
+    cache.delete(_cache_key(key))
+
+
+def invalidate_user(user_id):
+    """Drop cached entries for every token belonging to ``user_id``."""
+    invalidate_users([user_id])
+
+
+def invalidate_users(user_ids):
+    """Drop cached entries for every token belonging to any of ``user_ids``."""
+    from rest_framework.authtoken.models import Token
+
+    keys = list(Token.objects.filter(user_id__in=user_ids).values_list("key", flat=True))
+    for key in keys:
+        _local.delete(key)
+    cache.delete_many([_cache_key(key) for key in keys])
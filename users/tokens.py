@@ -0,0 +1,129 @@
+"""
+Signed access / refresh tokens (JWT) alongside the legacy DRF Token.
+
+Access tokens are short-lived (SIMPLE_JWT ACCESS_TOKEN_LIFETIME) and carry
+the compact user snapshot authorization needs (role, status, verification
+status, email_verified, staff flags), so StatelessJWTAuthentication builds
+``request.user`` from the signature without touching the database. The
+only per-request I/O is one cache ``get_many`` against the revocation set:
+
+- ``auth:revoked:<jti>`` marks a single token (logout, a refresh token that
+  has been rotated) until it would have expired anyway;
+- ``auth:revoked-user:<id>`` holds a cutoff time; every token issued before
+  it is rejected (role or status change, password reset, deletion,
+  "log out everywhere").
+
+Refresh tokens are single-use: ``rotate`` claims the presented token's jti
+atomically, reloads the user so the new claims reflect the current row and
+returns a fresh pair.
+
+Migration from legacy tokens: while AUTH_LEGACY_TOKENS is on, login and
+email verification return the legacy ``token`` next to ``access`` and
+``refresh``, and a client holding only a legacy token can swap it for a
+pair at /api/auth/token/exchange. Both authentication classes stay enabled
+until the legacy tokens are switched off.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken as BaseAccessToken
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+
+CLAIM_FIELDS = ("role", "status", "verification_status", "email_verified", "is_staff", "is_superuser")
+
+
+class PreciseIssuedAtMixin:
+    # Sub-second "iat" so a token issued right after a revocation cutoff is
+    # not mistaken for one issued before it.
+    def set_iat(self, claim="iat", at_time=None):
+        self.payload[claim] = (at_time or self.current_time).timestamp()
+
+
+class AccessToken(PreciseIssuedAtMixin, BaseAccessToken):
+    pass
+
+
+class RefreshToken(PreciseIssuedAtMixin, BaseRefreshToken):
+    access_token_class = AccessToken
+
+
+def _jti_key(jti):
+    return f"auth:revoked:{jti}"
+
+
+def _user_key(user_id):
+    return f"auth:revoked-user:{user_id}"
+
+
+def issue_tokens(user):
+    """Return ``{"access": ..., "refresh": ...}`` for ``user``."""
+    refresh = RefreshToken.for_user(user)
+    for field in CLAIM_FIELDS:
+        refresh[field] = getattr(user, field)
+    return {"access": str(refresh.access_token), "refresh": str(refresh)}
+
+
+def user_from_claims(payload):
+    """A User built from token claims; unclaimed columns load lazily on access."""
+    from .token_cache import build_user
+
+    row = {field: payload[field] for field in CLAIM_FIELDS}
+    row["id"] = uuid.UUID(payload[api_settings.USER_ID_CLAIM])
+    row["is_active"] = True
+    return build_user(row)
+
+
+def is_revoked(payload):
+    jti_key = _jti_key(payload[api_settings.JTI_CLAIM])
+    user_key = _user_key(payload[api_settings.USER_ID_CLAIM])
+    found = cache.get_many([jti_key, user_key])
+    if jti_key in found:
+        return True
+    cutoff = found.get(user_key)
+    return cutoff is not None and payload["iat"] < cutoff
+
+
+def _remaining(token):
+    return max(int(token["exp"] - time.time()), 1)
+
+
+def revoke_token(token):
+    """Revoke one access or refresh token until it expires."""
+    cache.set(_jti_key(token[api_settings.JTI_CLAIM]), 1, _remaining(token))
+
+
+def revoke_user(user_id):
+    """Reject every token issued to ``user_id`` up to now."""
+    revoke_users([user_id])
+
+
+def revoke_users(user_ids):
+    timeout = int(settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds())
+    now = time.time()
+    cache.set_many({_user_key(user_id): now for user_id in user_ids}, timeout)
+
+
+def rotate(raw_refresh):
+    """
+    Exchange a refresh token for a new pair, revoking the old one.
+
+    Raises TokenError if the token is invalid, expired, revoked or already
+    used, or if the user can no longer log in.
+    """
+    from .models import User
+
+    refresh = RefreshToken(raw_refresh)
+    if is_revoked(refresh.payload):
+        raise TokenError("Token has been revoked.")
+    # ``add`` is atomic, so two concurrent rotations cannot both succeed.
+    if not cache.add(_jti_key(refresh[api_settings.JTI_CLAIM]), 1, _remaining(refresh)):
+        raise TokenError("Token has been revoked.")
+
+    user = User.objects.filter(id=refresh[api_settings.USER_ID_CLAIM], is_active=True).first()
+    if user is None or user.status == User.STATUS_SUSPENDED or not user.email_verified:
+        raise TokenError("User can no longer log in.")
+    return issue_tokens(user)
@@ -1,15 +1,16 @@
 from django.urls import path
 from .views import (
-    admin_list_users, admin_list_pending_users,
+    AdminUserDirectoryView, AdminPendingUserListView,
     admin_verify_user, admin_reject_user,
     admin_promote_user, admin_demote_user,
     admin_suspend_user, admin_unsuspend_user,
-    admin_dashboard_analytics,
+    admin_dashboard_analytics, admin_bulk_moderate,
 )
 
 urlpatterns = [
-    path('users', admin_list_users),
-    path('users/pending', admin_list_pending_users),
+    path('users', AdminUserDirectoryView.as_view()),
+    path('users/pending', AdminPendingUserListView.as_view()),
+    path('users/bulk', admin_bulk_moderate),
     path('users/<uuid:user_id>/verify', admin_verify_user),
     path('users/<uuid:user_id>/reject', admin_reject_user),
     path('users/<uuid:user_id>/promote', admin_promote_user),
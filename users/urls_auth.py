@@ -5,12 +5,16 @@ from .views import (
     RegisterView, CustomLoginView,
     request_password_reset, confirm_password_reset, verify_status,
     verify_email, resend_otp, NewsletterSubscribeView, NewsletterUnsubscribeView,
-    ContactInquiryView, ContactInquiryListView
+    ContactInquiryView, ContactInquiryListView,
+    token_refresh, token_exchange, logout
 )
 
 urlpatterns = [
     path('register', RegisterView.as_view()),
     path('login', CustomLoginView.as_view()),
+    path('logout', logout, name='logout'),
+    path('token/refresh', token_refresh, name='token-refresh'),
+    path('token/exchange', token_exchange, name='token-exchange'),
     path('password-reset/request', request_password_reset),
     path('password-reset/confirm', confirm_password_reset),
 
@@ -1,45 +1,31 @@
-import random
-from datetime import timedelta
-from django.utils import timezone
-from django.core.mail import send_mail
 from django.conf import settings
 
+from . import otp
 
-def generate_otp():
-    return str(random.randint(100000, 999999))
 
+def queue_otp_email(email, otp, subject="Verify Your Email"):
+    from notifications.emails import enqueue_otp_email
 
-def send_otp_email(user, subject="Verify Your Email"):
-    """
-    Generates OTP, saves it, and sends email.
-    """
-    otp = generate_otp()
-
-    user.email_otp = otp
-    user.otp_expiry = timezone.now() + timedelta(minutes=10)
-    user.email_otp_used = False
-    user.save()
-
-    send_mail(
-        subject=subject,
-        message=f"Your OTP is {otp}. It expires in 10 minutes.",
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[user.email],
-        fail_silently=False,
+    enqueue_otp_email(
+        email,
+        subject,
+        f"Your OTP is {{otp}}. It expires in {settings.OTP_TTL_SECONDS // 60} minutes.",
+        otp,
+        settings.OTP_TTL_SECONDS,
     )
 
 
-def verify_user_otp(user, otp):
+def send_otp_email(user, subject="Verify Your Email", purpose=otp.EMAIL_VERIFY):
     """
-    Validates OTP, expiry, and prevents reuse.
+    Issues a new OTP for ``purpose`` and queues the email for background
+    delivery. The code lives in the OTP store, not on the user row.
     """
-    if user.email_otp_used:
-        return False, "OTP already used."
-
-    if user.email_otp != otp:
-        return False, "Invalid OTP."
+    code = otp.issue(user.id, purpose)
+    queue_otp_email(user.email, code, subject)
 
-    if not user.otp_expiry or timezone.now() > user.otp_expiry:
-        return False, "OTP expired."
 
-    return True, "OTP valid."
+def verify_user_otp(user, code, purpose=otp.EMAIL_VERIFY):
+    """
+    Validates the OTP and consumes it on success; returns ``(ok, message)``.
+    """
+    return otp.verify(user.id, purpose, code)
@@ -1,14 +1,17 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.filters import OrderingFilter, SearchFilter
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework_simplejwt.exceptions import TokenError
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
+from django.conf import settings
 from django.core.mail import send_mail
-from django.db import models
-import random
+from django.db import models, transaction
 
 from django.utils import timezone
 from datetime import timedelta
@@ -17,9 +20,11 @@ from .models import User, NewsletterSubscription, ContactInquiry
 from .serializers import (
     RegisterSerializer,
     UserSerializer,
+    AdminUserListSerializer,
     PublicUserSerializer,
     LoginSerializer,
     AdminVerificationSerializer,
+    BulkModerationSerializer,
     PasswordResetRequestSerializer,
     PasswordResetConfirmSerializer,
     VerifyEmailSerializer,
@@ -38,7 +43,26 @@ from .permissions import (
     IsOwnerOrAdmin,
 )
 
+from .otp import EMAIL_VERIFY, PASSWORD_RESET
 from .utils import send_otp_email, verify_user_otp
+from .throttling import (
+    ContactThrottle,
+    LoginThrottle,
+    NewsletterThrottle,
+    OtpSendThrottle,
+    OtpVerifyThrottle,
+    PasswordResetThrottle,
+)
+from .tokens import AccessToken, RefreshToken, issue_tokens, revoke_token, revoke_user, rotate
+from .dashboard import get_rollup
+from .pagination import KeysetPagination
+from .analytics import (
+    PeriodError,
+    parse_period,
+    parse_bucket,
+    landlord_analytics_data,
+    get_admin_analytics,
+)
 
 
 # =====================================================
@@ -51,43 +75,47 @@ class RegisterView(generics.CreateAPIView):
     parser_classes = [MultiPartParser, FormParser]
 
     def perform_create(self, serializer):
-        import traceback
-        try:
+        # One short transaction: the user INSERT and the admin notification
+        # outbox row. The OTP is issued and emailed only once the user is
+        # committed. The first admin is created with the bootstrap_admin
+        # command, not by checking for other users here.
+        with transaction.atomic():
             user = serializer.save()
-            print(f"[DEBUG] User {user.username} created successfully.")
-
-            if not User.objects.exclude(id=user.id).exists():  # first user
-                user.role = User.ROLE_ADMIN
-                user.verification_status = User.VERIF_VERIFIED
-                user.save()
-                print(f"[DEBUG] First user set as admin: {user.username}")
-
-            # generate email OTP
-            user.email_otp = f"{random.randint(100000, 999999)}"
-            user.otp_expiry = timezone.now() + timezone.timedelta(minutes=10)
-            user.save()
-            print(f"[DEBUG] OTP generated: {user.email_otp}")
-
-            # Send email (might fail silently, so catch exception)
-            try:
-                send_otp_email(user, subject="Verify your email")
-                print(f"[DEBUG] OTP email sent to {user.email}")
-            except Exception as email_err:
-                print("[ERROR] Failed to send OTP email:", email_err)
-
-        except Exception as e:
-            print("[ERROR] RegisterView perform_create crashed:", e)
-            traceback.print_exc()
-            raise
+            transaction.on_commit(lambda: send_otp_email(user, subject="Verify your email"))
 
 
 # ----------------------------------------------------
 # LIST ALL USERS (ADMIN ONLY)
 # =====================================================
-class UserListView(generics.ListAPIView):
-    queryset = User.objects.all()
-    serializer_class = UserSerializer
+class AdminUserDirectoryView(generics.ListAPIView):
+    """
+    Paginated user directory for admins.
+
+    Filter with ``role``, ``verification_status``, ``status`` and
+    ``email_verified``; search name, email and phone with ``search``; order
+    with ``ordering``. Pages are keyset-paginated (``cursor``) and served
+    from the (role, verification_status, created_at) indexes.
+    """
+    serializer_class = AdminUserListSerializer
     permission_classes = [IsAdmin]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filterset_fields = ["role", "verification_status", "status", "email_verified"]
+    search_fields = ["full_name", "email", "phone_number"]
+    ordering_fields = ["created_at", "full_name", "email"]
+    ordering = ["-created_at"]
+
+    def get_queryset(self):
+        return User.objects.only(*AdminUserListSerializer.Meta.fields)
+
+
+class AdminPendingUserListView(AdminUserDirectoryView):
+    def get_queryset(self):
+        return super().get_queryset().filter(verification_status=User.VERIF_PENDING)
+
+
+class UserListView(AdminUserDirectoryView):
+    pass
 
 
 # =====================================================
@@ -95,6 +123,7 @@ class UserListView(generics.ListAPIView):
 # =====================================================
 class CustomLoginView(APIView):
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [LoginThrottle]
     serializer_class = LoginSerializer
 
     def post(self, request):
@@ -129,21 +158,92 @@ class CustomLoginView(APIView):
                     status=403,
                 )
 
-            token, _ = Token.objects.get_or_create(user=user)
-
-            return Response({
-                "token": token.key,
+            data = {
                 "user_id": user.id,
                 "username": user.username,
                 "email": user.email,
                 "role": user.role,
                 "status": user.status,
                 "verification_status": user.verification_status,
-            })
+            }
+            data.update(issue_tokens(user))
+            if settings.AUTH_LEGACY_TOKENS:
+                token, _ = Token.objects.get_or_create(user=user)
+                data["token"] = token.key
+
+            return Response(data)
 
         return Response(serializer.errors, status=400)
 
 
+# =====================================================
+# JWT REFRESH / EXCHANGE / LOGOUT
+# =====================================================
+@extend_schema(
+    request={"application/json": {"type": "object", "properties": {"refresh": {"type": "string"}}}},
+    responses={200: {"description": "New access and refresh tokens"}}
+)
+@api_view(["POST"])
+@permission_classes([permissions.AllowAny])
+def token_refresh(request):
+    raw = request.data.get("refresh")
+    if not raw:
+        return Response({"error": "refresh is required."}, status=400)
+    try:
+        return Response(rotate(raw))
+    except TokenError as e:
+        return Response({"error": str(e)}, status=401)
+
+
+@extend_schema(responses={200: {"description": "Access and refresh tokens for the legacy token's user"}})
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def token_exchange(request):
+    """Swap a legacy token for a JWT pair; ``revoke_legacy`` deletes the old token."""
+    if not isinstance(request.auth, Token):
+        return Response({"error": "Authenticate with a legacy token to exchange it."}, status=400)
+    data = issue_tokens(request.user)
+    if request.data.get("revoke_legacy"):
+        Token.objects.filter(key=request.auth.key).delete()
+    return Response(data)
+
+
+@extend_schema(
+    request={"application/json": {"type": "object", "properties": {
+        "refresh": {"type": "string"},
+        "all": {"type": "boolean"},
+    }}},
+    responses={200: {"description": "Logged out"}}
+)
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def logout(request):
+    """
+    Revoke the token used for this request and the given refresh token.
+    ``all`` revokes every token the user holds, legacy token included.
+    """
+    if request.data.get("all"):
+        revoke_user(request.user.id)
+        Token.objects.filter(user_id=request.user.id).delete()
+        return Response({"success": "Logged out everywhere."})
+
+    if isinstance(request.auth, AccessToken):
+        revoke_token(request.auth)
+    elif isinstance(request.auth, Token):
+        Token.objects.filter(key=request.auth.key).delete()
+
+    raw = request.data.get("refresh")
+    if raw:
+        try:
+            refresh = RefreshToken(raw)
+        except TokenError:
+            refresh = None
+        if refresh is not None and refresh["user_id"] == str(request.user.id):
+            revoke_token(refresh)
+
+    return Response({"success": "Logged out."})
+
+
 # =====================================================
 # VIEW PROFILE
 # =====================================================
@@ -195,32 +295,6 @@ def user_public_profile(request, user_id):
 # =====================================================
 # ADMIN OPERATIONS
 # =====================================================
-@api_view(["GET"])
-@permission_classes([IsAdmin])
-def admin_list_users(request):
-    role = request.GET.get("role")
-    verification_status = request.GET.get("verification_status")
-
-    users = User.objects.all()
-
-    if role:
-        users = users.filter(role=role)
-
-    if verification_status:
-        users = users.filter(verification_status=verification_status)
-
-    return Response(UserSerializer(users, many=True).data)
-
-
-@api_view(["GET"])
-@permission_classes([IsAdmin])
-def admin_list_pending_users(request):
-    users = User.objects.filter(
-        verification_status=User.VERIF_PENDING
-    )
-    return Response(UserSerializer(users, many=True).data)
-
-
 @api_view(["POST"])
 @permission_classes([IsAdmin])
 def admin_verify_user(request, user_id):
@@ -238,7 +312,9 @@ def admin_verify_user(request, user_id):
         )
         user.verified_by_admin = request.user
         user.verification_date = timezone.now()
-        user.save()
+        user.save(update_fields=[
+            "verification_status", "verification_notes", "verified_by_admin", "verification_date", "updated_at",
+        ])
 
         return Response({"success": f"{user.role} verified successfully."})
 
@@ -262,155 +338,98 @@ def admin_reject_user(request, user_id):
         )
         user.verified_by_admin = request.user
         user.verification_date = timezone.now()
-        user.save()
+        user.save(update_fields=[
+            "verification_status", "verification_notes", "verified_by_admin", "verification_date", "updated_at",
+        ])
 
         return Response({"success": f"{user.role} rejected successfully."})
 
     return Response(serializer.errors, status=400)
 
 
+@extend_schema(request=BulkModerationSerializer, responses={200: {"description": "Per-user results"}})
+@api_view(["POST"])
+@permission_classes([IsAdmin])
+def admin_bulk_moderate(request):
+    """
+    Apply verify / reject / promote / demote / suspend / unsuspend to many
+    users at once. Each id is reported as updated, unchanged, not_found or
+    skipped (your own account for demote / suspend).
+    """
+    from .moderation import moderate
+
+    serializer = BulkModerationSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=400)
+
+    data = serializer.validated_data
+    results, updated_ids = moderate(data["action"], data["user_ids"], request.user, data["verification_notes"])
+    return Response({
+        "action": data["action"],
+        "updated": len(updated_ids),
+        "results": [{"id": user_id, "result": result} for user_id, result in results.items()],
+    })
+
+
 # =====================================================
 # LANDLORD / TENANT DASHBOARDS
 # =====================================================
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsVerifiedLandlord])
 def landlord_dashboard(request):
-    from properties.models import Apartment, Unit
-    from wallet.models import Wallet
-    from bookings.models import Booking
-
     user = request.user
-    apartments = Apartment.objects.filter(landlord=user)
-    total_units = Unit.objects.filter(apartment__landlord=user).count()
-    occupied_units = Unit.objects.filter(apartment__landlord=user, status="OCCUPIED").count()
-
-    pending_bookings = Booking.objects.filter(
-        landlord=user,
-        booking_status="PENDING",
-    ).count()
-
-    wallet, _ = Wallet.objects.get_or_create(
-        user=user,
-        wallet_type="LANDLORD",
-    )
+    stats = get_rollup(user.id)
+    total_units = stats.units_total
+    occupied_units = stats.units_occupied
 
     serializer = LandlordDashboardSerializer(user)
     return Response({
         "message": f"Welcome {user.username}",
         "profile": serializer.data,
         "stats": {
-            "total_apartments": apartments.count(),
+            "total_apartments": stats.apartments,
             "total_units": total_units,
             "occupied_units": occupied_units,
             "vacant_units": total_units - occupied_units,
             "occupancy_rate": round((occupied_units / total_units * 100) if total_units > 0 else 0, 1),
-            "pending_bookings": pending_bookings,
-            "wallet_balance": str(wallet.balance),
+            "pending_bookings": stats.landlord_bookings_pending,
+            "wallet_balance": str(stats.landlord_wallet_balance),
         }
     })
 
+@extend_schema(
+    parameters=[
+        OpenApiParameter(name="period", description="Preset window in days: 7, 30 or 90", type=str),
+        OpenApiParameter(name="start", description="Custom range start (YYYY-MM-DD)", type=str),
+        OpenApiParameter(name="end", description="Custom range end (YYYY-MM-DD)", type=str),
+        OpenApiParameter(name="bucket", description="Add time series bucketed by day, week or month", type=str),
+        OpenApiParameter(name="mode", description="'historical' reads the nightly fact tables", type=str),
+    ],
+)
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsVerifiedLandlord])
 def landlord_analytics(request):
-    from properties.models import Apartment, Unit
-    from bookings.models import Booking
-    from wallet.models import Wallet, WalletTransaction
-
-    user = request.user
-    thirty_days_ago = timezone.now() - timezone.timedelta(days=30)
-
-    apartments = Apartment.objects.filter(landlord=user)
-    apartment_ids = apartments.values_list("id", flat=True)
+    try:
+        start, end, label = parse_period(request.query_params)
+        bucket = parse_bucket(request.query_params)
+    except PeriodError as e:
+        return Response({"error": str(e)}, status=400)
 
-    # Unit stats
-    total_units = Unit.objects.filter(apartment__landlord=user).count()
-    occupied_units = Unit.objects.filter(apartment__landlord=user, status="OCCUPIED").count()
-    vacant_units = total_units - occupied_units
+    if request.query_params.get("mode") == "historical":
+        from analytics.reports import landlord_history
 
-    # Booking stats (last 30 days)
-    recent_bookings = Booking.objects.filter(
-        landlord=user,
-        created_at__gte=thirty_days_ago
-    )
-    total_bookings = recent_bookings.count()
-    confirmed_bookings = recent_bookings.filter(booking_status="CONFIRMED").count()
-    pending_bookings = recent_bookings.filter(booking_status="PENDING").count()
-    cancelled_bookings = recent_bookings.filter(booking_status="CANCELLED").count()
-
-    # Revenue (last 30 days)
-    revenue = WalletTransaction.objects.filter(
-        wallet__user=user,
-        status="COMPLETED",
-        transaction_type="DEPOSIT",
-        created_at__gte=thirty_days_ago
-    ).aggregate(total=models.Sum("amount"))["total"] or 0
-
-    # Occupancy trend
-    occupancy_rate = round((occupied_units / total_units * 100) if total_units > 0 else 0, 1)
-
-    # Apartment performance
-    apartment_performance = []
-    for apt in apartments:
-        apt_bookings = Booking.objects.filter(unit__apartment=apt).count()
-        apt_revenue = WalletTransaction.objects.filter(
-            wallet__user=user,
-            status="COMPLETED",
-            transaction_type="DEPOSIT",
-            reference_id__in=Booking.objects.filter(unit__apartment=apt).values_list("id", flat=True),
-            created_at__gte=thirty_days_ago
-        ).aggregate(total=models.Sum("amount"))["total"] or 0
-        apartment_performance.append({
-            "apartment_id": str(apt.id),
-            "name": apt.name,
-            "total_units": apt.total_units,
-            "occupied_units": apt.occupied_units,
-            "bookings": apt_bookings,
-            "revenue": str(apt_revenue),
-        })
+        data = landlord_history(request.user, start.date(), end.date(), bucket=bucket)
+        return Response({"period": label, "mode": "historical", "start": start.date(), "end": end.date(), **data})
 
-    return Response({
-        "period": "last_30_days",
-        "units": {
-            "total": total_units,
-            "occupied": occupied_units,
-            "vacant": vacant_units,
-            "occupancy_rate": occupancy_rate,
-        },
-        "bookings": {
-            "total": total_bookings,
-            "confirmed": confirmed_bookings,
-            "pending": pending_bookings,
-            "cancelled": cancelled_bookings,
-        },
-        "revenue": str(revenue),
-        "apartments": apartment_performance,
-    })
+    data = landlord_analytics_data(request.user, start, end, bucket=bucket)
+    return Response({"period": label, **data})
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated, IsVerifiedTenant])
 def tenant_dashboard(request):
-    from bookings.models import Booking
-    from wallet.models import Wallet
-    
     user = request.user
-    
-    active_bookings = Booking.objects.filter(
-        tenant=user,
-        booking_status__in=["CONFIRMED", "PAID"]
-    ).count()
-    
-    pending_bookings = Booking.objects.filter(
-        tenant=user,
-        booking_status="PENDING"
-    ).count()
-    
-    past_bookings = Booking.objects.filter(
-        tenant=user,
-        booking_status__in=["COMPLETED", "CANCELLED"]
-    ).count()
-    
-    wallet, _ = Wallet.objects.get_or_create(user=user)
-    
+    stats = get_rollup(user.id)
+
     return Response({
         "message": f"Welcome {user.username}",
         "user": {
@@ -422,10 +441,10 @@ def tenant_dashboard(request):
             "verification_status": user.verification_status,
         },
         "stats": {
-            "active_bookings": active_bookings,
-            "pending_bookings": pending_bookings,
-            "past_bookings": past_bookings,
-            "wallet_balance": str(wallet.balance),
+            "active_bookings": stats.tenant_bookings_confirmed + stats.tenant_bookings_paid,
+            "pending_bookings": stats.tenant_bookings_pending,
+            "past_bookings": stats.tenant_bookings_completed + stats.tenant_bookings_cancelled,
+            "wallet_balance": str(stats.wallet_balance),
         }
     })
 
@@ -458,7 +477,7 @@ def admin_promote_user(request, user_id):
     try:
         user = User.objects.get(id=user_id)
         user.role = User.ROLE_ADMIN
-        user.save()
+        user.save(update_fields=["role", "updated_at"])
         return Response({"success": "User promoted"})
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=404)
@@ -470,7 +489,7 @@ def admin_demote_user(request, user_id):
     try:
         user = User.objects.get(id=user_id)
         user.role = User.ROLE_TENANT
-        user.save()
+        user.save(update_fields=["role", "updated_at"])
         return Response({"success": "User demoted"})
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=404)
@@ -482,7 +501,7 @@ def admin_suspend_user(request, user_id):
     try:
         user = User.objects.get(id=user_id)
         user.status = User.STATUS_SUSPENDED
-        user.save()
+        user.save(update_fields=["status", "updated_at"])
         return Response({"success": "User suspended"})
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=404)
@@ -494,7 +513,7 @@ def admin_unsuspend_user(request, user_id):
     try:
         user = User.objects.get(id=user_id)
         user.status = User.STATUS_ACTIVE
-        user.save()
+        user.save(update_fields=["status", "updated_at"])
         return Response({"success": "User unsuspended"})
     except User.DoesNotExist:
         return Response({"error": "User not found"}, status=404)
@@ -503,16 +522,38 @@ def admin_unsuspend_user(request, user_id):
 # =====================================================
 # ADMIN ANALYTICS
 # =====================================================
+@extend_schema(
+    parameters=[
+        OpenApiParameter(name="period", description="Preset window in days: 7, 30 or 90", type=str),
+        OpenApiParameter(name="start", description="Custom range start (YYYY-MM-DD)", type=str),
+        OpenApiParameter(name="end", description="Custom range end (YYYY-MM-DD)", type=str),
+        OpenApiParameter(name="bucket", description="Add time series bucketed by day, week or month", type=str),
+        OpenApiParameter(name="mode", description="'historical' reads the nightly fact tables", type=str),
+    ],
+)
 @api_view(["GET"])
 @permission_classes([IsAdmin])
 def admin_dashboard_analytics(request):
-    return Response({
-        "total_tenants": User.objects.filter(role=User.ROLE_TENANT).count(),
-        "total_landlords": User.objects.filter(role=User.ROLE_LANDLORD).count(),
-        "pending_verifications": User.objects.filter(
-            verification_status=User.VERIF_PENDING
-        ).count(),
-    })
+    if request.query_params.get("mode") == "historical":
+        from analytics.reports import admin_history
+
+        try:
+            start, end, label = parse_period(request.query_params)
+            bucket = parse_bucket(request.query_params)
+        except PeriodError as e:
+            return Response({"error": str(e)}, status=400)
+        return Response({
+            "period": label,
+            "mode": "historical",
+            "start": start.date(),
+            "end": end.date(),
+            **admin_history(start.date(), end.date(), bucket=bucket),
+        })
+
+    try:
+        return Response(get_admin_analytics(request.query_params))
+    except PeriodError as e:
+        return Response({"error": str(e)}, status=400)
 
 
 # =====================================================
@@ -524,13 +565,14 @@ def admin_dashboard_analytics(request):
 )
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([PasswordResetThrottle])
 def request_password_reset(request):
     serializer = PasswordResetRequestSerializer(data=request.data)
 
     if serializer.is_valid():
         try:
             user = User.objects.get(email=serializer.validated_data["email"])
-            send_otp_email(user, subject="Password Reset OTP")
+            send_otp_email(user, subject="Password Reset OTP", purpose=PASSWORD_RESET)
             return Response({"success": "OTP sent."})
         except User.DoesNotExist:
             return Response({"error": "User not found"}, status=404)
@@ -544,6 +586,7 @@ def request_password_reset(request):
 )
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([OtpVerifyThrottle])
 def confirm_password_reset(request):
     serializer = PasswordResetConfirmSerializer(data=request.data)
 
@@ -556,15 +599,14 @@ def confirm_password_reset(request):
         is_valid, message = verify_user_otp(
             user,
             serializer.validated_data["otp"],
+            purpose=PASSWORD_RESET,
         )
 
         if not is_valid:
             return Response({"error": message}, status=400)
 
         user.set_password(serializer.validated_data["new_password"])
-        user.email_otp = None
-        user.otp_expiry = None
-        user.save()
+        user.save(update_fields=["password", "updated_at"])
 
         return Response({"success": "Password reset successfully."})
 
@@ -580,6 +622,7 @@ def confirm_password_reset(request):
 )
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([OtpVerifyThrottle])
 def verify_email(request):
     email = request.data.get("email")
     otp = request.data.get("otp")
@@ -592,23 +635,21 @@ def verify_email(request):
     if user.email_verified:
         return Response({"message": "Email already verified."})
 
-    is_valid, message = verify_user_otp(user, otp)
+    is_valid, message = verify_user_otp(user, otp, purpose=EMAIL_VERIFY)
 
     if not is_valid:
         return Response({"error": message}, status=400)
 
     user.email_verified = True
-    user.email_otp = None
-    user.otp_expiry = None
-    user.email_otp_used = True
-    user.save()
+    user.save(update_fields=["email_verified", "updated_at"])
 
-    token, _ = Token.objects.get_or_create(user=user)
+    data = {"message": "Email verified successfully."}
+    data.update(issue_tokens(user))
+    if settings.AUTH_LEGACY_TOKENS:
+        token, _ = Token.objects.get_or_create(user=user)
+        data["token"] = token.key
 
-    return Response({
-        "message": "Email verified successfully.",
-        "token": token.key,
-    })
+    return Response(data)
 
 
 # =====================================================
@@ -620,6 +661,7 @@ def verify_email(request):
 )
 @api_view(["POST"])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([OtpSendThrottle])
 def resend_otp(request):
     try:
         user = User.objects.get(email=request.data.get("email"))
@@ -627,21 +669,8 @@ def resend_otp(request):
         if user.email_verified:
             return Response({"message": "Email already verified."})
 
-        now = timezone.now()
-        window_start = user.otp_request_window
-        if not window_start or now > window_start + timedelta(hours=1):
-            user.otp_request_count = 1
-            user.otp_request_window = now
-        else:
-            if user.otp_request_count >= 3:
-                return Response(
-                    {"error": "Too many OTP requests. Please try again later."},
-                    status=429
-                )
-            user.otp_request_count += 1
-
-        user.save()
-        send_otp_email(user, subject="Your New OTP Code")
+        # Request limits are enforced by OtpSendThrottle, outside the user table.
+        send_otp_email(user, subject="Your New OTP Code", purpose=EMAIL_VERIFY)
 
         return Response({"success": "OTP resent successfully."})
 
@@ -673,6 +702,7 @@ class NewsletterSubscribeView(generics.CreateAPIView):
     queryset = NewsletterSubscription.objects.all()
     serializer_class = NewsletterSubscriptionSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [NewsletterThrottle]
 
     def create(self, request, *args, **kwargs):
         email = request.data.get("email")
@@ -697,6 +727,7 @@ class NewsletterUnsubscribeView(generics.UpdateAPIView):
     queryset = NewsletterSubscription.objects.all()
     serializer_class = NewsletterSubscriptionSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [NewsletterThrottle]
     lookup_field = "email"
 
     def update(self, request, *args, **kwargs):
@@ -716,12 +747,14 @@ class ContactInquiryView(generics.CreateAPIView):
     queryset = ContactInquiry.objects.all()
     serializer_class = ContactInquirySerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [ContactThrottle]
 
 
 class ContactInquiryListView(generics.ListAPIView):
     queryset = ContactInquiry.objects.all()
     serializer_class = ContactInquirySerializer
     permission_classes = [IsAdmin]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return ContactInquiry.objects.filter(is_resolved=False).order_by("-created_at")
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class VerificationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'verification'
+
+    def ready(self):
+        from . import signals
+        signals.register_dispatch_signals()
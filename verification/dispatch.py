@@ -0,0 +1,229 @@
+"""
+Verification dispatch.
+
+Apartments that enter PENDING get a PENDING ``Verification`` row (see
+verification/signals.py, and ``create_missing`` as a backfill). ``assign_pending``
+then hands unassigned tasks to field agents in batches:
+
+- the active agents' rows are locked, then one aggregate query reads their
+  open workload and the centroid of the apartments they are already
+  visiting; concurrent runs therefore take turns per agent instead of
+  overfilling one from the same stale counts;
+- each task goes to the agent with the lowest score, where a score is the
+  agent's open workload plus the distance to the apartment expressed in
+  "tasks" (``VERIFICATION_DISPATCH_KM_PER_TASK`` km cost as much as one
+  more open task). Agents at ``VERIFICATION_AGENT_MAX_OPEN`` are skipped;
+- the agent's load and centroid are updated as tasks are handed out, so
+  one run clusters nearby apartments onto the same agent;
+- assignments are written with one UPDATE per agent per chunk, plus one
+  per chunk moving the apartments to PENDING.
+
+Agents have no stored location, so proximity is measured from the centroid
+of their open tasks; an agent with no open tasks competes on workload alone.
+"""
+import logging
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Q
+from django.utils import timezone
+
+from .models import Verification
+from .transitions import sync_apartment
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+
+OPEN_STATUSES = (
+    Verification.Status.PENDING,
+    Verification.Status.ASSIGNED,
+    Verification.Status.IN_PROGRESS,
+)
+AGENT_OPEN_STATUSES = (Verification.Status.ASSIGNED, Verification.Status.IN_PROGRESS)
+
+KM_PER_DEGREE = 111.32
+
+
+def project(lat, lon):
+    """
+    ``(x, y)`` in km on an equirectangular projection: accurate to well under
+    a percent over the few tens of km an agent covers, and cheap enough to
+    score every agent against every task.
+    """
+    if lat is None or lon is None:
+        return None
+    lat, lon = float(lat), float(lon)
+    return lon * KM_PER_DEGREE * math.cos(math.radians(lat)), lat * KM_PER_DEGREE
+
+
+class AgentSlot:
+    """An agent's running workload and the centroid of their open tasks."""
+
+    __slots__ = ("agent_id", "load", "point", "located")
+
+    def __init__(self, agent_id, load=0, point=None, located=0):
+        self.agent_id = agent_id
+        self.load = load
+        self.point = point
+        self.located = located
+
+    def take(self, point):
+        self.load += 1
+        if point is None:
+            return
+        if self.point is None:
+            self.point, self.located = point, 1
+            return
+        self.located += 1
+        x, y = self.point
+        self.point = (x + (point[0] - x) / self.located, y + (point[1] - y) / self.located)
+
+
+def create_missing():
+    """Create PENDING verifications for PENDING apartments that have no open one. Returns the count."""
+    from properties.models import Apartment, VerificationStatus
+
+    apartment_ids = list(
+        Apartment.objects.filter(verification_status=VerificationStatus.PENDING)
+        .exclude(verifications__status__in=OPEN_STATUSES)
+        .values_list("id", flat=True)
+    )
+    created = 0
+    for start in range(0, len(apartment_ids), CHUNK_SIZE):
+        # The partial unique constraint drops anything created concurrently.
+        created += len(Verification.objects.bulk_create(
+            [Verification(apartment_id=apartment_id) for apartment_id in apartment_ids[start:start + CHUNK_SIZE]],
+            ignore_conflicts=True,
+        ))
+    return created
+
+
+def load_agents():
+    """
+    Lock the active agents' rows, then read their open workloads. Must run
+    inside ``transaction.atomic()``: a concurrent dispatch waits on the locks
+    until this one commits and then counts the tasks it handed out, so the
+    two can't both fill the same agent past ``VERIFICATION_AGENT_MAX_OPEN``.
+    """
+    from users.models import User
+
+    active = User.objects.filter(role=User.ROLE_AGENT, is_active=True, status=User.STATUS_ACTIVE)
+    # Locked in a query of their own: FOR UPDATE can't be combined with the
+    # aggregate below.
+    agent_ids = list(active.select_for_update().order_by("id").values_list("id", flat=True))
+    agents = (
+        active.filter(id__in=agent_ids)
+        .annotate(
+            open_tasks=Count("assigned_verifications", filter=Q(assigned_verifications__status__in=AGENT_OPEN_STATUSES)),
+            located_tasks=Count(
+                "assigned_verifications",
+                filter=Q(
+                    assigned_verifications__status__in=AGENT_OPEN_STATUSES,
+                    assigned_verifications__apartment__latitude__isnull=False,
+                    assigned_verifications__apartment__longitude__isnull=False,
+                ),
+            ),
+            lat=Avg("assigned_verifications__apartment__latitude", filter=Q(assigned_verifications__status__in=AGENT_OPEN_STATUSES)),
+            lon=Avg("assigned_verifications__apartment__longitude", filter=Q(assigned_verifications__status__in=AGENT_OPEN_STATUSES)),
+        )
+        .order_by("id")
+        .values_list("id", "open_tasks", "lat", "lon", "located_tasks")
+    )
+    return [
+        AgentSlot(agent_id, load, project(lat, lon), located)
+        for agent_id, load, lat, lon, located in agents
+    ]
+
+
+def plan(tasks, agents, max_open, km_per_task):
+    """
+    Greedy assignment of ``tasks`` (``(id, point)`` pairs, oldest first, where
+    ``point`` comes from ``project``) to ``agents``. Returns
+    ``{agent_id: [task ids]}``.
+    """
+    assignments = defaultdict(list)
+    hypot = math.hypot
+    available = [slot for slot in agents if slot.load < max_open]
+    for task_id, point in tasks:
+        if not available:
+            break
+        best = None
+        best_score = None
+        for slot in available:
+            score = slot.load
+            if point is not None and slot.point is not None:
+                score += hypot(slot.point[0] - point[0], slot.point[1] - point[1]) / km_per_task
+            if best is None or score < best_score:
+                best, best_score = slot, score
+        best.take(point)
+        assignments[best.agent_id].append(task_id)
+        if best.load >= max_open:
+            available.remove(best)
+    return assignments
+
+
+def assign_pending(limit=None):
+    """
+    Assign up to ``limit`` unassigned PENDING verifications, oldest first.
+    Returns ``{agent_id: [verification ids]}``.
+    """
+    limit = limit or settings.VERIFICATION_DISPATCH_BATCH_SIZE
+    with transaction.atomic():
+        agents = load_agents()
+        if not agents:
+            return {}
+
+        tasks = [
+            (task_id, project(lat, lon))
+            for task_id, lat, lon in (
+                Verification.objects.select_for_update(skip_locked=True, of=("self",))
+                .filter(status=Verification.Status.PENDING, assigned_agent__isnull=True)
+                .order_by("created_at")
+                .values_list("id", "apartment__latitude", "apartment__longitude")[:limit]
+            )
+        ]
+        assignments = plan(
+            tasks,
+            agents,
+            settings.VERIFICATION_AGENT_MAX_OPEN,
+            settings.VERIFICATION_DISPATCH_KM_PER_TASK,
+        )
+
+        now = timezone.now()
+        for agent_id, task_ids in assignments.items():
+            for start in range(0, len(task_ids), CHUNK_SIZE):
+                Verification.objects.filter(
+                    id__in=task_ids[start:start + CHUNK_SIZE],
+                    status=Verification.Status.PENDING,
+                ).update(assigned_agent_id=agent_id, status=Verification.Status.ASSIGNED, updated_at=now)
+
+        # Apartments follow their task to PENDING, as a status save would do.
+        assigned_ids = [task_id for task_ids in assignments.values() for task_id in task_ids]
+        for start in range(0, len(assigned_ids), CHUNK_SIZE):
+            sync_apartment(Verification.Status.ASSIGNED, now, verifications__id__in=assigned_ids[start:start + CHUNK_SIZE])
+
+        if assignments:
+            _notify(assignments)
+
+    assigned = sum(len(task_ids) for task_ids in assignments.values())
+    if assigned < len(tasks):
+        logger.warning(f"{len(tasks) - assigned} verifications left unassigned: every agent is at capacity")
+    return dict(assignments)
+
+
+def _notify(assignments):
+    from notifications.outbox import publish_many
+
+    by_count = defaultdict(list)
+    for agent_id, task_ids in assignments.items():
+        by_count[len(task_ids)].append(agent_id)
+    for count, agent_ids in by_count.items():
+        publish_many(
+            "GENERAL",
+            "New Verification Tasks",
+            f"{count} new verification task(s) have been assigned to you.",
+            agent_ids,
+        )
@@ -0,0 +1,238 @@
+"""
+Evidence photo pipeline for verification reports.
+
+Submitting a report only streams the uploaded files to storage, in parallel,
+under ``verification_images/raw/``; nothing is decoded beyond the header
+check in ``EvidenceImageField``. After the report commits, the
+``process_evidence`` task takes each staged file and, again in a thread pool:
+
+- applies the EXIF orientation, then drops every other piece of metadata
+  (GPS position, device, timestamps) by re-encoding;
+- downsizes to EVIDENCE_MAX_DIMENSION and recompresses as progressive JPEG;
+- writes an EVIDENCE_THUMBNAIL_SIZE thumbnail;
+- computes a 64-bit difference hash (dHash) of the picture.
+
+The results are linked to the verification with one bulk INSERT, and each
+new photo is compared with photos filed for *other* apartments. The hash is
+stored as four 16-bit bands; two hashes within DUPLICATE_DISTANCE bits of
+each other must share at least one band exactly, so candidates come from
+indexed equality lookups and only those are compared bit by bit. Matches are
+recorded in ``duplicate_of`` and reported to admins.
+"""
+import io
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+RAW_PREFIX = "verification_images/raw"
+IMAGE_PREFIX = "verification_images"
+
+# Pigeonhole: with four bands, hashes at most 3 bits apart share a band.
+BANDS = 4
+DUPLICATE_DISTANCE = BANDS - 1
+
+
+# ================= REQUEST SIDE =================
+
+def _stage(verification_id, upload):
+    ext = os.path.splitext(upload.name)[1].lower() or ".img"
+    return default_storage.save(f"{RAW_PREFIX}/{verification_id}/{uuid.uuid4().hex}{ext}", upload)
+
+
+def stage_uploads(verification_id, uploads):
+    """Stream ``uploads`` to storage concurrently; returns the stored names in order."""
+    if not uploads:
+        return []
+    with ThreadPoolExecutor(max_workers=min(settings.EVIDENCE_UPLOAD_WORKERS, len(uploads))) as pool:
+        futures = [pool.submit(_stage, verification_id, upload) for upload in uploads]
+        names = []
+        errors = []
+        for future in futures:
+            try:
+                names.append(future.result())
+            except Exception as e:
+                errors.append(e)
+    if errors:
+        discard(names)
+        raise errors[0]
+    return names
+
+
+def discard(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except Exception as e:
+            logger.warning(f"Could not delete staged evidence {name}: {e}")
+
+
+def schedule(verification_id, names):
+    """Queue processing of ``names`` once the surrounding transaction commits."""
+    from django.db import transaction
+
+    from .tasks import process_evidence
+
+    def enqueue():
+        try:
+            process_evidence.delay(verification_id, names)
+        except Exception as e:
+            logger.warning(f"Could not enqueue evidence processing for verification {verification_id}: {e}")
+
+    if names:
+        transaction.on_commit(enqueue)
+
+
+# ================= WORKER SIDE =================
+
+def dhash(image):
+    """64-bit difference hash: brightness gradients of a 9x8 greyscale thumbnail."""
+    from PIL import Image
+
+    small = image.convert("L").resize((9, 8), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            value = (value << 1) | (pixels[row * 9 + col] > pixels[row * 9 + col + 1])
+    return value
+
+
+def bands(value):
+    return [(value >> (16 * (BANDS - 1 - i))) & 0xFFFF for i in range(BANDS)]
+
+
+def _encode(image, quality):
+    out = io.BytesIO()
+    # No ``exif=`` argument: the re-encoded file carries no metadata.
+    image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+    return ContentFile(out.getvalue())
+
+
+def process_one(verification_id, raw_name):
+    """
+    Clean, compress and thumbnail one staged photo. Returns the fields of
+    its VerificationImage row, or None if the file is not a usable image.
+    """
+    from PIL import Image, ImageOps
+
+    max_dim = settings.EVIDENCE_MAX_DIMENSION
+    try:
+        with default_storage.open(raw_name, "rb") as fh:
+            image = Image.open(fh)
+            # JPEG decoders can scale down while decoding, skipping most of the work.
+            image.draft("RGB", (max_dim, max_dim))
+            image = ImageOps.exif_transpose(image).convert("RGB")
+    except Exception as e:
+        logger.warning(f"Discarding unreadable evidence {raw_name}: {e}")
+        return None
+
+    image.thumbnail((max_dim, max_dim), Image.Resampling.LANCZOS)
+    thumbnail = image.copy()
+    thumbnail.thumbnail((settings.EVIDENCE_THUMBNAIL_SIZE,) * 2, Image.Resampling.LANCZOS)
+
+    stem = uuid.uuid4().hex
+    value = dhash(image)
+    return {
+        "image": default_storage.save(
+            f"{IMAGE_PREFIX}/{verification_id}/{stem}.jpg", _encode(image, settings.EVIDENCE_JPEG_QUALITY)
+        ),
+        "thumbnail": default_storage.save(
+            f"{IMAGE_PREFIX}/{verification_id}/thumbs/{stem}.jpg", _encode(thumbnail, settings.EVIDENCE_JPEG_QUALITY)
+        ),
+        "phash": f"{value:016x}",
+        **{f"phash_{i}": band for i, band in enumerate(bands(value))},
+    }
+
+
+def process(verification_id, raw_names):
+    """Process staged photos and link them to the verification. Returns the created rows."""
+    from .models import Verification, VerificationImage
+
+    apartment_id = Verification.objects.filter(pk=verification_id).values_list("apartment_id", flat=True).first()
+    if apartment_id is None:
+        discard(raw_names)
+        return []
+
+    with ThreadPoolExecutor(max_workers=min(settings.EVIDENCE_UPLOAD_WORKERS, len(raw_names) or 1)) as pool:
+        futures = [pool.submit(process_one, verification_id, name) for name in raw_names]
+    results = []
+    errors = []
+    for future in futures:
+        try:
+            row = future.result()
+        except Exception as e:
+            errors.append(e)
+            continue
+        if row:
+            results.append(row)
+
+    # Nothing retries a failed run, so clean up whatever it wrote to storage.
+    try:
+        if errors:
+            raise errors[0]
+        duplicates = find_duplicates(apartment_id, [int(row["phash"], 16) for row in results])
+        images = VerificationImage.objects.bulk_create([
+            VerificationImage(verification_id=verification_id, duplicate_of_id=duplicate, **row)
+            for row, duplicate in zip(results, duplicates)
+        ])
+    except Exception:
+        discard([name for row in results for name in (row["image"], row["thumbnail"])])
+        raise
+    finally:
+        discard(raw_names)
+
+    reused = sum(1 for duplicate in duplicates if duplicate)
+    if reused:
+        _report_reuse(verification_id, reused)
+    return images
+
+
+def find_duplicates(apartment_id, hashes):
+    """
+    For each hash, the id of the earliest photo filed for another apartment
+    within DUPLICATE_DISTANCE bits, or None. One query for the whole batch.
+    """
+    from .models import VerificationImage
+
+    if not hashes:
+        return []
+    lookup = Q()
+    for value in hashes:
+        for i, band in enumerate(bands(value)):
+            lookup |= Q(**{f"phash_{i}": band})
+    candidates = list(
+        VerificationImage.objects.filter(lookup)
+        .exclude(verification__apartment_id=apartment_id)
+        .order_by("uploaded_at", "id")
+        .values_list("id", "phash")
+    )
+
+    matches = []
+    for value in hashes:
+        match = None
+        for image_id, phash in candidates:
+            if bin(value ^ int(phash, 16)).count("1") <= DUPLICATE_DISTANCE:
+                match = image_id
+                break
+        matches.append(match)
+    return matches
+
+
+def _report_reuse(verification_id, count):
+    from notifications.outbox import publish
+
+    logger.warning(f"Verification {verification_id}: {count} evidence photo(s) match photos of other apartments")
+    publish(
+        "GENERAL",
+        "Reused Verification Photos",
+        f"{count} photo(s) submitted for verification #{verification_id} match photos filed for other apartments.",
+        recipient_role="ADMIN",
+    )
@@ -0,0 +1,63 @@
+import random
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from properties.models import Apartment, VerificationStatus
+from users.models import User
+from verification.dispatch import assign_pending, create_missing
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure verification dispatch on synthetic pending apartments spread "
+        "around a city centre. Everything runs in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--apartments", type=int, default=10000)
+        parser.add_argument("--agents", type=int, default=250)
+        parser.add_argument("--radius-km", type=float, default=20)
+
+    def handle(self, *args, **options):
+        prefix = f"bench-{uuid.uuid4().hex[:8]}-"
+        spread = options["radius_km"] / 111
+        rng = random.Random(0)
+
+        with transaction.atomic():
+            landlord = User.objects.create(username=f"{prefix}landlord", email=f"{prefix}landlord@example.com", role=User.ROLE_LANDLORD)
+            User.objects.bulk_create([
+                User(username=f"{prefix}agent{i}", email=f"{prefix}agent{i}@example.com", role=User.ROLE_AGENT)
+                for i in range(options["agents"])
+            ])
+            Apartment.objects.bulk_create([
+                Apartment(
+                    landlord=landlord,
+                    name=f"{prefix}{i}",
+                    latitude=round(-1.2921 + rng.uniform(-spread, spread), 6),
+                    longitude=round(36.8219 + rng.uniform(-spread, spread), 6),
+                    verification_status=VerificationStatus.PENDING,
+                )
+                for i in range(options["apartments"])
+            ], batch_size=1000)
+
+            started = time.perf_counter()
+            created = create_missing()
+            opened = time.perf_counter() - started
+
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                assignments = assign_pending(options["apartments"])
+            assigned = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        loads = sorted(len(task_ids) for task_ids in assignments.values())
+        self.stdout.write(
+            f"opened {created} tasks in {opened:.2f} s; assigned {sum(loads)} to {len(loads)} agents "
+            f"in {assigned:.2f} s ({len(queries)} queries); per-agent load min {loads[0] if loads else 0}, "
+            f"max {loads[-1] if loads else 0}"
+        )
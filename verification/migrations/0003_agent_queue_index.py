@@ -0,0 +1,24 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0009_unit_deposit_amount_unit_electricity_deposit_and_more'),
+        ('verification', '0002_verification_unique_active_verification_per_apartment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='verification',
+            name='verificatio_assigne_4f42f7_idx',
+        ),
+        migrations.AddIndex(
+            model_name='verification',
+            index=models.Index(fields=['assigned_agent', 'status', 'created_at'], name='verif_agent_status_created_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.0.4 on 2026-10-19 14:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('verification', '0003_agent_queue_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='verificationimage',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, help_text='Earlier photo of another apartment this one matches', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reuses', to='verification.verificationimage'),
+        ),
+        migrations.AddField(
+            model_name='verificationimage',
+            name='phash',
+            field=models.CharField(blank=True, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='verificationimage',
+            name='phash_0',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='verificationimage',
+            name='phash_1',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='verificationimage',
+            name='phash_2',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='verificationimage',
+            name='phash_3',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='verificationimage',
+            name='thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='verification_images/thumbs/'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationimage',
+            index=models.Index(fields=['phash_0'], name='verif_image_phash0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationimage',
+            index=models.Index(fields=['phash_1'], name='verif_image_phash1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationimage',
+            index=models.Index(fields=['phash_2'], name='verif_image_phash2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='verificationimage',
+            index=models.Index(fields=['phash_3'], name='verif_image_phash3_idx'),
+        ),
+    ]
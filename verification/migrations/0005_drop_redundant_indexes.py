@@ -0,0 +1,29 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('verification', '0004_evidence_pipeline'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='verification',
+            name='verificatio_status_94997c_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='verification',
+            name='verificatio_apartme_2e0890_idx',
+        ),
+        migrations.AlterField(
+            model_name='verification',
+            name='assigned_agent',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_verifications', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
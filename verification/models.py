@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
+from tyrent_backend.tracking import FieldTracker
+
+class Verification(FieldTracker, models.Model):
+    tracked_fields = ("status",)
 
-class Verification(models.Model):
     class Status(models.TextChoices):
         PENDING = "PENDING", "Pending"
         ASSIGNED = "ASSIGNED", "Assigned"
@@ -23,7 +26,8 @@ class Verification(models.Model):
         null=True,
         blank=True,
         related_name="assigned_verifications",
-        db_index=True,
+        # Served by verif_agent_status_created_idx, which leads with it.
+        db_index=False,
     )
 
     status = models.CharField(
@@ -43,10 +47,10 @@ class Verification(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        # status and apartment are already indexed by their fields' db_index.
         indexes = [
-            models.Index(fields=["status"]),
-            models.Index(fields=["assigned_agent"]),
-            models.Index(fields=["apartment"]),
+            # Agent work queue: WHERE assigned_agent = ? AND status = ? ORDER BY created_at
+            models.Index(fields=["assigned_agent", "status", "created_at"], name="verif_agent_status_created_idx"),
         ]
         constraints = [
             models.UniqueConstraint(
@@ -66,56 +70,70 @@ class Verification(models.Model):
         return f"Verification #{self.id} - {self.apartment}"
 
     #form submission business logic
-    def submit_report(self, report_text):
-        self.report = report_text
-        self.verification_date = timezone.now()
-
-        if self.status == self.Status.VERIFIED:
-            self.apartment.verification_status = "VERIFIED"
-        elif self.status == self.Status.REJECTED:
-            self.apartment.verification_status = "REJECTED"
-
-        self.apartment.save(update_fields = ["verification_status"])
-        self.save()
-
-    def can_transition(self, new_status):
-        allowed_transitions = {
-            self.Status.PENDING: [self.Status.ASSIGNED],
-            self.Status.ASSIGNED : [self.Status.IN_PROGRESS],
-            self.Status.IN_PROGRESS : [
-                self.Status.VERIFIED,
-                self.Status.REJECTED,
-            ],
-            self.Status.VERIFIED : [],
-            self.Status.REJECTED : [],
-
-        }
-        return new_status in allowed_transitions.get(self.status, [])
-
-    def update_apartment_status(self):
-        apartment = self.apartment
-
-        if(self.status == self.Status.VERIFIED):
-            apartment.verification_status = "VERIFIED"
-        elif(self.status == self.Status.REJECTED):
-            apartment.verification_status = "REJECTED"
-        else:
-            apartment.verification_status = "PENDING"
-
-        apartment.save(update_fields = ["verification_status"])
+    def submit_report(self, report_text, status=None):
+        """Record the agent's report and move to ``status`` (defaults to the status already set)."""
+        return self.transition(status or self.status, report=report_text, verification_date=timezone.now())
+
+    # status -> statuses it may move to
+    TRANSITIONS = {
+        Status.PENDING: [Status.ASSIGNED],
+        Status.ASSIGNED: [Status.IN_PROGRESS],
+        Status.IN_PROGRESS: [Status.VERIFIED, Status.REJECTED],
+        Status.VERIFIED: [],
+        Status.REJECTED: [],
+    }
+
+    def can_transition(self, new_status, from_status=None):
+        return new_status in self.TRANSITIONS.get(from_status or self.status, [])
+
+    def transition(self, new_status, **fields):
+        """
+        Compare-and-set ``status`` from its loaded value to ``new_status``,
+        writing ``fields`` in the same UPDATE and syncing the apartment.
+        Raises ValueError for an invalid transition and TransitionConflict
+        when the row has moved on since it was loaded; neither writes.
+        """
+        from .transitions import TransitionConflict, apply
+
+        expected = self.previous("status")
+        if expected is None or not self.can_transition(new_status, from_status=expected):
+            raise ValueError(f"Invalid transition from {expected} to {new_status}")
+        now = timezone.now()
+        if not apply(self.pk, new_status, expected=[expected], apartment_id=self.apartment_id, now=now, **fields):
+            raise TransitionConflict(f"Verification #{self.pk} is no longer {expected}")
+
+        self.status = new_status
+        self.updated_at = now
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self._snapshot_tracked(["status"])
+        self._follow_apartment()
+
+    def _follow_apartment(self):
+        """Mirror the apartment status written by the transition onto an already-loaded apartment."""
+        from .transitions import apartment_status
+
+        if Verification.apartment.is_cached(self):
+            self.apartment.verification_status = apartment_status(self.status)
+            self.apartment._snapshot_tracked(["verification_status"])
 
     def save(self, *args, **kwargs):
-        if self.pk:
-            old = Verification.objects.get(pk=self.pk)
-            if old.status != self.status:
-
-                self.update_apartment_status()
-
-                if not old.can_transition(self.status):
-                    raise ValueError(
-                        f"Invalid transition from {old.status} to {self.status}"
-                    )
-        super().save(*args, **kwargs)
+        status_changed = bool(self.pk) and self.has_changed("status")
+        if status_changed:
+            old_status = self.previous("status")
+            if not self.can_transition(self.status, from_status=old_status):
+                raise ValueError(
+                    f"Invalid transition from {old_status} to {self.status}"
+                )
+        if not status_changed:
+            return super().save(*args, **kwargs)
+
+        from .transitions import sync_apartment
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            sync_apartment(self.status, self.updated_at, pk=self.apartment_id)
+        self._follow_apartment()
 
 #Verification images
 class VerificationImage(models.Model):
@@ -125,8 +143,31 @@ class VerificationImage(models.Model):
         related_name = "images",
     )
     image = models.ImageField(upload_to = "verification_images/")
+    thumbnail = models.ImageField(upload_to = "verification_images/thumbs/", blank = True, null = True)
+    # 64-bit dHash as hex, plus its four 16-bit bands for near-duplicate lookups
+    phash = models.CharField(max_length = 16, blank = True)
+    phash_0 = models.PositiveIntegerField(blank = True, null = True)
+    phash_1 = models.PositiveIntegerField(blank = True, null = True)
+    phash_2 = models.PositiveIntegerField(blank = True, null = True)
+    phash_3 = models.PositiveIntegerField(blank = True, null = True)
+    duplicate_of = models.ForeignKey(
+        "self",
+        on_delete = models.SET_NULL,
+        null = True,
+        blank = True,
+        related_name = "reuses",
+        help_text = "Earlier photo of another apartment this one matches",
+    )
     uploaded_at = models.DateTimeField(auto_now_add = True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields = ["phash_0"], name = "verif_image_phash0_idx"),
+            models.Index(fields = ["phash_1"], name = "verif_image_phash1_idx"),
+            models.Index(fields = ["phash_2"], name = "verif_image_phash2_idx"),
+            models.Index(fields = ["phash_3"], name = "verif_image_phash3_idx"),
+        ]
+
     def __str__(self):
         return f"Image for verification #{self.verification.id}"
 
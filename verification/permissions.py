@@ -1,11 +1,15 @@
-from rest_framework.permissions import BasePermission, SAFE_METHODS
+from rest_framework.permissions import BasePermission
+
+from users.principal import get_principal
+
 
 class IsAdminOrAssignedAgent(BasePermission):
     def has_object_permission(self, request, view, obj):
+        principal = get_principal(request)
 
         #admin has full access
-        if request.user.is_staff or getattr(request.user, "role", "") == "ADMIN":
+        if principal.is_admin or principal.is_staff:
             return True
 
         #Field agent can only access assigned tasks
-        return obj.assigned_agent == request.user
\ No newline at end of file
+        return principal.is_user(obj.assigned_agent_id)
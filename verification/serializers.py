@@ -1,11 +1,43 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Verification, VerificationImage
 
+EVIDENCE_FORMATS = {"JPEG", "PNG", "WEBP", "MPO"}
+
+
+class EvidenceImageField(serializers.FileField):
+    """
+    An uploaded photo checked from its header only. Unlike ImageField it
+    does not decode the whole picture in the request; the evidence
+    pipeline does that in the background.
+    """
+    default_error_messages = {
+        "invalid_image": "Upload a valid JPEG, PNG or WebP image.",
+        "too_large": "Images must be under {max_mb} MB.",
+    }
+
+    def to_internal_value(self, data):
+        from PIL import Image
+
+        upload = super().to_internal_value(data)
+        if upload.size > settings.EVIDENCE_MAX_BYTES:
+            self.fail("too_large", max_mb=settings.EVIDENCE_MAX_BYTES // (1024 * 1024))
+        try:
+            with Image.open(upload) as image:
+                image_format = image.format
+        except Exception:
+            self.fail("invalid_image")
+        if image_format not in EVIDENCE_FORMATS:
+            self.fail("invalid_image")
+        upload.seek(0)
+        return upload
+
+
 class VerificationImageSerializer(serializers.ModelSerializer):
     class Meta:
         model = VerificationImage
-        fields = ["id","image","uploaded_at"]
-        read_only_fields = ["id","uploaded_at"]
+        fields = ["id","image","thumbnail","duplicate_of","uploaded_at"]
+        read_only_fields = ["id","thumbnail","duplicate_of","uploaded_at"]
 
 class VerificationSerializer(serializers.ModelSerializer):
     images = VerificationImageSerializer(many=True, read_only=True)
@@ -36,7 +68,33 @@ class SubmitReportSerializer(serializers.Serializer):
         choices = [Verification.Status.VERIFIED, Verification.Status.REJECTED]
     )
     images = serializers.ListField(
-        child = serializers.ImageField(),
+        child = EvidenceImageField(),
         required = False,
         allow_empty = True,
-    )
\ No newline at end of file
+        max_length = settings.EVIDENCE_MAX_IMAGES,
+    )
+
+class VerificationQueueSerializer(serializers.ModelSerializer):
+    apartment_name = serializers.CharField(source="apartment.name", read_only=True)
+    address = serializers.CharField(source="apartment.address", read_only=True)
+    latitude = serializers.DecimalField(source="apartment.latitude", max_digits=9, decimal_places=6, read_only=True)
+    longitude = serializers.DecimalField(source="apartment.longitude", max_digits=9, decimal_places=6, read_only=True)
+
+    class Meta:
+        model = Verification
+        fields = [
+            "id",
+            "apartment",
+            "apartment_name",
+            "address",
+            "latitude",
+            "longitude",
+            "assigned_agent",
+            "status",
+            "created_at",
+        ]
+        read_only_fields = fields
+
+
+class DispatchSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(min_value=1, required=False)
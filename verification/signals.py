@@ -0,0 +1,19 @@
+"""
+Open a verification task whenever an apartment is submitted for
+verification. Registered from VerificationConfig.ready().
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+
+def register_dispatch_signals():
+    from properties.models import Apartment, VerificationStatus
+
+    from .models import Verification
+
+    @receiver(post_save, sender=Apartment, dispatch_uid="verification_open_task")
+    def open_verification_task(sender, instance, created, **kwargs):
+        if instance.verification_status != VerificationStatus.PENDING or not instance.has_changed("verification_status"):
+            return
+        # The partial unique constraint keeps this a no-op when a task is already open.
+        Verification.objects.bulk_create([Verification(apartment_id=instance.id)], ignore_conflicts=True)
@@ -0,0 +1,26 @@
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name="verification.tasks.dispatch_verifications")
+def dispatch_verifications():
+    """Runs every minute — opens missing tasks and assigns pending ones to agents."""
+    from .dispatch import assign_pending, create_missing
+
+    created = create_missing()
+    assignments = assign_pending()
+    assigned = sum(len(task_ids) for task_ids in assignments.values())
+    if created or assigned:
+        logger.info(f"Opened {created} verification tasks, assigned {assigned} to {len(assignments)} agents")
+    return f"Opened {created}, assigned {assigned}"
+
+
+@shared_task(name="verification.tasks.process_evidence")
+def process_evidence(verification_id, raw_names):
+    """Clean, compress, thumbnail and hash staged report photos, then link them to the verification."""
+    from .evidence import process
+
+    images = process(verification_id, raw_names)
+    return f"Linked {len(images)} of {len(raw_names)}"
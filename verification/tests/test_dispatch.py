@@ -0,0 +1,119 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from properties.models import Apartment, VerificationStatus
+from verification.dispatch import assign_pending, create_missing
+from verification.models import Verification
+
+User = get_user_model()
+
+
+class VerificationDispatchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = User.objects.create_user(
+            email="dispatch-admin@test.com", password="password", username="dispatch_admin", role=User.ROLE_ADMIN,
+        )
+        self.landlord = User.objects.create_user(
+            email="dispatch-landlord@test.com", password="password", username="dispatch_landlord", role=User.ROLE_LANDLORD,
+        )
+        self.west = User.objects.create_user(
+            email="west@test.com", password="password", username="agent_west", role=User.ROLE_AGENT,
+        )
+        self.east = User.objects.create_user(
+            email="east@test.com", password="password", username="agent_east", role=User.ROLE_AGENT,
+        )
+
+    def apartment(self, name, lat=None, lon=None, status=VerificationStatus.PENDING):
+        return Apartment.objects.create(
+            landlord=self.landlord, name=name, latitude=lat, longitude=lon, verification_status=status,
+        )
+
+    def test_pending_apartment_opens_one_task(self):
+        apartment = self.apartment("Draft", status=VerificationStatus.NOT_REQUESTED)
+        self.assertFalse(Verification.objects.exists())
+
+        apartment.verification_status = VerificationStatus.PENDING
+        apartment.save()
+        apartment.save()
+        task = Verification.objects.get(apartment=apartment)
+        self.assertEqual(task.status, Verification.Status.PENDING)
+        self.assertIsNone(task.assigned_agent_id)
+
+        self.assertEqual(create_missing(), 0)
+
+    def test_create_missing_backfills(self):
+        apartments = Apartment.objects.bulk_create([
+            Apartment(landlord=self.landlord, name=f"Bulk {i}", verification_status=VerificationStatus.PENDING)
+            for i in range(3)
+        ])
+        self.assertEqual(create_missing(), 3)
+        self.assertEqual(Verification.objects.filter(apartment__in=apartments).count(), 3)
+        self.assertEqual(create_missing(), 0)
+
+    def test_assignment_balances_load_and_clusters_by_location(self):
+        # Two clusters about 30 km apart.
+        for i in range(4):
+            self.apartment(f"West {i}", -1.29 + i * 0.001, 36.70)
+            self.apartment(f"East {i}", -1.29 + i * 0.001, 36.97)
+
+        # Savepoint, agent locks, agent workloads, tasks, one UPDATE per agent,
+        # apartments, notifications, release.
+        with self.assertNumQueries(9):
+            assignments = assign_pending()
+
+        self.assertEqual(sorted(len(ids) for ids in assignments.values()), [4, 4])
+        for agent_id, ids in assignments.items():
+            names = {name.split()[0] for name in Apartment.objects.filter(verifications__id__in=ids).values_list("name", flat=True)}
+            self.assertEqual(len(names), 1, names)
+        self.assertFalse(Verification.objects.filter(status=Verification.Status.PENDING).exists())
+
+    def test_existing_workload_is_respected(self):
+        busy = self.apartment("Busy", status=VerificationStatus.NOT_REQUESTED)
+        Verification.objects.create(apartment=busy, assigned_agent=self.west, status=Verification.Status.IN_PROGRESS)
+        for i in range(3):
+            self.apartment(f"New {i}")
+
+        assignments = assign_pending()
+        self.assertEqual(len(assignments[self.east.id]), 2)
+        self.assertEqual(len(assignments[self.west.id]), 1)
+
+    @override_settings(VERIFICATION_AGENT_MAX_OPEN=1)
+    def test_agents_at_capacity_get_nothing(self):
+        for i in range(3):
+            self.apartment(f"Apt {i}")
+        assignments = assign_pending()
+        self.assertEqual(sum(len(ids) for ids in assignments.values()), 2)
+        self.assertEqual(Verification.objects.filter(status=Verification.Status.PENDING).count(), 1)
+
+    def test_agent_queue(self):
+        for i in range(3):
+            self.apartment(f"Apt {i}")
+        assign_pending()
+        mine = list(Verification.objects.filter(assigned_agent=self.west).order_by("created_at").values_list("id", flat=True))
+
+        self.client.force_authenticate(self.west)
+        response = self.client.get("/api/verification/queue/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.data["results"]], mine)
+        self.assertTrue(all(row["status"] == Verification.Status.ASSIGNED for row in response.data["results"]))
+
+        response = self.client.get("/api/verification/queue/", {"status": "VERIFIED"})
+        self.assertEqual(response.data["results"], [])
+        response = self.client.get("/api/verification/queue/", {"status": "BOGUS"})
+        self.assertEqual(response.status_code, 400)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get("/api/verification/queue/", {"agent": str(self.east.id)})
+        self.assertEqual(len(response.data["results"]), 3 - len(mine))
+
+    def test_dispatch_endpoint_is_admin_only(self):
+        self.apartment("Apt")
+        self.client.force_authenticate(self.west)
+        self.assertEqual(self.client.post("/api/verification/dispatch/").status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.post("/api/verification/dispatch/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["assigned"], 1)
@@ -0,0 +1,156 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework.test import APIClient
+
+from properties.models import Apartment
+from verification import evidence
+from verification.models import Verification, VerificationImage
+
+User = get_user_model()
+
+
+def photo(name="photo.jpg", size=(640, 480), flip=False):
+    image = Image.effect_mandelbrot(size, (-2.0, -1.5, 1.0, 1.5), 60).convert("RGB")
+    if flip:
+        image = image.transpose(Image.Transpose.FLIP_LEFT_RIGHT)
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    exif[0x0110] = "Model X"
+    out = io.BytesIO()
+    image.save(out, "JPEG", exif=exif.tobytes())
+    return SimpleUploadedFile(name, out.getvalue(), content_type="image/jpeg")
+
+
+class EvidencePipelineTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.override = override_settings(MEDIA_ROOT=self.media, EVIDENCE_MAX_DIMENSION=400, EVIDENCE_THUMBNAIL_SIZE=64)
+        self.override.enable()
+
+        self.client = APIClient()
+        self.agent = User.objects.create_user(
+            email="evidence-agent@test.com", password="password", username="evidence_agent", role=User.ROLE_AGENT,
+        )
+        landlord = User.objects.create_user(
+            email="evidence-landlord@test.com", password="password", username="evidence_landlord", role=User.ROLE_LANDLORD,
+        )
+        self.first = Verification.objects.create(
+            apartment=Apartment.objects.create(landlord=landlord, name="First"),
+            assigned_agent=self.agent,
+            status=Verification.Status.IN_PROGRESS,
+        )
+        self.second = Verification.objects.create(
+            apartment=Apartment.objects.create(landlord=landlord, name="Second"),
+            assigned_agent=self.agent,
+            status=Verification.Status.IN_PROGRESS,
+        )
+
+    def tearDown(self):
+        self.override.disable()
+        shutil.rmtree(self.media, ignore_errors=True)
+
+    def submit(self, verification, images):
+        self.client.force_authenticate(self.agent)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                f"/api/verification/{verification.id}/submit-report/",
+                {"report": "Checked", "status": "VERIFIED", "images": images},
+                format="multipart",
+            )
+
+    def test_photos_are_cleaned_thumbnailed_and_linked(self):
+        response = self.submit(self.first, [photo("a.jpg"), photo("b.jpg", flip=True)])
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data["images_processing"], 2)
+
+        images = list(VerificationImage.objects.filter(verification=self.first))
+        self.assertEqual(len(images), 2)
+        for row in images:
+            with default_storage.open(row.image.name) as fh:
+                stored = Image.open(fh)
+                self.assertEqual(stored.format, "JPEG")
+                self.assertLessEqual(max(stored.size), 400)
+                self.assertEqual(len(stored.getexif()), 0)
+            with default_storage.open(row.thumbnail.name) as fh:
+                self.assertLessEqual(max(Image.open(fh).size), 64)
+            self.assertEqual(len(row.phash), 16)
+            self.assertEqual(evidence.bands(int(row.phash, 16)), [row.phash_0, row.phash_1, row.phash_2, row.phash_3])
+            self.assertIsNone(row.duplicate_of_id)
+
+        # Raw uploads are removed once processed.
+        _, raw = default_storage.listdir(f"{evidence.RAW_PREFIX}/{self.first.id}")
+        self.assertEqual(raw, [])
+
+    def test_reused_photo_from_another_apartment_is_flagged(self):
+        self.submit(self.first, [photo("original.jpg")])
+        original = VerificationImage.objects.get(verification=self.first)
+
+        # Same scene, re-encoded at another size.
+        response = self.submit(self.second, [photo("again.jpg", size=(800, 600)), photo("other.jpg", flip=True)])
+        self.assertEqual(response.status_code, 200)
+        rows = {row.duplicate_of_id for row in VerificationImage.objects.filter(verification=self.second)}
+        self.assertEqual(rows, {original.id, None})
+
+    def test_rejected_report_discards_staged_photos(self):
+        self.client.force_authenticate(self.agent)
+        self.first.transition(Verification.Status.VERIFIED)
+        response = self.client.post(
+            f"/api/verification/{self.first.id}/submit-report/",
+            {"report": "Again", "status": "VERIFIED", "images": [photo()]},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(default_storage.exists(f"{evidence.RAW_PREFIX}/{self.first.id}")
+                         and default_storage.listdir(f"{evidence.RAW_PREFIX}/{self.first.id}")[1])
+
+    def test_unauthorized_report_stages_nothing(self):
+        other = User.objects.create_user(
+            email="evidence-other@test.com", password="password", username="evidence_other", role=User.ROLE_AGENT,
+        )
+        self.client.force_authenticate(other)
+        response = self.client.post(
+            f"/api/verification/{self.first.id}/submit-report/",
+            {"report": "Not mine", "status": "VERIFIED", "images": [photo()]},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(default_storage.exists(f"{evidence.RAW_PREFIX}/{self.first.id}"))
+
+    def test_failed_processing_cleans_up_storage(self):
+        names = evidence.stage_uploads(self.first.id, [photo("a.jpg"), photo("b.jpg", flip=True)])
+        with mock.patch.object(evidence, "find_duplicates", side_effect=RuntimeError("db down")):
+            with self.assertRaises(RuntimeError):
+                evidence.process(self.first.id, names)
+
+        self.assertFalse(any(default_storage.exists(name) for name in names))
+        _, processed = default_storage.listdir(f"{evidence.IMAGE_PREFIX}/{self.first.id}")
+        _, thumbs = default_storage.listdir(f"{evidence.IMAGE_PREFIX}/{self.first.id}/thumbs")
+        self.assertEqual((processed, thumbs), ([], []))
+        self.assertFalse(VerificationImage.objects.exists())
+
+    def test_non_image_is_rejected_without_decoding(self):
+        self.client.force_authenticate(self.agent)
+        bogus = SimpleUploadedFile("x.jpg", b"not an image", content_type="image/jpeg")
+        response = self.client.post(
+            f"/api/verification/{self.first.id}/submit-report/",
+            {"report": "Checked", "status": "VERIFIED", "images": [bogus]},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("images", response.data)
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.status, Verification.Status.IN_PROGRESS)
+
+    def test_dhash_tolerates_resizing(self):
+        small = Image.effect_mandelbrot((160, 120), (-2.0, -1.5, 1.0, 1.5), 60)
+        large = Image.effect_mandelbrot((1600, 1200), (-2.0, -1.5, 1.0, 1.5), 60)
+        distance = bin(evidence.dhash(small) ^ evidence.dhash(large)).count("1")
+        self.assertLessEqual(distance, evidence.DUPLICATE_DISTANCE)
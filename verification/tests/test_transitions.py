@@ -0,0 +1,107 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from notifications.models import NotificationEvent
+from properties.models import Apartment, VerificationStatus
+from verification.models import Verification
+from verification.transitions import TransitionConflict
+
+User = get_user_model()
+
+
+def writes(queries):
+    return [q["sql"] for q in queries if q["sql"].split()[0] in ("INSERT", "UPDATE", "DELETE")]
+
+
+class VerificationTransitionTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.agent = User.objects.create_user(
+            email="cas-agent@test.com", password="password", username="cas_agent", role=User.ROLE_AGENT,
+        )
+        self.landlord = User.objects.create_user(
+            email="cas-landlord@test.com", password="password", username="cas_landlord", role=User.ROLE_LANDLORD,
+        )
+        self.apartment = Apartment.objects.create(
+            landlord=self.landlord, name="CAS Apartment", verification_status=VerificationStatus.NOT_REQUESTED,
+        )
+        self.verification = Verification.objects.create(
+            apartment=self.apartment, assigned_agent=self.agent, status=Verification.Status.IN_PROGRESS,
+        )
+        self.url = f"/api/verification/{self.verification.id}/submit-report/"
+
+    def test_report_is_two_writes_without_reading_first(self):
+        self.client.force_authenticate(self.agent)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {"report": "Damp walls", "status": "REJECTED"}, format="json")
+        self.assertEqual(response.status_code, 200)
+
+        statements = [q["sql"] for q in queries if not q["sql"].split()[0] in ("SAVEPOINT", "RELEASE")]
+        self.assertEqual(len(statements), 2, statements)
+        self.assertEqual(len(writes(queries)), 2)
+
+        self.verification.refresh_from_db()
+        self.apartment.refresh_from_db()
+        self.assertEqual(self.verification.status, Verification.Status.REJECTED)
+        self.assertEqual(self.verification.report, "Damp walls")
+        self.assertIsNotNone(self.verification.verification_date)
+        self.assertEqual(self.apartment.verification_status, VerificationStatus.REJECTED)
+
+    def test_verified_report_notifies_landlord(self):
+        self.client.force_authenticate(self.agent)
+        response = self.client.post(self.url, {"report": "All good", "status": "VERIFIED"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        event = NotificationEvent.objects.get(type="APARTMENT_VERIFIED")
+        self.assertEqual(event.recipient_id, self.landlord.id)
+        self.assertEqual(event.related_object_id, self.apartment.id)
+
+    def test_resubmission_and_wrong_state_write_nothing(self):
+        self.client.force_authenticate(self.agent)
+        self.client.post(self.url, {"report": "All good", "status": "VERIFIED"}, format="json")
+        before = Verification.objects.values().get(pk=self.verification.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, {"report": "Again", "status": "REJECTED"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        # Only the compare-and-set itself, which matched no row.
+        self.assertEqual(len(writes(queries)), 1)
+        self.assertEqual(Verification.objects.values().get(pk=self.verification.pk), before)
+
+        other = Apartment.objects.create(landlord=self.landlord, name="Assigned only")
+        assigned = Verification.objects.create(apartment=other, assigned_agent=self.agent, status=Verification.Status.ASSIGNED)
+        response = self.client.post(
+            f"/api/verification/{assigned.id}/submit-report/", {"report": "Early", "status": "VERIFIED"}, format="json",
+        )
+        self.assertEqual(response.status_code, 409)
+        assigned.refresh_from_db()
+        self.assertEqual(assigned.status, Verification.Status.ASSIGNED)
+
+        response = self.client.post("/api/verification/999999/submit-report/", {"report": "x", "status": "VERIFIED"}, format="json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_transition_writes_nothing(self):
+        with self.assertNumQueries(0):
+            with self.assertRaises(ValueError):
+                self.verification.transition(Verification.Status.ASSIGNED)
+
+    def test_stale_instance_loses_compare_and_set(self):
+        first = Verification.objects.get(pk=self.verification.pk)
+        second = Verification.objects.get(pk=self.verification.pk)
+
+        first.transition(Verification.Status.VERIFIED, report="First")
+        with self.assertRaises(TransitionConflict):
+            second.transition(Verification.Status.REJECTED, report="Second")
+
+        self.verification.refresh_from_db()
+        self.assertEqual(self.verification.status, Verification.Status.VERIFIED)
+        self.assertEqual(self.verification.report, "First")
+
+    def test_transition_updates_loaded_apartment(self):
+        verification = Verification.objects.select_related("apartment").get(pk=self.verification.pk)
+        verification.submit_report("Fine", status=Verification.Status.VERIFIED)
+        self.assertEqual(verification.status, Verification.Status.VERIFIED)
+        self.assertEqual(verification.apartment.verification_status, VerificationStatus.VERIFIED)
+        self.assertFalse(verification.apartment.has_changed("verification_status"))
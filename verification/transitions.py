@@ -0,0 +1,97 @@
+"""
+Set-based verification status transitions.
+
+``apply`` moves a verification with one conditional
+``UPDATE ... WHERE id = <id> AND status IN (<expected>)`` (an optimistic
+compare-and-set), so two requests racing on the same task cannot both win
+and an invalid or stale move writes nothing. The apartment's
+verification_status is brought in line by a second UPDATE in the same
+transaction. Nothing is read before writing.
+
+Both writes bypass ``save()``, so the landlord's APARTMENT_VERIFIED
+notification, otherwise sent from the apartment's post_save, is published
+here.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Verification
+
+
+class TransitionConflict(ValueError):
+    """The verification was no longer in the expected status; nothing was written."""
+
+
+def apartment_status(status):
+    from properties.models import VerificationStatus
+
+    if status == Verification.Status.VERIFIED:
+        return VerificationStatus.VERIFIED
+    if status == Verification.Status.REJECTED:
+        return VerificationStatus.REJECTED
+    return VerificationStatus.PENDING
+
+
+def sources(new_status):
+    """Statuses a verification may move to ``new_status`` from."""
+    return [status for status, targets in Verification.TRANSITIONS.items() if new_status in targets]
+
+
+def sync_apartment(status, now=None, **lookup):
+    """
+    Set the verification_status of the apartment matching ``lookup`` to
+    follow a verification now in ``status``. Returns True if it changed.
+    """
+    from properties.models import Apartment
+
+    target = apartment_status(status)
+    changed = bool(
+        Apartment.objects.filter(**lookup)
+        .exclude(verification_status=target)
+        .update(verification_status=target, updated_at=now or timezone.now())
+    )
+    if changed and status == Verification.Status.VERIFIED:
+        _notify_verified(lookup)
+    return changed
+
+
+def apply(verification_id, new_status, expected=None, agent_id=None, apartment_id=None, now=None, **fields):
+    """
+    Move verification ``verification_id`` to ``new_status`` if it is in one
+    of ``expected`` (default: every status allowed to move there) and, when
+    ``agent_id`` is given, assigned to that agent. ``fields`` are written in
+    the same UPDATE. Returns False, having written nothing, if no row matched.
+    """
+    expected = sources(new_status) if expected is None else expected
+    if not expected:
+        raise ValueError(f"No status can move to {new_status}")
+    now = now or timezone.now()
+
+    rows = Verification.objects.filter(pk=verification_id, status__in=expected)
+    if agent_id is not None:
+        rows = rows.filter(assigned_agent_id=agent_id)
+
+    with transaction.atomic():
+        if not rows.update(status=new_status, updated_at=now, **fields):
+            return False
+        if apartment_id is not None:
+            sync_apartment(new_status, now, pk=apartment_id)
+        else:
+            sync_apartment(new_status, now, verifications__id=verification_id)
+    return True
+
+
+def _notify_verified(lookup):
+    from notifications.outbox import publish_many
+    from properties.models import Apartment
+
+    apartment = Apartment.objects.filter(**lookup).values("id", "name", "landlord_id").first()
+    if apartment:
+        publish_many(
+            "APARTMENT_VERIFIED",
+            "Apartment Verified",
+            f"Your apartment '{apartment['name']}' has been verified and is pending final approval.",
+            [apartment["landlord_id"]],
+            related_object_type="Apartment",
+            related_object_id=apartment["id"],
+        )
@@ -1,3 +1,5 @@
+import uuid
+
 from django.core.exceptions import PermissionDenied
 from django.http import Http404
 from django.db import transaction
@@ -5,20 +7,35 @@ from django.utils import timezone
 
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
-from .models import Verification, VerificationImage
-from .serializers import VerificationSerializer, SubmitReportSerializer
+from users.pagination import KeysetPagination
+from users.principal import get_principal
+
+from .dispatch import AGENT_OPEN_STATUSES, assign_pending, create_missing
+from .evidence import discard, schedule, stage_uploads
+from .models import Verification
+from .transitions import apply
+from .serializers import (
+    VerificationSerializer, SubmitReportSerializer, VerificationQueueSerializer, DispatchSerializer
+)
 from .permissions import IsAdminOrAssignedAgent
 
 
+class QueuePagination(KeysetPagination):
+    # Oldest first, matching the (assigned_agent, status, created_at) index.
+    ordering = "created_at"
+
+
 class VerificationViewSet(viewsets.ModelViewSet):
     serializer_class = VerificationSerializer
     permission_classes = [IsAdminOrAssignedAgent]
 
-    def _is_admin(self, user):
-        return user.is_staff or getattr(user, "role", "") == "ADMIN"
+    def _is_admin(self):
+        principal = get_principal(self.request)
+        return principal.is_admin or principal.is_staff
 
     def get_queryset(self):
         qs = (
@@ -27,82 +44,156 @@ class VerificationViewSet(viewsets.ModelViewSet):
             .prefetch_related("images")
         )
 
-        user = self.request.user
-        if user.is_staff or getattr(user, "role", "") == "ADMIN":
+        if self._is_admin():
             return qs
 
-        return qs.filter(assigned_agent=user)
-
-    def _is_admin(self, user):
-        return user.is_staff or getattr(user, "role", "") == "ADMIN"
+        principal = get_principal(self.request)
+        if not principal.is_authenticated:
+            return qs.none()
+        return qs.filter(assigned_agent_id=principal.user_id)
 
     # CREATE (admins only)
     def perform_create(self, serializer):
-        if not self._is_admin(self.request.user):
+        if not self._is_admin():
             raise PermissionDenied("Only admins can create verification tasks.")
         serializer.save()
 
     # UPDATE (admins only)
     def perform_update(self, serializer):
-        if not self._is_admin(self.request.user):
+        if not self._is_admin():
             raise PermissionDenied("Only admins can modify verification records.")
-        serializer.save()
+        try:
+            serializer.save()
+        except ValueError as e:
+            raise ValidationError({"status": str(e)})
 
-    # SUBMIT REPORT (agent only)
+    # AGENT QUEUE
     @action(
-        detail=True,
-        methods=["post"],
-        url_path="submit-report",
+        detail=False,
+        methods=["get"],
+        url_path="queue",
         permission_classes=[IsAuthenticated],
+        pagination_class=QueuePagination,
     )
-    def submit_report(self, request, pk=None):
-        try:
-            verification = (
-                Verification.objects
-                .select_related("apartment", "assigned_agent")
-                .get(pk=pk)
+    def queue(self, request):
+        agent_id = get_principal(request).user_id
+        if self._is_admin() and request.query_params.get("agent"):
+            try:
+                agent_id = uuid.UUID(request.query_params["agent"])
+            except ValueError:
+                return Response({"detail": "Invalid agent"}, status=status.HTTP_400_BAD_REQUEST)
+
+        statuses = request.query_params.get("status")
+        statuses = statuses.split(",") if statuses else list(AGENT_OPEN_STATUSES)
+        if not set(statuses) <= set(Verification.Status.values):
+            return Response({"detail": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
+
+        qs = (
+            Verification.objects
+            .filter(assigned_agent_id=agent_id, status__in=statuses)
+            .select_related("apartment")
+            .only(
+                "id", "apartment_id", "assigned_agent_id", "status", "created_at",
+                "apartment__name", "apartment__address", "apartment__latitude", "apartment__longitude",
             )
-        except Verification.DoesNotExist:
-            raise Http404
+        )
+        page = self.paginate_queryset(qs)
+        return self.get_paginated_response(VerificationQueueSerializer(page, many=True).data)
 
-        if verification.assigned_agent != request.user:
+    # DISPATCH (admins only)
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="dispatch",
+        permission_classes=[IsAuthenticated],
+    )
+    def dispatch_pending(self, request):
+        if not self._is_admin():
+            raise PermissionDenied("Only admins can dispatch verification tasks.")
+        serializer = DispatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        created = create_missing()
+        assignments = assign_pending(serializer.validated_data.get("limit"))
+        return Response({
+            "created": created,
+            "assigned": sum(len(task_ids) for task_ids in assignments.values()),
+            "agents": {str(agent_id): len(task_ids) for agent_id, task_ids in assignments.items()},
+        })
+
+    def _report_rejected(self, principal, pk):
+        """Explain why a report matched no row; nothing was written."""
+        current = Verification.objects.filter(pk=pk).values_list("assigned_agent_id", "status").first()
+        if current is None:
+            raise Http404
+        agent_id, current_status = current
+        if not principal.is_user(agent_id):
             return Response(
                 {"detail": "You are not assigned to this task."},
                 status=status.HTTP_403_FORBIDDEN,
             )
-
         # Prevent re-submission
-        if verification.status == Verification.Status.VERIFIED:
+        if current_status in (Verification.Status.VERIFIED, Verification.Status.REJECTED):
             return Response(
                 {"detail": "Report already submitted."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
+        return Response(
+            {"detail": f"Only in-progress tasks accept reports; this one is {current_status}."},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+    # SUBMIT REPORT (agent only)
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="submit-report",
+        permission_classes=[IsAuthenticated],
+    )
+    def submit_report(self, request, pk=None):
+        if not str(pk).isdigit():
+            raise Http404
 
         serializer = SubmitReportSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
-
-        with transaction.atomic():
-            verification.report = data["report"]
-            verification.status = data["status"]
-            verification.verification_date = timezone.now()
-            verification.save()
-
-            apartment = verification.apartment
-            apartment.verification_status = data["status"]
-            apartment.save(update_fields=["verification_status"])
-
-            VerificationImage.objects.bulk_create(
-                [
-                    VerificationImage(
-                        verification=verification,
-                        image=image,
-                    )
-                    for image in data.get("images", [])
-                ]
-            )
+        principal = get_principal(request)
+
+        # With photos attached, check cheaply before anything is written to
+        # storage, so a caller who can't submit this report can't make us
+        # stage their uploads. ``apply`` below still decides atomically.
+        images = data.get("images", [])
+        if images and not Verification.objects.filter(
+            pk=pk, assigned_agent_id=principal.user_id, status=Verification.Status.IN_PROGRESS
+        ).exists():
+            return self._report_rejected(principal, pk)
+
+        # Photos are streamed to storage before the transaction so no lock is
+        # held during uploads; processing and linking happen after commit.
+        staged = stage_uploads(pk, images)
+
+        # One conditional UPDATE on the task and one on the apartment; a task
+        # that is missing, someone else's or not in progress matches no row.
+        try:
+            with transaction.atomic():
+                submitted = apply(
+                    pk,
+                    data["status"],
+                    agent_id=principal.user_id,
+                    report=data["report"],
+                    verification_date=timezone.now(),
+                )
+                if submitted:
+                    schedule(int(pk), staged)
+        except Exception:
+            discard(staged)
+            raise
+
+        if not submitted:
+            discard(staged)
+            return self._report_rejected(principal, pk)
 
         return Response(
-            {"detail": "Verification report submitted successfully."},
+            {"detail": "Verification report submitted successfully.", "images_processing": len(staged)},
             status=status.HTTP_200_OK,
         )
\ No newline at end of file
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.4 on 2026-10-19 15:46
+
+import wallet.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0010_statementexport'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='statementexport',
+            name='file',
+            field=models.FileField(blank=True, null=True, storage=wallet.models.statement_storage, upload_to='statements/%Y/%m/'),
+        ),
+    ]
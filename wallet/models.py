@@ -1,7 +1,10 @@
 import uuid
 from django.db import models
 from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.module_loading import import_string
 from bookings.models import Booking  # Import Booking model
+from tyrent_backend.tracking import FieldTracker
 
 User = settings.AUTH_USER_MODEL
 
@@ -42,7 +45,9 @@ class Wallet(models.Model):
         self.save()
 
 
-class WalletTransaction(models.Model):
+class WalletTransaction(FieldTracker, models.Model):
+    tracked_fields = ("status",)
+
     TRANSACTION_TYPES = [
         ("DEPOSIT", "Deposit"),
         ("WITHDRAWAL", "Withdrawal"),
@@ -79,6 +84,9 @@ class WalletTransaction(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["wallet", "created_at"]),
+        ]
 
 class PendingPayment(models.Model):
     STATUS_CHOICES = [
@@ -136,4 +144,43 @@ class Subscription(models.Model):
         from django.utils import timezone
         return self.status == "ACTIVE" and (
             self.expires_at is None or self.expires_at > timezone.now()
-        )
\ No newline at end of file
+        )
+
+def statement_storage():
+    """Storage for statement files: STATEMENT_EXPORT_STORAGE, or the default one."""
+    if settings.STATEMENT_EXPORT_STORAGE:
+        return import_string(settings.STATEMENT_EXPORT_STORAGE)()
+    return default_storage
+
+
+class StatementExport(models.Model):
+    """A wallet statement generated in the background for large date ranges."""
+    FORMAT_CHOICES = [
+        ("csv", "CSV"),
+        ("jsonl", "JSON Lines"),
+    ]
+
+    STATUS_CHOICES = [
+        ("PENDING", "Pending"),
+        ("COMPLETED", "Completed"),
+        ("FAILED", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name="statement_exports")
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name="statement_exports")
+    file_format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default="csv")
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    file = models.FileField(upload_to="statements/%Y/%m/", storage=statement_storage, null=True, blank=True)
+    row_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"Statement {self.id} ({self.file_format}, {self.status})"
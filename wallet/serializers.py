@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Wallet, WalletTransaction
+from .models import Wallet, WalletTransaction, StatementExport
 
 
 class PaymentRequestSerializer(serializers.Serializer):
@@ -20,3 +20,22 @@ class WalletSerializer(serializers.ModelSerializer):
     class Meta:
         model = Wallet
         fields = "__all__"
+
+
+class StatementExportSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = StatementExport
+        fields = [
+            "id", "file_format", "start_date", "end_date", "status",
+            "row_count", "download_url", "error", "created_at", "completed_at",
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        if obj.status != "COMPLETED" or not obj.file:
+            return None
+        request = self.context.get("request")
+        url = obj.file.url
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,137 @@
+"""
+Settling captured booking payments.
+
+A booking payment is captured by the provider before we know whether the
+unit can still be booked, so by the time the callback (or a status poll)
+lands the money is already ours. Settling it therefore always ends with the
+payer holding value:
+
+- the payer already has an UNPAID booking request for the unit: that
+  request is marked paid;
+- the unit is free, or held only by other tenants' UNPAID booking requests:
+  those requests are cancelled (the paying tenant wins; the cancellation
+  signals notify the requesters) and a paid booking is created, as before;
+- the unit went to a paid or pending-payment booking, or the landlord blocked
+  it on the calendar, while the payer was on the STK prompt: the amount is
+  credited to the payer's wallet as a REFUND transaction and the payer is
+  notified.
+
+The PendingPayment row is locked first, so a webhook and a status poll for
+the same payment settle it once: whichever comes second finds it gone.
+"""
+import logging
+from functools import partial
+
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger("payments")
+
+BOOKED = "Booking Created"
+CREDITED = "Credited"
+SETTLED = "Duplicate"
+
+
+def settle_booking_payment(checkout_id, receipt=None, reserve_unit=False):
+    """
+    Apply the captured payment ``checkout_id``. Returns ``(outcome, booking)``
+    where outcome is ``BOOKED``, ``CREDITED`` (booking is None) or ``SETTLED``
+    (already applied by another callback; booking is None).
+    """
+    from bookings.models import Booking
+    from bookings.reservations import UnitUnavailable, insert, lock_unit, unpaid_request
+
+    from .models import PendingPayment
+
+    with transaction.atomic():
+        pending = (
+            PendingPayment.objects.select_for_update()
+            .select_related("user")
+            .filter(checkout_request_id=checkout_id)
+            .first()
+        )
+        if pending is None:
+            return SETTLED, None
+
+        today = timezone.now().date()
+        try:
+            with transaction.atomic():
+                unit = lock_unit(pending.unit_id, today, payer_id=pending.user_id)
+                booking = unpaid_request(unit.pk, pending.user_id).first()
+                if booking is not None:
+                    booking.payment_status = "COMPLETED"
+                    booking.booking_amount = pending.amount
+                    booking.save(update_fields=["payment_status", "booking_amount", "updated_at"])
+                else:
+                    booking = insert(unit.pk, partial(
+                        Booking.objects.create,
+                        unit=unit,
+                        tenant=pending.user,
+                        landlord=unit.apartment.landlord,
+                        booking_status="PENDING",
+                        payment_status="COMPLETED",
+                        booking_amount=pending.amount,
+                        move_in_date=today,
+                    ))
+                if reserve_unit:
+                    unit.status = "RESERVED"
+                    unit.save(update_fields=["status", "last_status_updated"])
+                    unit.apartment.recalc_unit_counts()
+        except UnitUnavailable:
+            _credit(pending, checkout_id, receipt)
+            pending.delete()
+            logger.warning(f"Unit {pending.unit_id} is no longer available; payment {checkout_id} credited to wallet")
+            return CREDITED, None
+
+        _record(pending, checkout_id, receipt, "DEPOSIT", booking=booking)
+        pending.delete()
+        return BOOKED, booking
+
+
+def _wallet(user):
+    from .models import Wallet
+
+    wallet, _ = Wallet.objects.get_or_create(user=user, defaults={"wallet_type": "PLATFORM"})
+    return wallet
+
+
+def _record(pending, checkout_id, receipt, transaction_type, booking=None, description=""):
+    from .models import WalletTransaction
+
+    return WalletTransaction.objects.create(
+        wallet=_wallet(pending.user),
+        transaction_type=transaction_type,
+        amount=pending.amount,
+        status="COMPLETED",
+        checkout_request_id=checkout_id,
+        phone_number=pending.phone_number,
+        mpesa_receipt_number=receipt,
+        booking=booking,
+        description=description,
+    )
+
+
+def _credit(pending, checkout_id, receipt):
+    from notifications.models import NotificationType
+    from notifications.outbox import publish
+    from .models import Wallet
+
+    txn = _record(
+        pending,
+        checkout_id,
+        receipt,
+        "REFUND",
+        description=f"Unit {pending.unit_id} was no longer available; booking payment credited",
+    )
+    Wallet.objects.select_for_update().get(pk=txn.wallet_id).deposit(pending.amount)
+    publish(
+        recipient=pending.user,
+        notification_type=NotificationType.BOOKING_PAYMENT,
+        title="Unit No Longer Available",
+        message=(
+            f"The unit you paid for was booked before your payment completed. "
+            f"KES {pending.amount} has been credited to your wallet."
+        ),
+        related_object_type="WalletTransaction",
+        related_object_id=txn.id,
+    )
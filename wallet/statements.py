@@ -0,0 +1,94 @@
+"""
+Wallet statement rendering.
+
+Rows are read with a server-side cursor (``iterator(chunk_size=...)``) and
+rendered one line at a time, so memory use does not depend on how much
+history a wallet has.
+"""
+import csv
+import json
+from datetime import datetime, time
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import WalletTransaction
+
+STATEMENT_FIELDS = [
+    "id",
+    "created_at",
+    "transaction_type",
+    "status",
+    "amount",
+    "reference_id",
+    "booking_id",
+    "checkout_request_id",
+    "mpesa_receipt_number",
+    "phone_number",
+    "description",
+]
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+class Echo:
+    """File-like object that hands back what is written instead of buffering it."""
+
+    def write(self, value):
+        return value
+
+
+def _day_bounds(start_date, end_date):
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(start_date, time.min), tz) if start_date else None
+    end = timezone.make_aware(datetime.combine(end_date, time.max), tz) if end_date else None
+    return start, end
+
+
+def statement_queryset(wallet, start_date=None, end_date=None):
+    """Transactions for ``wallet`` in [start_date, end_date], oldest first."""
+    qs = WalletTransaction.objects.filter(wallet=wallet)
+    start, end = _day_bounds(start_date, end_date)
+    if start:
+        qs = qs.filter(created_at__gte=start)
+    if end:
+        qs = qs.filter(created_at__lte=end)
+    return qs.order_by("created_at", "id").values_list(*STATEMENT_FIELDS)
+
+
+def _iter_rows(queryset):
+    chunk_size = getattr(settings, "STATEMENT_EXPORT_CHUNK_SIZE", 2000)
+    return queryset.iterator(chunk_size=chunk_size)
+
+
+def _serialize(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (int, float, str)):
+        return value
+    return str(value)
+
+
+def iter_csv(queryset):
+    writer = csv.writer(Echo())
+    yield writer.writerow(STATEMENT_FIELDS)
+    for row in _iter_rows(queryset):
+        yield writer.writerow(["" if v is None else _serialize(v) for v in row])
+
+
+def iter_jsonl(queryset):
+    for row in _iter_rows(queryset):
+        record = {field: _serialize(value) for field, value in zip(STATEMENT_FIELDS, row)}
+        yield json.dumps(record) + "\n"
+
+
+def render_statement(queryset, file_format):
+    """Return an iterator of text chunks for the requested format."""
+    if file_format == "jsonl":
+        return iter_jsonl(queryset)
+    return iter_csv(queryset)
@@ -10,8 +10,8 @@ logger = logging.getLogger("payments")
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=5)
 def process_paystack_callback(self, reference):
     """Process Paystack payment callback."""
-    from .models import PendingPayment, Wallet, WalletTransaction
-    from bookings.models import Booking
+    from .models import PendingPayment, WalletTransaction
+    from .settlement import settle_booking_payment
 
     logger.info(f"Processing Paystack callback for reference: {reference}")
 
@@ -34,43 +34,13 @@ def process_paystack_callback(self, reference):
 
         pending = PendingPayment.objects.filter(checkout_request_id=reference).first()
         if pending:
-            with transaction.atomic():
-                existing = Booking.objects.filter(
-                    unit=pending.unit,
-                    payment_status="COMPLETED",
-                ).first()
-                if existing:
-                    pending.delete()
-                    return "Duplicate"
-
-                booking = Booking.objects.create(
-                    tenant=pending.user,
-                    landlord=pending.unit.apartment.landlord,
-                    unit=pending.unit,
-                    booking_status="PENDING",
-                    payment_status="COMPLETED",
-                    booking_amount=pending.amount,
-                    move_in_date=timezone.now().date(),
-                )
-                wallet, _ = Wallet.objects.get_or_create(
-                    user=pending.user,
-                    defaults={"wallet_type": "PLATFORM"}
-                )
-                WalletTransaction.objects.create(
-                    wallet=wallet,
-                    transaction_type="DEPOSIT",
-                    amount=pending.amount,
-                    status="COMPLETED",
-                    checkout_request_id=reference,
-                    phone_number=pending.phone_number,
-                    booking=booking,
-                )
-                pending.delete()
-
-            logger.info(f"Booking {booking.id} created after Paystack payment {reference}")
-            return "Booking Created"
+            outcome, booking = settle_booking_payment(reference)
+            if booking:
+                logger.info(f"Booking {booking.id} created after Paystack payment {reference}")
+            return outcome
 
-        txn = WalletTransaction.objects.filter(checkout_request_id=reference).first()
+        # PENDING only: a repeated callback must not deposit a settled payment twice.
+        txn = WalletTransaction.objects.select_related("wallet").filter(checkout_request_id=reference, status="PENDING").first()
         if txn:
             with transaction.atomic():
                 txn.status = "COMPLETED"
@@ -92,7 +62,7 @@ def process_paystack_callback(self, reference):
                 logger.info(f"Subscription activated for {reference}")
             return "Processed"
 
-        logger.warning(f"No record found for reference: {reference}")
+        logger.warning(f"No pending record for reference: {reference}")
         return "Ignored"
 
     except Exception as e:
@@ -102,8 +72,8 @@ def process_paystack_callback(self, reference):
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=5)
 def process_mpesa_callback(self, stk_data):
-    from .models import PendingPayment, Wallet, WalletTransaction
-    from bookings.models import Booking
+    from .models import PendingPayment, WalletTransaction
+    from .settlement import settle_booking_payment
 
     logger.info("Processing MPESA Callback")
 
@@ -121,44 +91,13 @@ def process_mpesa_callback(self, stk_data):
             pending.delete()
             return "Failed"
 
-        with transaction.atomic():
-            existing = Booking.objects.filter(
-                unit=pending.unit,
-                payment_status="COMPLETED",
-            ).first()
-            if existing:
-                pending.delete()
-                return "Duplicate"
-
-            booking = Booking.objects.create(
-                tenant=pending.user,
-                landlord=pending.unit.apartment.landlord,
-                unit=pending.unit,
-                booking_status="PENDING",
-                payment_status="COMPLETED",
-                booking_amount=pending.amount,
-                move_in_date=timezone.now().date(),
-            )
-            wallet, _ = Wallet.objects.get_or_create(
-                user=pending.user,
-                defaults={"wallet_type": "PLATFORM"}
-            )
-            WalletTransaction.objects.create(
-                wallet=wallet,
-                transaction_type="DEPOSIT",
-                amount=pending.amount,
-                status="COMPLETED",
-                checkout_request_id=checkout_id,
-                phone_number=pending.phone_number,
-                mpesa_receipt_number=receipt,
-                booking=booking,
-            )
-            pending.delete()
-
-        logger.info(f"Booking {booking.id} created after M-Pesa payment {checkout_id}")
-        return "Booking Created"
+        outcome, booking = settle_booking_payment(checkout_id, receipt=receipt)
+        if booking:
+            logger.info(f"Booking {booking.id} created after M-Pesa payment {checkout_id}")
+        return outcome
 
-    txn = WalletTransaction.objects.filter(checkout_request_id=checkout_id).first()
+    # PENDING only: a repeated callback must not deposit a settled payment twice.
+    txn = WalletTransaction.objects.select_related("wallet").filter(checkout_request_id=checkout_id, status="PENDING").first()
     if txn:
         with transaction.atomic():
             if result_code == 0:
@@ -194,14 +133,14 @@ def process_mpesa_callback(self, stk_data):
 
         return "Processed"
 
-    logger.warning(f"No record found for checkout_id: {checkout_id}")
+    logger.warning(f"No pending record for checkout_id: {checkout_id}")
     return "Ignored"
 
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_backoff=5)
 def process_intasend_webhook(self, data):
-    from .models import PendingPayment, Wallet, WalletTransaction
-    from bookings.models import Booking
+    from .models import PendingPayment, WalletTransaction
+    from .settlement import settle_booking_payment
 
     logger.info(f"Processing IntaSend webhook: {data}")
 
@@ -231,51 +170,14 @@ def process_intasend_webhook(self, data):
             pending.delete()
             return "Failed"
 
-        with transaction.atomic():
-            existing = Booking.objects.filter(
-                unit=pending.unit,
-                payment_status="COMPLETED",
-            ).first()
-            if existing:
-                pending.delete()
-                return "Duplicate"
-
-            booking = Booking.objects.create(
-                tenant=pending.user,
-                landlord=pending.unit.apartment.landlord,
-                unit=pending.unit,
-                booking_status="PENDING",
-                payment_status="COMPLETED",
-                booking_amount=pending.amount,
-                move_in_date=timezone.now().date(),
-            )
-
-            # Mark unit as RESERVED immediately after payment
-            pending.unit.status = "RESERVED"
-            pending.unit.save(update_fields=["status", "last_status_updated"])
-            pending.unit.apartment.recalc_unit_counts()
-
-            wallet, _ = Wallet.objects.get_or_create(
-                user=pending.user,
-                defaults={"wallet_type": "PLATFORM"}
-            )
-            WalletTransaction.objects.create(
-                wallet=wallet,
-                transaction_type="DEPOSIT",
-                amount=pending.amount,
-                status="COMPLETED",
-                checkout_request_id=invoice_id,
-                phone_number=pending.phone_number,
-                mpesa_receipt_number=mpesa_ref,
-                booking=booking,
-            )
-            pending.delete()
-
-        logger.info(f"Booking {booking.id} created: {invoice_id}")
-        return "Booking Created"
+        outcome, booking = settle_booking_payment(invoice_id, receipt=mpesa_ref, reserve_unit=True)
+        if booking:
+            logger.info(f"Booking {booking.id} created: {invoice_id}")
+        return outcome
 
     # --- Subscription payment ---
-    txn = WalletTransaction.objects.filter(checkout_request_id=invoice_id).first()
+    # PENDING only: a repeated callback must not deposit a settled payment twice.
+    txn = WalletTransaction.objects.select_related("wallet").filter(checkout_request_id=invoice_id, status="PENDING").first()
     if txn:
         with transaction.atomic():
             if is_success:
@@ -312,7 +214,7 @@ def process_intasend_webhook(self, data):
 
         return "Processed"
 
-    logger.warning(f"No record found for invoice_id: {invoice_id}")
+    logger.warning(f"No pending record for invoice_id: {invoice_id}")
     return "Ignored"
 
 
@@ -350,4 +252,42 @@ def expire_stale_pending_transactions():
     ).update(status="FAILED")
 
     logger.info(f"Expired {count} stale pending transactions")
-    return f"Expired {count}"
\ No newline at end of file
+    return f"Expired {count}"
+
+@shared_task(name="wallet.tasks.generate_statement_export")
+def generate_statement_export(export_id):
+    """Render a statement to storage for ranges too large to stream inline."""
+    import tempfile
+    from django.core.files import File
+    from .models import StatementExport
+    from .statements import statement_queryset, render_statement
+
+    export = StatementExport.objects.select_related("wallet").filter(id=export_id).first()
+    if not export or export.status != "PENDING":
+        return "Ignored"
+
+    qs = statement_queryset(export.wallet, export.start_date, export.end_date)
+    rows = 0
+    try:
+        with tempfile.TemporaryFile(mode="w+b") as tmp:
+            for chunk in render_statement(qs, export.file_format):
+                tmp.write(chunk.encode("utf-8"))
+                rows += 1
+            tmp.seek(0)
+            if export.file_format == "csv":
+                rows -= 1  # header line
+            export.file.save(f"statement-{export.id}.{export.file_format}", File(tmp), save=False)
+
+        export.status = "COMPLETED"
+        export.row_count = rows
+        export.completed_at = timezone.now()
+        export.save(update_fields=["file", "status", "row_count", "completed_at"])
+    except Exception as e:
+        logger.error(f"Statement export {export_id} failed: {e}", exc_info=True)
+        export.status = "FAILED"
+        export.error = str(e)
+        export.save(update_fields=["status", "error"])
+        return "Failed"
+
+    logger.info(f"Statement export {export_id} completed with {rows} rows")
+    return "Completed"
@@ -1,9 +1,12 @@
+import json
 from datetime import date, timedelta
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from rest_framework.test import APIClient
 from bookings.models import Booking
+from notifications.models import Notification, NotificationType
 from properties.models import Apartment, Unit
-from .models import Wallet, WalletTransaction
+from .models import PendingPayment, Wallet, WalletTransaction, StatementExport
 from .tasks import process_mpesa_callback
 
 User = get_user_model()
@@ -74,3 +77,169 @@ class MpesaCallbackBookingSyncTests(TestCase):
         self.assertEqual(txn.status, "FAILED")
         self.assertEqual(self.booking.payment_status, "FAILED")
         self.assertEqual(self.booking.booking_status, "CANCELLED")
+
+    def _pending_for_other_tenant(self, checkout_id):
+        other = User.objects.create_user(
+            email="wallet-other@test.com",
+            password="password",
+            username="wallet_other",
+            role=User.ROLE_TENANT,
+        )
+        PendingPayment.objects.create(
+            user=other,
+            unit=self.booking.unit,
+            phone_number="254700000000",
+            amount=1500,
+            checkout_request_id=checkout_id,
+        )
+        return other
+
+    def test_payment_for_booked_unit_is_credited_to_wallet(self):
+        Booking.objects.filter(pk=self.booking.pk).update(payment_status="PENDING")
+        other = self._pending_for_other_tenant("checkout-taken")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = process_mpesa_callback({"CheckoutRequestID": "checkout-taken", "ResultCode": 0})
+
+        self.assertEqual(result, "Credited")
+        self.assertEqual(Booking.objects.filter(unit=self.booking.unit).count(), 1)
+        self.assertFalse(PendingPayment.objects.filter(checkout_request_id="checkout-taken").exists())
+        refund = WalletTransaction.objects.get(checkout_request_id="checkout-taken")
+        self.assertEqual((refund.transaction_type, refund.status), ("REFUND", "COMPLETED"))
+        self.assertEqual(Wallet.objects.get(user=other).balance, 1500)
+        self.assertTrue(Notification.objects.filter(recipient=other, type=NotificationType.BOOKING_PAYMENT).exists())
+
+        # A repeated callback for the same payment is not credited twice.
+        self.assertEqual(process_mpesa_callback({"CheckoutRequestID": "checkout-taken", "ResultCode": 0}), "Ignored")
+        self.assertEqual(Wallet.objects.get(user=other).balance, 1500)
+
+    def test_payment_supersedes_unpaid_booking_request(self):
+        other = self._pending_for_other_tenant("checkout-unpaid")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = process_mpesa_callback({"CheckoutRequestID": "checkout-unpaid", "ResultCode": 0})
+
+        self.assertEqual(result, "Booking Created")
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.booking_status, "CANCELLED")
+        paid = Booking.objects.get(unit=self.booking.unit, tenant=other)
+        self.assertEqual(paid.payment_status, "COMPLETED")
+        self.assertTrue(Notification.objects.filter(recipient=self.tenant, type=NotificationType.BOOKING_CANCELLED).exists())
+
+    def test_payment_marks_payers_own_request_paid(self):
+        PendingPayment.objects.create(
+            user=self.tenant,
+            unit=self.booking.unit,
+            phone_number="254700000000",
+            amount=1500,
+            checkout_request_id="checkout-own",
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = process_mpesa_callback({"CheckoutRequestID": "checkout-own", "ResultCode": 0})
+
+        self.assertEqual(result, "Booking Created")
+        self.assertEqual(Booking.objects.filter(unit=self.booking.unit).count(), 1)
+        self.booking.refresh_from_db()
+        self.assertEqual((self.booking.booking_status, self.booking.payment_status), ("PENDING", "COMPLETED"))
+        self.assertFalse(Notification.objects.filter(recipient=self.tenant, type=NotificationType.BOOKING_CANCELLED).exists())
+
+    def test_payment_can_be_initiated_on_unit_with_unpaid_request(self):
+        from unittest import mock
+        from properties.availability import block
+
+        other = User.objects.create_user(
+            email="wallet-payer@test.com", password="password", username="wallet_payer", role=User.ROLE_TENANT,
+        )
+        client = APIClient()
+        client.force_authenticate(other)
+        payload = {"phone": "254700000000", "unit_id": self.booking.unit_id}
+        with mock.patch("wallet.views.stk_push", return_value={"invoice": {"invoice_id": "inv-unpaid"}}):
+            response = client.post("/api/wallet/pay/", payload, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(PendingPayment.objects.filter(user=other, checkout_request_id="inv-unpaid").exists())
+
+        PendingPayment.objects.all().delete()
+        self.booking.delete()
+        today = date.today()
+        block(self.booking.unit_id, today, today + timedelta(days=3))
+        with mock.patch("wallet.views.stk_push") as stk_push:
+            response = client.post("/api/wallet/pay/", payload, format="json")
+        self.assertEqual(response.status_code, 409)
+        stk_push.assert_not_called()
+
+
+class WalletStatementExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.landlord = User.objects.create_user(
+            email="statement-landlord@test.com",
+            password="password",
+            username="statement_landlord",
+            role=User.ROLE_LANDLORD,
+        )
+        self.wallet = Wallet.objects.create(user=self.landlord, wallet_type="LANDLORD")
+        for amount in (100, 250, 75):
+            WalletTransaction.objects.create(
+                wallet=self.wallet,
+                transaction_type="DEPOSIT",
+                amount=amount,
+                status="COMPLETED",
+            )
+        self.client.force_authenticate(self.landlord)
+
+    def _body(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def _range(self):
+        today = date.today()
+        return {"start": str(today - timedelta(days=1)), "end": str(today + timedelta(days=1))}
+
+    def test_csv_export_streams_all_rows(self):
+        response = self.client.get("/api/wallet/statements/export/", {"file_format": "csv", **self._range()})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = self._body(response).strip().splitlines()
+        self.assertEqual(lines[0].split(",")[0], "id")
+        self.assertEqual(len(lines), 4)
+
+    def test_jsonl_export_is_one_object_per_line(self):
+        response = self.client.get("/api/wallet/statements/export/", {"file_format": "jsonl", **self._range()})
+        self.assertEqual(response.status_code, 200)
+        records = [json.loads(line) for line in self._body(response).strip().splitlines()]
+        self.assertEqual([r["amount"] for r in records], ["100.00", "250.00", "75.00"])
+
+    def test_date_range_filters_rows(self):
+        tomorrow = date.today() + timedelta(days=1)
+        response = self.client.get(
+            "/api/wallet/statements/export/",
+            {"file_format": "jsonl", "start": str(tomorrow), "end": str(tomorrow)},
+        )
+        self.assertEqual(self._body(response), "")
+
+    def test_invalid_format_rejected(self):
+        response = self.client.get("/api/wallet/statements/export/", {"file_format": "xml"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_async_export_writes_file_and_returns_link(self):
+        response = self.client.get(
+            "/api/wallet/statements/export/", {"file_format": "csv", "async": "true"}
+        )
+        self.assertEqual(response.status_code, 202)
+        export = StatementExport.objects.get(id=response.data["id"])
+        self.assertEqual(export.status, "COMPLETED")
+        self.assertEqual(export.row_count, 3)
+        self.assertIsNotNone(response.data["download_url"])
+
+        detail = self.client.get(f"/api/wallet/statements/exports/{export.id}/")
+        self.assertEqual(detail.status_code, 200)
+        self.assertEqual(detail.data["status"], "COMPLETED")
+        export.file.delete(save=False)
+
+    def test_full_history_export_runs_async(self):
+        response = self.client.get("/api/wallet/statements/export/", {"file_format": "csv"})
+        self.assertEqual(response.status_code, 202)
+        export = StatementExport.objects.get(id=response.data["id"])
+        self.assertEqual(export.row_count, 3)
+        export.file.delete(save=False)
@@ -4,6 +4,8 @@ from . import views
 urlpatterns = [
     path("", views.WalletDetailView.as_view(), name="wallet-detail"),
     path("transactions/", views.WalletTransactionListView.as_view(), name="wallet-transactions"),
+    path("statements/export/", views.WalletStatementExportView.as_view(), name="wallet-statement-export"),
+    path("statements/exports/<uuid:pk>/", views.StatementExportDetailView.as_view(), name="wallet-statement-export-detail"),
     path("deposit/", views.WalletDepositView.as_view(), name="wallet-deposit"),
     path("withdraw/", views.WalletWithdrawView.as_view(), name="wallet-withdraw"),
     path("pay/", views.InitiatePaymentView.as_view(), name="wallet-pay"),
@@ -4,10 +4,11 @@ import logging
 from decimal import Decimal
 
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.db import transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from datetime import timedelta
 
 from rest_framework import generics, status
@@ -16,10 +17,13 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from bookings.models import Booking
-from .models import Wallet, WalletTransaction, PendingPayment
-from .serializers import WalletSerializer, WalletTransactionSerializer
+from bookings.reservations import active_bookings
+from properties.availability import is_blocked
+from .models import Wallet, WalletTransaction, PendingPayment, StatementExport
+from .serializers import WalletSerializer, WalletTransactionSerializer, StatementExportSerializer
 from .intasend import stk_push, check_status
-from .tasks import process_intasend_webhook
+from .statements import CONTENT_TYPES, statement_queryset, render_statement
+from .tasks import process_intasend_webhook, generate_statement_export
 from .utils import is_duplicate
 
 logger = logging.getLogger(__name__)
@@ -58,6 +62,78 @@ class WalletTransactionListView(generics.ListAPIView):
         return WalletTransaction.objects.filter(wallet=wallet)
 
 
+class WalletStatementExportView(APIView):
+    """
+    Export wallet transactions as CSV or JSONL.
+
+    Query params: file_format (csv|jsonl), start, end (YYYY-MM-DD), async (true|false).
+    Small ranges are streamed directly; open-ended or long ranges, or async=true,
+    are rendered by a Celery task and return 202 with the export to poll.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        file_format = request.query_params.get("file_format", "csv").lower()
+        if file_format not in CONTENT_TYPES:
+            return Response(
+                {"error": "file_format must be 'csv' or 'jsonl'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        start_raw = request.query_params.get("start")
+        end_raw = request.query_params.get("end")
+        start_date = parse_date(start_raw) if start_raw else None
+        end_date = parse_date(end_raw) if end_raw else None
+        if (start_raw and not start_date) or (end_raw and not end_date):
+            return Response({"error": "Dates must be YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+        if start_date and end_date and start_date > end_date:
+            return Response({"error": "start must be before end"}, status=status.HTTP_400_BAD_REQUEST)
+
+        wallet = get_or_create_wallet(request.user)
+
+        if self._should_run_async(request, start_date, end_date):
+            export = StatementExport.objects.create(
+                wallet=wallet,
+                requested_by=request.user,
+                file_format=file_format,
+                start_date=start_date,
+                end_date=end_date,
+            )
+            generate_statement_export.delay(str(export.id))
+            export.refresh_from_db()
+            return Response(
+                StatementExportSerializer(export, context={"request": request}).data,
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        qs = statement_queryset(wallet, start_date, end_date)
+        response = StreamingHttpResponse(
+            render_statement(qs, file_format),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        filename = f"statement-{start_date or 'all'}-{end_date or timezone.now().date()}.{file_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    def _should_run_async(self, request, start_date, end_date):
+        if request.query_params.get("async", "").lower() == "true":
+            return True
+        max_days = getattr(settings, "STATEMENT_EXPORT_ASYNC_DAYS", 92)
+        if not start_date:
+            # No start date means the whole history, however long it is.
+            return True
+        end_date = end_date or timezone.now().date()
+        return (end_date - start_date).days > max_days
+
+
+class StatementExportDetailView(generics.RetrieveAPIView):
+    serializer_class = StatementExportSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return StatementExport.objects.filter(requested_by=self.request.user)
+
+
 class WalletDepositView(generics.CreateAPIView):
     serializer_class = WalletTransactionSerializer
     permission_classes = [IsAuthenticated]
@@ -147,16 +223,17 @@ class InitiatePaymentView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Check 2: active booking already exists
-        has_active = Booking.objects.filter(
-            unit=unit,
-            booking_status__in=["PENDING", "CONFIRMED", "PAID", "COMPLETED"],
-            payment_status__in=["PENDING", "COMPLETED"],
-        ).exists()
-        if has_active:
+        # Check 2: a paid or pending-payment booking, or a landlord block,
+        # already holds the unit. UNPAID booking requests (and the calendar
+        # rows they own) don't block a paying tenant: settling the payment
+        # supersedes them. Checked again under the unit lock when the
+        # payment lands; this one avoids charging for a unit that is
+        # already gone.
+        taken = active_bookings(unit.pk).exclude(payment_status="UNPAID")
+        if taken.exists() or is_blocked(unit.pk, timezone.now().date()):
             return Response(
                 {"error": "This unit is already booked."},
-                status=status.HTTP_400_BAD_REQUEST,
+                status=status.HTTP_409_CONFLICT,
             )
 
         # Check 3: another tenant already has a pending payment for this unit
@@ -243,56 +320,12 @@ class PaymentStatusView(APIView):
             state = invoice.get("state", "PENDING")
 
             if state == "COMPLETE":
-                from .models import PendingPayment, Wallet, WalletTransaction
-                from bookings.models import Booking
-
-                pending = PendingPayment.objects.filter(
-                    checkout_request_id=invoice_id
-                ).first()
-
-                if pending:
-                    existing = Booking.objects.filter(
-                        unit=pending.unit,
-                        payment_status="COMPLETED",
-                    ).first()
-
-                    if not existing:
-                        with transaction.atomic():
-                            mpesa_ref = invoice.get("mpesa_reference") or invoice.get("provider_ref", "")
-
-                            booking = Booking.objects.create(
-                                tenant=pending.user,
-                                landlord=pending.unit.apartment.landlord,
-                                unit=pending.unit,
-                                booking_status="PENDING",
-                                payment_status="COMPLETED",
-                                booking_amount=pending.amount,
-                                move_in_date=timezone.now().date(),
-                            )
-
-                            # Reserve the unit immediately
-                            pending.unit.status = "RESERVED"
-                            pending.unit.save(update_fields=["status", "last_status_updated"])
-                            pending.unit.apartment.recalc_unit_counts()
-
-                            wallet, _ = Wallet.objects.get_or_create(
-                                user=pending.user,
-                                defaults={"wallet_type": "PLATFORM"}
-                            )
-
-                            WalletTransaction.objects.create(
-                                wallet=wallet,
-                                transaction_type="DEPOSIT",
-                                amount=pending.amount,
-                                status="COMPLETED",
-                                checkout_request_id=invoice_id,
-                                phone_number=pending.phone_number,
-                                mpesa_receipt_number=mpesa_ref,
-                                booking=booking,
-                            )
-
-                            pending.delete()
-                            logger.info(f"Booking {booking.id} created and unit {pending.unit.id} reserved: {invoice_id}")
+                from .settlement import settle_booking_payment
+
+                mpesa_ref = invoice.get("mpesa_reference") or invoice.get("provider_ref", "")
+                _, booking = settle_booking_payment(invoice_id, receipt=mpesa_ref, reserve_unit=True)
+                if booking:
+                    logger.info(f"Booking {booking.id} created and unit {booking.unit_id} reserved: {invoice_id}")
 
             return Response({
                 "invoice_id": invoice_id,